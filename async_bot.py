@@ -0,0 +1,501 @@
+"""
+Variante asíncrona del bot de scalping usando ccxt.async_support
+
+Las peticiones independientes de cada ciclo (ticker, velas y balance) se lanzan
+en paralelo con asyncio.gather, así que un ciclo cuesta aproximadamente un
+round trip en lugar de tres o cuatro. La lógica de decisión y el manejo de
+estado son los mismos de ScalpingBot.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+import ccxt
+import ccxt.async_support as ccxt_async
+
+import batch_orders
+import config
+import entry_manager
+import market_filters
+import metrics
+import rate_limit
+import recording
+import transport
+import utils
+import warm_start
+from main import ScalpingBot
+from market_data import stream_symbol
+
+
+async def _nothing():
+    return None
+
+
+class AsyncScalpingBot(ScalpingBot):
+    """
+    Bot de scalping asíncrono (solo modo automático)
+    """
+
+    def _paper_trading_enabled(self) -> bool:
+        """El simulador (sim_exchange.py) es síncrono: sin trading real se usan las órdenes simuladas de utils.py"""
+        return False
+
+    def _start_market_data(self):
+        """Arranca el feed recordando el bucle de eventos (el snapshot del libro se pide desde otro hilo)"""
+        self._loop = asyncio.get_running_loop()
+        super()._start_market_data()
+
+    def _load_order_book_snapshot(self) -> Dict[str, Any]:
+        """Snapshot REST del libro con el exchange asíncrono, ejecutado en el bucle del bot"""
+        future = asyncio.run_coroutine_threadsafe(
+            self.exchange.fetch_order_book(self.symbol, config.ORDER_BOOK_DEPTH), self._loop)
+        return future.result(timeout=30)
+
+    def _setup_exchange(self) -> ccxt_async.Exchange:
+        """
+        Crea la instancia asíncrona del exchange sin hacer llamadas de red
+
+        La conexión (tiempo, mercados, apalancamiento) se hace en ``setup()``.
+
+        Returns:
+            Instancia de ccxt.async_support.binance
+        """
+        market_type = 'future' if self.use_futures else 'spot'
+
+        exchange = ccxt_async.binance({
+            'apiKey': config.API_KEY,
+            'secret': config.API_SECRET,
+            'enableRateLimit': True,
+            'options': {
+                'defaultType': market_type,
+                'recvWindow': 60000,
+            }
+        })
+
+        if self._use_testnet():
+            exchange.set_sandbox_mode(True)
+            print("⚠️  MODO SANDBOX ACTIVADO - No se usará dinero real")
+
+        return exchange
+
+    async def setup(self):
+        """
+        Conecta con el exchange lanzando en paralelo las llamadas independientes
+        """
+        if config.USE_TUNED_TRANSPORT:
+            transport.configure_ccxt_async(self.exchange)
+        # Mismo planificador de peso que el resto del proceso (sustituye a enableRateLimit)
+        if config.USE_RATE_LIMIT_SCHEDULER:
+            rate_limit.instrument_ccxt(self.exchange)
+        if config.USE_METRICS:
+            metrics.instrument_ccxt(self.exchange)
+        if config.RECORD_TRAFFIC is True:
+            recording.record_ccxt(self.exchange, recording.open_log(recording.SOURCE_CCXT))
+
+        print("🕐 Sincronizando tiempo y cargando mercados...")
+        market_type = 'future' if self.use_futures else 'spot'
+        if self._warm_start_enabled(self.exchange):
+            sandbox = self._use_testnet()
+            _, from_cache = await asyncio.gather(
+                warm_start.load_time_difference_async(self.exchange, market_type, sandbox),
+                warm_start.load_markets_async(self.exchange, self._warm_start_symbols(), market_type, sandbox)
+            )
+            if from_cache:
+                print("⚡ Mercados cargados desde la caché local")
+        else:
+            await asyncio.gather(
+                self.exchange.load_time_difference(),
+                self.exchange.load_markets()
+            )
+        print(f"✅ Conectado a Binance exitosamente")
+        self.filters = market_filters.get_filters(self.exchange, self.symbol)
+
+        if self.use_futures:
+            await self._configure_futures_symbol_async()
+
+    async def _configure_futures_symbol_async(self):
+        """
+        Apalancamiento y modo de margen en paralelo (se omiten si la caché ya los tiene)
+        """
+        symbol_id = self.symbol.replace('/', '')
+        margin_type = 'ISOLATED' if self.margin_mode == 'isolated' else 'CROSSED'
+        use_cache = self._warm_start_enabled(self.exchange)
+        if use_cache and warm_start.futures_config_matches(self._warm_start_account(), symbol_id,
+                                                            self.leverage, margin_type):
+            print(f"✅ Apalancamiento {self.leverage}x y margen {margin_type} ya configurados (caché)")
+            return
+
+        leverage_result, margin_result = await asyncio.gather(
+            self.exchange.fapiPrivate_post_leverage({'symbol': symbol_id, 'leverage': self.leverage}),
+            self.exchange.fapiPrivate_post_margintype({'symbol': symbol_id, 'marginType': margin_type}),
+            return_exceptions=True
+        )
+        if isinstance(leverage_result, Exception):
+            print(f"⚠️  Advertencia al configurar apalancamiento: {leverage_result}")
+        else:
+            print(f"✅ Apalancamiento configurado: {self.leverage}x")
+        if isinstance(margin_result, Exception) and not warm_start.margin_already_set(margin_result):
+            print(f"⚠️  Advertencia al configurar modo de margen: {margin_result}")
+            print(f"   (Es normal si ya estaba configurado)")
+        else:
+            print(f"✅ Modo de margen: {margin_type}")
+            if use_cache and not isinstance(leverage_result, Exception):
+                warm_start.remember_futures_config(self._warm_start_account(), symbol_id, self.leverage, margin_type)
+
+    # ------------------------------------------------------------------
+    # Lecturas (se combinan en un solo round trip)
+    # ------------------------------------------------------------------
+
+    async def _fetch_price_async(self) -> Optional[float]:
+        if self.market_data is not None:
+            price = self.market_data.get_current_price()
+            if price is not None:
+                return price
+        try:
+            ticker = await self.exchange.fetch_ticker(self.symbol)
+            return ticker['last']
+        except Exception as e:
+            print(f"Error obteniendo precio actual: {e}")
+            return None
+
+    async def _fetch_candles_async(self, request: Dict[str, Any]) -> Optional[list]:
+        source = self._candle_source(request['since'])
+        if source is not self.exchange:
+            return utils.get_ohlcv_candles(source, self.symbol, self.timeframe,
+                                           since=request['since'], limit=request['limit'])
+        try:
+            return await self.exchange.fetch_ohlcv(self.symbol, self.timeframe,
+                                                   since=request['since'], limit=request['limit'])
+        except Exception as e:
+            print(f"Error obteniendo datos OHLCV: {e}")
+            return None
+
+    async def _fetch_available_balance_async(self) -> Optional[float]:
+        try:
+            balance = await self.exchange.fetch_balance()
+            return balance['free'].get('USDT', 0.0)
+        except Exception as e:
+            print(f"Error obteniendo balance: {e}")
+            return None
+
+    async def _check_existing_positions_async(self):
+        if not self.use_futures:
+            return
+
+        print("🔍 Verificando posiciones abiertas...")
+        try:
+            positions = await self.exchange.fetch_positions([self.symbol])
+            position = utils.find_open_position(positions)
+        except Exception as e:
+            print(f"Error obteniendo posiciones: {e}")
+            position = None
+        self._load_existing_position(position)
+
+    # ------------------------------------------------------------------
+    # Ciclo de trading
+    # ------------------------------------------------------------------
+
+    async def _trading_cycle_automatic_async(self):
+        """
+        Ciclo de trading: precio, velas y balance en paralelo, luego la decisión
+        """
+        self._apply_exchange_events()
+        if self._reconcile_due():
+            await self._reconcile_state_async()
+        await self._sync_protective_orders_async()
+
+        ema_request = self._ema_candles_request()
+        if ema_request and ema_request['seed'] and self.candle_store is not None:
+            # Arranque desde la caché local: luego solo se piden las velas que faltan
+            if self._seed_ema_from_store(fetch=False):
+                ema_request = self._ema_candles_request()
+        # El balance solo hace falta para abrir posición: se pide en el mismo
+        # round trip en lugar de justo antes de la orden
+        need_balance = not self.in_position and self.use_dynamic_position_size
+
+        current_price, candles, available_balance = await asyncio.gather(
+            self._fetch_price_async(),
+            self._fetch_candles_async(ema_request) if ema_request else _nothing(),
+            self._fetch_available_balance_async() if need_balance else _nothing()
+        )
+
+        if current_price is None:
+            print("⚠️  No se pudo obtener el precio actual")
+            return
+
+        await self._manage_entry_order_async(current_price)
+
+        if ema_request and not self._apply_ema_candles(candles, ema_request['seed']):
+            print("⚠️  No hay suficientes datos para calcular EMA")
+            return
+
+        ema = self.ema_engine.peek(current_price)
+        if ema is None:
+            print("⚠️  No se pudo calcular la EMA")
+            return
+
+        action = self._evaluate_strategy(current_price, ema)
+        if action is None:
+            return
+
+        kind, detail = action
+        if kind == 'ENTRY':
+            await self._execute_buy_async(current_price, detail, available_balance)
+        else:
+            await self._execute_sell_async(current_price, detail)
+        await self._sync_protective_orders_async()
+
+    async def _sync_protective_orders_async(self):
+        """
+        Versión asíncrona de ScalpingBot._sync_protective_orders (un lote por operación)
+        """
+        if self._orders_to_cancel:
+            order_ids, self._orders_to_cancel = self._orders_to_cancel, []
+            try:
+                await self.exchange.fapiPrivateDeleteBatchOrders(
+                    batch_orders.cancel_request(self.symbol, order_ids))
+            except Exception as e:
+                print(f"Error cancelando lote de {len(order_ids)} órdenes: {e}")
+        requests = self._protective_order_requests()
+        if not requests:
+            return
+        try:
+            response = await self.exchange.fapiPrivatePostBatchOrders({'batchOrders': requests})
+            orders = batch_orders.parse_batch_response(self.exchange, requests, response)
+        except Exception as e:
+            print(f"Error colocando lote de {len(requests)} órdenes: {e}")
+            orders = [None] * len(requests)
+        self._on_protective_orders(requests, orders)
+
+    async def _reconcile_state_async(self):
+        """
+        Reconciliación con el exchange: posición y órdenes vivas en un solo round trip
+        """
+        self._last_reconcile = time.monotonic()
+        live = self.position_state.live_orders()
+        try:
+            rows, *orders = await asyncio.gather(
+                self.exchange.fapiPrivateV2GetPositionRisk({'symbol': stream_symbol(self.symbol).upper()})
+                if self.use_futures else _nothing(),
+                *[self.exchange.fetch_order(o.id, self.symbol) for o in live]
+            )
+        except Exception as e:
+            print(f"⚠️  Error reconciliando el estado con el exchange: {e}")
+            return
+        self._apply_reconciliation(rows, orders)
+        if self._futures_config_changed(rows):
+            await self._configure_futures_symbol_async()
+
+    async def _manage_entry_order_async(self, current_price: float):
+        """
+        Versión asíncrona de ScalpingBot._manage_entry_order
+        """
+        decision = self._entry_order_decision(current_price)
+        if decision is None:
+            return
+        order = self.position_state.entry_order
+        print(f"\n⏱️  Entrada {order.id} sin ejecutar en {self.entry_chase.timeout:g}s: {decision.reason}")
+        try:
+            if decision.action == entry_manager.CANCEL:
+                self._on_entry_canceled(order, await self.exchange.cancel_order(order.id, self.symbol))
+            elif config.ENTRY_REPRICE_METHOD == 'edit':
+                self._on_entry_repriced(order, await self.exchange.edit_order(
+                    order.id, self.symbol, 'limit', order.side, order.amount, decision.price
+                ), decision.price)
+            else:
+                canceled = await self.exchange.cancel_order(order.id, self.symbol)
+                if (canceled.get('filled') or 0) > 0:
+                    self._on_entry_canceled(order, canceled)
+                    return
+                try:
+                    replacement = await self.exchange.create_order(self.symbol, 'limit', order.side, order.amount,
+                                                                   decision.price)
+                except Exception:
+                    self._on_entry_canceled(order, canceled)
+                    raise
+                self._on_entry_repriced(order, replacement, decision.price)
+        except Exception as e:
+            print(f"⚠️  No se pudo {'cancelar' if decision.action == entry_manager.CANCEL else 'mover'} "
+                  f"la orden de entrada: {e}")
+            self._last_reconcile = float('-inf')
+        finally:
+            self._sync_position_attributes()
+
+    async def _place_limit_order_async(self, side: str, amount: float,
+                                       limit_price: float) -> Optional[Dict[str, Any]]:
+        try:
+            if side == 'buy':
+                return await self.exchange.create_limit_buy_order(self.symbol, amount, limit_price)
+            return await self.exchange.create_limit_sell_order(self.symbol, amount, limit_price)
+        except Exception as e:
+            print(f"Error creando orden limit: {e}")
+            return None
+
+    async def _execute_buy_async(self, current_price: float, position_side: str,
+                                 available_balance: Optional[float]):
+        """
+        Abre posición con orden LIMIT usando el balance ya obtenido en el ciclo
+        """
+        position_size_usdt = self._position_size_from_balance(available_balance)
+        self._announce_entry(current_price, position_side, available_balance, position_size_usdt)
+
+        limit_price = self._entry_limit_price(current_price, position_side, position_size_usdt)
+        self._record_decision_latency()
+
+        if not self.enable_real_trading:
+            create = utils.create_limit_buy_order if position_side == 'LONG' else utils.create_limit_short_order
+            order = create(self.exchange, self.symbol, position_size_usdt, limit_price, False)
+        else:
+            side = 'buy' if position_side == 'LONG' else 'sell'
+            limit_price = self.filters.limit_price(side, limit_price)
+            amount = utils.calculate_limit_order_amount(position_size_usdt, limit_price, self.filters)
+            order = await self._place_limit_order_async(side, amount, limit_price)
+
+        self._on_entry_order(order, position_side, limit_price, position_size_usdt)
+
+    async def _cancel_limit_exit_async(self) -> bool:
+        """
+        Versión asíncrona de ScalpingBot._cancel_limit_exit
+        """
+        order = self.position_state.exit_order
+        try:
+            response = await self.exchange.cancel_order(order.id, self.symbol)
+        except Exception as e:
+            print(f"⚠️  No se pudo cancelar la orden de cierre {order.id}: {e}")
+            self._last_reconcile = float('-inf')  # Pudo ejecutarse entretanto: reconciliar ya
+            return False
+        return self._on_exit_canceled(order, response)
+
+    async def _execute_sell_async(self, current_price: float, reason: str):
+        """
+        Cierra la posición con orden LIMIT al precio de take profit (a mercado si es el stop loss)
+        """
+        self._announce_exit(current_price, reason)
+
+        if utils.is_stop_loss(reason):
+            if self.position_state.has_limit_exit and not await self._cancel_limit_exit_async():
+                return
+            self._record_decision_latency()
+            if not self.enable_real_trading:
+                if self.position_side == 'LONG':
+                    order = utils.create_market_sell_order(self.exchange, self.symbol, self.position_amount,
+                                                           False, self.use_futures, self.position_side)
+                else:
+                    order = utils.close_short_order(self.exchange, self.symbol, self.position_amount, False)
+            else:
+                side = 'sell' if self.position_side == 'LONG' else 'buy'
+                try:
+                    order = await self.exchange.create_order(self.symbol, 'market', side,
+                                                             self.filters.round_amount(self.position_amount),
+                                                             None, {'reduceOnly': True})
+                except Exception as e:
+                    print(f"Error creando orden de mercado: {e}")
+                    order = None
+            self._on_exit_order(order, current_price, 'MARKET')
+            return
+
+        limit_price = self.take_profit_price
+        self._record_decision_latency()
+
+        if not self.enable_real_trading:
+            if self.position_side == 'LONG':
+                order = utils.create_limit_sell_order(self.exchange, self.symbol, self.position_amount,
+                                                      limit_price, False, self.position_side)
+            else:
+                order = utils.close_limit_short_order(self.exchange, self.symbol, self.position_amount,
+                                                      limit_price, False)
+        else:
+            side = 'sell' if self.position_side == 'LONG' else 'buy'
+            order = await self._place_limit_order_async(side, self.filters.round_amount(self.position_amount),
+                                                        self.filters.limit_price(side, limit_price))
+
+        self._on_exit_order(order, limit_price)
+
+    # ------------------------------------------------------------------
+    # Loop principal
+    # ------------------------------------------------------------------
+
+    async def _wait_next_cycle_async(self):
+        feed = self.market_data
+        if self.event_driven and feed is not None and feed.connected.is_set():
+            # La espera bloqueante del feed se hace en un hilo para no parar el loop
+            await asyncio.to_thread(self._wait_next_cycle)
+        else:
+            await asyncio.sleep(self.loop_interval)
+            self._tick_received_at = None
+
+    async def _run_automatic_mode_async(self):
+        retry_count = 0
+        max_retries = 3
+
+        while True:
+            try:
+                await self._trading_cycle_automatic_async()
+                retry_count = 0
+                await self._wait_next_cycle_async()
+
+            except ccxt.NetworkError as e:
+                retry_count += 1
+                print(f"\n⚠️  Error de red ({retry_count}/{max_retries}): {e}")
+
+                if retry_count >= max_retries:
+                    print("❌ Máximo de reintentos alcanzado. Deteniendo bot...")
+                    break
+
+                print(f"🔄 Reintentando en {self.loop_interval * 2} segundos...")
+                await asyncio.sleep(self.loop_interval * 2)
+
+            except ccxt.ExchangeError as e:
+                print(f"\n❌ Error del exchange: {e}")
+                print(f"⏸️  Pausando por {self.loop_interval * 2} segundos...")
+                await asyncio.sleep(self.loop_interval * 2)
+
+            except Exception as e:
+                print(f"\n❌ Error inesperado: {e}")
+                print(f"⏸️  Pausando por {self.loop_interval * 2} segundos...")
+                await asyncio.sleep(self.loop_interval * 2)
+
+    async def run_async(self):
+        """
+        Loop principal asíncrono del bot
+        """
+        print(f"🚀 Iniciando bot de scalping asíncrono en modo {self.operation_mode.upper()}...")
+        print(f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+        try:
+            await self.setup()
+            await self._check_existing_positions_async()
+
+            if config.USE_CANDLE_CACHE:
+                self._open_candle_store()
+            if config.USE_WEBSOCKET_FEED:
+                self._start_market_data()
+            if config.USE_METRICS:
+                self._start_metrics()
+
+            await self._run_automatic_mode_async()
+        finally:
+            if self.market_data is not None:
+                self.market_data.stop()
+            self._stop_metrics()
+            await self.exchange.close()
+
+    def run(self):
+        """
+        Ejecuta el bot asíncrono hasta que el usuario lo detenga
+        """
+        if self.operation_mode == 'manual':
+            print("❌ El bot asíncrono solo soporta modo automático")
+            return
+
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            print("\n\n⏹️  Bot detenido por el usuario")
+            if self.in_position:
+                print(f"⚠️  ADVERTENCIA: Hay una posición abierta en {self.symbol}")
+                print(f"   Precio de entrada: ${self.entry_price:.4f}")
+            if self.decision_latency.count:
+                print("\n" + self.decision_latency.format())
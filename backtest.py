@@ -0,0 +1,393 @@
+"""
+Backtester offline para la estrategia EMA del bot de scalping
+
+Recorre velas históricas desde un archivo local (CSV o Parquet) y las pasa por
+las mismas funciones de decisión de utils.py (should_buy, should_sell_short,
+should_sell y calculate_take_profit_price_for_fixed_usd) sin tocar el exchange.
+
+Modelo de ejecución:
+- La señal se evalúa al cierre de cada vela, con la EMA incluyendo esa vela
+  (igual que el bot en vivo con el precio actual).
+- La entrada es una orden LIMIT al precio de cierre. Se llena en una vela
+  posterior si el precio la toca (low <= límite en LONG, high >= límite en
+  SHORT) y se cancela si no se llena en ``entry_timeout_candles`` velas.
+- El take profit es una orden LIMIT al precio calculado para ganar
+  TARGET_PROFIT_USDT. Se llena cuando el precio lo toca (comisión maker).
+- El stop loss se detecta con should_sell sobre el extremo adverso de la vela
+  y se ejecuta a mercado en el precio de stop (comisión taker). Si en la misma
+  vela se tocan stop y take profit, se asume el stop (caso conservador).
+
+Uso:
+    python backtest.py velas.csv [--ema 12] [--stop-loss 0.4] [--target-profit 2.0]
+    python backtest.py --symbol DOGE/USDT --timeframe 1m   # Desde la caché local (candle_store.py)
+
+El CSV debe tener columnas timestamp(ms),open,high,low,close,volume (con o sin
+cabecera), el mismo formato que devuelve fetch_ohlcv.
+"""
+
+import argparse
+import csv
+import os
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+import config
+import utils
+from indicators import IncrementalEMA
+
+
+Candle = Tuple[int, float, float, float, float, float]
+
+
+def load_candles(path: str) -> List[Candle]:
+    """
+    Carga velas OHLCV desde un archivo CSV o Parquet
+
+    Args:
+        path: Ruta del archivo (.csv o .parquet)
+
+    Returns:
+        Lista de velas (timestamp, open, high, low, close, volume) ordenadas por tiempo
+    """
+    if path.endswith('.parquet'):
+        import pandas as pd  # Solo se necesita para Parquet
+        df = pd.read_parquet(path)
+        columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+        timestamps = df['timestamp']
+        if hasattr(timestamps, 'dt'):
+            timestamps = timestamps.astype('int64') // 1_000_000
+        rows = zip(timestamps.tolist(), *(df[c].tolist() for c in columns[1:]))
+        candles = [(int(t), float(o), float(h), float(l), float(c), float(v)) for t, o, h, l, c, v in rows]
+    else:
+        candles = []
+        with open(path, newline='') as f:
+            for row in csv.reader(f):
+                if not row or not row[0].strip().lstrip('-').isdigit():
+                    continue  # Cabecera o línea vacía
+                candles.append((int(row[0]), float(row[1]), float(row[2]),
+                                float(row[3]), float(row[4]), float(row[5])))
+    candles.sort(key=lambda c: c[0])
+    return candles
+
+
+def load_cached_candles(symbol: str, timeframe: str, since: Optional[int] = None,
+                        until: Optional[int] = None) -> List[Candle]:
+    """
+    Carga velas de la caché local (ver candle_store.py) sin descargar nada
+
+    Args:
+        symbol: Par de trading
+        timeframe: Timeframe de las velas
+        since: Timestamp inicial en ms (incluido)
+        until: Timestamp final en ms (excluido)
+
+    Returns:
+        Lista de velas (timestamp, open, high, low, close, volume) ordenadas por tiempo
+    """
+    from candle_store import CandleStore
+
+    return [tuple(c) for c in CandleStore().read_list(symbol, timeframe, since, until)]
+
+
+def save_candles_csv(path: str, candles: List[list]):
+    """
+    Guarda velas en formato CSV compatible con load_candles
+
+    Args:
+        path: Ruta del archivo CSV
+        candles: Velas en formato CCXT
+    """
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        writer.writerows(candles)
+
+
+class BacktestResult:
+    """
+    Resultado de un backtest: lista de trades y estadísticas agregadas
+    """
+
+    def __init__(self, trades: List[Dict[str, Any]], candles_processed: int,
+                 elapsed_seconds: float, max_drawdown_usd: float, orders_canceled: int):
+        self.trades = trades
+        self.candles_processed = candles_processed
+        self.elapsed_seconds = elapsed_seconds
+        self.max_drawdown_usd = max_drawdown_usd
+        self.orders_canceled = orders_canceled
+
+        self.total_trades = len(trades)
+        self.winning_trades = sum(1 for t in trades if t['profit_loss_percent'] >= 0)
+        self.losing_trades = self.total_trades - self.winning_trades
+        self.total_profit_usd = sum(t['profit_loss_usd'] for t in trades)
+        self.total_fees_usd = sum(t['fees_usd'] for t in trades)
+
+    @property
+    def win_rate(self) -> float:
+        return (self.winning_trades / self.total_trades * 100) if self.total_trades > 0 else 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas en forma de dict (las mismas que muestra _finalize_trade)
+        """
+        return {
+            'total_trades': self.total_trades,
+            'winning_trades': self.winning_trades,
+            'losing_trades': self.losing_trades,
+            'win_rate': self.win_rate,
+            'total_profit_usd': self.total_profit_usd,
+            'total_fees_usd': self.total_fees_usd,
+            'max_drawdown_usd': self.max_drawdown_usd,
+            'orders_canceled': self.orders_canceled,
+        }
+
+    def print_summary(self):
+        """
+        Muestra el resumen en el mismo formato que las estadísticas del bot
+        """
+        speed = self.candles_processed / self.elapsed_seconds if self.elapsed_seconds > 0 else 0
+        print(f"\n📈 ESTADÍSTICAS DEL BACKTEST:")
+        print(f"   Velas procesadas: {self.candles_processed} ({self.elapsed_seconds:.2f}s, {speed:,.0f} velas/s)")
+        print(f"   Total trades: {self.total_trades}")
+        print(f"   Ganadores: {self.winning_trades} | Perdedores: {self.losing_trades}")
+        print(f"   Win rate: {self.win_rate:.1f}%")
+        print(f"   Comisiones: ${self.total_fees_usd:.2f} USD")
+        print(f"   Máximo drawdown: ${self.max_drawdown_usd:.2f} USD")
+        print(f"   Órdenes de entrada canceladas: {self.orders_canceled}")
+        print(f"   P/L Total: ${self.total_profit_usd:.2f} USD\n")
+
+
+class Backtester:
+    """
+    Simulador de la estrategia EMA sobre velas históricas
+    """
+
+    def __init__(self,
+                 ema_period: int = config.EMA_PERIOD,
+                 take_profit_percent: float = config.TAKE_PROFIT_PERCENT,
+                 stop_loss_percent: float = config.STOP_LOSS_PERCENT,
+                 target_profit_usdt: float = config.TARGET_PROFIT_USDT,
+                 position_size_usdt: float = config.POSITION_SIZE_USDT,
+                 leverage: int = config.LEVERAGE,
+                 use_futures: bool = config.USE_FUTURES,
+                 enable_short_positions: bool = config.ENABLE_SHORT_POSITIONS,
+                 cooldown_seconds: int = config.COOLDOWN_SECONDS,
+                 maker_fee: float = 0.0002,
+                 taker_fee: float = 0.0005,
+                 entry_timeout_candles: int = 5):
+        """
+        Args:
+            ema_period: Periodo de la EMA
+            take_profit_percent: Porcentaje de take profit para should_sell
+            stop_loss_percent: Porcentaje de stop loss
+            target_profit_usdt: Ganancia objetivo por operación (precio del take profit)
+            position_size_usdt: Margen por operación en USDT
+            leverage: Apalancamiento (solo Futures)
+            use_futures: Si se simula Futures (apalancamiento y SHORT)
+            enable_short_positions: Permitir posiciones SHORT
+            cooldown_seconds: Espera tras cerrar una posición
+            maker_fee: Comisión de órdenes LIMIT (fracción del notional)
+            taker_fee: Comisión de órdenes a mercado (fracción del notional)
+            entry_timeout_candles: Velas que una entrada LIMIT puede quedar sin llenarse
+        """
+        self.ema_period = ema_period
+        self.take_profit_percent = take_profit_percent
+        self.stop_loss_percent = stop_loss_percent
+        self.target_profit_usdt = target_profit_usdt
+        self.position_size_usdt = position_size_usdt
+        self.use_futures = use_futures
+        self.leverage = leverage if use_futures else 1
+        self.enable_short_positions = enable_short_positions and use_futures
+        self.cooldown_ms = cooldown_seconds * 1000
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.entry_timeout_candles = entry_timeout_candles
+
+    def _close_trade(self, trade: Dict[str, Any], exit_time: int, exit_price: float,
+                     reason: str, fee_rate: float) -> Dict[str, Any]:
+        """
+        Calcula P/L igual que ScalpingBot._finalize_trade y descuenta comisiones
+        """
+        entry_price = trade['entry_price']
+        amount = trade['amount']
+        if trade['side'] == 'LONG':
+            profit_loss_percent = utils.calculate_profit_loss_percent(entry_price, exit_price)
+            profit_loss_usd = (exit_price - entry_price) * amount
+        else:
+            profit_loss_percent = -utils.calculate_profit_loss_percent(entry_price, exit_price)
+            profit_loss_usd = (entry_price - exit_price) * amount
+        profit_loss_usd *= self.leverage
+
+        exit_fee = amount * self.leverage * exit_price * fee_rate
+        fees = trade['entry_fee'] + exit_fee
+
+        trade.update({
+            'exit_time': exit_time,
+            'exit_price': exit_price,
+            'reason': reason,
+            'fees_usd': fees,
+            'profit_loss_percent': profit_loss_percent,
+            'profit_loss_usd': profit_loss_usd - fees,
+        })
+        return trade
+
+    def run(self, candles: List[Candle]) -> BacktestResult:
+        """
+        Ejecuta el backtest
+
+        Args:
+            candles: Velas (timestamp, open, high, low, close, volume) ordenadas por tiempo
+
+        Returns:
+            BacktestResult con los trades y las estadísticas
+        """
+        started = time.perf_counter()
+        ema = IncrementalEMA(self.ema_period)
+
+        should_buy = utils.should_buy
+        should_sell_short = utils.should_sell_short
+        should_sell = utils.should_sell
+
+        trades: List[Dict[str, Any]] = []
+        pending: Optional[Dict[str, Any]] = None  # Orden de entrada LIMIT pendiente
+        position: Optional[Dict[str, Any]] = None
+        last_close_time: Optional[int] = None
+        orders_canceled = 0
+
+        equity = 0.0
+        peak = 0.0
+        max_drawdown = 0.0
+
+        for ts, open_, high, low, close, _volume in candles:
+            # 1. Posición abierta: stop loss (conservador) y luego take profit
+            if position is not None:
+                side = position['side']
+                adverse = low if side == 'LONG' else high
+                exit_now, reason = should_sell(position['entry_price'], adverse, self.take_profit_percent,
+                                               self.stop_loss_percent, side)
+                closed = None
+                if exit_now and reason.startswith('STOP'):
+                    stop_price = position['stop_price']
+                    # Si la vela abrió más allá del stop, se ejecuta a la apertura
+                    if side == 'LONG':
+                        fill = min(stop_price, open_)
+                    else:
+                        fill = max(stop_price, open_)
+                    closed = self._close_trade(position, ts, fill, reason, self.taker_fee)
+                elif (side == 'LONG' and high >= position['take_profit_price']) or \
+                        (side == 'SHORT' and low <= position['take_profit_price']):
+                    closed = self._close_trade(position, ts, position['take_profit_price'],
+                                               'TAKE PROFIT (limit)', self.maker_fee)
+                if closed is not None:
+                    trades.append(closed)
+                    position = None
+                    last_close_time = ts
+                    equity += closed['profit_loss_usd']
+                    peak = max(peak, equity)
+                    max_drawdown = max(max_drawdown, peak - equity)
+
+            # 2. Orden de entrada pendiente: llenado o cancelación por timeout
+            elif pending is not None:
+                limit_price = pending['limit_price']
+                filled = low <= limit_price if pending['side'] == 'LONG' else high >= limit_price
+                if filled:
+                    position = self._open_position(pending, ts)
+                    pending = None
+                else:
+                    pending['age'] += 1
+                    if pending['age'] >= self.entry_timeout_candles:
+                        pending = None
+                        orders_canceled += 1
+
+            # 3. Actualizar EMA con la vela cerrada y buscar señal
+            value = ema.update(close, ts)
+            if position is not None or pending is not None or not ema.ready:
+                continue
+            if last_close_time is not None and ts - last_close_time < self.cooldown_ms:
+                continue
+
+            if should_buy(close, value):
+                pending = {'side': 'LONG', 'limit_price': close, 'signal_time': ts, 'age': 0}
+            elif self.enable_short_positions and should_sell_short(close, value):
+                pending = {'side': 'SHORT', 'limit_price': close, 'signal_time': ts, 'age': 0}
+
+        return BacktestResult(trades, len(candles), time.perf_counter() - started,
+                              max_drawdown, orders_canceled)
+
+    def _open_position(self, pending: Dict[str, Any], ts: int) -> Dict[str, Any]:
+        side = pending['side']
+        entry_price = pending['limit_price']
+        amount = self.position_size_usdt / entry_price
+        take_profit_price = utils.calculate_take_profit_price_for_fixed_usd(
+            entry_price=entry_price,
+            position_size_usdt=self.position_size_usdt,
+            target_profit_usd=self.target_profit_usdt,
+            leverage=self.leverage,
+            position_side=side
+        )
+        if side == 'LONG':
+            stop_price = entry_price * (1 - self.stop_loss_percent / 100)
+        else:
+            stop_price = entry_price * (1 + self.stop_loss_percent / 100)
+        return {
+            'side': side,
+            'signal_time': pending['signal_time'],
+            'entry_time': ts,
+            'entry_price': entry_price,
+            'amount': amount,
+            'take_profit_price': take_profit_price,
+            'stop_price': stop_price,
+            'entry_fee': amount * self.leverage * entry_price * self.maker_fee,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Backtest offline de la estrategia EMA')
+    parser.add_argument('path', nargs='?', help='Archivo de velas (.csv o .parquet)')
+    parser.add_argument('--symbol', help='Leer las velas de la caché local en vez de un archivo')
+    parser.add_argument('--timeframe', default=config.TIMEFRAME, help='Timeframe de la caché local')
+    parser.add_argument('--ema', type=int, default=config.EMA_PERIOD, help='Periodo de la EMA')
+    parser.add_argument('--stop-loss', type=float, default=config.STOP_LOSS_PERCENT, help='Stop loss en %%')
+    parser.add_argument('--take-profit', type=float, default=config.TAKE_PROFIT_PERCENT, help='Take profit en %%')
+    parser.add_argument('--target-profit', type=float, default=config.TARGET_PROFIT_USDT,
+                        help='Ganancia objetivo por operación en USDT')
+    parser.add_argument('--size', type=float, default=config.POSITION_SIZE_USDT, help='Margen por operación en USDT')
+    parser.add_argument('--leverage', type=int, default=config.LEVERAGE, help='Apalancamiento')
+    parser.add_argument('--maker-fee', type=float, default=0.0002, help='Comisión maker (fracción)')
+    parser.add_argument('--taker-fee', type=float, default=0.0005, help='Comisión taker (fracción)')
+    parser.add_argument('--trades', action='store_true', help='Mostrar cada trade')
+    args = parser.parse_args(argv)
+
+    if args.path is None and args.symbol is None:
+        parser.error("Indica un archivo de velas o --symbol")
+    if args.path is not None and not os.path.exists(args.path):
+        parser.error(f"No existe el archivo {args.path}")
+
+    load_started = time.perf_counter()
+    if args.path is not None:
+        candles = load_candles(args.path)
+    else:
+        candles = load_cached_candles(args.symbol, args.timeframe)
+    print(f"📂 {len(candles)} velas cargadas en {time.perf_counter() - load_started:.2f}s")
+
+    backtester = Backtester(
+        ema_period=args.ema,
+        take_profit_percent=args.take_profit,
+        stop_loss_percent=args.stop_loss,
+        target_profit_usdt=args.target_profit,
+        position_size_usdt=args.size,
+        leverage=args.leverage,
+        maker_fee=args.maker_fee,
+        taker_fee=args.taker_fee,
+    )
+    result = backtester.run(candles)
+
+    if args.trades:
+        for t in result.trades:
+            print(f"   {t['side']:5} {t['entry_price']:.5f} → {t['exit_price']:.5f} "
+                  f"{t['profit_loss_usd']:+.2f} USD ({t['reason']})")
+    result.print_summary()
+
+
+if __name__ == '__main__':
+    main()
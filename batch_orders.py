@@ -0,0 +1,224 @@
+"""
+Colocación y cancelación de órdenes en lote con los endpoints batch de Binance Futures
+
+- POST /fapi/v1/batchOrders: hasta 5 órdenes por petición
+- DELETE /fapi/v1/batchOrders: hasta 10 IDs de orden por petición
+
+Binance procesa cada orden del lote por separado: una petición puede devolver
+órdenes creadas y errores mezclados. Aquí cada resultado se devuelve en la
+misma posición que su orden (la orden en formato CCXT, o None si falló), así
+que el take profit y el stop loss de una posición salen en un solo round trip
+y el que llama decide qué hacer con las que fallaron.
+"""
+
+import itertools
+import time
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
+
+import market_filters
+
+if TYPE_CHECKING:
+    import ccxt
+
+
+BATCH_PLACE_LIMIT = 5
+BATCH_CANCEL_LIMIT = 10
+
+
+def _format_number(value: float) -> str:
+    """Número en texto decimal sin notación científica (formato que espera la API)"""
+    text = f"{value:.10f}".rstrip('0').rstrip('.')
+    return text or '0'
+
+
+def market_id(symbol: str) -> str:
+    """
+    ID de Binance de un símbolo CCXT (ej: 'DOGE/USDT' o 'DOGE/USDT:USDT' → 'DOGEUSDT')
+    """
+    return symbol.split(':')[0].replace('/', '').upper()
+
+
+_simulated_ids = itertools.count(1)
+
+
+def simulated_order_id() -> str:
+    """
+    ID de una orden simulada sin trading real (único aunque se creen varias en el mismo segundo)
+    """
+    return f"sim_{int(time.time())}_{next(_simulated_ids)}"
+
+
+def order_request(symbol: str, side: str, order_type: str, amount: Optional[float] = None,
+                  price: Optional[float] = None, stop_price: Optional[float] = None,
+                  reduce_only: bool = False, close_position: bool = False,
+                  time_in_force: str = 'GTC', client_order_id: Optional[str] = None,
+                  filters: Optional[market_filters.SymbolFilters] = None) -> Dict[str, str]:
+    """
+    Construye una orden en el formato de la API de Futures para un lote
+
+    Args:
+        symbol: Par de trading
+        side: 'buy' o 'sell'
+        order_type: 'LIMIT', 'MARKET', 'STOP', 'STOP_MARKET', 'TAKE_PROFIT', 'TAKE_PROFIT_MARKET'
+        amount: Cantidad (no se usa con close_position)
+        price: Precio límite (órdenes LIMIT, STOP y TAKE_PROFIT)
+        stop_price: Precio de activación (órdenes STOP y TAKE_PROFIT)
+        reduce_only: Si True, solo reduce la posición
+        close_position: Si True, la orden cierra toda la posición al activarse
+        time_in_force: Vigencia de las órdenes con precio límite
+        client_order_id: ID propio de la orden
+        filters: Filtros del símbolo para cuantizar precios y cantidad (None para enviarlos tal cual)
+
+    Returns:
+        Parámetros de la orden
+    """
+    order_type = order_type.upper()
+    if filters is not None:
+        if amount is not None:
+            amount = filters.floor_amount(amount) if reduce_only else filters.ceil_amount(amount)
+        if price is not None:
+            price = filters.limit_price(side.lower(), price)
+        if stop_price is not None:
+            stop_price = filters.round_price(stop_price)
+    request = {
+        'symbol': market_id(symbol),
+        'side': side.upper(),
+        'type': order_type,
+    }
+    if close_position:
+        request['closePosition'] = 'true'
+    elif amount is not None:
+        request['quantity'] = _format_number(amount)
+    if price is not None:
+        request['price'] = _format_number(price)
+        request['timeInForce'] = time_in_force
+    if stop_price is not None:
+        request['stopPrice'] = _format_number(stop_price)
+    if reduce_only and not close_position:
+        request['reduceOnly'] = 'true'
+    if client_order_id:
+        request['newClientOrderId'] = client_order_id
+    return request
+
+
+def _parse_order(exchange: 'ccxt.Exchange', raw: Dict[str, Any]) -> Dict[str, Any]:
+    market = None
+    if exchange.markets:
+        market = exchange.markets_by_id.get(raw.get('symbol'), [None])[0]
+    return exchange.parse_order(raw, market)
+
+
+def _is_error(item: Dict[str, Any]) -> bool:
+    return 'code' in item and 'orderId' not in item
+
+
+def create_batch_orders(exchange: 'ccxt.Exchange', requests: List[Dict[str, str]],
+                        enable_real_trading: bool = True) -> List[Optional[Dict[str, Any]]]:
+    """
+    Coloca órdenes en lotes de BATCH_PLACE_LIMIT
+
+    Args:
+        exchange: Instancia del exchange de CCXT (Futures)
+        requests: Órdenes construidas con order_request
+        enable_real_trading: Si está habilitado el trading real
+
+    Returns:
+        Una entrada por orden, en el mismo orden: la orden creada (formato CCXT)
+        o None si Binance la rechazó o la petición del lote falló
+    """
+    if not enable_real_trading:
+        simulated = []
+        for request in requests:
+            print(f"[MODO SIMULACIÓN] Orden {request['type']} {request['side']} de {request['symbol']} en lote")
+            simulated.append({
+                'id': simulated_order_id(),
+                'symbol': request['symbol'],
+                'type': request['type'].lower(),
+                'side': request['side'].lower(),
+                'price': float(request['price']) if 'price' in request else None,
+                'stopPrice': float(request['stopPrice']) if 'stopPrice' in request else None,
+                'amount': float(request['quantity']) if 'quantity' in request else None,
+                'status': 'open',
+                'simulated': True
+            })
+        return simulated
+
+    results: List[Optional[Dict[str, Any]]] = []
+    for start in range(0, len(requests), BATCH_PLACE_LIMIT):
+        chunk = requests[start:start + BATCH_PLACE_LIMIT]
+        try:
+            response = exchange.fapiPrivatePostBatchOrders({'batchOrders': chunk})  # CCXT lo serializa a JSON
+        except Exception as e:
+            print(f"Error colocando lote de {len(chunk)} órdenes: {e}")
+            results.extend([None] * len(chunk))
+            continue
+
+        results.extend(parse_batch_response(exchange, chunk, response))
+    return results
+
+
+def parse_batch_response(exchange: 'ccxt.Exchange', requests: List[Dict[str, str]],
+                         response: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Convierte la respuesta de batchOrders en órdenes CCXT (también para ccxt.async_support)
+
+    Args:
+        exchange: Instancia del exchange (para parse_order)
+        requests: Órdenes enviadas en el lote
+        response: Respuesta de Binance, una entrada por orden
+
+    Returns:
+        La orden creada o None si Binance la rechazó, en el mismo orden que requests
+    """
+    results: List[Optional[Dict[str, Any]]] = []
+    for request, item in zip(requests, response):
+        if _is_error(item):
+            print(f"   ⚠️ Orden {request['type']} {request['side']} rechazada ({item.get('code')}): {item.get('msg')}")
+            results.append(None)
+        else:
+            results.append(_parse_order(exchange, item))
+    return results
+
+
+def cancel_request(symbol: str, order_ids: List[str]) -> Dict[str, Any]:
+    """
+    Parámetros de DELETE /fapi/v1/batchOrders (también para ccxt.async_support)
+
+    CCXT solo codifica la lista como ``orderidlist=%5B1%2C2%5D`` (y la firma así)
+    si la clave va en minúsculas y los IDs son texto; con ``orderIdList`` la
+    firma no coincide con la URL enviada y Binance rechaza la petición (-1022).
+    """
+    return {'symbol': market_id(symbol), 'orderidlist': [str(order_id) for order_id in order_ids]}
+
+
+def cancel_batch_orders(exchange: 'ccxt.Exchange', symbol: str, order_ids: List[str]) -> Dict[str, bool]:
+    """
+    Cancela órdenes de un símbolo en lotes de BATCH_CANCEL_LIMIT
+
+    Args:
+        exchange: Instancia del exchange de CCXT (Futures)
+        symbol: Par de trading
+        order_ids: IDs de las órdenes a cancelar
+
+    Returns:
+        Diccionario ID → True si se canceló
+    """
+    results: Dict[str, bool] = {}
+    ids = [str(order_id) for order_id in order_ids]
+    for start in range(0, len(ids), BATCH_CANCEL_LIMIT):
+        chunk = ids[start:start + BATCH_CANCEL_LIMIT]
+        try:
+            response = exchange.fapiPrivateDeleteBatchOrders(cancel_request(symbol, chunk))
+        except Exception as e:
+            print(f"Error cancelando lote de {len(chunk)} órdenes: {e}")
+            results.update({order_id: False for order_id in chunk})
+            continue
+
+        for order_id, item in zip(chunk, response):
+            if _is_error(item):
+                print(f"   ⚠️ Error cancelando orden {order_id} ({item.get('code')}): {item.get('msg')}")
+                results[order_id] = False
+            else:
+                results[order_id] = True
+    return results
+
@@ -0,0 +1,60 @@
+"""
+Benchmark: velocidad del backtester sobre meses de velas de 1 minuto
+
+Genera un paseo aleatorio reproducible (semilla fija), lo escribe en CSV y mide
+la carga y la simulación.
+
+Uso:
+    python benchmarks/bench_backtest.py [--months 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import Backtester, load_candles, save_candles_csv  # noqa: E402
+
+
+def synthetic_candles(n, seed=42, start_price=0.08):
+    """Velas de 1m con un paseo aleatorio log-normal reproducible"""
+    rng = random.Random(seed)
+    price = start_price
+    candles = []
+    for i in range(n):
+        open_ = price
+        price *= 1 + rng.gauss(0, 0.0015)
+        high = max(open_, price) * (1 + abs(rng.gauss(0, 0.0005)))
+        low = min(open_, price) * (1 - abs(rng.gauss(0, 0.0005)))
+        candles.append([1_600_000_000_000 + i * 60000, open_, high, low, price, rng.uniform(1e4, 1e6)])
+    return candles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--months', type=float, default=3)
+    args = parser.parse_args()
+
+    n = int(args.months * 30 * 24 * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'velas.csv')
+        save_candles_csv(path, synthetic_candles(n))
+
+        start = time.perf_counter()
+        candles = load_candles(path)
+        load_time = time.perf_counter() - start
+
+    result = Backtester().run(candles)
+
+    print(f"Velas: {n:,} ({args.months:g} meses de 1m)")
+    print(f"  Carga CSV:  {load_time:.2f}s")
+    print(f"  Simulación: {result.elapsed_seconds:.2f}s ({n / result.elapsed_seconds:,.0f} velas/s)")
+    print(f"  Trades: {result.total_trades} | P/L: ${result.total_profit_usd:.2f}")
+
+
+if __name__ == '__main__':
+    main()
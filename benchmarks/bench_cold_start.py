@@ -0,0 +1,125 @@
+"""
+Benchmark: tiempo de arranque en frío de la CLI y de los módulos del bot
+
+Cada caso se ejecuta en un intérprete nuevo (subproceso) y se toma la mediana
+del tiempo de pared. Al resultado se le resta el arranque de un intérprete
+vacío (``python -c pass``), así que los umbrales miden solo lo que cuesta
+nuestro código y sus imports, no la máquina.
+
+Casos:
+- cli_help: python cli.py --help (no debe cargar ccxt, numpy, pandas ni keyboard)
+- import_backtest: import backtest (utils sin ccxt ni pandas)
+- import_main: import main (ccxt, sin pandas ni keyboard)
+
+También se comprueba qué módulos pesados carga cada caso (``heavy_modules``).
+Con --check se compara con benchmarks/thresholds.json (max_cold_start_ms) y
+se termina con código 1 si algún caso supera su presupuesto.
+
+Uso:
+    python benchmarks/bench_cold_start.py [--repeat 5] [--check]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thresholds.json')
+
+HEAVY_MODULES = ('ccxt', 'numpy', 'pandas', 'keyboard', 'binance')
+
+CASES = {
+    'cli_help': "import sys, cli\ntry:\n    cli.main(['--help'])\nexcept SystemExit:\n    pass",
+    'import_backtest': "import backtest",
+    'import_main': "import main",
+}
+
+_REPORT = ("\nimport sys\nprint(' '.join(m for m in {modules!r} if m in sys.modules), file=sys.stderr)")
+
+
+def _run(code):
+    """Tiempo de pared (ms) de ``code`` en un intérprete nuevo y su salida de error"""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Falló el caso de arranque:\n{result.stderr}")
+    return elapsed_ms, result.stderr
+
+
+def heavy_modules(case):
+    """
+    Módulos pesados que quedan cargados tras ejecutar un caso
+
+    Returns:
+        Lista de nombres de HEAVY_MODULES presentes en sys.modules
+    """
+    _, stderr = _run(CASES[case] + _REPORT.format(modules=HEAVY_MODULES))
+    lines = stderr.strip().splitlines()
+    return lines[-1].split() if lines else []
+
+
+def run_suite(repeat=5, cases=None):
+    """
+    Ejecuta los casos del benchmark
+
+    Args:
+        repeat: Arranques por caso (se usa la mediana)
+        cases: Nombres de los casos (por defecto todos)
+
+    Returns:
+        Dict caso -> ms de arranque por encima de un intérprete vacío
+    """
+    baseline = statistics.median(_run('pass')[0] for _ in range(repeat))
+    return {name: max(0.0, statistics.median(_run(CASES[name])[0] for _ in range(repeat)) - baseline)
+            for name in (cases or CASES)}
+
+
+def load_thresholds(path=THRESHOLDS_FILE):
+    """Presupuesto de arranque en ms de cada caso"""
+    with open(path) as f:
+        return json.load(f)['max_cold_start_ms']
+
+
+def regressions(results, thresholds):
+    """
+    Casos que superan su presupuesto
+
+    Returns:
+        Lista de (caso, ms medidos, presupuesto)
+    """
+    return [(name, value, thresholds[name]) for name, value in results.items()
+            if name in thresholds and value > thresholds[name]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--case', action='append', choices=sorted(CASES), help='Caso a ejecutar (repetible)')
+    parser.add_argument('--check', action='store_true', help='Fallar si algún caso supera su presupuesto')
+    args = parser.parse_args()
+
+    results = run_suite(args.repeat, args.case)
+    thresholds = load_thresholds()
+
+    print(f"{'Caso':<18} {'ms':>8} {'Límite':>8}  Módulos pesados")
+    for name, value in results.items():
+        limit = thresholds.get(name)
+        modules = ', '.join(heavy_modules(name)) or '-'
+        print(f"{name:<18} {value:>8.1f} {limit if limit is not None else '-':>8}  {modules}")
+
+    if args.check:
+        failed = regressions(results, thresholds)
+        for name, value, limit in failed:
+            print(f"❌ Arranque lento en {name}: {value:.1f} ms > {limit} ms")
+        if failed:
+            sys.exit(1)
+        print("✅ Todos los casos dentro de su presupuesto de arranque")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: coste por ciclo del cálculo de EMA
+
+Compara el camino anterior (fetch_ohlcv + DataFrame + ewm().mean() en cada
+ciclo) con la EMA incremental (inicialización única + peek por tick).
+
+Uso:
+    python benchmarks/bench_ema.py [--cycles 2000] [--rtt-ms 0]
+
+--rtt-ms simula la latencia de red de cada llamada REST al exchange.
+"""
+
+import argparse
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils  # noqa: E402
+from indicators import IncrementalEMA  # noqa: E402
+from main import ScalpingBot  # noqa: E402
+
+
+class FakeExchange:
+    """Exchange mínimo que devuelve velas sintéticas y cuenta llamadas REST"""
+
+    def __init__(self, rtt_ms: float):
+        self.rtt = rtt_ms / 1000
+        self.calls = 0
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+        now_ms = int(time.time() * 1000)
+        current_open = now_ms - now_ms % 60000
+        n = limit or 2
+        return [[current_open - (n - 1 - i) * 60000, 0.08, 0.081, 0.079, 0.08 + i * 1e-5, 1000.0]
+                for i in range(n)]
+
+
+def bench_before(exchange, cycles, period):
+    start = time.perf_counter()
+    for _ in range(cycles):
+        df = utils.get_ohlcv_data(exchange, 'DOGE/USDT', '1m', limit=period + 10)
+        utils.calculate_ema(df, period)
+    return time.perf_counter() - start
+
+
+def bench_after(exchange, cycles, period):
+    bot = ScalpingBot.__new__(ScalpingBot)
+    bot.exchange = exchange
+    bot.symbol = 'DOGE/USDT'
+    bot.timeframe = '1m'
+    bot.timeframe_ms = 60000
+    bot.ema_period = period
+    bot.ema_engine = IncrementalEMA(period)
+    bot.market_data = None
+    bot.candle_store = None
+
+    # Reloj congelado dentro de la misma vela: refleja un minuto de ciclos
+    frozen = time.time()
+    start = time.perf_counter()
+    with patch('main.time.time', return_value=frozen):
+        for i in range(cycles):
+            bot._sync_ema_candles()
+            bot.ema_engine.peek(0.08 + i * 1e-7)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cycles', type=int, default=2000)
+    parser.add_argument('--period', type=int, default=12)
+    parser.add_argument('--rtt-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    before_ex = FakeExchange(args.rtt_ms)
+    before = bench_before(before_ex, args.cycles, args.period)
+    after_ex = FakeExchange(args.rtt_ms)
+    after = bench_after(after_ex, args.cycles, args.period)
+
+    print(f"Ciclos: {args.cycles} | EMA({args.period}) | RTT simulado: {args.rtt_ms} ms")
+    print(f"  Antes:   {before / args.cycles * 1e6:10.1f} µs/ciclo  ({before_ex.calls} llamadas REST)")
+    print(f"  Después: {after / args.cycles * 1e6:10.1f} µs/ciclo  ({after_ex.calls} llamadas REST)")
+    print(f"  Mejora:  {before / after:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
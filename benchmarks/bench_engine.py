@@ -0,0 +1,98 @@
+"""
+Benchmark: memoria y CPU por símbolo añadido al motor multi-símbolo
+
+Crea motores con 1, 10 y 50 símbolos sobre un exchange simulado (sin red),
+inicializa la EMA de cada uno, reparte ticks por el stream compartido y mide:
+- memoria asignada por símbolo (tracemalloc, tras el primer ciclo)
+- CPU por ciclo de estrategia disparado por tick
+
+Uso:
+    python benchmarks/bench_engine.py [--ticks 2000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from engine import TradingEngine  # noqa: E402
+from market_data import MarketDataHub, stream_symbol  # noqa: E402
+
+
+class SimulatedExchange:
+    """Responde al instante con datos planos"""
+
+    def fapiPrivate_post_leverage(self, params):
+        return {}
+
+    def fapiPrivate_post_margintype(self, params):
+        return {}
+
+    def fetch_ticker(self, symbol):
+        return {'last': 1.0}
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        now_ms = int(time.time() * 1000)
+        current_open = now_ms - now_ms % 60000
+        return [[current_open - (40 - i) * 60000, 1.0, 1.0, 1.0, 1.0, 1.0] for i in range(41)]
+
+
+def build_engine(n):
+    symbols = [f"COIN{i}/USDT" for i in range(n)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = TradingEngine(symbols, exchange=SimulatedExchange())
+        hub = MarketDataHub(symbols, '1m', max_candles=engine.bots[0].ema_period + 20)
+        engine.market_data = hub
+        for bot in engine.bots:
+            bot.market_data = hub.feeds[bot.symbol]
+        engine.run_due_cycles()  # Inicializa la EMA de todos
+    return engine, hub
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type=int, default=2000)
+    args = parser.parse_args()
+
+    # Simulación: sin órdenes reales ni consultas de balance
+    config.ENABLE_REAL_TRADING = False
+    config.USE_DYNAMIC_POSITION_SIZE = False
+    config.ENABLE_SHORT_POSITIONS = False
+
+    print(f"{'Símbolos':>8} {'Memoria/símbolo':>16} {'CPU/ciclo':>10} {'Ticks/s':>10}")
+    for n in (1, 10, 50):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        engine, hub = build_engine(n)
+        memory = (tracemalloc.get_traced_memory()[0] - before) / n
+        tracemalloc.stop()
+
+        rng = random.Random(n)
+        ids = [stream_symbol(s).upper() for s in engine.symbols]
+        messages = [{"data": {"e": "aggTrade", "E": 1, "s": rng.choice(ids),
+                              "p": str(1.0 - rng.random() * 1e-3), "q": "1", "T": 1}}
+                    for _ in range(args.ticks)]
+
+        cpu_before = sum(engine.cpu_seconds.values())
+        cycles_before = sum(engine.cycles.values())
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for message in messages:
+                hub.handle_message(message)
+                engine.run_due_cycles()
+        elapsed = time.perf_counter() - started
+        cycles = sum(engine.cycles.values()) - cycles_before
+        cpu = (sum(engine.cpu_seconds.values()) - cpu_before) / max(cycles, 1)
+
+        print(f"{n:>8} {memory / 1024:>13.1f} KB {cpu * 1e6:>8.0f}µs {args.ticks / elapsed:>10,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""
+Benchmark: camino caliente de la decisión (tick → decisión) con umbrales de regresión
+
+Casos medidos contra un exchange simulado (sin red) y datos reproducibles
+(paseo aleatorio con semilla fija, ver ``dataset``):
+
+- calculate_ema: EMA con pandas sobre un DataFrame de velas
+- get_ohlcv_data: velas del exchange → DataFrame
+- calculate_ema_buffer / get_ohlcv_buffer: lo mismo con CandleBuffer (sin pandas,
+  camino del bot en vivo)
+- should_sell: decisión de cierre por take profit / stop loss
+- take_profit_fixed_usd: calculate_take_profit_price_for_fixed_usd
+- trading_cycle: _trading_cycle_automatic completo (precio, EMA incremental,
+  estrategia y órdenes simuladas), con el reloj dentro de la misma vela
+- sim_order_fill: orden LIMIT en el simulador local (sim_exchange.py), tick que
+  la ejecuta y consulta de la orden
+
+Cada caso se repite varias veces y se toma la mediana en µs por operación.
+Con --check se compara con benchmarks/thresholds.json y se termina con
+código 1 si algún caso supera su umbral.
+
+Uso:
+    python benchmarks/bench_hot_path.py [--scale 1.0] [--repeat 5] [--check]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+import config  # noqa: E402
+import sim_exchange  # noqa: E402
+import utils  # noqa: E402
+from candle_buffer import CandleBuffer  # noqa: E402
+from main import ScalpingBot  # noqa: E402
+
+
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thresholds.json')
+
+SEED = 20240101
+CANDLES = 500
+TICKS = 2000
+
+
+def dataset(seed=SEED, candles=CANDLES, ticks=TICKS, start_price=0.08):
+    """
+    Datos reproducibles: velas de 1m y ticks de precio dentro de la última vela
+
+    Returns:
+        (velas [timestamp, open, high, low, close, volume], lista de precios)
+    """
+    rng = random.Random(seed)
+    price = start_price
+    rows = []
+    for i in range(candles):
+        open_ = price
+        price *= 1 + rng.gauss(0, 0.0015)
+        high = max(open_, price) * (1 + abs(rng.gauss(0, 0.0005)))
+        low = min(open_, price) * (1 - abs(rng.gauss(0, 0.0005)))
+        rows.append([1_700_000_000_000 + i * 60000, open_, high, low, price, rng.uniform(1e4, 1e6)])
+    prices = []
+    for _ in range(ticks):
+        price *= 1 + rng.gauss(0, 0.0008)
+        prices.append(price)
+    return rows, prices
+
+
+class SimulatedExchange:
+    """Exchange sin red: velas fijas alineadas con el reloj y precios del dataset en orden"""
+
+    def __init__(self, candles, prices):
+        self.candles = candles
+        self.prices = prices
+        self.index = 0
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        now_ms = int(time.time() * 1000)
+        current_open = now_ms - now_ms % 60000
+        rows = self.candles[-(limit or len(self.candles)):]
+        n = len(rows)
+        return [[current_open - (n - 1 - i) * 60000] + row[1:] for i, row in enumerate(rows)]
+
+    def fetch_ticker(self, symbol):
+        price = self.prices[self.index % len(self.prices)]
+        self.index += 1
+        return {'last': price}
+
+    def fetch_balance(self):
+        return {'free': {'USDT': 1000.0}}
+
+    def fapiPrivate_post_leverage(self, params):
+        return {}
+
+    def fapiPrivate_post_margintype(self, params):
+        return {}
+
+
+def _timed(func, n, repeat):
+    """Mediana de µs por operación de ``func(n)``"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(n)
+        samples.append((time.perf_counter() - started) / n * 1e6)
+    return statistics.median(samples)
+
+
+def bench_calculate_ema(candles, prices, scale, repeat):
+    df = pd.DataFrame(candles[-100:], columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+
+    def run(n):
+        for _ in range(n):
+            utils.calculate_ema(df, 20)
+    return _timed(run, max(1, int(300 * scale)), repeat)
+
+
+def bench_get_ohlcv_data(candles, prices, scale, repeat):
+    exchange = SimulatedExchange(candles, prices)
+
+    def run(n):
+        for _ in range(n):
+            utils.get_ohlcv_data(exchange, 'DOGE/USDT', '1m', limit=100)
+    return _timed(run, max(1, int(200 * scale)), repeat)
+
+
+def bench_calculate_ema_buffer(candles, prices, scale, repeat):
+    buffer = CandleBuffer.from_ohlcv(candles[-100:])
+
+    def run(n):
+        for _ in range(n):
+            utils.calculate_ema(buffer, 20)
+    return _timed(run, max(1, int(300 * scale)), repeat)
+
+
+def bench_get_ohlcv_buffer(candles, prices, scale, repeat):
+    exchange = SimulatedExchange(candles, prices)
+    buffer = CandleBuffer(100)
+
+    def run(n):
+        for _ in range(n):
+            utils.get_ohlcv_buffer(exchange, 'DOGE/USDT', '1m', limit=100, buffer=buffer)
+    return _timed(run, max(1, int(200 * scale)), repeat)
+
+
+def bench_should_sell(candles, prices, scale, repeat):
+    entry = prices[0]
+
+    def run(n):
+        for i in range(n):
+            utils.should_sell(entry, prices[i % len(prices)], 0.6, 0.4, 'LONG' if i & 1 else 'SHORT')
+    return _timed(run, max(1, int(20000 * scale)), repeat)
+
+
+def bench_take_profit(candles, prices, scale, repeat):
+    def run(n):
+        for i in range(n):
+            utils.calculate_take_profit_price_for_fixed_usd(prices[i % len(prices)], 20, 2.0, 10,
+                                                            'LONG' if i & 1 else 'SHORT')
+    return _timed(run, max(1, int(20000 * scale)), repeat)
+
+
+@contextlib.contextmanager
+def _paper_config():
+    """Configuración de simulación sin red ni disco"""
+    with patch.multiple(config, ENABLE_REAL_TRADING=False, USE_DYNAMIC_POSITION_SIZE=False,
+                        POSITION_SIZE_USDT=20, USE_FUTURES=True, LEVERAGE=10, EMA_PERIOD=20, TIMEFRAME='1m',
+                        ENABLE_SHORT_POSITIONS=True, COOLDOWN_SECONDS=0, EVENT_DRIVEN=False,
+                        TAKE_PROFIT_PERCENT=0.6, STOP_LOSS_PERCENT=0.4, TARGET_PROFIT_USDT=2.0,
+                        USE_WARM_START=False):
+        yield
+
+
+def bench_trading_cycle(candles, prices, scale, repeat):
+    sink = io.StringIO()
+    with _paper_config(), contextlib.redirect_stdout(sink):
+        bot = ScalpingBot('automatic', symbol='DOGE/USDT', exchange=SimulatedExchange(candles, prices),
+                          show_configuration=False)
+        # Reloj congelado dentro de la misma vela: la EMA no vuelve a pedir velas
+        frozen = time.time()
+        with patch('main.time.time', return_value=frozen):
+            bot._trading_cycle_automatic()  # Inicializa la EMA
+
+            def run(n):
+                for _ in range(n):
+                    bot._trading_cycle_automatic()
+                sink.seek(0)
+                sink.truncate()
+            return _timed(run, max(1, int(1000 * scale)), repeat)
+
+
+def bench_sim_order_fill(candles, prices, scale, repeat):
+    exchange = sim_exchange.SimulatedExchange(balance=1e9, leverage=10)
+
+    def run(n):
+        for i in range(n):
+            # Compra y venta alternas un 0,1 % fuera del mercado: esperan en el libro hasta el tick
+            price = prices[i % len(prices)]
+            side = 'buy' if i & 1 else 'sell'
+            limit_price = price * (0.999 if side == 'buy' else 1.001)
+            exchange.tick('DOGE/USDT', price)
+            order = exchange.create_order('DOGE/USDT', 'limit', side, 100, limit_price)
+            exchange.tick('DOGE/USDT', limit_price, quantity=1000)
+            exchange.fetch_order(order['id'])
+    return _timed(run, max(1, int(2000 * scale)), repeat)
+
+
+CASES = {
+    'calculate_ema': bench_calculate_ema,
+    'get_ohlcv_data': bench_get_ohlcv_data,
+    'calculate_ema_buffer': bench_calculate_ema_buffer,
+    'get_ohlcv_buffer': bench_get_ohlcv_buffer,
+    'should_sell': bench_should_sell,
+    'take_profit_fixed_usd': bench_take_profit,
+    'trading_cycle': bench_trading_cycle,
+    'sim_order_fill': bench_sim_order_fill,
+}
+
+
+def run_suite(scale=1.0, repeat=5, cases=None):
+    """
+    Ejecuta los casos del benchmark
+
+    Args:
+        scale: Factor sobre el número de operaciones de cada caso
+        repeat: Repeticiones de cada caso (se usa la mediana)
+        cases: Nombres de los casos (por defecto todos)
+
+    Returns:
+        Dict caso -> µs por operación
+    """
+    candles, prices = dataset()
+    return {name: CASES[name](candles, prices, scale, repeat) for name in (cases or CASES)}
+
+
+def load_thresholds(path=THRESHOLDS_FILE):
+    """Umbrales en µs por operación de cada caso"""
+    with open(path) as f:
+        return json.load(f)['max_us_per_op']
+
+
+def regressions(results, thresholds):
+    """
+    Casos que superan su umbral
+
+    Returns:
+        Lista de (caso, µs medidos, umbral)
+    """
+    return [(name, value, thresholds[name]) for name, value in results.items()
+            if name in thresholds and value > thresholds[name]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0, help='Factor sobre el número de operaciones')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--case', action='append', choices=sorted(CASES), help='Caso a ejecutar (repetible)')
+    parser.add_argument('--check', action='store_true', help='Fallar si algún caso supera su umbral')
+    args = parser.parse_args()
+
+    results = run_suite(args.scale, args.repeat, args.case)
+    thresholds = load_thresholds()
+
+    print(f"{'Caso':<24} {'µs/op':>10} {'Umbral':>10}")
+    for name, value in results.items():
+        limit = thresholds.get(name)
+        print(f"{name:<24} {value:>10.2f} {limit if limit is not None else '-':>10}")
+
+    if args.check:
+        failed = regressions(results, thresholds)
+        for name, value, limit in failed:
+            print(f"❌ Regresión en {name}: {value:.2f} µs/op > {limit} µs/op")
+        if failed:
+            sys.exit(1)
+        print("✅ Todos los casos dentro de sus umbrales")
+
+
+if __name__ == '__main__':
+    main()
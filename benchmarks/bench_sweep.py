@@ -0,0 +1,58 @@
+"""
+Benchmark: barrido vectorizado frente a N backtests secuenciales
+
+Mide el tiempo del núcleo vectorizado para una rejilla de combinaciones sobre
+velas sintéticas de 1m y lo compara con el coste extrapolado de ejecutar
+Backtester una vez por combinación.
+
+Uso:
+    python benchmarks/bench_sweep.py [--months 1] [--workers 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from backtest import Backtester  # noqa: E402
+from bench_backtest import synthetic_candles  # noqa: E402
+from sweep import build_grid, run_sweep  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--months', type=float, default=1)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    n = int(args.months * 30 * 24 * 60)
+    candles = synthetic_candles(n)
+    array = np.array(candles, dtype=np.float64)
+
+    # 10 EMAs × 10 stops × 2 take profits × 5 objetivos = 1000 combinaciones
+    grid = build_grid([5, 8, 12, 15, 20, 26, 30, 40, 50, 60],
+                      [round(0.1 * i, 1) for i in range(1, 11)],
+                      [0.6, 1.0],
+                      [0.5, 1.0, 1.5, 2.0, 3.0])
+    combos = len(grid['ema_period'])
+
+    start = time.perf_counter()
+    Backtester().run(candles)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    run_sweep(array, grid, workers=args.workers)
+    sweep_time = time.perf_counter() - start
+
+    print(f"Velas: {n:,} ({args.months:g} meses de 1m) | Combinaciones: {combos}")
+    print(f"  Backtester secuencial (extrapolado): {single * combos:.1f}s")
+    print(f"  Barrido vectorizado ({args.workers} procesos): {sweep_time:.1f}s")
+    print(f"  Aceleración: {single * combos / sweep_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark: round trip de una orden con el transporte por defecto y con el ajustado
+
+Levanta un servidor HTTP/1.1 local que imita POST /fapi/v1/order y mide la
+latencia de fapiPrivatePostOrder (firma + petición + parseo) de CCXT con:
+- una conexión nueva por orden (sin keep-alive)
+- la sesión por defecto de CCXT
+- el transporte de transport.py (pool compartido, TCP_NODELAY, caché de DNS)
+
+El servidor se alcanza por 'localhost' para que cada conexión nueva pase por
+la resolución DNS. Con --threads > 1 varias órdenes salen a la vez (como en el
+motor multi-símbolo) y cuenta también el tamaño del pool.
+
+Uso:
+    python benchmarks/bench_transport.py [--orders 500] [--threads 1] [--delay-ms 0]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ccxt  # noqa: E402
+import requests  # noqa: E402
+
+import transport  # noqa: E402
+
+
+ORDER_RESPONSE = json.dumps({
+    'orderId': 8886774, 'symbol': 'DOGEUSDT', 'status': 'NEW', 'clientOrderId': 'bench', 'price': '0.08',
+    'avgPrice': '0', 'origQty': '100', 'executedQty': '0', 'type': 'LIMIT', 'side': 'BUY',
+    'timeInForce': 'GTC', 'updateTime': 1700000000000,
+}).encode()
+
+
+class MockBinanceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # Como el exchange: la respuesta no espera al ACK retrasado
+    delay = 0.0
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        if self.delay:
+            time.sleep(self.delay)
+        # Cabeceras y cuerpo en escrituras separadas, como un servidor real
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(ORDER_RESPONSE)))
+        self.send_header('X-MBX-USED-WEIGHT-1M', '1')
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.flush()
+        self.wfile.write(ORDER_RESPONSE)
+
+    do_POST = _reply
+    do_GET = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+class NoKeepAliveSession(requests.Session):
+    """Cierra la conexión tras cada petición (un handshake TCP por orden)"""
+
+    def request(self, method, url, headers=None, **kwargs):
+        headers = dict(headers or {}, Connection='close')
+        return super().request(method, url, headers=headers, **kwargs)
+
+
+def build_exchange(base_url, variant):
+    exchange = ccxt.binance({'apiKey': 'key', 'secret': 'secret', 'enableRateLimit': False,
+                             'options': {'defaultType': 'future'}})
+    exchange.urls['api']['fapiPrivate'] = base_url + '/fapi/v1'
+    if variant == 'nueva conexión':
+        exchange.session = NoKeepAliveSession()
+    elif variant == 'ajustado':
+        transport.configure_ccxt(exchange, use_http2=False)
+    return exchange
+
+
+def run_variant(base_url, variant, orders, threads):
+    exchange = build_exchange(base_url, variant)
+    params = {'symbol': 'DOGEUSDT', 'side': 'BUY', 'type': 'LIMIT', 'quantity': '100',
+              'price': '0.08', 'timeInForce': 'GTC'}
+    exchange.fapiPrivatePostOrder(params)  # Calentamiento (primera conexión)
+
+    def one_order(_):
+        started = time.perf_counter()
+        exchange.fapiPrivatePostOrder(params)
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(one_order, range(orders)))
+    elapsed = time.perf_counter() - started
+    return latencies, orders / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--delay-ms', type=float, default=0.0, help='Tiempo de proceso simulado del exchange')
+    args = parser.parse_args()
+
+    MockBinanceHandler.delay = args.delay_ms / 1000
+    ThreadingHTTPServer.request_queue_size = 256
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockBinanceHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://localhost:{server.server_address[1]}"
+
+    print(f"{args.orders} órdenes, {args.threads} hilo(s), servidor en {base_url}")
+    print(f"{'Transporte':>16} {'p50 (ms)':>9} {'p99 (ms)':>9} {'media (ms)':>11} {'órdenes/s':>10}")
+    try:
+        for variant in ('nueva conexión', 'CCXT por defecto', 'ajustado'):
+            latencies, throughput = run_variant(base_url, variant, args.orders, args.threads)
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{variant:>16} {p50:>9.3f} {p99:>9.3f} {statistics.mean(latencies):>11.3f} {throughput:>10.0f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,37 @@
-from ast import If
-from symtable import Symbol
+"""
+Bot manual de 1000SHIBUSDT con python-binance (teclas 2 = LONG, 3 = SHORT)
+
+Importar este módulo no conecta con Binance: el cliente, el stream de usuario,
+las métricas y el apalancamiento se configuran en ``connect()``, y el bucle de
+teclado corre en ``run()``.
+
+Uso:
+    python bot.py
+"""
+
 import time
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
 import config
-import keyboard
+import metrics
+import order_book
+import rate_limit
+import recording
+import transport
+from market_filters import SymbolFilters
+from user_data import UserDataStream, binance_client_listen_key_functions
 
 
-user_key = config.API_KEY
-secret_key = config.API_SECRET
+# Cliente, stream de usuario y libro local (se crean en connect())
+binance_client = None
+user_data = None
+libro = None
 
-binance_client = Client(user_key, secret_key)
+# Tick size de 1000SHIBUSDT (PRICE_FILTER de Futures) para los precios sacados del libro
+FILTROS_1000SHIB = SymbolFilters('1000SHIB/USDT', tick_size=0.000001)
 
 #cuanto apalancamiento leverage
 apalancamiento=50
-binance_client.futures_change_leverage(symbol="1000SHIBUSDT", leverage=apalancamiento)
 
 # Target profit en USDT
 TARGET_PROFIT_USDT = 2.0
@@ -52,6 +69,63 @@ def calculate_take_profit_price(entry_price, position_size_usdt, target_profit_u
     return take_profit_price
 
 
+def precio_entrada(side, precio_ticker, cantidad):
+    """
+    Precio LIMIT de entrada desde el libro local (config.ENTRY_PRICE_MODE)
+    
+    El precio del ticker es el de la última operación y suele estar viejo: con el
+    libro sincronizado se usa el mejor bid/ask.
+    
+    Args:
+        side: 'buy' o 'sell'
+        precio_ticker: Precio de futures_symbol_ticker (si el libro no está sincronizado)
+        cantidad: Cantidad de la orden (para ENTRY_PRICE_MODE = 'cross')
+        
+    Returns:
+        Precio límite de la orden
+    """
+    if libro is None or not libro.is_fresh():
+        return precio_ticker
+    precio = order_book.entry_price(libro, side, cantidad, config.ENTRY_PRICE_MODE, FILTROS_1000SHIB,
+                                    config.ENTRY_QUEUE_MAX_AHEAD_USDT)
+    if precio is None:
+        return precio_ticker
+    print(f"Precio del libro ({config.ENTRY_PRICE_MODE}): {precio:.8f} (ticker {precio_ticker:.8f})")
+    return precio
+
+
+def esperar_posicion(symbol, timeout):
+    """
+    Espera hasta `timeout` segundos a que haya una posición abierta en `symbol`.
+    Usa el stream de usuario si está conectado y, si no, consulta la posición por REST.
+    
+    Args:
+        symbol: Símbolo del par (ej: '1000SHIBUSDT')
+        timeout: Segundos máximos de espera
+        
+    Returns:
+        Tupla (precio de entrada, cantidad) con la cantidad como texto, igual que
+        positionAmt de futures_position_information ('0' si no hay posición)
+    """
+    if user_data is not None and user_data.connected.is_set():
+        posicion = user_data.wait_for_position_open(symbol, timeout=timeout)
+        if posicion is None:
+            return 0.0, '0'
+        print(posicion)
+        return posicion['entry_price'], format(posicion['amount'], 'f').rstrip('0').rstrip('.')
+    
+    entrada, cantidad = 0.0, '0'
+    position = binance_client.futures_position_information(symbol=symbol)
+    for x in position:
+        if(x['symbol']==symbol):
+            print(x)
+            entrada=float(x['entryPrice'])
+            cantidad=x['positionAmt']
+    if cantidad=='0':
+        time.sleep(timeout)
+    return entrada, cantidad
+
+
 def create_order_with_retry(symbol, side, precio, cantidad_inicial, apalancamiento):
     """
     Crea una orden de futuros con manejo de error -2019 (margen insuficiente).
@@ -147,204 +221,260 @@ def create_order_with_retry(symbol, side, precio, cantidad_inicial, apalancamien
 
 
 
-time.sleep(0.2)
-print('-----------------------------')
-position=binance_client.futures_position_information()
-#print(position)
-for x in position:
-    if(x['symbol']=='1000SHIBUSDT'):
-        print(x)
-        entrada=float(x['entryPrice'])
-        cantidad=x['positionAmt']
-
-while True:
-
-
-    if keyboard.is_pressed('2'):
-        precioshib=binance_client.futures_symbol_ticker(symbol='1000SHIBUSDT')
-        print(precioshib)
-
-        balance=binance_client.futures_account_balance()
-        for x in balance:
-            if(x['asset']=='USDT'):
-                saldo=float(x['balance'])
-        print(saldo)
-        precio=float(precioshib['price'])
-        
-        # Calcular position size en USDT (el margen usado, sin apalancamiento)
-        position_size_usdt = saldo * 0.98  # Usar 98% del balance disponible
-        
-        cantidadshiba=int((position_size_usdt/precio))*apalancamiento
-        print(f"Cantidad inicial calculada: {cantidadshiba}")
-        print(f"Position size (margen): {position_size_usdt:.2f} USDT")
-        
-        # Calcular precio de take profit para obtener 2 USDT
-        take_profit_price = calculate_take_profit_price(
-            entry_price=precio,
-            position_size_usdt=position_size_usdt,
-            target_profit_usd=TARGET_PROFIT_USDT,
-            leverage=apalancamiento,
-            position_side='LONG'
-        )
-        
-        print(f"Precio de entrada: {precio:.8f}")
-        print(f"Precio de Take Profit: {take_profit_price:.8f} (para ${TARGET_PROFIT_USDT:.2f} USDT profit)")
-        
-        #orden de comprar
-        orden_result = create_order_with_retry(
-            symbol='1000SHIBUSDT',
-            side='BUY',
-            precio=precio,
-            cantidad_inicial=cantidadshiba,
-            apalancamiento=apalancamiento
-        )
-        
-        if orden_result is None:
-            print("❌ No se pudo ejecutar la orden de compra")
-            continue
-        time.sleep(0.2)
-        espera=True
-        while espera == True:
-
-            position=binance_client.futures_position_information()
-            #print(position)
-            for x in position:
-                if(x['symbol']=='1000SHIBUSDT'):
-                    print(x)
-                    entrada=float(x['entryPrice'])
-                    cantidad=x['positionAmt']
-                    
-            
-            if cantidad=='0':
-                print('aun no estamos en pocision')
-                time.sleep(0.1)
-                if keyboard.is_pressed('5'):
-                    espera=False
-            if cantidad!='0':
-                if int(cantidad)<0:
-                        cantidad=int(cantidad)*(-1)
-                else:
-                    cantidad=int(cantidad)
-                
-                # Usar el precio de take profit calculado
-                print(f"Colocando orden de venta LIMIT a {take_profit_price:.8f} para profit de ${TARGET_PROFIT_USDT:.2f} USDT")
-                binance_client.futures_create_order(
-                symbol='1000SHIBUSDT',
-                type='LIMIT',
-                timeInForce='GTC',
-                price=take_profit_price,
-                side='SELL',
-                quantity=cantidad
-                )
-                espera=False
-
-
+def connect():
+    """
+    Crea el cliente de Binance, inicia el stream de usuario y las métricas
+    y configura el apalancamiento de 1000SHIBUSDT
+    """
+    global binance_client, user_data, libro
+    
+    binance_client = Client(config.API_KEY, config.API_SECRET)
+    # Todas las peticiones pasan por el planificador de peso (las órdenes tienen prioridad
+    # y las consultas de posición frenan antes de llegar al límite de Binance)
+    if config.USE_RATE_LIMIT_SCHEDULER:
+        rate_limit.instrument_binance_client(binance_client)
+    # Conexiones keep-alive compartidas con TCP_NODELAY y caché de DNS
+    if config.USE_TUNED_TRANSPORT:
+        transport.configure_binance_client(binance_client)
+    # Latencia, errores y peso de cada petición por endpoint
+    if config.USE_METRICS:
+        metrics.instrument_binance_client(binance_client)
+    # Cada petición y respuesta al registro de tráfico (se reproduce con recording.py)
+    if config.RECORD_TRAFFIC is True:
+        recording.record_binance_client(binance_client, recording.open_log(recording.SOURCE_BINANCE))
+    
+    # Stream de usuario: los llenados y cambios de posición llegan como eventos
+    # en lugar de consultar futures_position_information() en bucle
+    if config.USE_USER_DATA_STREAM:
+        user_data = UserDataStream(*binance_client_listen_key_functions(binance_client))
+        try:
+            user_data.start()
+        except RuntimeError as e:
+            print(f"⚠️  No se pudo iniciar el stream de usuario ({e}). Usando REST.")
+    
+    # Libro L2 local (snapshot REST + stream de profundidad) para el precio de entrada
+    if config.USE_ORDER_BOOK:
+        libro = order_book.OrderBook('1000SHIB/USDT', lambda: binance_client.futures_order_book(
+            symbol='1000SHIBUSDT', limit=config.ORDER_BOOK_DEPTH))
+        try:
+            order_book.OrderBookStream(libro).start()
+        except RuntimeError as e:
+            print(f"⚠️  No se pudo iniciar el libro local ({e}). Usando el precio del ticker.")
+            libro = None
+    
+    # Endpoint local de métricas y resumen periódico en consola
+    if config.USE_METRICS:
+        try:
+            metrics.MetricsServer().start()
+        except OSError as e:
+            print(f"⚠️  No se pudo iniciar el endpoint de métricas ({e})")
+    
+    binance_client.futures_change_leverage(symbol="1000SHIBUSDT", leverage=apalancamiento)
 
-        
-        
-    if keyboard.is_pressed('3'):
-        precioshib=binance_client.futures_symbol_ticker(symbol='1000SHIBUSDT')
-        print(precioshib)
-
-        balance=binance_client.futures_account_balance()
-        for x in balance:
-            if(x['asset']=='USDT'):
-                saldo=float(x['balance'])
-        print(saldo)
-        precio=float(precioshib['price'])
-        
-        # Calcular position size en USDT (el margen usado, sin apalancamiento)
-        position_size_usdt = saldo * 0.98  # Usar 98% del balance disponible
-        
-        cantidadshiba=int((position_size_usdt/precio))*apalancamiento
-        print(f"Cantidad inicial calculada: {cantidadshiba}")
-        print(f"Position size (margen): {position_size_usdt:.2f} USDT")
-        
-        # Calcular precio de take profit para obtener 2 USDT en SHORT
-        take_profit_price = calculate_take_profit_price(
-            entry_price=precio,
-            position_size_usdt=position_size_usdt,
-            target_profit_usd=TARGET_PROFIT_USDT,
-            leverage=apalancamiento,
-            position_side='SHORT'
-        )
-        
-        print(f"Precio de entrada: {precio:.8f}")
-        print(f"Precio de Take Profit: {take_profit_price:.8f} (para ${TARGET_PROFIT_USDT:.2f} USDT profit)")
-        
-        #orden de vender
-        orden_result = create_order_with_retry(
-            symbol='1000SHIBUSDT',
-            side='SELL',
-            precio=precio,
-            cantidad_inicial=cantidadshiba,
-            apalancamiento=apalancamiento
-        )
-        
-        if orden_result is None:
-            print("❌ No se pudo ejecutar la orden de venta")
-            continue
-        time.sleep(0.2)
-        espera=True
-        while espera == True:
-
-            position=binance_client.futures_position_information()
-            #print(position)
-            for x in position:
-                if(x['symbol']=='1000SHIBUSDT'):
-                    print(x)
-                    entrada=float(x['entryPrice'])
-                    cantidad=x['positionAmt']
-                    
-            if cantidad=='0':
-                print('aun no estamos en pocision')
-                time.sleep(0.1)
-                if keyboard.is_pressed('5'):
-                    espera=False
-            if cantidad!='0':
-                if int(cantidad)<0:
-                        cantidad=int(cantidad)*(-1)
-                else:
-                    cantidad=int(cantidad)
-                
-                # Usar el precio de take profit calculado para SHORT
-                print(f"Colocando orden de compra LIMIT a {take_profit_price:.8f} para profit de ${TARGET_PROFIT_USDT:.2f} USDT")
-                binance_client.futures_create_order(
-                symbol='1000SHIBUSDT',
-                type='LIMIT',
-                timeInForce='GTC',
-                price=take_profit_price,
-                side='BUY',
-                quantity=cantidad
-                )
-                espera=False
 
-    position=binance_client.futures_position_information()
+def run():
+    """
+    Bucle de teclado: 2 abre LONG, 3 abre SHORT, 5 deja de esperar el llenado
+    (requiere haber llamado a connect())
+    """
+    import keyboard  # Solo al operar: tarda en cargar y en Linux exige root
+    
+    time.sleep(0.2)
+    print('-----------------------------')
+    position=binance_client.futures_position_information(symbol='1000SHIBUSDT')
     #print(position)
     for x in position:
         if(x['symbol']=='1000SHIBUSDT'):
             print(x)
             entrada=float(x['entryPrice'])
-            markprice=float(x['markPrice'])
             cantidad=x['positionAmt']
-            pnl=float(x['unRealizedProfit'])
-    if cantidad!='0' and pnl<-3:
-        if int(cantidad)<0:
-            cantidad=int(cantidad)*(-1)
-        else:
-            cantidad=int(cantidad)
-        if entrada<markprice:
-                binance_client.futures_create_order(
+
+    while True:
+
+
+        if keyboard.is_pressed('2'):
+            precioshib=binance_client.futures_symbol_ticker(symbol='1000SHIBUSDT')
+            print(precioshib)
+
+            balance=binance_client.futures_account_balance()
+            for x in balance:
+                if(x['asset']=='USDT'):
+                    saldo=float(x['balance'])
+            print(saldo)
+            precio=float(precioshib['price'])
+            precio=precio_entrada('buy', precio, saldo * 0.98 * apalancamiento / precio)
+
+            # Calcular position size en USDT (el margen usado, sin apalancamiento)
+            position_size_usdt = saldo * 0.98  # Usar 98% del balance disponible
+
+            cantidadshiba=int((position_size_usdt/precio))*apalancamiento
+            print(f"Cantidad inicial calculada: {cantidadshiba}")
+            print(f"Position size (margen): {position_size_usdt:.2f} USDT")
+
+            # Calcular precio de take profit para obtener 2 USDT
+            take_profit_price = calculate_take_profit_price(
+                entry_price=precio,
+                position_size_usdt=position_size_usdt,
+                target_profit_usd=TARGET_PROFIT_USDT,
+                leverage=apalancamiento,
+                position_side='LONG'
+            )
+
+            print(f"Precio de entrada: {precio:.8f}")
+            print(f"Precio de Take Profit: {take_profit_price:.8f} (para ${TARGET_PROFIT_USDT:.2f} USDT profit)")
+
+            #orden de comprar
+            orden_result = create_order_with_retry(
                 symbol='1000SHIBUSDT',
-                type='MARKET',
                 side='BUY',
-                quantity=cantidad
-                )
-        else:
-                binance_client.futures_create_order(
+                precio=precio,
+                cantidad_inicial=cantidadshiba,
+                apalancamiento=apalancamiento
+            )
+
+            if orden_result is None:
+                print("❌ No se pudo ejecutar la orden de compra")
+                continue
+            time.sleep(0.2)
+            espera=True
+            while espera == True:
+
+                entrada, cantidad = esperar_posicion('1000SHIBUSDT', timeout=0.1)
+
+
+                if cantidad=='0':
+                    print('aun no estamos en pocision')
+                    if keyboard.is_pressed('5'):
+                        espera=False
+                if cantidad!='0':
+                    if int(cantidad)<0:
+                            cantidad=int(cantidad)*(-1)
+                    else:
+                        cantidad=int(cantidad)
+
+                    # Usar el precio de take profit calculado
+                    print(f"Colocando orden de venta LIMIT a {take_profit_price:.8f} para profit de ${TARGET_PROFIT_USDT:.2f} USDT")
+                    binance_client.futures_create_order(
+                    symbol='1000SHIBUSDT',
+                    type='LIMIT',
+                    timeInForce='GTC',
+                    price=take_profit_price,
+                    side='SELL',
+                    quantity=cantidad
+                    )
+                    espera=False
+
+
+
+
+
+        if keyboard.is_pressed('3'):
+            precioshib=binance_client.futures_symbol_ticker(symbol='1000SHIBUSDT')
+            print(precioshib)
+
+            balance=binance_client.futures_account_balance()
+            for x in balance:
+                if(x['asset']=='USDT'):
+                    saldo=float(x['balance'])
+            print(saldo)
+            precio=float(precioshib['price'])
+            precio=precio_entrada('sell', precio, saldo * 0.98 * apalancamiento / precio)
+
+            # Calcular position size en USDT (el margen usado, sin apalancamiento)
+            position_size_usdt = saldo * 0.98  # Usar 98% del balance disponible
+
+            cantidadshiba=int((position_size_usdt/precio))*apalancamiento
+            print(f"Cantidad inicial calculada: {cantidadshiba}")
+            print(f"Position size (margen): {position_size_usdt:.2f} USDT")
+
+            # Calcular precio de take profit para obtener 2 USDT en SHORT
+            take_profit_price = calculate_take_profit_price(
+                entry_price=precio,
+                position_size_usdt=position_size_usdt,
+                target_profit_usd=TARGET_PROFIT_USDT,
+                leverage=apalancamiento,
+                position_side='SHORT'
+            )
+
+            print(f"Precio de entrada: {precio:.8f}")
+            print(f"Precio de Take Profit: {take_profit_price:.8f} (para ${TARGET_PROFIT_USDT:.2f} USDT profit)")
+
+            #orden de vender
+            orden_result = create_order_with_retry(
                 symbol='1000SHIBUSDT',
-                type='MARKET',
                 side='SELL',
-                quantity=cantidad
-                )
-    time.sleep(0.2)
\ No newline at end of file
+                precio=precio,
+                cantidad_inicial=cantidadshiba,
+                apalancamiento=apalancamiento
+            )
+
+            if orden_result is None:
+                print("❌ No se pudo ejecutar la orden de venta")
+                continue
+            time.sleep(0.2)
+            espera=True
+            while espera == True:
+
+                entrada, cantidad = esperar_posicion('1000SHIBUSDT', timeout=0.1)
+
+                if cantidad=='0':
+                    print('aun no estamos en pocision')
+                    if keyboard.is_pressed('5'):
+                        espera=False
+                if cantidad!='0':
+                    if int(cantidad)<0:
+                            cantidad=int(cantidad)*(-1)
+                    else:
+                        cantidad=int(cantidad)
+
+                    # Usar el precio de take profit calculado para SHORT
+                    print(f"Colocando orden de compra LIMIT a {take_profit_price:.8f} para profit de ${TARGET_PROFIT_USDT:.2f} USDT")
+                    binance_client.futures_create_order(
+                    symbol='1000SHIBUSDT',
+                    type='LIMIT',
+                    timeInForce='GTC',
+                    price=take_profit_price,
+                    side='BUY',
+                    quantity=cantidad
+                    )
+                    espera=False
+
+        position=binance_client.futures_position_information(symbol='1000SHIBUSDT')
+        #print(position)
+        for x in position:
+            if(x['symbol']=='1000SHIBUSDT'):
+                print(x)
+                entrada=float(x['entryPrice'])
+                markprice=float(x['markPrice'])
+                cantidad=x['positionAmt']
+                pnl=float(x['unRealizedProfit'])
+        if cantidad!='0' and pnl<-3:
+            if int(cantidad)<0:
+                cantidad=int(cantidad)*(-1)
+            else:
+                cantidad=int(cantidad)
+            if entrada<markprice:
+                    binance_client.futures_create_order(
+                    symbol='1000SHIBUSDT',
+                    type='MARKET',
+                    side='BUY',
+                    quantity=cantidad
+                    )
+            else:
+                    binance_client.futures_create_order(
+                    symbol='1000SHIBUSDT',
+                    type='MARKET',
+                    side='SELL',
+                    quantity=cantidad
+                    )
+        time.sleep(0.2)
+
+
+def main():
+    """Conecta con Binance y arranca el bucle de teclado"""
+    connect()
+    run()
+
+
+if __name__ == '__main__':
+    main()
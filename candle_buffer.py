@@ -0,0 +1,201 @@
+"""
+Buffer circular de velas en memoria respaldado por NumPy
+
+Sustituye a los DataFrames de pandas y a las listas de listas en el camino
+en vivo: capacidad fija reservada una sola vez, sin asignaciones por vela y
+lectura de columnas (cierres, timestamps) sin copiar.
+
+Cada fila se escribe dos veces (en ``i`` y en ``i + capacity``), así que las
+``len(buffer)`` últimas velas siempre forman un bloque contiguo del array y
+``view()`` devuelve una vista en orden cronológico aunque el buffer haya dado
+la vuelta.
+"""
+
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+
+FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+_COLUMN = {name: index for index, name in enumerate(FIELDS)}
+
+
+class CandleBuffer:
+    """
+    Últimas ``capacity`` velas [timestamp, open, high, low, close, volume]
+
+    La última vela puede estar abierta: ``upsert`` la actualiza mientras tenga
+    el mismo timestamp y añade una nueva cuando llega una posterior. No es
+    seguro entre hilos (quien lo comparte debe usar su propio lock).
+    """
+
+    def __init__(self, capacity: int = 500):
+        """
+        Args:
+            capacity: Número máximo de velas (las más antiguas se descartan)
+        """
+        if capacity < 1:
+            raise ValueError(f"Capacidad de buffer inválida: {capacity}")
+        self.capacity = capacity
+        self._data = np.zeros((2 * capacity, len(FIELDS)), dtype=np.float64)
+        self._start = 0
+        self._size = 0
+
+    @classmethod
+    def from_ohlcv(cls, candles: Iterable[list], capacity: Optional[int] = None) -> 'CandleBuffer':
+        """
+        Crea un buffer con velas en formato CCXT
+
+        Args:
+            candles: Velas [timestamp, open, high, low, close, volume]
+            capacity: Capacidad (por defecto, el número de velas)
+        """
+        candles = candles if isinstance(candles, (list, np.ndarray)) else list(candles)
+        buffer = cls(capacity or max(len(candles), 1))
+        buffer.extend(candles)
+        return buffer
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _write(self, position: int, candle):
+        self._data[position, :] = candle[:6]
+        self._data[position + self.capacity, :] = self._data[position]
+
+    def upsert(self, candle) -> bool:
+        """
+        Añade una vela o actualiza la última si tiene el mismo timestamp
+
+        Las velas anteriores a la última se ignoran.
+
+        Returns:
+            True si la vela se añadió o actualizó
+        """
+        if self._size:
+            last_position = (self._start + self._size - 1) % self.capacity
+            last_timestamp = self._data[last_position, 0]
+            if candle[0] == last_timestamp:
+                self._write(last_position, candle)
+                return True
+            if candle[0] < last_timestamp:
+                return False
+        if self._size < self.capacity:
+            position = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            position = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._write(position, candle)
+        return True
+
+    def extend(self, candles: Iterable[list]):
+        """
+        Añade varias velas en orden (misma regla que ``upsert``)
+
+        Las velas posteriores a la última se copian en bloque con NumPy.
+        """
+        array = np.asarray(candles if isinstance(candles, (list, np.ndarray)) else list(candles),
+                           dtype=np.float64)
+        if array.ndim != 2 or not len(array):
+            return
+        array = array[:, :len(FIELDS)]
+        if len(array) > 1 and not (np.diff(array[:, 0]) > 0).all():
+            for candle in array:  # Desordenadas o repetidas: vela a vela
+                self.upsert(candle)
+            return
+        if self._size:
+            # Solapamiento con lo que ya hay (normalmente solo la vela en curso)
+            last_timestamp = self._data[(self._start + self._size - 1) % self.capacity, 0]
+            overlap = int(np.searchsorted(array[:, 0], last_timestamp, 'right'))
+            for candle in array[:overlap]:
+                self.upsert(candle)
+            array = array[overlap:]
+
+        count = len(array)
+        if count >= self.capacity:
+            self._data[:self.capacity] = array[-self.capacity:]
+            self._data[self.capacity:] = array[-self.capacity:]
+            self._start, self._size = 0, self.capacity
+            return
+        positions = (self._start + self._size + np.arange(count)) % self.capacity
+        self._data[positions] = array
+        self._data[positions + self.capacity] = array
+        total = self._size + count
+        if total > self.capacity:
+            self._start = (self._start + total - self.capacity) % self.capacity
+        self._size = min(total, self.capacity)
+
+    def clear(self):
+        """Vacía el buffer sin liberar la memoria reservada"""
+        self._start = 0
+        self._size = 0
+
+    def view(self) -> np.ndarray:
+        """
+        Velas en orden cronológico como array (n, 6) de solo lectura, sin copiar
+
+        La vista deja de ser válida en cuanto se añade otra vela.
+        """
+        view = self._data[self._start:self._start + self._size]
+        view.flags.writeable = False
+        return view
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Una columna en orden cronológico (vista sin copiar)
+
+        Args:
+            name: 'timestamp', 'open', 'high', 'low', 'close' o 'volume'
+        """
+        return self.view()[:, _COLUMN[name]]
+
+    def closes(self) -> np.ndarray:
+        """Precios de cierre en orden cronológico"""
+        return self.column('close')
+
+    def last(self) -> Optional[list]:
+        """Última vela (la que puede estar en curso) o None si está vacío"""
+        if not self._size:
+            return None
+        return self._row(self._data[(self._start + self._size - 1) % self.capacity])
+
+    @property
+    def first_timestamp(self) -> Optional[int]:
+        """Timestamp (ms) de la vela más antigua del buffer"""
+        return int(self._data[self._start, 0]) if self._size else None
+
+    def contiguous_since(self, since: int, step: int) -> bool:
+        """
+        True si hay velas desde ``since`` (ms) hasta la última sin huecos
+
+        Args:
+            since: Timestamp (ms) de la primera vela necesaria
+            step: Duración de una vela en ms
+        """
+        timestamps = self.column('timestamp')
+        timestamps = timestamps[int(np.searchsorted(timestamps, since, 'left')):]
+        return len(timestamps) > 0 and timestamps[0] == since and bool((np.diff(timestamps) == step).all())
+
+    @staticmethod
+    def _row(row: np.ndarray) -> list:
+        values = row.tolist()
+        values[0] = int(values[0])
+        return values
+
+    def to_list(self, since: Optional[int] = None, limit: Optional[int] = None) -> List[list]:
+        """
+        Velas en formato CCXT (listas con el timestamp entero)
+
+        Args:
+            since: Solo velas con timestamp >= since (ms)
+            limit: Como máximo las ``limit`` últimas
+        """
+        view = self.view()
+        if since is not None:
+            view = view[int(np.searchsorted(view[:, 0], since, 'left')):]
+        if limit:
+            view = view[-limit:]
+        rows = view.tolist()
+        for row in rows:
+            row[0] = int(row[0])
+        return rows
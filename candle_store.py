@@ -0,0 +1,292 @@
+"""
+Caché local de velas OHLCV en disco
+
+Guarda un archivo binario por símbolo y timeframe con registros de 6 float64
+(timestamp, open, high, low, close, volume) ordenados por tiempo. El archivo
+solo crece por el final y se lee con np.memmap, así que las lecturas por rango
+devuelven vistas sin copia que pueden usar el bot en vivo, el backtester y el
+barrido de parámetros.
+
+Solo se guardan velas cerradas: la vela en curso que devuelve fetch_ohlcv
+nunca entra en el archivo.
+
+Uso (descargar o actualizar el histórico):
+    python candle_store.py DOGE/USDT 1m --days 365
+"""
+
+import argparse
+import os
+import threading
+import time
+from typing import Optional, List, Tuple, Dict
+
+import ccxt
+import numpy as np
+
+import config
+
+
+RECORD_FIELDS = 6
+RECORD_SIZE = RECORD_FIELDS * 8
+DTYPE = np.dtype('<f8')
+
+
+def timeframe_ms(timeframe: str) -> int:
+    """
+    Duración de una vela en milisegundos (ej: '1m' -> 60000)
+    """
+    return ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+
+class CandleStore:
+    """
+    Almacén de velas por símbolo y timeframe con append incremental
+    """
+
+    def __init__(self, root: str = config.CANDLE_CACHE_DIR):
+        """
+        Args:
+            root: Directorio donde se guardan los archivos de velas
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._maps: Dict[str, Tuple[int, np.ndarray]] = {}  # path -> (registros, memmap)
+
+    def path(self, symbol: str, timeframe: str) -> str:
+        """
+        Ruta del archivo de un símbolo y timeframe
+        """
+        name = symbol.split(':')[0].replace('/', '')
+        return os.path.join(self.root, f"{name}_{timeframe}.f64")
+
+    # ------------------------------------------------------------------
+    # Lectura (sin copia)
+    # ------------------------------------------------------------------
+
+    def _map(self, symbol: str, timeframe: str) -> np.ndarray:
+        path = self.path(symbol, timeframe)
+        try:
+            records = os.path.getsize(path) // RECORD_SIZE
+        except OSError:
+            records = 0
+        if records == 0:
+            return np.empty((0, RECORD_FIELDS), dtype=DTYPE)
+
+        cached = self._maps.get(path)
+        if cached is not None and cached[0] == records:
+            return cached[1]
+        data = np.memmap(path, dtype=DTYPE, mode='r', shape=(records, RECORD_FIELDS))
+        self._maps[path] = (records, data)
+        return data
+
+    def read(self, symbol: str, timeframe: str, since: Optional[int] = None,
+             until: Optional[int] = None) -> np.ndarray:
+        """
+        Velas en el rango [since, until) como vista de solo lectura del archivo
+
+        Args:
+            symbol: Par de trading
+            timeframe: Timeframe de las velas
+            since: Timestamp inicial en ms (incluido)
+            until: Timestamp final en ms (excluido)
+
+        Returns:
+            Array (N, 6) con timestamp, open, high, low, close, volume
+        """
+        data = self._map(symbol, timeframe)
+        timestamps = data[:, 0]
+        start = 0 if since is None else int(np.searchsorted(timestamps, since, 'left'))
+        end = len(data) if until is None else int(np.searchsorted(timestamps, until, 'left'))
+        return data[start:end]
+
+    def read_last(self, symbol: str, timeframe: str, count: int) -> np.ndarray:
+        """
+        Las ``count`` velas más recientes (vista de solo lectura)
+        """
+        data = self._map(symbol, timeframe)
+        return data[max(0, len(data) - count):]
+
+    def read_list(self, symbol: str, timeframe: str, since: Optional[int] = None,
+                  until: Optional[int] = None) -> List[list]:
+        """
+        Velas del rango en formato CCXT (listas con timestamp entero)
+        """
+        return [[int(c[0])] + c[1:] for c in self.read(symbol, timeframe, since, until).tolist()]
+
+    def last_timestamp(self, symbol: str, timeframe: str) -> Optional[int]:
+        """
+        Timestamp (ms) de la última vela guardada, o None si no hay datos
+        """
+        data = self._map(symbol, timeframe)
+        return int(data[-1, 0]) if len(data) else None
+
+    def find_gaps(self, symbol: str, timeframe: str) -> List[Tuple[int, int]]:
+        """
+        Huecos entre velas guardadas
+
+        Returns:
+            Lista de rangos [inicio, fin) en ms que faltan
+        """
+        step = timeframe_ms(timeframe)
+        timestamps = self._map(symbol, timeframe)[:, 0]
+        holes = np.nonzero(np.diff(timestamps) > step)[0]
+        return [(int(timestamps[i]) + step, int(timestamps[i + 1])) for i in holes]
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _to_array(candles) -> np.ndarray:
+        array = np.asarray(candles, dtype=DTYPE).reshape(-1, RECORD_FIELDS)
+        if len(array) > 1:
+            array = array[np.argsort(array[:, 0], kind='stable')]
+            keep = np.append(np.diff(array[:, 0]) > 0, True)  # Ante duplicados gana la última
+            array = array[keep]
+        return array
+
+    def append(self, symbol: str, timeframe: str, candles) -> int:
+        """
+        Añade al final las velas posteriores a la última guardada
+
+        Args:
+            candles: Velas cerradas en formato CCXT (o array (N, 6))
+
+        Returns:
+            Número de velas añadidas
+        """
+        array = self._to_array(candles)
+        with self._lock:
+            last = self.last_timestamp(symbol, timeframe)
+            if last is not None:
+                array = array[array[:, 0] > last]
+            if len(array) == 0:
+                return 0
+            path = self.path(symbol, timeframe)
+            with open(path, 'ab') as f:
+                size = f.tell()
+                if size % RECORD_SIZE:
+                    f.truncate(size - size % RECORD_SIZE)  # Registro a medias de una escritura interrumpida
+                    f.seek(0, os.SEEK_END)
+                f.write(array.astype(DTYPE, copy=False).tobytes())
+            return len(array)
+
+    def merge(self, symbol: str, timeframe: str, candles) -> int:
+        """
+        Inserta velas en cualquier posición (relleno de huecos)
+
+        Reescribe el archivo en uno temporal y lo sustituye de forma atómica;
+        las vistas ya entregadas siguen apuntando a los datos anteriores.
+
+        Returns:
+            Número de velas nuevas
+        """
+        array = self._to_array(candles)
+        if len(array) == 0:
+            return 0
+        with self._lock:
+            existing = self._map(symbol, timeframe)
+            new = array[~np.isin(array[:, 0], existing[:, 0])]
+            if len(new) == 0:
+                return 0
+            combined = self._to_array(np.concatenate([existing, new]))
+            path = self.path(symbol, timeframe)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(combined.tobytes())
+            os.replace(tmp_path, path)
+            self._maps.pop(path, None)
+            return len(new)
+
+    # ------------------------------------------------------------------
+    # Sincronización con el exchange
+    # ------------------------------------------------------------------
+
+    def _fetch_closed(self, exchange, symbol: str, timeframe: str, since: int, until: int,
+                      limit: int) -> List[list]:
+        """
+        Descarga por páginas las velas cerradas en [since, until)
+        """
+        step = timeframe_ms(timeframe)
+        collected: List[list] = []
+        while since < until:
+            page = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+            closed = [c for c in page if since <= c[0] < until]
+            collected.extend(closed)
+            if not closed or len(page) < limit:
+                break
+            since = closed[-1][0] + step
+        return collected
+
+    def sync(self, exchange, symbol: str, timeframe: str, since: Optional[int] = None,
+             limit: int = 1000, now_ms: Optional[int] = None) -> int:
+        """
+        Descarga solo las velas cerradas posteriores a la última guardada
+
+        Args:
+            exchange: Instancia del exchange de CCXT
+            symbol: Par de trading
+            timeframe: Timeframe de las velas
+            since: Inicio del histórico si todavía no hay datos (por defecto, la última página)
+            limit: Velas por petición
+            now_ms: Hora actual en ms (para tests)
+
+        Returns:
+            Número de velas añadidas
+        """
+        step = timeframe_ms(timeframe)
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        current_open = now_ms - now_ms % step
+
+        last = self.last_timestamp(symbol, timeframe)
+        if last is not None:
+            start = last + step
+        elif since is not None:
+            start = since - since % step
+        else:
+            start = current_open - limit * step
+
+        if start >= current_open:
+            return 0
+        candles = self._fetch_closed(exchange, symbol, timeframe, start, current_open, limit)
+        return self.append(symbol, timeframe, candles)
+
+    def fill_gaps(self, exchange, symbol: str, timeframe: str, limit: int = 1000) -> int:
+        """
+        Vuelve a pedir al exchange los rangos que faltan entre velas guardadas
+
+        Los huecos que el exchange tampoco tiene (mantenimientos) se quedan como están.
+
+        Returns:
+            Número de velas insertadas
+        """
+        candles: List[list] = []
+        for start, end in self.find_gaps(symbol, timeframe):
+            candles.extend(self._fetch_closed(exchange, symbol, timeframe, start, end, limit))
+        return self.merge(symbol, timeframe, candles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Descarga o actualiza la caché local de velas')
+    parser.add_argument('symbol', nargs='?', default=config.SYMBOL, help='Par de trading')
+    parser.add_argument('timeframe', nargs='?', default=config.TIMEFRAME, help='Timeframe')
+    parser.add_argument('--days', type=float, default=30, help='Días de histórico si no hay caché')
+    parser.add_argument('--spot', action='store_true', help='Velas de spot en vez de Futures')
+    args = parser.parse_args()
+
+    exchange = ccxt.binance({'enableRateLimit': True,
+                             'options': {'defaultType': 'spot' if args.spot else 'future'}})
+    store = CandleStore()
+    since = int((time.time() - args.days * 86400) * 1000)
+
+    started = time.perf_counter()
+    added = store.sync(exchange, args.symbol, args.timeframe, since=since)
+    filled = store.fill_gaps(exchange, args.symbol, args.timeframe)
+    total = len(store.read(args.symbol, args.timeframe))
+    print(f"✅ {added} velas nuevas, {filled} huecos rellenados, {total:,} velas en "
+          f"{store.path(args.symbol, args.timeframe)} ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
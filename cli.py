@@ -0,0 +1,227 @@
+"""
+Punto de entrada de línea de comandos del bot de scalping
+
+Subcomandos:
+- run: arranca el bot (menú de modo si no se indica --mode)
+- backtest: backtest offline (mismas opciones que backtest.py)
+- status: balance, posiciones y órdenes abiertas
+- flatten: cancela las órdenes abiertas y cierra las posiciones a mercado
+- headless: modo automático sin TTY con configuración de entorno/archivo (headless.py)
+
+Los módulos pesados (ccxt, el bot, pandas, keyboard) se importan dentro de
+cada subcomando, así que ``--help`` y los comandos que no los necesitan
+arrancan en milisegundos. El tiempo de arranque se mide con
+benchmarks/bench_cold_start.py.
+
+Uso:
+    python cli.py run [--mode automatic] [--yes]
+    python cli.py backtest velas.csv --ema 12
+    python cli.py status [--symbol DOGE/USDT]
+    python cli.py flatten [--symbol DOGE/USDT] [--dry-run] [--yes]
+    python cli.py headless [--config instancia.json] [--confirm-real-trading]
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+
+import config
+
+
+def _symbols(args) -> List[str]:
+    """Símbolos indicados con --symbol o, si no hay, los de config.SYMBOLS"""
+    return args.symbol or list(dict.fromkeys([config.SYMBOL, *config.SYMBOLS]))
+
+
+def _connect(symbols: List[str]):
+    """
+    Crea una instancia de ccxt.binance para consultas y cierres puntuales
+
+    A diferencia de ScalpingBot._setup_exchange no cambia apalancamiento ni
+    modo de margen: solo sincroniza la hora y carga los mercados.
+
+    Args:
+        symbols: Símbolos que se van a consultar (para la caché de mercados)
+
+    Returns:
+        Instancia del exchange
+    """
+    import ccxt
+    import rate_limit
+    import transport
+    import warm_start
+
+    market_type = 'future' if config.USE_FUTURES else 'spot'
+    sandbox = config.USE_SANDBOX and not config.ENABLE_REAL_TRADING
+    exchange = ccxt.binance({
+        'apiKey': config.API_KEY,
+        'secret': config.API_SECRET,
+        'enableRateLimit': True,
+        'options': {
+            'defaultType': market_type,
+            'recvWindow': 60000,
+        }
+    })
+    if sandbox:
+        exchange.set_sandbox_mode(True)
+    if config.USE_TUNED_TRANSPORT:
+        transport.configure_ccxt(exchange)
+    if config.USE_RATE_LIMIT_SCHEDULER:
+        rate_limit.instrument_ccxt(exchange)
+
+    if config.USE_WARM_START:
+        warm_start.load_time_difference(exchange, market_type, sandbox)
+        warm_start.load_markets(exchange, symbols, market_type, sandbox)
+    else:
+        exchange.load_time_difference()
+        exchange.load_markets()
+    return exchange
+
+
+def cmd_run(args) -> int:
+    """Arranca el bot como main.py (con --mode y --yes sin preguntas)"""
+    import main as bot_main
+
+    if not bot_main.check_credentials():
+        return 1
+    operation_mode = args.mode or bot_main.ask_operation_mode()
+    if operation_mode is None:
+        return 1
+    if not args.yes and not bot_main.confirm_real_trading():
+        return 1
+    bot_main.create_bot(operation_mode).run()
+    return 0
+
+
+def cmd_backtest(args, extra: List[str]) -> int:
+    """Delega en backtest.main con el resto de argumentos"""
+    import backtest
+
+    backtest.main(extra)
+    return 0
+
+
+def cmd_status(args) -> int:
+    """Imprime balance, posiciones y órdenes abiertas de cada símbolo"""
+    import utils
+
+    symbols = _symbols(args)
+    exchange = _connect(symbols)
+
+    if config.USE_FUTURES:
+        balance = utils.get_futures_available_balance(exchange, 'USDT')
+    else:
+        balance = utils.get_balance(exchange, 'USDT')
+    print(f"💰 Balance disponible: {balance if balance is not None else '?'} USDT")
+
+    for symbol in symbols:
+        print(f"\n📊 {symbol}")
+        if config.USE_FUTURES:
+            position = utils.get_open_positions(exchange, symbol)
+            if position:
+                print(f"   Posición {position['side']}: {position['contracts']} @ ${position['entryPrice']:.4f} "
+                      f"(mark ${position['markPrice']:.4f}, PnL {position['unrealizedPnl']:+.2f} USDT, "
+                      f"{position['leverage']:.0f}x)")
+            else:
+                print("   Sin posición abierta")
+        orders = exchange.fetch_open_orders(symbol)
+        for order in orders:
+            print(f"   Orden {order['id']}: {order['type']} {order['side']} {order['amount']} @ {order['price']}")
+        if not orders:
+            print("   Sin órdenes abiertas")
+    return 0
+
+
+def cmd_flatten(args) -> int:
+    """Cancela las órdenes abiertas y cierra las posiciones (orden de mercado reduceOnly)"""
+    import utils
+
+    symbols = _symbols(args)
+    if not args.yes and not args.dry_run:
+        response = input(f"\n¿Cancelar órdenes y cerrar posiciones en {', '.join(symbols)}? "
+                         f"(escribe 'SI' para confirmar): ")
+        if response != 'SI':
+            print("❌ Operación cancelada por el usuario")
+            return 1
+
+    exchange = _connect(symbols)
+    failed = False
+    for symbol in symbols:
+        orders = exchange.fetch_open_orders(symbol)
+        position = utils.get_open_positions(exchange, symbol) if config.USE_FUTURES else None
+        if args.dry_run:
+            print(f"[SIMULACIÓN] {symbol}: se cancelarían {len(orders)} órdenes"
+                  + (f" y se cerraría {position['side']} {position['contracts']}" if position else ""))
+            continue
+
+        try:
+            if orders:
+                exchange.cancel_all_orders(symbol)
+                print(f"🗑️  {symbol}: {len(orders)} órdenes canceladas")
+            if position:
+                side = 'sell' if position['side'] == 'LONG' else 'buy'
+                exchange.create_order(symbol, 'market', side, position['contracts'], None, {'reduceOnly': True})
+                print(f"✅ {symbol}: {position['side']} de {position['contracts']} cerrada a mercado")
+            elif not orders:
+                print(f"✅ {symbol}: nada que cerrar")
+        except Exception as e:
+            print(f"❌ Error cerrando {symbol}: {e}")
+            failed = True
+    return 1 if failed else 0
+
+
+def cmd_headless(args) -> int:
+    """Arranca el bot sin TTY (ver headless.py)"""
+    import headless
+
+    return headless.run(args.config, args.confirm_real_trading)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Parser con los subcomandos run, backtest, status, flatten y headless"""
+    parser = argparse.ArgumentParser(prog='cli.py', description='Bot de scalping para Binance')
+    commands = parser.add_subparsers(dest='command', metavar='{run,backtest,status,flatten,headless}')
+    commands.required = True
+
+    run = commands.add_parser('run', help='Arrancar el bot')
+    run.add_argument('--mode', choices=['manual', 'automatic'], help='Modo de operación (sin menú)')
+    run.add_argument('--yes', action='store_true', help='No pedir confirmación con trading real')
+
+    # Las opciones se pasan tal cual a backtest.py (python cli.py backtest --help muestra las suyas)
+    commands.add_parser('backtest', help='Backtest offline (opciones de backtest.py)', add_help=False)
+
+    status = commands.add_parser('status', help='Balance, posiciones y órdenes abiertas')
+    status.add_argument('--symbol', action='append', help='Símbolo (repetible; por defecto config.SYMBOLS)')
+
+    flatten = commands.add_parser('flatten', help='Cancelar órdenes y cerrar posiciones')
+    flatten.add_argument('--symbol', action='append', help='Símbolo (repetible; por defecto config.SYMBOLS)')
+    flatten.add_argument('--dry-run', action='store_true', help='Solo mostrar lo que se haría')
+    flatten.add_argument('--yes', action='store_true', help='No pedir confirmación')
+
+    headless = commands.add_parser('headless', help='Modo automático sin TTY (configuración de entorno/archivo)')
+    headless.add_argument('--config', help='Archivo JSON con constantes de config.py (o SCALPER_CONFIG_FILE)')
+    headless.add_argument('--confirm-real-trading', action='store_true',
+                          help='Confirmar el trading real (o SCALPER_CONFIRM_REAL_TRADING=1)')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Args:
+        argv: Argumentos (por defecto sys.argv[1:])
+
+    Returns:
+        Código de salida
+    """
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == 'backtest':
+        return cmd_backtest(args, extra)
+    if extra:
+        parser.error(f"argumentos no reconocidos: {' '.join(extra)}")
+    return {'run': cmd_run, 'status': cmd_status, 'flatten': cmd_flatten,
+            'headless': cmd_headless}[args.command](args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
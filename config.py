@@ -4,6 +4,7 @@ API_SECRET = ''
 
 # Trading configuration
 SYMBOL = 'DOGE/USDT'  # Trading pair
+SYMBOLS = [SYMBOL]  # Pares para el motor multi-símbolo (con más de uno, el modo automático usa engine.py)
 TIMEFRAME = '1m'  # 1 minute candles
 EMA_PERIOD = 12  # ⚠️ Reducido para más sensibilidad
 
@@ -25,8 +26,54 @@ TARGET_PROFIT_USDT = 2.0  # Ganancia objetivo por operación en USDT
 # Execution settings
 LOOP_INTERVAL = 3  # Seconds between each loop iteration (3-5 seconds)
 COOLDOWN_SECONDS = 60  # ⚠️ Tiempo de espera después de cerrar posición (evita overtrading)
+RECONCILE_INTERVAL = 30  # Segundos entre reconciliaciones del estado local con el exchange (sin stream de usuario: cada LOOP_INTERVAL)
 ENABLE_REAL_TRADING = True  # ⚠️ DESACTIVADO - Probar en testnet primero
 ENABLE_SHORT_POSITIONS = True  # ⚠️ Permitir posiciones SHORT (venta en corto)
+USE_ASYNC_BOT = False  # Modo automático con ccxt.async_support (peticiones independientes en paralelo)
+USE_PROTECTIVE_ORDERS = True  # Al ejecutarse la entrada, dejar en el exchange el take profit (LIMIT reduceOnly) y el stop loss (STOP_MARKET closePosition)
+ENTRY_PRICE_MODE = 'join'  # Precio LIMIT de entrada con el libro local: 'join' (mejor bid/ask de nuestro lado), 'improve' (un tick dentro del spread), 'cross' (contra el libro hasta completar la cantidad) o 'last' (último precio negociado)
+ENTRY_QUEUE_MAX_AHEAD_USDT = 0.0  # Con 'join', si en el mejor nivel hay más de estos USDT por delante se mejora un tick cuando el spread lo permite (0 = nunca)
+ENTRY_ORDER_TIMEOUT = 15  # Segundos que la entrada LIMIT puede esperar sin ejecutarse antes de moverla al nuevo precio o cancelarla (0 = esperar siempre)
+ENTRY_MAX_REPRICES = 3  # Veces que se mueve la entrada al nuevo precio antes de cancelarla
+ENTRY_MAX_CHASE_PERCENT = 0.2  # Si el nuevo precio se aleja más de este % del precio de la señal, se cancela la entrada en vez de perseguirlo (0 = sin límite)
+ENTRY_REPRICE_METHOD = 'edit'  # 'edit' (modificar la orden en una petición: PUT /fapi/v1/order en Futures, cancelReplace en Spot) o 'cancel_replace' (cancelar y colocar otra)
+USE_SIMULATOR = False  # Sin trading real, enviar las órdenes al simulador local (sim_exchange.py) en vez de darlas por ejecutadas: se ejecutan con el precio real, con comisiones y margen
+SIMULATOR_BALANCE_USDT = 1000.0  # Balance inicial del simulador
+
+# Market data
+USE_WEBSOCKET_FEED = True  # Leer precios del stream WebSocket en vez de fetch_ticker (REST) en cada ciclo
+EVENT_DRIVEN = True  # Evaluar la estrategia en cuanto llega un tick del feed (LOOP_INTERVAL pasa a ser solo el latido máximo)
+USE_CANDLE_CACHE = True  # Guardar las velas cerradas en disco y arrancar la EMA desde la caché local
+CANDLE_CACHE_DIR = 'data/candles'  # Directorio de la caché de velas (un archivo por símbolo y timeframe)
+USE_ORDER_BOOK = True  # Mantener un libro L2 local (snapshot REST + stream de profundidad, con detección de huecos) para el precio de entrada
+ORDER_BOOK_DEPTH = 1000  # Niveles del snapshot REST del libro (5, 10, 20, 50, 100, 500 o 1000; 1000 pesa 20 en Futures)
+USE_USER_DATA_STREAM = True  # Recibir llenados y cambios de posición por el stream de usuario (listen key) en vez de consultar posiciones en bucle
+USE_WARM_START = True  # Arranque en caliente: mercados, hora y apalancamiento/margen desde la caché local
+WARM_START_CACHE_FILE = 'data/exchange_cache.json'  # Archivo de la caché de arranque
+MARKETS_CACHE_TTL = 6 * 3600  # Segundos que son válidos los mercados y la diferencia de hora guardados
+
+# Rate limiting
+USE_RATE_LIMIT_SCHEDULER = True  # Planificador de peso compartido (sustituye a enableRateLimit de CCXT)
+RATE_LIMIT_WEIGHT_PER_MINUTE = 2400  # Peso máximo por minuto de la IP (Futures: 2400)
+RATE_LIMIT_ORDER_RESERVE = 0.2  # Fracción del peso reservada para colocar/cancelar órdenes
+
+# HTTP transport
+USE_TUNED_TRANSPORT = True  # Pool keep-alive compartido por CCXT y python-binance (TCP_NODELAY, caché de DNS)
+HTTP_POOL_SIZE = 20  # Conexiones abiertas que se conservan por host
+HTTP_TCP_NODELAY = True  # Desactivar Nagle: cada petición sale sin esperar a juntar paquetes
+HTTP_DNS_CACHE_TTL = 300  # Segundos que se reutiliza una resolución DNS (0 para desactivar la caché)
+HTTP_KEEPALIVE_TIMEOUT = 60  # Segundos que se mantiene abierta una conexión sin uso (aiohttp/HTTP2)
+HTTP_USE_HTTP2 = False  # HTTP/2 para CCXT (requiere pip install httpx[http2]; si falta se usa HTTP/1.1)
+
+# Métricas
+USE_METRICS = True  # Medir latencia, errores y peso de cada llamada al exchange por endpoint
+METRICS_HOST = '127.0.0.1'  # Dirección del endpoint de métricas (solo local)
+METRICS_PORT = 9108  # Puerto del endpoint /metrics (formato Prometheus) y /metrics.json (0 = sin endpoint)
+METRICS_SUMMARY_INTERVAL = 300  # Segundos entre resúmenes de métricas en consola (0 = solo al detener el bot)
+
+# Grabación de tráfico
+RECORD_TRAFFIC = False  # Guardar cada petición/respuesta al exchange (CCXT y python-binance) con su hora en un registro binario para reproducirlo (recording.py)
+TRAFFIC_LOG_DIR = 'data/traffic'  # Directorio de los registros de tráfico (un archivo por arranque)
 
 # Sandbox mode configuration
 USE_SANDBOX = False  # ⚠️ ACTIVADO - Usar testnet para practicar
\ No newline at end of file
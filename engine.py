@@ -0,0 +1,288 @@
+"""
+Motor multi-símbolo: varias estrategias ScalpingBot en un solo proceso
+
+Todos los bots comparten una única instancia del exchange (un solo
+load_markets y el mismo planificador de peso de peticiones), un único stream
+WebSocket con los datos de todos los símbolos, un único stream de usuario y
+una sola caché de velas.
+El motor despierta con cualquier tick y solo ejecuta el ciclo de los símbolos
+que recibieron datos nuevos (o cuyo latido de loop_interval venció).
+
+Uso:
+    python engine.py DOGE/USDT 1000SHIB/USDT XRP/USDT
+    (sin argumentos usa config.SYMBOLS)
+"""
+
+import sys
+import time
+from datetime import datetime
+from typing import List, Optional, Dict, Any
+
+import ccxt
+
+import config
+import utils
+from candle_store import CandleStore
+from main import ScalpingBot
+from market_data import MarketDataHub
+from rate_limit import RateLimitScheduler
+
+
+class TradingEngine:
+    """
+    Aloja N estrategias de scalping sobre un exchange compartido
+    """
+
+    def __init__(self, symbols: List[str], exchange: Optional[ccxt.Exchange] = None):
+        """
+        Args:
+            symbols: Pares de trading (ej: ['DOGE/USDT', 'XRP/USDT'])
+            exchange: Exchange ya conectado (por defecto lo crea el primer bot)
+        """
+        self.symbols = list(dict.fromkeys(symbols))
+        if not self.symbols:
+            raise ValueError("El motor necesita al menos un símbolo")
+
+        # El primer bot conecta (o recibe) el exchange y el resto lo reutiliza
+        first = ScalpingBot('automatic', symbol=self.symbols[0], exchange=exchange, show_configuration=False)
+        self.exchange = first.exchange
+        self.bots: List[ScalpingBot] = [first] + [
+            ScalpingBot('automatic', symbol=symbol, exchange=self.exchange, show_configuration=False)
+            for symbol in self.symbols[1:]
+        ]
+        self.loop_interval = first.loop_interval
+        self.event_driven = first.event_driven
+        self.market_data: Optional[MarketDataHub] = None
+        self._hub_sequence = 0
+
+        # Estado de planificación y consumo por símbolo
+        self._last_cycle: Dict[str, float] = {s: float('-inf') for s in self.symbols}
+        self._paused_until: Dict[str, float] = {s: 0.0 for s in self.symbols}
+        self.cycles: Dict[str, int] = {s: 0 for s in self.symbols}
+        self.cpu_seconds: Dict[str, float] = {s: 0.0 for s in self.symbols}
+
+        first._print_configuration()
+        print(f"🧩 Motor multi-símbolo: {len(self.symbols)} estrategias ({', '.join(self.symbols)})\n")
+
+    # ------------------------------------------------------------------
+    # Arranque
+    # ------------------------------------------------------------------
+
+    def _check_existing_positions(self):
+        """
+        Carga las posiciones abiertas de todos los símbolos con una sola petición
+        """
+        if not self.bots[0].use_futures:
+            return
+
+        print("🔍 Verificando posiciones abiertas...")
+        try:
+            positions = self.exchange.fetch_positions(self.symbols)
+        except Exception as e:
+            print(f"Error obteniendo posiciones: {e}")
+            positions = []
+
+        for bot in self.bots:
+            base = bot.symbol.split(':')[0]
+            own = [p for p in positions if p.get('symbol', '').split(':')[0] == base]
+            print(f"[{bot.symbol}] ", end='')
+            bot._load_existing_position(utils.find_open_position(own))
+
+    def _open_candle_store(self):
+        try:
+            store = CandleStore(config.CANDLE_CACHE_DIR)
+        except Exception as e:
+            print(f"⚠️  No se pudo abrir la caché de velas ({e}). Se descargará el histórico.")
+            return
+        for bot in self.bots:
+            bot.candle_store = store
+
+    def _start_market_data(self):
+        """
+        Arranca un solo stream WebSocket para todos los símbolos
+        """
+        first = self.bots[0]
+        order_books = {bot.symbol: bot._create_order_book() for bot in self.bots} if config.USE_ORDER_BOOK else {}
+        try:
+            hub = MarketDataHub(
+                self.symbols,
+                first.timeframe,
+                use_futures=first.use_futures,
+                use_testnet=first._use_testnet(),
+                order_books=order_books,
+                max_candles=first.ema_period + 20  # Solo hace falta cubrir huecos cortos
+            )
+            hub.start()
+        except Exception as e:
+            print(f"⚠️  No se pudo iniciar el feed WebSocket ({e}). Usando REST.")
+            return
+        self.market_data = hub
+        for bot in self.bots:
+            bot.market_data = hub.feeds[bot.symbol]
+            bot.order_book = order_books.get(bot.symbol)
+            if bot.paper_trading:
+                self.exchange.attach_feed(bot.symbol, bot.market_data)
+        print(f"📡 Feed WebSocket compartido iniciado ({len(self.symbols)} símbolos)")
+
+    def _start_user_data(self):
+        """
+        Arranca un solo stream de usuario para toda la cuenta
+        """
+        first = self.bots[0]
+        first._start_user_data()
+        if first.user_data is None:
+            return
+        for bot in self.bots[1:]:
+            bot._attach_user_data(first.user_data)
+
+    # ------------------------------------------------------------------
+    # Planificación
+    # ------------------------------------------------------------------
+
+    def _run_bot_cycle(self, bot: ScalpingBot, now: float):
+        """
+        Ejecuta un ciclo de un bot aislando sus errores del resto
+        """
+        started = time.process_time()
+        try:
+            bot._trading_cycle_automatic()
+        except (ccxt.NetworkError, ccxt.ExchangeError) as e:
+            print(f"\n⚠️  [{bot.symbol}] Error del exchange: {e}")
+            print(f"⏸️  Pausando {bot.symbol} por {self.loop_interval * 2} segundos...")
+            self._paused_until[bot.symbol] = now + self.loop_interval * 2
+        except Exception as e:
+            print(f"\n❌ [{bot.symbol}] Error inesperado: {e}")
+            self._paused_until[bot.symbol] = now + self.loop_interval * 2
+        finally:
+            self.cpu_seconds[bot.symbol] += time.process_time() - started
+            self.cycles[bot.symbol] += 1
+            self._last_cycle[bot.symbol] = now
+
+    def run_due_cycles(self) -> int:
+        """
+        Ejecuta el ciclo de los bots con ticks nuevos o con el latido vencido
+
+        Returns:
+            Número de bots que ejecutaron un ciclo
+        """
+        ran = 0
+        for bot in self.bots:
+            now = time.monotonic()
+            if now < self._paused_until[bot.symbol]:
+                continue
+
+            feed = bot.market_data
+            ticked = self.event_driven and feed is not None and feed.sequence != bot._tick_sequence
+            if not ticked and now - self._last_cycle[bot.symbol] < self.loop_interval:
+                continue
+
+            if ticked:
+                bot._tick_sequence = feed.sequence
+                bot._tick_received_at = feed.last_tick_at
+            else:
+                bot._tick_received_at = None
+            self._run_bot_cycle(bot, now)
+            ran += 1
+        return ran
+
+    def _wait_next_cycle(self):
+        """
+        Espera al próximo tick de cualquier símbolo o al próximo latido
+        """
+        now = time.monotonic()
+        next_due = min(max(self._last_cycle[s], self._paused_until[s] - self.loop_interval)
+                       for s in self.symbols) + self.loop_interval
+        timeout = max(0.0, next_due - now)
+
+        hub = self.market_data
+        if self.event_driven and hub is not None and hub.connected.is_set():
+            self._hub_sequence = hub.wait_for_update(self._hub_sequence, timeout=timeout)
+        else:
+            time.sleep(timeout)
+
+    # ------------------------------------------------------------------
+    # Loop principal
+    # ------------------------------------------------------------------
+
+    def resource_usage(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Ciclos y CPU consumida por símbolo
+        """
+        return {
+            symbol: {
+                'cycles': self.cycles[symbol],
+                'cpu_ms': self.cpu_seconds[symbol] * 1000,
+                'cpu_us_per_cycle': (self.cpu_seconds[symbol] / self.cycles[symbol] * 1e6
+                                     if self.cycles[symbol] else 0.0),
+            }
+            for symbol in self.symbols
+        }
+
+    def print_summary(self):
+        """
+        Resumen por símbolo: trades, P/L y consumo de CPU
+        """
+        usage = self.resource_usage()
+        print(f"\n📈 RESUMEN DEL MOTOR ({len(self.bots)} símbolos):")
+        print(f"   {'Símbolo':<16} {'Trades':>6} {'P/L USD':>10} {'Ciclos':>8} {'CPU/ciclo':>10}")
+        total_profit = 0.0
+        for bot in self.bots:
+            stats = usage[bot.symbol]
+            total_profit += bot.total_profit_usd
+            print(f"   {bot.symbol:<16} {bot.total_trades:>6} {bot.total_profit_usd:>10.2f} "
+                  f"{stats['cycles']:>8} {stats['cpu_us_per_cycle']:>8.0f}µs")
+            if bot.in_position:
+                print(f"      ⚠️  Posición abierta {bot.position_side} a ${bot.entry_price:.4f}")
+        print(f"   P/L Total: ${total_profit:.2f} USD")
+
+        scheduler = getattr(self.exchange, 'rate_limit_scheduler', None)
+        if isinstance(scheduler, RateLimitScheduler):
+            stats = scheduler.snapshot()
+            print(f"   Peticiones: {stats['requests']} | Con espera: {stats['throttled']} "
+                  f"({stats['wait_seconds']:.1f}s) | Peso usado: {stats['used_weight']}/{stats['weight_limit']} "
+                  f"| 429/418: {stats['rate_limited']}")
+        print()
+
+    def run(self):
+        """
+        Loop principal del motor
+        """
+        print(f"🚀 Iniciando motor de scalping con {len(self.bots)} símbolos...")
+        print(f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+        self._check_existing_positions()
+
+        if config.USE_CANDLE_CACHE:
+            self._open_candle_store()
+
+        if config.USE_WEBSOCKET_FEED:
+            self._start_market_data()
+
+        if config.USE_USER_DATA_STREAM and self.bots[0].enable_real_trading and not self.bots[0].paper_trading:
+            self._start_user_data()
+
+        if config.USE_METRICS:
+            self.bots[0]._start_metrics()
+
+        try:
+            while True:
+                self.run_due_cycles()
+                self._wait_next_cycle()
+        except KeyboardInterrupt:
+            print("\n\n⏹️  Motor detenido por el usuario")
+            self.print_summary()
+        finally:
+            if self.market_data is not None:
+                self.market_data.stop()
+            if self.bots[0].user_data is not None:
+                self.bots[0].user_data.stop()
+            self.bots[0]._stop_metrics()
+
+
+def main():
+    symbols = sys.argv[1:] or config.SYMBOLS
+    TradingEngine(symbols).run()
+
+
+if __name__ == '__main__':
+    main()
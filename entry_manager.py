@@ -0,0 +1,99 @@
+"""
+Seguimiento de la orden de entrada: re-precio y cancelación por tiempo
+
+Una entrada LIMIT que no se ejecuta deja a la estrategia esperando y el margen
+bloqueado en una orden muerta. Cuando lleva ``timeout`` segundos sin
+ejecutarse del todo:
+
+- Si se ejecutó una parte, se cancela el resto y se gestiona esa parte.
+- Si ya se movió ``max_reprices`` veces, o el nuevo precio se aleja del de la
+  señal más de ``max_chase_percent``, se cancela: el precio se ha ido y la
+  señal ya no es la misma.
+- Si no, se mueve al nuevo precio (libro local o último precio) y vuelve a
+  empezar el plazo.
+
+Este módulo solo decide; las llamadas al exchange (edit_order o
+cancelar + colocar) las hace el bot.
+"""
+
+import time
+from typing import NamedTuple, Optional
+
+from order_state import TrackedOrder
+
+
+REPRICE = 'REPRICE'
+CANCEL = 'CANCEL'
+
+
+class EntryDecision(NamedTuple):
+    """Acción sobre la orden de entrada"""
+    action: str            # REPRICE o CANCEL
+    price: Optional[float]  # Nuevo precio (REPRICE)
+    reason: str
+
+
+class EntryChase:
+    """
+    Plazo y re-precios de la orden de entrada en curso
+    """
+
+    def __init__(self, timeout: float, max_reprices: int, max_chase_percent: float):
+        """
+        Args:
+            timeout: Segundos sin ejecutarse antes de actuar (0 = esperar siempre)
+            max_reprices: Re-precios antes de cancelar
+            max_chase_percent: Distancia máxima (%) al precio de la señal (0 = sin límite)
+        """
+        self.timeout = float(timeout)
+        self.max_reprices = int(max_reprices)
+        self.max_chase_percent = float(max_chase_percent)
+        self.initial_price: Optional[float] = None
+        self.placed_at = 0.0
+        self.reprices = 0
+
+    def start(self, price: float, now: Optional[float] = None):
+        """Empieza el plazo de una entrada recién colocada"""
+        self.initial_price = price
+        self.placed_at = time.monotonic() if now is None else now
+        self.reprices = 0
+
+    def repriced(self, now: Optional[float] = None):
+        """La entrada se movió de precio (o sigue en el mejor precio): vuelve a empezar el plazo"""
+        self.reprices += 1
+        self.placed_at = time.monotonic() if now is None else now
+
+    def decide(self, order: Optional[TrackedOrder], target_price: float,
+               now: Optional[float] = None) -> Optional[EntryDecision]:
+        """
+        Decide qué hacer con la orden de entrada
+
+        Si el plazo venció pero la orden ya está en el precio objetivo no hace
+        falta moverla: se cuenta como un re-precio sin petición y vuelve a
+        empezar el plazo.
+
+        Args:
+            order: Orden de entrada en curso
+            target_price: Precio al que se colocaría ahora (ya cuantizado al tick)
+            now: time.monotonic() (por defecto el actual)
+
+        Returns:
+            EntryDecision o None si hay que seguir esperando
+        """
+        if order is None or order.is_final or self.initial_price is None or self.timeout <= 0:
+            return None
+        now = time.monotonic() if now is None else now
+        if now - self.placed_at < self.timeout:
+            return None
+
+        if order.filled > 0:
+            return EntryDecision(CANCEL, None, f"ejecutada en parte ({order.filled:g} de {order.amount:g})")
+        if self.reprices >= self.max_reprices:
+            return EntryDecision(CANCEL, None, f"sin ejecutarse tras {self.reprices} re-precios")
+        chase = abs(target_price - self.initial_price) / self.initial_price * 100
+        if self.max_chase_percent > 0 and chase > self.max_chase_percent:
+            return EntryDecision(CANCEL, None, f"el precio se alejó {chase:.2f}% de la señal")
+        if target_price == order.price:
+            self.repriced(now)
+            return None
+        return EntryDecision(REPRICE, target_price, f"re-precio {self.reprices + 1}/{self.max_reprices}")
@@ -0,0 +1,85 @@
+"""
+Servidor WebSocket local que reproduce mensajes grabados
+Se usa en los tests para probar los consumidores de streams sin conectarse a Binance
+"""
+
+import json
+import threading
+import time
+from typing import Iterable, Optional, List
+
+from websockets.sync.server import serve
+
+
+class FakeStreamServer:
+    """
+    Servidor WebSocket en un hilo que envía una secuencia de mensajes a cada cliente
+
+    Uso:
+        with FakeStreamServer(messages) as server:
+            feed = MarketDataFeed('DOGE/USDT', url=server.url)
+    """
+
+    def __init__(self, messages: Iterable, interval: float = 0.0, keep_open: bool = True):
+        """
+        Args:
+            messages: Mensajes a reproducir (dicts se serializan a JSON)
+            interval: Segundos de espera entre mensajes
+            keep_open: Mantener la conexión abierta tras el último mensaje
+        """
+        self.messages: List[str] = [m if isinstance(m, str) else json.dumps(m) for m in messages]
+        self.interval = interval
+        self.keep_open = keep_open
+        self.connections = 0
+        self.received: List[str] = []  # Mensajes enviados por los clientes
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._closing = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}"
+
+    def _handler(self, connection):
+        self.connections += 1
+        for message in self.messages:
+            if self._closing.is_set():
+                return
+            connection.send(message)
+            if self.interval:
+                time.sleep(self.interval)
+        while self.keep_open and not self._closing.is_set():
+            try:
+                self.received.append(connection.recv(timeout=0.1))
+            except TimeoutError:
+                continue
+            except Exception:
+                return
+
+    def send_to_all(self, message):
+        """
+        Envía un mensaje adicional a todos los clientes conectados
+        """
+        payload = message if isinstance(message, str) else json.dumps(message)
+        for connection in list(self._server.connections):
+            connection.send(payload)
+
+    def start(self) -> 'FakeStreamServer':
+        self._server = serve(self._handler, '127.0.0.1', 0, compression=None)
+        self.port = self._server.socket.getsockname()[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._closing.set()
+        if self._server:
+            self._server.shutdown()
+        if self._thread:
+            self._thread.join(5)
+
+    def __enter__(self) -> 'FakeStreamServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
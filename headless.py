@@ -0,0 +1,93 @@
+"""
+Arranque sin TTY para supervisores (systemd, supervisord) y contenedores
+
+Arranca directamente en modo automático, sin menú, sin ``input()`` y sin el
+módulo ``keyboard``. La configuración sale de config.py con los cambios de un
+archivo JSON y de las variables de entorno ``SCALPER_*`` (ver settings.py), así
+que cada instancia se configura desde fuera con el mismo código.
+
+Con ENABLE_REAL_TRADING activado hay que confirmarlo explícitamente con
+``--confirm-real-trading`` o ``SCALPER_CONFIRM_REAL_TRADING=1`` (sustituye a
+escribir 'SI'). SIGTERM detiene el bot igual que Ctrl+C.
+
+Códigos de salida: 0 = detenido, 2 = configuración inválida o sin credenciales,
+3 = trading real sin confirmar.
+
+Uso:
+    SCALPER_API_KEY=... SCALPER_API_SECRET=... SCALPER_SYMBOL=XRP/USDT python headless.py
+    python headless.py --config instancia.json --confirm-real-trading
+    python cli.py headless --config instancia.json
+"""
+
+import argparse
+import os
+import signal
+import sys
+from typing import List, Mapping, Optional
+
+import config
+import settings
+
+
+EXIT_CONFIG = 2
+EXIT_NOT_CONFIRMED = 3
+
+
+def _stop_on_sigterm(signum, frame):
+    # El supervisor para el proceso con SIGTERM: mismo cierre ordenado que Ctrl+C
+    raise KeyboardInterrupt
+
+
+def run(config_file: Optional[str] = None, confirm_real_trading: bool = False,
+        environ: Optional[Mapping[str, str]] = None) -> int:
+    """
+    Aplica la configuración y ejecuta el bot en modo automático
+
+    Args:
+        config_file: Archivo JSON de configuración (por defecto SCALPER_CONFIG_FILE)
+        confirm_real_trading: Confirmación de trading real (o SCALPER_CONFIRM_REAL_TRADING)
+        environ: Entorno (por defecto os.environ)
+
+    Returns:
+        Código de salida
+    """
+    environ = os.environ if environ is None else environ
+    try:
+        overrides = settings.load(config_file, environ)
+    except (OSError, ValueError) as e:
+        print(f"❌ Configuración inválida: {e}")
+        return EXIT_CONFIG
+    # Antes de importar el bot: algunos módulos leen config.py al importarse
+    settings.apply(overrides)
+    print(f"⚙️  Configuración: {settings.describe(overrides)}")
+
+    import main as bot_main
+
+    if not bot_main.check_credentials():
+        return EXIT_CONFIG
+
+    confirmed = confirm_real_trading or settings.is_true(environ.get(settings.ENV_PREFIX + 'CONFIRM_REAL_TRADING'))
+    if config.ENABLE_REAL_TRADING and not confirmed:
+        print("❌ TRADING REAL ACTIVADO sin confirmar: usa --confirm-real-trading o SCALPER_CONFIRM_REAL_TRADING=1")
+        return EXIT_NOT_CONFIRMED
+
+    # Sin TTY la salida va a un pipe: una línea por mensaje para los logs del supervisor
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(line_buffering=True)
+    signal.signal(signal.SIGTERM, _stop_on_sigterm)
+
+    bot_main.create_bot('automatic').run()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Bot de scalping sin TTY (modo automático)')
+    parser.add_argument('--config', help='Archivo JSON con constantes de config.py (o SCALPER_CONFIG_FILE)')
+    parser.add_argument('--confirm-real-trading', action='store_true',
+                        help='Confirmar el trading real (o SCALPER_CONFIRM_REAL_TRADING=1)')
+    args = parser.parse_args(argv)
+    return run(args.config, args.confirm_real_trading)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
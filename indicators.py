@@ -0,0 +1,104 @@
+"""
+Indicadores técnicos incrementales para el bot de scalping
+Mantienen estado entre ciclos para no recalcular toda la serie en cada loop
+"""
+
+from typing import Iterable, Optional
+
+
+class IncrementalEMA:
+    """
+    Media Móvil Exponencial (EMA) incremental
+
+    Se inicializa una sola vez con el histórico de cierres y luego se
+    actualiza en O(1) por cada vela cerrada. Reproduce exactamente el
+    resultado de ``utils.calculate_ema`` (``ewm(span=period, adjust=False)``)
+    cuando recibe la misma serie de precios.
+    """
+
+    def __init__(self, period: int):
+        """
+        Args:
+            period: Periodo de la EMA
+        """
+        if period < 1:
+            raise ValueError(f"Periodo de EMA inválido: {period}")
+
+        self.period = period
+        self.alpha = 2.0 / (period + 1.0)
+        self._old_weight = 1.0 - self.alpha
+        self.value: Optional[float] = None  # EMA sobre velas cerradas
+        self.count = 0  # Número de velas cerradas procesadas
+        self.last_timestamp: Optional[int] = None  # Timestamp (ms) de la última vela cerrada
+
+    @property
+    def ready(self) -> bool:
+        """True si ya se procesaron al menos ``period`` velas"""
+        return self.count >= self.period
+
+    def _step(self, previous: float, price: float) -> float:
+        """
+        Aplica un paso de la recurrencia de la EMA
+
+        Usa la misma forma que pandas (suma ponderada normalizada) para que
+        el redondeo en punto flotante sea idéntico al de ``ewm().mean()``.
+        """
+        if previous == price:
+            return previous
+        return (self._old_weight * previous + self.alpha * price) / (self._old_weight + self.alpha)
+
+    def seed(self, closes: Iterable[float], last_timestamp: Optional[int] = None) -> Optional[float]:
+        """
+        Inicializa la EMA desde cero con un histórico de cierres
+
+        Args:
+            closes: Precios de cierre de velas cerradas, del más antiguo al más reciente
+            last_timestamp: Timestamp (ms) de apertura de la última vela del histórico
+
+        Returns:
+            Valor de la EMA tras procesar el histórico
+        """
+        self.value = None
+        self.count = 0
+        for close in closes:
+            self.update(close)
+        self.last_timestamp = last_timestamp
+        return self.value
+
+    def update(self, close: float, timestamp: Optional[int] = None) -> float:
+        """
+        Incorpora una vela cerrada (O(1))
+
+        Args:
+            close: Precio de cierre de la vela
+            timestamp: Timestamp (ms) de apertura de la vela
+
+        Returns:
+            Nuevo valor de la EMA
+        """
+        close = float(close)
+        if self.value is None:
+            self.value = close
+        else:
+            self.value = self._step(self.value, close)
+        self.count += 1
+        if timestamp is not None:
+            self.last_timestamp = timestamp
+        return self.value
+
+    def peek(self, price: float) -> Optional[float]:
+        """
+        Calcula la EMA incluyendo la vela en curso sin modificar el estado
+
+        Equivale a ``calculate_ema`` sobre una serie cuya última vela todavía
+        está abierta y cotiza a ``price``. Se puede llamar en cada tick.
+
+        Args:
+            price: Precio actual (cierre provisional de la vela en curso)
+
+        Returns:
+            Valor provisional de la EMA o None si no se ha inicializado
+        """
+        if self.value is None:
+            return None
+        return self._step(self.value, float(price))
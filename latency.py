@@ -0,0 +1,139 @@
+"""
+Histogramas de latencia para medir tiempos del bot
+"""
+
+import bisect
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+
+# Límites superiores de cada bucket en milisegundos
+DEFAULT_BUCKETS_MS: Tuple[float, ...] = (
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000
+)
+
+
+class LatencyHistogram:
+    """
+    Histograma de latencias con buckets fijos (memoria constante)
+
+    Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self, name: str, buckets_ms: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        """
+        Args:
+            name: Nombre que se muestra en los resúmenes
+            buckets_ms: Límites superiores de los buckets en milisegundos
+        """
+        self.name = name
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)  # El último bucket es +Inf
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms: Optional[float] = None
+
+    def record(self, seconds: float):
+        """
+        Registra una muestra
+
+        Args:
+            seconds: Duración en segundos
+        """
+        ms = seconds * 1000.0
+        index = bisect.bisect_left(self.buckets_ms, ms)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total_ms += ms
+            if self.min_ms is None or ms < self.min_ms:
+                self.min_ms = ms
+            if self.max_ms is None or ms > self.max_ms:
+                self.max_ms = ms
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Percentil aproximado (límite superior del bucket que lo contiene)
+
+        Args:
+            p: Percentil entre 0 y 100
+
+        Returns:
+            Latencia en milisegundos o None si no hay muestras
+        """
+        with self._lock:
+            if self.count == 0:
+                return None
+            target = max(1, int(round(self.count * p / 100.0)))
+            seen = 0
+            for index, bucket_count in enumerate(self._counts):
+                seen += bucket_count
+                if seen >= target:
+                    if index < len(self.buckets_ms):
+                        return min(self.buckets_ms[index], self.max_ms)
+                    return self.max_ms
+        return self.max_ms
+
+    def reset(self):
+        """
+        Borra todas las muestras
+        """
+        with self._lock:
+            self._counts = [0] * (len(self.buckets_ms) + 1)
+            self.count = 0
+            self.total_ms = 0.0
+            self.min_ms = None
+            self.max_ms = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Devuelve el estado del histograma como dict (buckets acumulados)
+        """
+        with self._lock:
+            counts = list(self._counts)
+            count, total, low, high = self.count, self.total_ms, self.min_ms, self.max_ms
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets_ms + (float('inf'),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {
+            'name': self.name,
+            'count': count,
+            'sum_ms': total,
+            'min_ms': low,
+            'max_ms': high,
+            'avg_ms': total / count if count else None,
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+            'buckets': cumulative,
+        }
+
+    def format(self, width: int = 30) -> str:
+        """
+        Resumen en texto con barras para mostrar en consola
+        """
+        with self._lock:
+            counts = list(self._counts)
+            count = self.count
+        if count == 0:
+            return f"{self.name}: sin muestras"
+
+        snap = self.snapshot()
+        lines = [
+            f"{self.name}: n={count} avg={snap['avg_ms']:.2f}ms "
+            f"p50≤{snap['p50_ms']:.2f}ms p90≤{snap['p90_ms']:.2f}ms p99≤{snap['p99_ms']:.2f}ms "
+            f"max={snap['max_ms']:.2f}ms"
+        ]
+        peak = max(counts)
+        lower = 0.0
+        for bound, bucket_count in zip(self.buckets_ms + (float('inf'),), counts):
+            if bucket_count:
+                bar = '█' * max(1, int(bucket_count / peak * width))
+                upper = '+Inf' if bound == float('inf') else f"{bound:g}"
+                lines.append(f"   {lower:>7g} - {upper:>6} ms | {bar} {bucket_count}")
+            lower = bound
+        return "\n".join(lines)
@@ -11,17 +11,53 @@ Modos de operación:
 """
 
 import ccxt
+import gc
 import time
 import sys
+from collections import deque
 from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Tuple
 import config
 import utils
+import batch_orders
+import rate_limit
+import recording
+import metrics
+import market_filters
+import order_book
+import entry_manager
+import sim_exchange
+import transport
+import warm_start
+from indicators import IncrementalEMA
+from market_data import MarketDataFeed, stream_symbol
+from candle_store import CandleStore
+from user_data import UserDataStream, ccxt_listen_key_functions
+import order_state
+from order_state import PositionState
+from latency import LatencyHistogram
 
-try:
-    import keyboard
-except ImportError:
-    keyboard = None
-    print("⚠️  Advertencia: Módulo 'keyboard' no disponible. Modo manual deshabilitado.")
+# 'keyboard' se importa solo en modo manual (ver _load_keyboard): tarda en cargar
+# y en Linux exige root, así que no debe frenar ni romper el modo automático
+keyboard = None
+
+
+def _load_keyboard():
+    """
+    Importa el módulo 'keyboard' la primera vez que se necesita
+    
+    Returns:
+        El módulo o None si no está disponible
+    """
+    global keyboard
+    if keyboard is None:
+        try:
+            import keyboard as keyboard_module
+        except ImportError:
+            print("⚠️  Advertencia: Módulo 'keyboard' no disponible. Modo manual deshabilitado.")
+            return None
+        keyboard = keyboard_module
+    return keyboard
 
 
 class ScalpingBot:
@@ -30,14 +66,19 @@ class ScalpingBot:
     Soporta modo manual y automático
     """
     
-    def __init__(self, operation_mode='automatic'):
+    def __init__(self, operation_mode='automatic', symbol: Optional[str] = None,
+                 exchange: Optional[ccxt.Exchange] = None, show_configuration: bool = True):
         """
         Inicializa el bot con la configuración de config.py
         
         Args:
             operation_mode: 'manual' o 'automatic'
+            symbol: Par de trading (por defecto config.SYMBOL)
+            exchange: Exchange ya conectado y compartido con otros bots (opcional).
+                      Si se indica, no se vuelven a cargar los mercados.
+            show_configuration: Mostrar el resumen de configuración al iniciar
         """
-        self.symbol = config.SYMBOL
+        self.symbol = symbol or config.SYMBOL
         self.timeframe = config.TIMEFRAME
         self.ema_period = config.EMA_PERIOD
         self.position_size = config.POSITION_SIZE_USDT
@@ -48,6 +89,7 @@ class ScalpingBot:
         self.target_profit_usdt = config.TARGET_PROFIT_USDT
         self.loop_interval = config.LOOP_INTERVAL
         self.enable_real_trading = config.ENABLE_REAL_TRADING
+        self.paper_trading = False  # Simulador local sin trading real (se decide al conectar)
         self.cooldown_seconds = config.COOLDOWN_SECONDS
         self.enable_short_positions = config.ENABLE_SHORT_POSITIONS
         
@@ -69,6 +111,49 @@ class ScalpingBot:
         self.last_close_time = None  # Timestamp de última posición cerrada
         self.active_order_id = None  # ID de la orden activa
         
+        # Máquina de estados de órdenes y posición: los atributos anteriores se
+        # derivan de ella y solo cambian con eventos del exchange
+        self.position_state = PositionState()
+        self._exchange_events = deque()  # (tipo, registro) del stream de usuario pendientes de aplicar
+        
+        # Take profit y stop loss residentes en el exchange: se colocan al ejecutarse la
+        # entrada y las salidas que sobran se cancelan (ver _sync_protective_orders)
+        self._protection_due = False
+        self._orders_to_cancel = []
+        self.reconcile_interval = config.RECONCILE_INTERVAL
+        self._last_reconcile = time.monotonic()
+        
+        # Entrada LIMIT que no se ejecuta: se mueve al nuevo precio o se cancela (ver entry_manager.py)
+        self.entry_chase = entry_manager.EntryChase(
+            config.ENTRY_ORDER_TIMEOUT, config.ENTRY_MAX_REPRICES, config.ENTRY_MAX_CHASE_PERCENT
+        )
+        
+        # EMA incremental (se inicializa con el histórico en el primer ciclo)
+        self.ema_engine = IncrementalEMA(self.ema_period)
+        self.timeframe_ms = ccxt.Exchange.parse_timeframe(self.timeframe) * 1000
+        
+        # Feed de precios por WebSocket (se arranca en run())
+        self.market_data = None
+        
+        # Libro L2 local para el precio de entrada (llega por el mismo stream que el feed)
+        self.order_book = None
+        
+        # Caché local de velas (se abre en run())
+        self.candle_store = None
+        
+        # Stream de datos de usuario: llenados y posiciones sin polling (se arranca en run())
+        self.user_data = None
+        
+        # Endpoint de métricas y resumen periódico (se arranca en run())
+        self.metrics_server = None
+        
+        # Modo event-driven: cada tick del feed despierta a la estrategia
+        self.event_driven = config.EVENT_DRIVEN
+        self._tick_sequence = 0
+        self._tick_received_at = None  # time.perf_counter() del tick que originó el ciclo
+        self._last_status_print = 0.0
+        self.decision_latency = LatencyHistogram('⚡ Latencia tick→orden')
+        
         # Estadísticas
         self.total_trades = 0
         self.winning_trades = 0
@@ -76,10 +161,32 @@ class ScalpingBot:
         self.total_profit_usd = 0.0
         
         # Configurar exchange
-        self.exchange = self._setup_exchange()
+        if exchange is None:
+            self.exchange = self._setup_exchange()
+        else:
+            self.exchange = exchange
+            if self.use_futures:
+                self._configure_futures_symbol(exchange)
+        
+        # Sin trading real las órdenes se ejecutan en el simulador local con los precios del exchange
+        self.paper_trading = self._paper_trading_enabled()
+        if self.paper_trading:
+            if not isinstance(self.exchange, sim_exchange.SimulatedExchange):
+                self.exchange = sim_exchange.SimulatedExchange(self.exchange, config.SIMULATOR_BALANCE_USDT,
+                                                               self.leverage, self.margin_mode)
+            # Mismo camino que las órdenes reales (máquina de estados, reconciliación)
+            self.enable_real_trading = True
+        
+        # Filtros del símbolo (tick size, step size, notional mínimo) leídos una vez de load_markets
+        self.filters = market_filters.get_filters(self.exchange, self.symbol)
+        
+        # Lo creado al arrancar (ccxt, mercados, configuración) vive hasta el final:
+        # fuera del GC, una recolección completa no para un ciclo ~100 ms
+        gc.freeze()
         
         # Mostrar configuración
-        self._print_configuration()
+        if show_configuration:
+            self._print_configuration()
     
     def _setup_exchange(self) -> ccxt.Exchange:
         """
@@ -103,45 +210,145 @@ class ScalpingBot:
             })
             
             # Configurar para sandbox/testnet si está habilitado
-            if config.USE_SANDBOX and not self.enable_real_trading:
+            if self._use_testnet():
                 exchange.set_sandbox_mode(True)
                 print("⚠️  MODO SANDBOX ACTIVADO - No se usará dinero real")
             
+            # Conexiones keep-alive compartidas (TCP_NODELAY, caché de DNS)
+            if config.USE_TUNED_TRANSPORT:
+                transport.configure_ccxt(exchange)
+            
+            # Peso de peticiones compartido, con prioridad para las órdenes
+            if config.USE_RATE_LIMIT_SCHEDULER:
+                rate_limit.instrument_ccxt(exchange)
+            
+            # Latencia, errores y peso por endpoint (incluye la espera del planificador)
+            if config.USE_METRICS:
+                metrics.instrument_ccxt(exchange)
+            
+            # Cada petición y respuesta al registro de tráfico (se reproduce con recording.py)
+            if config.RECORD_TRAFFIC is True:
+                recording.record_ccxt(exchange, recording.open_log(recording.SOURCE_CCXT))
+            
             # Sincronizar tiempo con el servidor de Binance
             print("🕐 Sincronizando tiempo con el servidor...")
-            exchange.load_time_difference()
-            
-            # Verificar conexión
-            exchange.load_markets()
+            if self._warm_start_enabled(exchange):
+                # Hora y mercados desde la caché local (sin peticiones si no han caducado)
+                sandbox = self._use_testnet()
+                warm_start.load_time_difference(exchange, market_type, sandbox)
+                if warm_start.load_markets(exchange, self._warm_start_symbols(), market_type, sandbox):
+                    print("⚡ Mercados cargados desde la caché local")
+            else:
+                exchange.load_time_difference()
+                
+                # Verificar conexión
+                exchange.load_markets()
             print(f"✅ Conectado a Binance exitosamente")
             
             # Configurar apalancamiento y margin mode si es Futures
             if self.use_futures:
-                try:
-                    # Establecer apalancamiento
-                    exchange.fapiPrivate_post_leverage({
-                        'symbol': self.symbol.replace('/', ''),
-                        'leverage': self.leverage
-                    })
-                    print(f"✅ Apalancamiento configurado: {self.leverage}x")
-                    
-                    # Establecer modo de margen (isolated/cross)
-                    margin_type = 'ISOLATED' if self.margin_mode == 'isolated' else 'CROSSED'
-                    exchange.fapiPrivate_post_margintype({
-                        'symbol': self.symbol.replace('/', ''),
-                        'marginType': margin_type
-                    })
-                    print(f"✅ Modo de margen: {margin_type}")
-                    
-                except Exception as e:
-                    print(f"⚠️  Advertencia al configurar Futures: {e}")
-                    print(f"   (Es normal si ya estaba configurado)")
+                self._configure_futures_symbol(exchange)
             
             return exchange
         except Exception as e:
             print(f"❌ Error configurando exchange: {e}")
             sys.exit(1)
     
+    def _use_testnet(self) -> bool:
+        """True si se conecta a la testnet (USE_SANDBOX sin trading real, también con el simulador)"""
+        return config.USE_SANDBOX and (self.paper_trading or not self.enable_real_trading)
+    
+    def _paper_trading_enabled(self) -> bool:
+        """True si sin trading real se usa el simulador (sim_exchange.py; precios de un exchange de CCXT)"""
+        return not self.enable_real_trading and bool(config.USE_SIMULATOR) and \
+            isinstance(self.exchange, (ccxt.Exchange, sim_exchange.SimulatedExchange))
+    
+    def _warm_start_enabled(self, exchange) -> bool:
+        """
+        True si se usa la caché de arranque (solo con exchanges reales de CCXT)
+        
+        Grabando o reproduciendo tráfico no se usa: el registro tiene que
+        contener la hora, los mercados y el apalancamiento para reproducirse solo.
+        """
+        return bool(config.USE_WARM_START) and warm_start.supports(exchange) and not recording.is_attached(exchange)
+    
+    def _warm_start_symbols(self) -> list:
+        """Símbolos que se guardan en la caché de mercados (el del bot y los del motor)"""
+        return list(dict.fromkeys([self.symbol, *config.SYMBOLS]))
+    
+    def _warm_start_account(self) -> str:
+        """Cuenta de la caché de arranque (hash de la API key y red)"""
+        return warm_start.account_key(config.API_KEY, self._use_testnet())
+    
+    def _configure_futures_symbol(self, exchange: ccxt.Exchange):
+        """
+        Configura apalancamiento y modo de margen del símbolo en Futures
+        
+        Con arranque en caliente no se repiten las llamadas si la cuenta ya
+        tiene la misma configuración aplicada por el bot.
+        
+        Args:
+            exchange: Instancia del exchange de CCXT
+        """
+        symbol_id = self.symbol.replace('/', '')
+        margin_type = 'ISOLATED' if self.margin_mode == 'isolated' else 'CROSSED'
+        use_cache = self._warm_start_enabled(exchange)
+        if use_cache and warm_start.futures_config_matches(self._warm_start_account(), symbol_id,
+                                                            self.leverage, margin_type):
+            print(f"✅ Apalancamiento {self.leverage}x y margen {margin_type} ya configurados (caché)")
+            return
+        
+        try:
+            # Establecer apalancamiento
+            exchange.fapiPrivate_post_leverage({
+                'symbol': symbol_id,
+                'leverage': self.leverage
+            })
+            print(f"✅ Apalancamiento configurado: {self.leverage}x")
+            
+            # Establecer modo de margen (isolated/cross)
+            try:
+                exchange.fapiPrivate_post_margintype({
+                    'symbol': symbol_id,
+                    'marginType': margin_type
+                })
+            except Exception as e:
+                # -4046: el modo de margen ya era el pedido
+                if not warm_start.margin_already_set(e):
+                    raise
+            print(f"✅ Modo de margen: {margin_type}")
+            
+            if use_cache:
+                warm_start.remember_futures_config(self._warm_start_account(), symbol_id, self.leverage, margin_type)
+            
+        except Exception as e:
+            print(f"⚠️  Advertencia al configurar Futures: {e}")
+            print(f"   (Es normal si ya estaba configurado)")
+    
+    def _futures_config_changed(self, rows: Optional[list]) -> bool:
+        """
+        True si positionRisk muestra otro apalancamiento o modo de margen que el configurado
+        
+        La caché de arranque recuerda lo que aplicó el bot; si se cambió desde la
+        web o la app se olvida para que se vuelva a enviar la configuración.
+        
+        Args:
+            rows: Respuesta de positionRisk del símbolo (None en Spot)
+        """
+        rows = [r for r in rows or [] if r.get('positionSide', 'BOTH') == 'BOTH']
+        if not rows or not self._warm_start_enabled(self.exchange):
+            return False
+        row = rows[0]
+        margin_type = 'ISOLATED' if self.margin_mode == 'isolated' else 'CROSSED'
+        exchange_margin = 'ISOLATED' if str(row.get('marginType', '')).lower() == 'isolated' else 'CROSSED'
+        if int(float(row.get('leverage', self.leverage))) == self.leverage and \
+                ('marginType' not in row or exchange_margin == margin_type):
+            return False
+        print(f"🔄 Apalancamiento/margen cambiados en el exchange "
+              f"({row.get('leverage')}x {row.get('marginType')}), reconfigurando...")
+        warm_start.forget_futures_config(self._warm_start_account(), self.symbol.replace('/', ''))
+        return True
+    
     def _print_configuration(self):
         """
         Muestra la configuración actual del bot
@@ -174,7 +381,9 @@ class ScalpingBot:
         print(f"Intervalo de loop: {self.loop_interval} segundos")
         print(f"Cooldown: {self.cooldown_seconds} segundos")
         
-        if self.enable_real_trading:
+        if self.paper_trading:
+            print(f"📝 MODO SIMULACIÓN con simulador local ({config.SIMULATOR_BALANCE_USDT} USDT)")
+        elif self.enable_real_trading:
             print("⚠️  TRADING REAL ACTIVADO ⚠️")
         else:
             print("📝 MODO SIMULACIÓN (Paper Trading)")
@@ -190,8 +399,17 @@ class ScalpingBot:
         
         print("🔍 Verificando posiciones abiertas...")
         position = utils.get_open_positions(self.exchange, self.symbol)
+        self._load_existing_position(position)
+    
+    def _load_existing_position(self, position: Optional[Dict[str, Any]]):
+        """
+        Adopta como estado del bot una posición abierta encontrada en el exchange
         
+        Args:
+            position: Posición devuelta por utils.get_open_positions (o None)
+        """
         if position:
+            self.position_state.adopt(position['side'], position['contracts'], position['entryPrice'])
             self.in_position = True
             self.entry_price = position['entryPrice']
             self.position_amount = position['contracts']
@@ -206,6 +424,43 @@ class ScalpingBot:
         else:
             print("✅ No hay posiciones abiertas. Listo para operar.\n")
     
+    def _fetch_available_balance(self) -> Optional[float]:
+        """
+        Obtiene el balance disponible en USDT (Futures o Spot)
+        
+        Returns:
+            Balance disponible o None si hay error
+        """
+        if self.use_futures:
+            return utils.get_futures_available_balance(self.exchange, 'USDT')
+        return utils.get_balance(self.exchange, 'USDT')
+    
+    def _position_size_from_balance(self, available_balance: Optional[float]) -> float:
+        """
+        Calcula el tamaño de posición a partir de un balance ya obtenido
+        
+        Args:
+            available_balance: Balance disponible en USDT (None si no se pudo obtener)
+            
+        Returns:
+            Tamaño de posición en USDT
+        """
+        if not self.use_dynamic_position_size:
+            # Usar tamaño fijo
+            return self.position_size
+        
+        if available_balance is None or available_balance <= 0:
+            print(f"⚠️  No se pudo obtener balance disponible. Usando tamaño fijo: {self.position_size} USDT")
+            return self.position_size
+        
+        # Calcular tamaño basado en porcentaje
+        position_size = available_balance * (self.position_size_percent / 100)
+        
+        # Asegurar el notional mínimo del símbolo
+        position_size = max(position_size, self.filters.min_notional)
+        
+        return position_size
+    
     def _get_position_size(self) -> float:
         """
         Obtiene el tamaño de posición a usar (dinámico o estático)
@@ -214,26 +469,8 @@ class ScalpingBot:
             Tamaño de posición en USDT
         """
         if self.use_dynamic_position_size:
-            # Obtener balance disponible
-            if self.use_futures:
-                available_balance = utils.get_futures_available_balance(self.exchange, 'USDT')
-            else:
-                available_balance = utils.get_balance(self.exchange, 'USDT')
-            
-            if available_balance is None or available_balance <= 0:
-                print(f"⚠️  No se pudo obtener balance disponible. Usando tamaño fijo: {self.position_size} USDT")
-                return self.position_size
-            
-            # Calcular tamaño basado en porcentaje
-            position_size = available_balance * (self.position_size_percent / 100)
-            
-            # Asegurar mínimo de 5 USDT
-            position_size = max(position_size, 5.0)
-            
-            return position_size
-        else:
-            # Usar tamaño fijo
-            return self.position_size
+            return self._position_size_from_balance(self._fetch_available_balance())
+        return self.position_size
     
     def run(self):
         """
@@ -245,14 +482,180 @@ class ScalpingBot:
         # Verificar posiciones abiertas
         self._check_existing_positions()
         
-        if self.operation_mode == 'manual':
-            if keyboard is None:
-                print("❌ Error: Módulo 'keyboard' no disponible. No se puede usar modo manual.")
-                print("   Instala con: pip install keyboard")
-                return
-            self._run_manual_mode()
-        else:
-            self._run_automatic_mode()
+        if self.operation_mode == 'manual' and _load_keyboard() is None:
+            print("❌ Error: Módulo 'keyboard' no disponible. No se puede usar modo manual.")
+            print("   Instala con: pip install keyboard")
+            return
+        
+        if config.USE_CANDLE_CACHE:
+            self._open_candle_store()
+        
+        if config.USE_WEBSOCKET_FEED:
+            self._start_market_data()
+            if self.paper_trading and self.market_data is not None:
+                self.exchange.attach_feed(self.symbol, self.market_data)
+        
+        if config.USE_USER_DATA_STREAM and self.enable_real_trading and not self.paper_trading:
+            self._start_user_data()
+        
+        if config.USE_METRICS:
+            self._start_metrics()
+        
+        try:
+            if self.operation_mode == 'manual':
+                self._run_manual_mode()
+            else:
+                self._run_automatic_mode()
+        finally:
+            if self.market_data is not None:
+                self.market_data.stop()
+            if self.user_data is not None:
+                self.user_data.stop()
+            self._stop_metrics()
+    
+    def _start_market_data(self):
+        """
+        Arranca el feed de precios por WebSocket
+        
+        Si no se puede arrancar, el bot sigue usando fetch_ticker por REST.
+        """
+        try:
+            book = self._create_order_book() if config.USE_ORDER_BOOK else None
+            feed = MarketDataFeed(
+                self.symbol,
+                self.timeframe,
+                use_futures=self.use_futures,
+                use_testnet=self._use_testnet(),
+                order_book=book
+            )
+            feed.start()
+            self.market_data = feed
+            self.order_book = book
+            print(f"📡 Feed WebSocket de {self.symbol} iniciado" + (" (con libro L2)" if book else ""))
+        except Exception as e:
+            print(f"⚠️  No se pudo iniciar el feed WebSocket ({e}). Usando REST.")
+            self.market_data = None
+    
+    def _create_order_book(self) -> order_book.OrderBook:
+        """Libro L2 local del símbolo (el snapshot se pide al llegar el primer evento de profundidad)"""
+        return order_book.OrderBook(self.symbol, self._load_order_book_snapshot)
+    
+    def _load_order_book_snapshot(self) -> Dict[str, Any]:
+        """Snapshot REST del libro (se llama desde el hilo del libro al arrancar o tras un hueco)"""
+        return self.exchange.fetch_order_book(self.symbol, config.ORDER_BOOK_DEPTH)
+    
+    def _entry_limit_price(self, current_price: float, position_side: str, position_size_usdt: float) -> float:
+        """
+        Precio LIMIT de entrada según ENTRY_PRICE_MODE
+        
+        Con el libro local sincronizado se parte del mejor bid/ask; si no hay
+        libro (REST, feed caído o hueco sin resincronizar) se usa el último precio.
+        
+        Args:
+            current_price: Último precio negociado
+            position_side: 'LONG' o 'SHORT'
+            position_size_usdt: Tamaño de la posición en USDT (para el modo 'cross')
+            
+        Returns:
+            Precio límite de la orden
+        """
+        book = self.order_book
+        if book is None or not book.is_fresh():
+            return current_price
+        side = 'buy' if position_side == 'LONG' else 'sell'
+        price = order_book.entry_price(book, side, position_size_usdt / current_price, config.ENTRY_PRICE_MODE,
+                                       self.filters, config.ENTRY_QUEUE_MAX_AHEAD_USDT)
+        return current_price if price is None else price
+    
+    def _start_user_data(self):
+        """
+        Arranca el stream de datos de usuario (órdenes y posiciones)
+        
+        Si no se puede arrancar, el cierre de posiciones se sigue verificando por REST.
+        """
+        try:
+            stream = UserDataStream(
+                *ccxt_listen_key_functions(self.exchange, self.use_futures),
+                use_futures=self.use_futures,
+                use_testnet=self._use_testnet()
+            )
+            stream.start()
+            self._attach_user_data(stream)
+            print("👤 Stream de usuario iniciado (llenados y posiciones en tiempo real)")
+        except Exception as e:
+            print(f"⚠️  No se pudo iniciar el stream de usuario ({e}). Usando REST.")
+            self.user_data = None
+    
+    def _start_metrics(self):
+        """
+        Arranca el endpoint local de métricas y el resumen periódico
+        
+        Si el puerto está ocupado, el bot sigue y las métricas se muestran al detenerlo.
+        """
+        server = metrics.MetricsServer()
+        try:
+            server.start()
+        except OSError as e:
+            print(f"⚠️  No se pudo iniciar el endpoint de métricas ({e})")
+        self.metrics_server = server
+        if server.url:
+            print(f"📊 Métricas del exchange en {server.url}")
+    
+    def _stop_metrics(self):
+        """
+        Detiene el endpoint de métricas y muestra el resumen final
+        """
+        if self.metrics_server is None:
+            return
+        self.metrics_server.stop()
+        self.metrics_server = None
+        registry = getattr(self.exchange, 'metrics_registry', None)
+        if isinstance(registry, metrics.MetricsRegistry):
+            print("\n" + registry.format())
+    
+    def _attach_user_data(self, stream: UserDataStream):
+        """
+        Usa un stream de usuario (propio o compartido por el motor) como fuente de eventos
+        
+        Los eventos del símbolo se encolan desde el hilo del stream y se aplican
+        a la máquina de estados al principio de cada ciclo.
+        
+        Args:
+            stream: Stream de usuario ya arrancado
+        """
+        self.user_data = stream
+        symbol_id = stream_symbol(self.symbol).upper()
+        
+        def on_event(kind: str, record: Dict[str, Any]):
+            if record.get('symbol') == symbol_id:
+                self._exchange_events.append((kind, record))
+        
+        stream.add_listener(on_event)
+    
+    def _open_candle_store(self):
+        """
+        Abre la caché local de velas
+        
+        Si no se puede abrir, la EMA se inicializa descargando el histórico como siempre.
+        """
+        try:
+            self.candle_store = CandleStore(config.CANDLE_CACHE_DIR)
+        except Exception as e:
+            print(f"⚠️  No se pudo abrir la caché de velas ({e}). Se descargará el histórico.")
+            self.candle_store = None
+    
+    def _get_current_price(self) -> Optional[float]:
+        """
+        Obtiene el precio actual, del feed local si está activo o por REST si no
+        
+        Returns:
+            Precio actual o None si hay error
+        """
+        if self.market_data is not None:
+            price = self.market_data.get_current_price()
+            if price is not None:
+                return price
+        return utils.get_current_price(self.exchange, self.symbol)
     
     def _run_manual_mode(self):
         """
@@ -269,7 +672,7 @@ class ScalpingBot:
         try:
             while True:
                 # Mostrar precio actual
-                current_price = utils.get_current_price(self.exchange, self.symbol)
+                current_price = self._get_current_price()
                 if current_price:
                     timestamp = datetime.now().strftime('%H:%M:%S')
                     print(f"[{timestamp}] 💰 Precio actual {self.symbol}: ${current_price:.4f}", end='\r')
@@ -310,8 +713,8 @@ class ScalpingBot:
                 # Resetear contador de reintentos si el ciclo fue exitoso
                 retry_count = 0
                 
-                # Esperar antes del próximo ciclo
-                time.sleep(self.loop_interval)
+                # Esperar al próximo tick (event-driven) o al próximo intervalo
+                self._wait_next_cycle()
                 
             except ccxt.NetworkError as e:
                 retry_count += 1
@@ -334,6 +737,8 @@ class ScalpingBot:
                 if self.in_position:
                     print(f"⚠️  ADVERTENCIA: Hay una posición abierta en {self.symbol}")
                     print(f"   Precio de entrada: ${self.entry_price:.2f}")
+                if self.decision_latency.count:
+                    print("\n" + self.decision_latency.format())
                 break
                 
             except Exception as e:
@@ -341,6 +746,267 @@ class ScalpingBot:
                 print(f"⏸️  Pausando por {self.loop_interval * 2} segundos...")
                 time.sleep(self.loop_interval * 2)
     
+    def _wait_next_cycle(self):
+        """
+        Espera hasta el próximo ciclo de la estrategia
+        
+        En modo event-driven con el feed conectado, el ciclo se despierta en cuanto
+        llega un tick (con loop_interval como latido máximo). Si no, duerme
+        loop_interval segundos como en el modo por polling.
+        """
+        feed = self.market_data
+        if self.event_driven and feed is not None and feed.connected.is_set():
+            sequence = feed.wait_for_update(self._tick_sequence, timeout=self.loop_interval)
+            self._tick_received_at = feed.last_tick_at if sequence != self._tick_sequence else None
+            self._tick_sequence = sequence
+        else:
+            time.sleep(self.loop_interval)
+            self._tick_received_at = None
+    
+    def _record_decision_latency(self):
+        """
+        Registra la latencia desde la llegada del tick hasta el envío de la orden
+        """
+        if self._tick_received_at is None:
+            return
+        elapsed = time.perf_counter() - self._tick_received_at
+        self.decision_latency.record(elapsed)
+        self._tick_received_at = None
+        print(f"   ⚡ Latencia tick→orden: {elapsed * 1000:.2f} ms")
+    
+    def _sync_position_attributes(self):
+        """
+        Copia el estado de la máquina a los atributos que lee la estrategia
+        """
+        state = self.position_state
+        self.in_position = state.in_position
+        self.position_side = state.side
+        self.entry_price = state.entry_price
+        self.position_amount = state.amount
+        order = state.active_order
+        self.active_order_id = order.id if order else None
+    
+    def _update_take_profit(self):
+        """
+        Recalcula el take profit con la ejecución real de la entrada
+        """
+        state = self.position_state
+        self.position_size_used = state.amount * state.entry_price
+        self.take_profit_price = utils.calculate_take_profit_price_for_fixed_usd(
+            entry_price=state.entry_price,
+            position_size_usdt=self.position_size_used,
+            target_profit_usd=self.target_profit_usdt,
+            leverage=self.leverage if self.use_futures else 1,
+            position_side=state.side
+        )
+    
+    def _on_state_transition(self, transition: Optional[str]):
+        """
+        Reacciona a un cambio de estado de las órdenes o de la posición
+        
+        Args:
+            transition: Transición devuelta por PositionState (o None)
+        """
+        if transition is None:
+            return
+        state = self.position_state
+        
+        if transition == order_state.ENTRY_PARTIAL:
+            print(f"\n   ◐ Entrada {state.side} ejecutada parcialmente: {state.amount:.2f} a ${state.entry_price:.4f}")
+        elif transition in (order_state.ENTRY_FILLED, order_state.ADOPTED, order_state.RESIZED) or \
+                (transition == order_state.ENTRY_CANCELED and state.phase == order_state.OPEN):
+            self._update_take_profit()
+            if transition != order_state.RESIZED:
+                self._protection_due = self._protection_enabled()
+            if transition == order_state.ENTRY_FILLED:
+                print(f"\n✅ Entrada {state.side} ejecutada: {state.amount:.2f} a ${state.entry_price:.4f}")
+            elif transition == order_state.ENTRY_CANCELED:
+                print(f"\n⚠️  Orden de entrada cancelada con {state.amount:.2f} ejecutado. Se gestiona esa parte.")
+            elif transition == order_state.ADOPTED:
+                print(f"\n⚠️  Posición {state.side} detectada en el exchange: {state.amount:.2f} a ${state.entry_price:.4f}")
+            else:
+                print(f"\n🔄 Posición ajustada por el exchange: {state.amount:.2f} a ${state.entry_price:.4f}")
+            print(f"   Precio Take Profit: ${self.take_profit_price:.4f} (para ${self.target_profit_usdt:.2f} USDT profit)")
+        elif transition == order_state.ENTRY_CANCELED:
+            print(f"\n❌ Orden de entrada cancelada sin ejecutarse")
+        elif transition == order_state.EXIT_PARTIAL:
+            print(f"\n   ◐ Cierre ejecutado parcialmente: quedan {state.amount:.2f}")
+        elif transition == order_state.EXIT_FILLED:
+            print(f"\n   ✅ Orden de cierre ejecutada a ${state.exit_price:.4f}")
+            # La otra salida (take profit o stop loss) ya no tiene posición que cerrar
+            self._orders_to_cancel.extend(o.id for o in state.live_orders())
+            self._finalize_trade(state.exit_price)
+        elif transition == order_state.EXIT_CANCELED:
+            print(f"\n⚠️  Orden de cierre cancelada. La posición sigue abierta ({state.amount:.2f})")
+        elif transition == order_state.PROTECTION_CANCELED:
+            print(f"\n⚠️  Take profit o stop loss cancelado en el exchange. El bot vigila la salida.")
+        elif transition == order_state.CLOSED:
+            print(f"\n⚠️  La posición se cerró fuera del bot")
+            self._orders_to_cancel.extend(o.id for o in state.leftover_orders)
+            state.leftover_orders = []
+            self.take_profit_price = 0.0
+            self.position_size_used = 0.0
+            self.last_close_time = datetime.now()
+    
+    def _protection_enabled(self) -> bool:
+        """True si las salidas se dejan en el exchange (solo Futures con trading real)"""
+        return bool(config.USE_PROTECTIVE_ORDERS) and self.use_futures and self.enable_real_trading
+    
+    def _stop_loss_price(self) -> float:
+        """Precio de activación del stop loss (STOP_LOSS_PERCENT desde la entrada)"""
+        state = self.position_state
+        if state.side == 'LONG':
+            return state.entry_price * (1 - self.stop_loss / 100)
+        return state.entry_price * (1 + self.stop_loss / 100)
+    
+    def _protective_order_requests(self) -> Optional[list]:
+        """
+        Take profit (LIMIT reduceOnly) y stop loss (STOP_MARKET closePosition) pendientes de colocar
+        
+        Returns:
+            Órdenes en formato de lote [take profit, stop loss] o None si no toca
+        """
+        if not self._protection_due:
+            return None
+        self._protection_due = False
+        state = self.position_state
+        if state.phase != order_state.OPEN or state.amount <= 0 or self.take_profit_price <= 0:
+            return None
+        exit_side = 'sell' if state.side == 'LONG' else 'buy'
+        return [
+            batch_orders.order_request(self.symbol, exit_side, 'LIMIT', state.amount, price=self.take_profit_price,
+                                       reduce_only=True, filters=self.filters),
+            batch_orders.order_request(self.symbol, exit_side, 'STOP_MARKET', stop_price=self._stop_loss_price(),
+                                       close_position=True, filters=self.filters),
+        ]
+    
+    def _on_protective_orders(self, requests: list, orders: list):
+        """
+        Registra el take profit y el stop loss colocados
+        
+        Args:
+            requests: Órdenes enviadas (ver _protective_order_requests)
+            orders: Respuesta de cada una (None si se rechazó)
+        """
+        take_profit, stop = orders
+        take_profit_price, stop_price = float(requests[0]['price']), float(requests[1]['stopPrice'])
+        self.position_state.protection_placed(
+            take_profit.get('id') if take_profit else None, take_profit_price,
+            stop.get('id') if stop else None, stop_price
+        )
+        if take_profit:
+            print(f"   🎯 Take profit en el exchange: LIMIT reduceOnly a ${take_profit_price:.4f}")
+        if stop:
+            print(f"   🛡️  Stop loss en el exchange: STOP_MARKET a ${stop_price:.4f}")
+        else:
+            print(f"   ⚠️  No se pudo colocar el stop loss en el exchange. El bot lo vigila en cada ciclo.")
+    
+    def _sync_protective_orders(self):
+        """
+        Coloca el take profit y el stop loss de una entrada recién ejecutada y
+        cancela las salidas que sobran (un lote por operación, sin red si no hay nada)
+        """
+        if self._orders_to_cancel:
+            order_ids, self._orders_to_cancel = self._orders_to_cancel, []
+            batch_orders.cancel_batch_orders(self.exchange, self.symbol, order_ids)
+        requests = self._protective_order_requests()
+        if requests:
+            self._on_protective_orders(requests, batch_orders.create_batch_orders(self.exchange, requests))
+    
+    def _apply_order_response(self, order: Dict[str, Any]):
+        """
+        Aplica el estado que trae la respuesta de una orden recién colocada
+        (una orden LIMIT que cruza el libro puede volver ya ejecutada)
+        """
+        self._on_state_transition(self.position_state.on_order_update(
+            order.get('id'), order.get('status'), order.get('filled') or 0.0, order.get('average') or 0.0
+        ))
+    
+    def _apply_exchange_events(self):
+        """
+        Aplica los eventos del stream de usuario recibidos desde el último ciclo
+        """
+        events = self._exchange_events
+        if not events:
+            return
+        while events:
+            kind, record = events.popleft()
+            if kind == 'order':
+                transition = self.position_state.on_order_update(
+                    record['id'], record['status'], record['filled'], record['average']
+                )
+            elif record.get('position_side', 'BOTH') == 'BOTH':
+                transition = self.position_state.on_position_update(record['amount'], record['entry_price'])
+            else:
+                continue
+            self._on_state_transition(transition)
+        self._sync_position_attributes()
+    
+    def _reconcile_due(self) -> bool:
+        """
+        True si toca comparar el estado local con el del exchange
+        
+        Con el stream de usuario conectado basta con una reconciliación cada
+        reconcile_interval; sin él, la reconciliación es la única fuente de
+        ejecuciones y se hace en cada latido.
+        """
+        if not self.enable_real_trading:
+            return False
+        stream = self.user_data
+        interval = self.reconcile_interval if stream is not None and stream.connected.is_set() \
+            else self.loop_interval
+        return time.monotonic() - self._last_reconcile >= interval
+    
+    def _reconcile_state(self):
+        """
+        Compara el estado local con el del exchange y corrige solo las diferencias
+        
+        Cuesta una consulta de posición de un solo símbolo y una consulta por
+        cada orden del bot que siga viva (como mucho dos), en lugar de
+        descargar todas las posiciones.
+        """
+        self._last_reconcile = time.monotonic()
+        try:
+            rows = self.exchange.fapiPrivateV2GetPositionRisk({'symbol': stream_symbol(self.symbol).upper()}) \
+                if self.use_futures else None
+            orders = [self.exchange.fetch_order(o.id, self.symbol) for o in self.position_state.live_orders()]
+        except Exception as e:
+            print(f"⚠️  Error reconciliando el estado con el exchange: {e}")
+            return
+        self._apply_reconciliation(rows, orders)
+        if self._futures_config_changed(rows):
+            self._configure_futures_symbol(self.exchange)
+    
+    def _apply_reconciliation(self, rows: Optional[list], orders: list):
+        """
+        Aplica a la máquina de estados las órdenes y la posición consultadas
+        
+        Args:
+            rows: Respuesta de positionRisk del símbolo (None en Spot)
+            orders: Órdenes del bot consultadas (formato CCXT)
+        """
+        changes = []
+        for order in orders:
+            transition = self.position_state.on_order_update(
+                order['id'], order.get('status'), order.get('filled') or 0.0, order.get('average') or 0.0
+            )
+            if transition:
+                changes.append(transition)
+                self._on_state_transition(transition)
+        
+        if rows is not None:
+            rows = [r for r in rows if r.get('positionSide', 'BOTH') == 'BOTH']
+            amount = sum(float(r['positionAmt']) for r in rows)
+            entry_price = float(rows[0]['entryPrice']) if rows and amount else 0.0
+            transition = self.position_state.on_position_update(amount, entry_price)
+            if transition:
+                changes.append(transition)
+                self._on_state_transition(transition)
+        
+        if changes:
+            print(f"🔄 Reconciliación con el exchange: {', '.join(changes)}")
+        self._sync_position_attributes()
+    
     def _execute_manual_buy(self, position_side: str):
         """
         Ejecuta una orden manual de compra (LONG o SHORT) con orden LIMIT
@@ -348,7 +1014,7 @@ class ScalpingBot:
         Args:
             position_side: 'LONG' o 'SHORT'
         """
-        current_price = utils.get_current_price(self.exchange, self.symbol)
+        current_price = self._get_current_price()
         if current_price is None:
             print("\n⚠️  No se pudo obtener el precio actual")
             return
@@ -359,8 +1025,8 @@ class ScalpingBot:
         print(f"\n{side_emoji} ORDEN MANUAL DE {signal_text}")
         print(f"   Precio actual: ${current_price:.4f}")
         
-        # Usar precio actual como límite
-        limit_price = current_price
+        # Mejor bid/ask del libro local (o el precio actual si no hay libro)
+        limit_price = self._entry_limit_price(current_price, position_side, self.position_size)
         
         if position_side == 'LONG':
             order = utils.create_limit_buy_order(
@@ -422,7 +1088,7 @@ class ScalpingBot:
         Monitorea la posición abierta en modo manual y coloca orden de cierre automática
         """
         # Obtener precio actual
-        current_price = utils.get_current_price(self.exchange, self.symbol)
+        current_price = self._get_current_price()
         if current_price is None:
             return
         
@@ -464,6 +1130,8 @@ class ScalpingBot:
             
             # Colocar orden de cierre si aún no existe
             print(f"   Colocando orden de cierre a ${close_price:.4f}...")
+            # Solo cuenta un cierre que el stream informe después de enviar la orden
+            since = self.user_data.sequence if self.user_data is not None else None
             
             if self.position_side == 'LONG':
                 close_order = utils.create_limit_sell_order(
@@ -488,14 +1156,15 @@ class ScalpingBot:
                 
                 # Esperar a que se complete
                 print(f"   ⏳ Esperando ejecución de cierre...")
-                self._wait_for_close(close_price)
+                self._wait_for_close(close_price, since)
     
-    def _wait_for_close(self, close_price: float):
+    def _wait_for_close(self, close_price: float, since: Optional[int] = None):
         """
         Espera a que la orden de cierre se ejecute
         
         Args:
             close_price: Precio de cierre de la orden
+            since: sequence del stream de usuario antes de enviar la orden de cierre
         """
         # Simular cierre en modo simulación
         if not self.enable_real_trading:
@@ -507,6 +1176,17 @@ class ScalpingBot:
         max_wait = 60  # segundos
         waited = 0
         
+        # Con el stream de usuario conectado, el cierre llega como evento (sin polling)
+        stream = self.user_data
+        if stream is not None and stream.connected.is_set():
+            if stream.wait_for_position_closed(self.symbol, timeout=max_wait, since=since) or \
+                    not utils.get_open_positions(self.exchange, self.symbol):
+                print(f"\n   ✅ Posición cerrada exitosamente")
+                self._finalize_trade(close_price)
+            else:
+                print(f"\n   ⚠️  Tiempo de espera agotado. Verifica manualmente.")
+            return
+        
         while waited < max_wait:
             position = utils.get_open_positions(self.exchange, self.symbol)
             
@@ -566,6 +1246,7 @@ class ScalpingBot:
         print(f"   P/L Total: ${self.total_profit_usd:.2f} USD\n")
         
         # Resetear estado
+        self.position_state.reset()
         self.in_position = False
         self.entry_price = 0.0
         self.position_amount = 0.0
@@ -579,35 +1260,63 @@ class ScalpingBot:
         """
         Ejecuta un ciclo completo de la estrategia de trading en modo automático
         """
+        # Estado local al día con los eventos del exchange (sin red salvo reconciliación)
+        self._apply_exchange_events()
+        if self._reconcile_due():
+            self._reconcile_state()
+        self._sync_protective_orders()
+        
         # Obtener precio actual
-        current_price = utils.get_current_price(self.exchange, self.symbol)
+        current_price = self._get_current_price()
         if current_price is None:
             print("⚠️  No se pudo obtener el precio actual")
             return
         
-        # Obtener datos históricos para calcular EMA
-        ohlcv_data = utils.get_ohlcv_data(
-            self.exchange, 
-            self.symbol, 
-            self.timeframe, 
-            limit=self.ema_period + 10
-        )
+        # Entrada sin ejecutar pasado el plazo: moverla o cancelarla
+        self._manage_entry_order(current_price)
         
-        if ohlcv_data is None or len(ohlcv_data) < self.ema_period:
+        # Actualizar EMA incremental (solo pide velas al cerrar una nueva)
+        if not self._sync_ema_candles():
             print("⚠️  No hay suficientes datos para calcular EMA")
             return
         
-        # Calcular EMA
-        ema = utils.calculate_ema(ohlcv_data, self.ema_period)
+        # EMA incluyendo la vela en curso al precio actual
+        ema = self.ema_engine.peek(current_price)
         if ema is None:
             print("⚠️  No se pudo calcular la EMA")
             return
         
-        # Mostrar información actual
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        print(f"\n[{timestamp}] 📊 Estado del mercado:")
-        print(f"  💰 Precio actual: ${current_price:.2f}")
-        print(f"  📈 EMA({self.ema_period}): ${ema:.2f}")
+        action = self._evaluate_strategy(current_price, ema)
+        if action is None:
+            return
+        
+        kind, detail = action
+        if kind == 'ENTRY':
+            self._execute_buy(current_price, detail)
+        else:
+            self._execute_sell(current_price, detail)
+        # Una entrada LIMIT que cruza el libro vuelve ya ejecutada: sus salidas salen ya
+        self._sync_protective_orders()
+    
+    def _evaluate_strategy(self, current_price: float, ema: float) -> Optional[Tuple[str, str]]:
+        """
+        Decide la acción a tomar con el precio y la EMA actuales (sin llamadas al exchange)
+        
+        Args:
+            current_price: Precio actual del activo
+            ema: Valor de la EMA
+            
+        Returns:
+            ('ENTRY', 'LONG'|'SHORT'), ('EXIT', razón) o None si no hay que hacer nada
+        """
+        # Mostrar información actual (como máximo una vez por loop_interval)
+        verbose = time.monotonic() - self._last_status_print >= self.loop_interval
+        if verbose:
+            self._last_status_print = time.monotonic()
+            timestamp = datetime.now().strftime('%H:%M:%S')
+            print(f"\n[{timestamp}] 📊 Estado del mercado:")
+            print(f"  💰 Precio actual: ${current_price:.2f}")
+            print(f"  📈 EMA({self.ema_period}): ${ema:.2f}")
         
         # Lógica de trading
         if not self.in_position:
@@ -615,15 +1324,21 @@ class ScalpingBot:
             if self.last_close_time:
                 time_since_close = (datetime.now() - self.last_close_time).total_seconds()
                 if time_since_close < self.cooldown_seconds:
-                    remaining = int(self.cooldown_seconds - time_since_close)
-                    print(f"  ⏳ Cooldown activo: esperar {remaining}s antes de nueva posición")
-                    return
+                    if verbose:
+                        remaining = int(self.cooldown_seconds - time_since_close)
+                        print(f"  ⏳ Cooldown activo: esperar {remaining}s antes de nueva posición")
+                    return None
             
             # No estamos en posición - buscar señal de compra o venta
             if utils.should_buy(current_price, ema):
-                self._execute_buy(current_price, 'LONG')
-            elif self.use_futures and self.enable_short_positions and utils.should_sell_short(current_price, ema):
-                self._execute_buy(current_price, 'SHORT')
+                return 'ENTRY', 'LONG'
+            if self.use_futures and self.enable_short_positions and utils.should_sell_short(current_price, ema):
+                return 'ENTRY', 'SHORT'
+        elif self.position_state.is_pending and not self.position_state.has_limit_exit:
+            # Orden de entrada o cierre a mercado en curso: se espera a su ejecución
+            if verbose:
+                order = self.position_state.active_order
+                print(f"  ⏳ Orden {order.id if order else ''} pendiente ({self.position_state.phase})")
         else:
             # Estamos en posición - verificar si debemos cerrar
             if self.position_side == 'LONG':
@@ -637,14 +1352,15 @@ class ScalpingBot:
                     current_price
                 )
             
-            position_emoji = "🟢" if self.position_side == 'LONG' else "🔴"
-            print(f"  {position_emoji} En posición {self.position_side} desde: ${self.entry_price:.2f}")
-            
-            # Mostrar P/L con color
-            if profit_loss_percent >= 0:
-                print(f"  💹 P/L: +{profit_loss_percent:.2f}% (ganancia)")
-            else:
-                print(f"  📉 P/L: {profit_loss_percent:.2f}% (pérdida)")
+            if verbose:
+                position_emoji = "🟢" if self.position_side == 'LONG' else "🔴"
+                print(f"  {position_emoji} En posición {self.position_side} desde: ${self.entry_price:.2f}")
+                
+                # Mostrar P/L con color
+                if profit_loss_percent >= 0:
+                    print(f"  💹 P/L: +{profit_loss_percent:.2f}% (ganancia)")
+                else:
+                    print(f"  📉 P/L: {profit_loss_percent:.2f}% (pérdida)")
             
             # Verificar condiciones de salida
             should_exit, reason = utils.should_sell(
@@ -655,8 +1371,154 @@ class ScalpingBot:
                 self.position_side
             )
             
-            if should_exit:
-                self._execute_sell(current_price, reason)
+            # La salida que ya está en el exchange se ejecuta allí, sin orden desde aquí
+            # (con el take profit LIMIT del bot pendiente solo queda vigilar el stop loss)
+            state = self.position_state
+            if should_exit and not (state.has_stop if utils.is_stop_loss(reason)
+                                    else state.has_take_profit or state.has_limit_exit):
+                return 'EXIT', reason
+        
+        return None
+    
+    def _ema_candles_request(self) -> Optional[Dict[str, Any]]:
+        """
+        Determina qué velas hay que pedir para mantener la EMA incremental al día
+        
+        En el primer ciclo hay que descargar el histórico (ema_period + 10 velas).
+        Después solo hace falta consultar el exchange cuando el reloj indica que se
+        cerró una vela nueva, y únicamente por las velas que faltan.
+        
+        Returns:
+            None si la EMA está al día, o dict con 'since', 'limit' y 'seed'
+        """
+        last_timestamp = self.ema_engine.last_timestamp
+        now_ms = int(time.time() * 1000)
+        current_open = now_ms - now_ms % self.timeframe_ms
+        
+        # Reinicializar si no hay estado o si el bot estuvo parado demasiado tiempo
+        stale = (last_timestamp is not None and
+                 current_open - last_timestamp > (self.ema_period + 10) * self.timeframe_ms)
+        
+        if last_timestamp is None or not self.ema_engine.ready or stale:
+            return {'since': None, 'limit': self.ema_period + 10, 'seed': True}
+        
+        if last_timestamp + self.timeframe_ms >= current_open:
+            # No se ha cerrado ninguna vela nueva desde la última actualización
+            return None
+        
+        return {'since': last_timestamp + self.timeframe_ms, 'limit': None, 'seed': False}
+    
+    def _candle_source(self, since: Optional[int]):
+        """
+        Devuelve el feed si sus velas cubren el hueco pedido; si no, el exchange (REST)
+        """
+        feed = self.market_data
+        if since is not None and feed is not None and feed.is_fresh() and feed.covers(since):
+            return feed
+        return self.exchange
+    
+    def _apply_ema_candles(self, candles: Optional[list], seed: bool) -> bool:
+        """
+        Incorpora a la EMA las velas cerradas recibidas
+        
+        La última vela devuelta por el exchange es la que está en curso, así que
+        nunca se incorpora al estado.
+        
+        Args:
+            candles: Velas en formato CCXT (o None si la petición falló)
+            seed: True si las velas son el histórico inicial
+            
+        Returns:
+            True si la EMA está lista para usarse, False en caso contrario
+        """
+        if seed:
+            if not candles or len(candles) - 1 < self.ema_period:
+                return False
+            if self.market_data is not None:
+                self.market_data.seed_candles(candles)
+            closed = candles[:-1]
+            self.ema_engine.seed((c[4] for c in closed), closed[-1][0])
+            self._store_candles(closed)
+            return True
+        
+        last_timestamp = self.ema_engine.last_timestamp
+        if candles:
+            for candle in candles[:-1]:
+                if candle[0] > last_timestamp:
+                    self.ema_engine.update(candle[4], candle[0])
+            self._store_candles(candles[:-1])
+        return True
+    
+    def _store_candles(self, closed: list):
+        """
+        Guarda en la caché local las velas cerradas recibidas
+        """
+        if self.candle_store is None or not closed:
+            return
+        try:
+            self.candle_store.append(self.symbol, self.timeframe, closed)
+        except Exception as e:
+            print(f"⚠️  Error guardando velas en la caché: {e}")
+    
+    def _seed_ema_from_store(self, fetch: bool = True) -> bool:
+        """
+        Inicializa la EMA desde la caché local de velas
+        
+        Solo se descargan las velas posteriores a la última guardada, así que
+        un reinicio no vuelve a bajar el histórico.
+        
+        Args:
+            fetch: Si se completa la caché con el exchange antes de leerla
+            
+        Returns:
+            True si la caché tenía velas suficientes y recientes
+        """
+        store = self.candle_store
+        warmup = self.ema_period + 10
+        now_ms = int(time.time() * 1000)
+        current_open = now_ms - now_ms % self.timeframe_ms
+        
+        if fetch:
+            try:
+                store.sync(self.exchange, self.symbol, self.timeframe,
+                           since=current_open - warmup * self.timeframe_ms, now_ms=now_ms)
+            except Exception as e:
+                print(f"⚠️  Error actualizando la caché de velas: {e}")
+        
+        closed = store.read_last(self.symbol, self.timeframe, warmup)
+        if len(closed) < self.ema_period:
+            return False
+        last_timestamp = int(closed[-1, 0])
+        if current_open - last_timestamp > warmup * self.timeframe_ms:
+            return False
+        
+        self.ema_engine.seed(closed[:, 4].tolist(), last_timestamp)
+        if self.market_data is not None:
+            self.market_data.seed_candles(closed.tolist())
+        return True
+    
+    def _sync_ema_candles(self) -> bool:
+        """
+        Mantiene la EMA incremental al día con las velas cerradas
+        
+        Returns:
+            True si la EMA está lista para usarse, False en caso contrario
+        """
+        request = self._ema_candles_request()
+        if request is None:
+            return True
+        
+        if request['seed'] and self.candle_store is not None and self._seed_ema_from_store():
+            return True
+        
+        candles = utils.get_ohlcv_candles(
+            self._candle_source(request['since']),
+            self.symbol,
+            self.timeframe,
+            since=request['since'],
+            limit=request['limit']
+        )
+        return self._apply_ema_candles(candles, request['seed'])
     
     def _execute_buy(self, current_price: float, position_side: str):
         """
@@ -666,23 +1528,16 @@ class ScalpingBot:
             current_price: Precio actual del activo
             position_side: 'LONG' o 'SHORT'
         """
-        side_emoji = "🟢" if position_side == 'LONG' else "🔴"
-        signal_text = "COMPRA (LONG)" if position_side == 'LONG' else "VENTA (SHORT)"
-        
-        # Obtener tamaño de posición dinámico
-        position_size_usdt = self._get_position_size()
+        # Obtener tamaño de posición dinámico (una sola consulta de balance)
+        available_balance = self._fetch_available_balance() if self.use_dynamic_position_size else None
+        position_size_usdt = self._position_size_from_balance(available_balance)
         
-        print(f"\n{side_emoji} SEÑAL DE {signal_text} DETECTADA")
-        print(f"   Precio actual: ${current_price:.4f}")
+        self._announce_entry(current_price, position_side, available_balance, position_size_usdt)
         
-        if self.use_dynamic_position_size:
-            available_balance = utils.get_futures_available_balance(self.exchange, 'USDT') if self.use_futures else utils.get_balance(self.exchange, 'USDT')
-            if available_balance:
-                print(f"   💰 Balance disponible: ${available_balance:.2f} USDT")
-                print(f"   📊 Tamaño de posición: ${position_size_usdt:.2f} USDT ({self.position_size_percent}% del balance)")
+        # Mejor bid/ask del libro local (o el precio actual si no hay libro)
+        limit_price = self._entry_limit_price(current_price, position_side, position_size_usdt)
         
-        # Usar precio actual como límite
-        limit_price = current_price
+        self._record_decision_latency()
         
         if position_side == 'LONG':
             order = utils.create_limit_buy_order(
@@ -701,16 +1556,48 @@ class ScalpingBot:
                 self.enable_real_trading
             )
         
+        self._on_entry_order(order, position_side, limit_price, position_size_usdt)
+    
+    def _announce_entry(self, current_price: float, position_side: str,
+                        available_balance: Optional[float], position_size_usdt: float):
+        """
+        Muestra la señal de entrada detectada
+        """
+        side_emoji = "🟢" if position_side == 'LONG' else "🔴"
+        signal_text = "COMPRA (LONG)" if position_side == 'LONG' else "VENTA (SHORT)"
+        
+        print(f"\n{side_emoji} SEÑAL DE {signal_text} DETECTADA")
+        print(f"   Precio actual: ${current_price:.4f}")
+        
+        if self.use_dynamic_position_size and available_balance:
+            print(f"   💰 Balance disponible: ${available_balance:.2f} USDT")
+            print(f"   📊 Tamaño de posición: ${position_size_usdt:.2f} USDT ({self.position_size_percent}% del balance)")
+    
+    def _on_entry_order(self, order: Optional[Dict[str, Any]], position_side: str,
+                        limit_price: float, position_size_usdt: float):
+        """
+        Actualiza el estado del bot tras enviar la orden de entrada
+        
+        Args:
+            order: Orden devuelta por el exchange (None si falló)
+            position_side: 'LONG' o 'SHORT'
+            limit_price: Precio límite de la orden
+            position_size_usdt: Margen usado en USDT
+        """
         if order:
-            self.in_position = True
-            self.entry_price = limit_price
-            self.position_side = position_side
-            self.active_order_id = order.get('id')
-            self.position_size_used = position_size_usdt
-            
             # Calcular cantidad comprada
             base_currency = self.symbol.split('/')[0]
-            self.position_amount = position_size_usdt / limit_price
+            amount = order.get('amount') or position_size_usdt / limit_price
+            
+            # La posición solo existe cuando el exchange informa de la ejecución
+            self.position_state.entry_placed(order.get('id'), position_side, amount, limit_price)
+            if self.enable_real_trading:
+                self._apply_order_response(order)
+            else:
+                # Simulación: la orden se considera ejecutada al precio límite
+                self.position_state.on_order_update(order.get('id'), order_state.FILLED, amount, limit_price)
+            self._sync_position_attributes()
+            self.position_size_used = position_size_usdt
             
             # Calcular precio de take profit para obtener 2 USDT
             self.take_profit_price = utils.calculate_take_profit_price_for_fixed_usd(
@@ -721,12 +1608,15 @@ class ScalpingBot:
                 position_side=self.position_side
             )
             
+            pending = self.position_state.phase == order_state.ENTRY_PENDING
+            if pending:
+                self.entry_chase.start(self.position_state.entry_order.price)
             print(f"✅ Orden LIMIT {position_side} creada")
-            print(f"   Estado: Pendiente de ejecución")
-            print(f"   ID de orden: {self.active_order_id}")
-            print(f"   Precio límite: ${self.entry_price:.4f}")
+            print(f"   Estado: {'Pendiente de ejecución' if pending else 'Ejecutada'}")
+            print(f"   ID de orden: {order.get('id')}")
+            print(f"   Precio límite: ${limit_price:.4f}")
             print(f"   Precio Take Profit: ${self.take_profit_price:.4f} (para ${self.target_profit_usdt:.2f} USDT profit)")
-            print(f"   Cantidad: {self.position_amount:.2f} {base_currency}")
+            print(f"   Cantidad: {amount:.2f} {base_currency}")
             print(f"   Margen: {position_size_usdt:.2f} USDT")
             
             if self.use_futures:
@@ -738,6 +1628,85 @@ class ScalpingBot:
         else:
             print(f"❌ No se pudo ejecutar la orden {position_side}")
     
+    def _entry_order_decision(self, current_price: float) -> Optional[entry_manager.EntryDecision]:
+        """
+        Decide si la entrada pendiente se mueve de precio o se cancela (sin red)
+        
+        Args:
+            current_price: Último precio negociado
+            
+        Returns:
+            EntryDecision o None si no hay entrada pendiente o aún está en plazo
+        """
+        state = self.position_state
+        order = state.entry_order
+        if state.phase != order_state.ENTRY_PENDING or order is None:
+            return None
+        target = self._entry_limit_price(current_price, state.side, order.amount * current_price)
+        return self.entry_chase.decide(order, self.filters.limit_price(order.side, target))
+    
+    def _manage_entry_order(self, current_price: float):
+        """
+        Mueve al nuevo precio o cancela la entrada que no se ejecuta en ENTRY_ORDER_TIMEOUT
+        
+        Con ENTRY_REPRICE_METHOD = 'edit' se modifica la orden en una sola
+        petición (edit_order); con 'cancel_replace' se cancela y se coloca otra.
+        Si una petición falla, la reconciliación del siguiente ciclo aclara en
+        qué estado quedó la orden.
+        
+        Args:
+            current_price: Último precio negociado
+        """
+        decision = self._entry_order_decision(current_price)
+        if decision is None:
+            return
+        order = self.position_state.entry_order
+        print(f"\n⏱️  Entrada {order.id} sin ejecutar en {self.entry_chase.timeout:g}s: {decision.reason}")
+        try:
+            if decision.action == entry_manager.CANCEL:
+                self._on_entry_canceled(order, self.exchange.cancel_order(order.id, self.symbol))
+            elif config.ENTRY_REPRICE_METHOD == 'edit':
+                self._on_entry_repriced(order, self.exchange.edit_order(
+                    order.id, self.symbol, 'limit', order.side, order.amount, decision.price
+                ), decision.price)
+            else:
+                canceled = self.exchange.cancel_order(order.id, self.symbol)
+                if (canceled.get('filled') or 0) > 0:  # Se ejecutó una parte antes de cancelar
+                    self._on_entry_canceled(order, canceled)
+                    return
+                try:
+                    replacement = self.exchange.create_order(self.symbol, 'limit', order.side, order.amount,
+                                                             decision.price)
+                except Exception:
+                    self._on_entry_canceled(order, canceled)
+                    raise
+                self._on_entry_repriced(order, replacement, decision.price)
+        except Exception as e:
+            print(f"⚠️  No se pudo {'cancelar' if decision.action == entry_manager.CANCEL else 'mover'} "
+                  f"la orden de entrada: {e}")
+            self._last_reconcile = float('-inf')  # Pudo ejecutarse entretanto: reconciliar ya
+        finally:
+            self._sync_position_attributes()
+    
+    def _on_entry_canceled(self, order: order_state.TrackedOrder, response: Dict[str, Any]):
+        """
+        Aplica la cancelación de la entrada (si se ejecutó una parte, esa parte es la posición)
+        """
+        self._on_state_transition(self.position_state.on_order_update(
+            order.id, response.get('status') or order_state.CANCELED,
+            max(response.get('filled') or 0.0, order.filled), response.get('average') or order.average
+        ))
+    
+    def _on_entry_repriced(self, order: order_state.TrackedOrder, response: Dict[str, Any], price: float):
+        """
+        Registra la entrada movida a otro precio (puede volver ya ejecutada si cruza el libro)
+        """
+        self.position_state.entry_repriced(response.get('id') or order.id, price)
+        self.entry_chase.repriced()
+        print(f"   🔁 Entrada movida: ${order.price:.4f} → ${price:.4f} "
+              f"({self.entry_chase.reprices}/{self.entry_chase.max_reprices})")
+        self._apply_order_response(response)
+    
     def _execute_sell(self, current_price: float, reason: str):
         """
         Ejecuta una orden de cierre de posición con orden LIMIT
@@ -746,14 +1715,28 @@ class ScalpingBot:
             current_price: Precio actual del activo
             reason: Razón de la venta (TP o SL)
         """
-        side_emoji = "🟢" if self.position_side == 'LONG' else "🔴"
-        print(f"\n{side_emoji} SEÑAL DE CIERRE {self.position_side} DETECTADA")
-        print(f"   Razón: {reason}")
-        print(f"   Precio actual: ${current_price:.4f}")
+        self._announce_exit(current_price, reason)
+        
+        if utils.is_stop_loss(reason):
+            # Stop loss: a mercado (una LIMIT al precio del take profit quedaría del lado equivocado)
+            if self.position_state.has_limit_exit and not self._cancel_limit_exit():
+                return
+            self._record_decision_latency()
+            if self.position_side == 'LONG':
+                order = utils.create_market_sell_order(self.exchange, self.symbol, self.position_amount,
+                                                       self.enable_real_trading, self.use_futures,
+                                                       self.position_side)
+            else:  # SHORT
+                order = utils.close_short_order(self.exchange, self.symbol, self.position_amount,
+                                                self.enable_real_trading)
+            self._on_exit_order(order, current_price, 'MARKET')
+            return
         
         # Usar el precio de take profit calculado previamente
         limit_price = self.take_profit_price
         
+        self._record_decision_latency()
+        
         if self.position_side == 'LONG':
             order = utils.create_limit_sell_order(
                 self.exchange,
@@ -772,7 +1755,68 @@ class ScalpingBot:
                 self.enable_real_trading
             )
         
-        if order:
+        self._on_exit_order(order, limit_price)
+    
+    def _cancel_limit_exit(self) -> bool:
+        """
+        Cancela el take profit LIMIT pendiente para cerrar a mercado por stop loss
+        
+        Returns:
+            True si queda posición que cerrar
+        """
+        order = self.position_state.exit_order
+        try:
+            response = self.exchange.cancel_order(order.id, self.symbol)
+        except Exception as e:
+            print(f"⚠️  No se pudo cancelar la orden de cierre {order.id}: {e}")
+            self._last_reconcile = float('-inf')  # Pudo ejecutarse entretanto: reconciliar ya
+            return False
+        return self._on_exit_canceled(order, response)
+    
+    def _on_exit_canceled(self, order: order_state.TrackedOrder, response: Dict[str, Any]) -> bool:
+        """
+        Aplica la cancelación del take profit LIMIT (lo ejecutado antes de cancelar ya está cerrado)
+        
+        Returns:
+            True si queda posición que cerrar
+        """
+        self._on_state_transition(self.position_state.on_order_update(
+            order.id, response.get('status') or order_state.CANCELED,
+            max(response.get('filled') or 0.0, order.filled), response.get('average') or order.average
+        ))
+        self._sync_position_attributes()
+        return self.position_state.phase == order_state.OPEN
+    
+    def _announce_exit(self, current_price: float, reason: str):
+        """
+        Muestra la señal de cierre detectada
+        """
+        side_emoji = "🟢" if self.position_side == 'LONG' else "🔴"
+        print(f"\n{side_emoji} SEÑAL DE CIERRE {self.position_side} DETECTADA")
+        print(f"   Razón: {reason}")
+        print(f"   Precio actual: ${current_price:.4f}")
+    
+    def _on_exit_order(self, order: Optional[Dict[str, Any]], limit_price: float, order_type: str = 'LIMIT'):
+        """
+        Actualiza estadísticas y estado del bot tras enviar la orden de cierre
+        
+        Args:
+            order: Orden devuelta por el exchange (None si falló)
+            limit_price: Precio límite de la orden de cierre (precio actual si es MARKET)
+            order_type: 'LIMIT' (take profit) o 'MARKET' (stop loss)
+        """
+        if order and self.enable_real_trading:
+            # Las estadísticas y el cooldown se aplican cuando el exchange
+            # informa de la ejecución (_on_state_transition → _finalize_trade)
+            self.position_state.exit_placed(order.get('id'), self.position_amount, limit_price, order_type)
+            print(f"✅ Orden de cierre {order_type} colocada")
+            print(f"   Estado: Pendiente de ejecución")
+            print(f"   ID de orden: {order.get('id')}")
+            print(f"   Precio límite: ${limit_price:.4f}")
+            print(f"   Cantidad: {self.position_amount:.2f}")
+            self._apply_order_response(order)
+            self._sync_position_attributes()
+        elif order:
             # Calcular P/L estimado
             if self.position_side == 'LONG':
                 profit_loss_percent = utils.calculate_profit_loss_percent(
@@ -791,7 +1835,7 @@ class ScalpingBot:
             if self.use_futures:
                 profit_loss_usd *= self.leverage
             
-            print(f"✅ Orden de cierre LIMIT colocada")
+            print(f"✅ Orden de cierre {order_type} colocada")
             print(f"   Estado: Pendiente de ejecución")
             print(f"   Precio límite: ${limit_price:.4f}")
             print(f"   Cantidad: {self.position_amount:.2f}")
@@ -819,6 +1863,7 @@ class ScalpingBot:
                 print(f"   [SIMULACIÓN - No se ejecutó orden real]")
             
             # Resetear estado y activar cooldown
+            self.position_state.reset()
             self.in_position = False
             self.entry_price = 0.0
             self.position_amount = 0.0
@@ -833,11 +1878,13 @@ class ScalpingBot:
             print(f"❌ No se pudo cerrar la posición {self.position_side}")
 
 
-def main():
+def check_credentials() -> bool:
     """
-    Función principal para iniciar el bot
+    Verifica que las credenciales de la API estén configuradas
+    
+    Returns:
+        True si hay credenciales (si no, imprime cómo obtenerlas)
     """
-    # Verificar que las credenciales estén configuradas
     if config.API_KEY == 'your api key' or config.API_SECRET == 'your api secret' or not config.API_KEY:
         print("❌ ERROR: Configura tus credenciales de API en config.py")
         print("   Para obtener credenciales: https://www.binance.com/en/my/settings/api-management")
@@ -846,9 +1893,17 @@ def main():
             print("\n💡 NOTA: Estás en modo SANDBOX. Puedes usar credenciales de testnet:")
             print("   https://testnet.binance.vision/")
         
-        return
+        return False
+    return True
+
+
+def ask_operation_mode() -> Optional[str]:
+    """
+    Menú de selección de modo
     
-    # Menú de selección de modo
+    Returns:
+        'manual', 'automatic' o None si el usuario cancela
+    """
     print("\n" + "="*60)
     print("🤖 BOT DE SCALPING BINANCE FUTURES")
     print("="*60)
@@ -861,34 +1916,78 @@ def main():
         try:
             choice = input("\nIngresa tu opción (1 o 2): ").strip()
             if choice == '1':
-                operation_mode = 'manual'
-                break
+                return 'manual'
             elif choice == '2':
-                operation_mode = 'automatic'
-                break
+                return 'automatic'
             else:
                 print("⚠️  Opción inválida. Ingresa 1 o 2.")
         except KeyboardInterrupt:
             print("\n❌ Operación cancelada por el usuario")
-            return
+            return None
+
+
+def confirm_real_trading() -> bool:
+    """
+    Pide confirmación si el trading real está activado
     
-    # Advertencia si el trading real está activado
-    if config.ENABLE_REAL_TRADING:
-        print("\n" + "="*60)
-        print("⚠️  ADVERTENCIA: TRADING REAL ACTIVADO ⚠️")
-        print("="*60)
-        print("Este bot ejecutará órdenes REALES en Binance.")
-        print("Asegúrate de entender los riesgos antes de continuar.")
-        print("="*60)
+    Returns:
+        True si se puede continuar
+    """
+    if not config.ENABLE_REAL_TRADING:
+        return True
+    
+    print("\n" + "="*60)
+    print("⚠️  ADVERTENCIA: TRADING REAL ACTIVADO ⚠️")
+    print("="*60)
+    print("Este bot ejecutará órdenes REALES en Binance.")
+    print("Asegúrate de entender los riesgos antes de continuar.")
+    print("="*60)
+    
+    response = input("\n¿Estás seguro de continuar con trading real? (escribe 'SI' para confirmar): ")
+    if response != 'SI':
+        print("❌ Operación cancelada por el usuario")
+        return False
+    return True
+
+
+def create_bot(operation_mode: str):
+    """
+    Crea el bot adecuado a la configuración
+    
+    Args:
+        operation_mode: 'manual' o 'automatic'
         
-        response = input("\n¿Estás seguro de continuar con trading real? (escribe 'SI' para confirmar): ")
-        if response != 'SI':
-            print("❌ Operación cancelada por el usuario")
-            return
+    Returns:
+        TradingEngine (varios símbolos), AsyncScalpingBot (USE_ASYNC_BOT) o ScalpingBot
+    """
+    if operation_mode == 'automatic' and len(config.SYMBOLS) > 1:
+        from engine import TradingEngine
+        return TradingEngine(config.SYMBOLS)
+    if operation_mode == 'automatic' and config.USE_ASYNC_BOT:
+        from async_bot import AsyncScalpingBot
+        return AsyncScalpingBot(operation_mode=operation_mode)
+    return ScalpingBot(operation_mode=operation_mode)
+
+
+def main():
+    """
+    Función principal para iniciar el bot
+    """
+    # Verificar que las credenciales estén configuradas
+    if not check_credentials():
+        return
+    
+    # Menú de selección de modo
+    operation_mode = ask_operation_mode()
+    if operation_mode is None:
+        return
+    
+    # Advertencia si el trading real está activado
+    if not confirm_real_trading():
+        return
     
     # Crear e iniciar el bot con el modo seleccionado
-    bot = ScalpingBot(operation_mode=operation_mode)
-    bot.run()
+    create_bot(operation_mode).run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,434 @@
+"""
+Feed de datos de mercado por WebSocket
+Mantiene en memoria el último precio y un buffer de velas para que la estrategia
+lea precios localmente sin hacer un fetch_ticker REST en cada ciclo
+"""
+
+import json
+import threading
+import time
+from typing import Optional, Dict, Any, List, Union, Callable
+
+import ccxt
+
+try:
+    from websockets.sync.client import connect as ws_connect
+except ImportError:
+    ws_connect = None
+
+from candle_buffer import CandleBuffer
+
+
+FUTURES_STREAM_URL = 'wss://fstream.binance.com/stream?streams='
+FUTURES_TESTNET_STREAM_URL = 'wss://stream.binancefuture.com/stream?streams='
+SPOT_STREAM_URL = 'wss://stream.binance.com:9443/stream?streams='
+DEPTH_STREAM_SPEED = '100ms'
+
+
+def stream_symbol(symbol: str) -> str:
+    """
+    Convierte un símbolo CCXT al formato de los streams de Binance
+
+    Args:
+        symbol: Par de trading (ej: 'DOGE/USDT' o 'DOGE/USDT:USDT')
+
+    Returns:
+        Símbolo en minúsculas sin separadores (ej: 'dogeusdt')
+    """
+    return symbol.split(':')[0].replace('/', '').lower()
+
+
+def depth_stream(symbol: str) -> str:
+    """Nombre del stream de profundidad (diferencias) de un símbolo (ej: 'dogeusdt@depth@100ms')"""
+    return f"{stream_symbol(symbol)}@depth@{DEPTH_STREAM_SPEED}"
+
+
+def build_stream_url(symbol: Union[str, List[str]], timeframe: str, use_futures: bool = True,
+                     use_testnet: bool = False, depth: bool = False) -> str:
+    """
+    Construye la URL del stream combinado (trade + bookTicker + kline)
+
+    Args:
+        symbol: Par de trading, o lista de pares para un solo stream compartido
+        timeframe: Timeframe de las velas (ej: '1m')
+        use_futures: Si se usan los streams de Futures
+        use_testnet: Si se usa el testnet de Futures
+        depth: Añadir el stream de profundidad para el libro local (order_book.py)
+
+    Returns:
+        URL completa del stream combinado
+    """
+    symbols = [symbol] if isinstance(symbol, str) else symbol
+    trade_stream = 'aggTrade' if use_futures else 'trade'
+    streams = '/'.join(
+        f"{name}@{trade_stream}/{name}@bookTicker/{name}@kline_{timeframe}"
+        for name in (stream_symbol(s) for s in symbols)
+    )
+    if depth:
+        streams += ''.join(f"/{depth_stream(s)}" for s in symbols)
+    if not use_futures:
+        base = SPOT_STREAM_URL
+    elif use_testnet:
+        base = FUTURES_TESTNET_STREAM_URL
+    else:
+        base = FUTURES_STREAM_URL
+    return base + streams
+
+
+def run_stream(url: Union[str, Callable[[], str]], handle_message: Callable, stop_event: threading.Event,
+               connected: threading.Event, reconnect: Optional[threading.Event] = None,
+               label: str = 'Stream de mercado'):
+    """
+    Consume un stream WebSocket hasta que se active ``stop_event``
+
+    Reconecta con backoff exponencial si la conexión se cae.
+
+    Args:
+        url: URL del stream, o función que la devuelve en cada conexión
+             (ej: para pedir un listen key nuevo al reconectar)
+        handle_message: Función que recibe cada mensaje
+        stop_event: Evento para detener el consumo
+        connected: Evento que refleja si hay conexión
+        reconnect: Evento que fuerza cerrar y reabrir la conexión
+        label: Nombre del stream en los mensajes de aviso
+    """
+    backoff = 1.0
+    while not stop_event.is_set():
+        try:
+            target = url() if callable(url) else url
+            with ws_connect(target, open_timeout=10) as ws:
+                if reconnect is not None:
+                    reconnect.clear()
+                connected.set()
+                backoff = 1.0
+                while not stop_event.is_set():
+                    if reconnect is not None and reconnect.is_set():
+                        break
+                    try:
+                        raw = ws.recv(timeout=1.0)
+                    except TimeoutError:
+                        continue
+                    handle_message(raw)
+            if reconnect is not None and reconnect.is_set():
+                connected.clear()
+                continue
+        except Exception as e:
+            if stop_event.is_set():
+                break
+            print(f"⚠️  {label} desconectado: {e}. Reconectando en {backoff:.0f}s...")
+        connected.clear()
+        if stop_event.wait(backoff):
+            break
+        backoff = min(backoff * 2, 30.0)
+
+
+class MarketDataFeed:
+    """
+    Consumidor en segundo plano de los streams de mercado de Binance
+
+    Expone ``fetch_ticker`` y ``fetch_ohlcv`` con la misma forma que CCXT, de
+    modo que ``utils.get_current_price`` y ``utils.get_ohlcv_candles`` funcionan
+    igual pasándole el feed en lugar del exchange.
+    """
+
+    def __init__(self, symbol: str, timeframe: str = '1m', use_futures: bool = True,
+                 url: Optional[str] = None, max_candles: int = 500,
+                 stale_after: float = 5.0, use_testnet: bool = False, order_book=None):
+        """
+        Args:
+            symbol: Par de trading (ej: 'DOGE/USDT')
+            timeframe: Timeframe de las velas
+            use_futures: Si se usan los streams de Futures
+            url: URL del stream (por defecto se construye a partir del símbolo)
+            max_candles: Capacidad del buffer de velas
+            stale_after: Segundos sin mensajes tras los que el precio se considera viejo
+            use_testnet: Si se usa el testnet de Futures
+            order_book: order_book.OrderBook que recibe los eventos de profundidad (se suscribe al stream)
+        """
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.timeframe_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        self.url = url or build_stream_url(symbol, timeframe, use_futures, use_testnet, depth=order_book is not None)
+        self.stale_after = stale_after
+        self.order_book = order_book
+
+        self._lock = threading.Lock()
+        self._candles = CandleBuffer(max_candles)  # [ts, o, h, l, c, v], la última puede estar abierta
+        self._last_price: Optional[float] = None
+        self._bid: Optional[float] = None
+        self._ask: Optional[float] = None
+        self._last_event_ms: Optional[int] = None
+        self.last_update: Optional[float] = None  # time.monotonic() del último mensaje
+        self.messages_received = 0
+
+        # Notificación de ticks para el modo event-driven
+        self._tick_condition = threading.Condition(self._lock)
+        self.sequence = 0  # Se incrementa con cada cambio de precio
+        self.last_tick_at: Optional[float] = None  # time.perf_counter() al recibir el último tick
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.connected = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """
+        Arranca el hilo consumidor del stream
+        """
+        if ws_connect is None:
+            raise RuntimeError("Módulo 'websockets' no disponible. Instala con: pip install websockets")
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"market-data-{self.symbol}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Detiene el hilo consumidor
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.connected.clear()
+
+    def seed_candles(self, candles: List[list]):
+        """
+        Carga velas históricas (formato CCXT) en el buffer antes de recibir streams
+
+        Args:
+            candles: Lista de velas [timestamp, open, high, low, close, volume]
+        """
+        with self._lock:
+            for candle in candles:
+                self._upsert_candle([int(candle[0])] + [float(x) for x in candle[1:6]])
+            if self._last_price is None and len(self._candles):
+                self._last_price = self._candles.last()[4]
+
+    def _run(self):
+        run_stream(self.url, self.handle_message, self._stop_event, self.connected)
+
+    # ------------------------------------------------------------------
+    # Procesamiento de mensajes
+    # ------------------------------------------------------------------
+
+    def handle_message(self, raw):
+        """
+        Procesa un mensaje del stream (combinado o individual)
+
+        Args:
+            raw: Mensaje JSON (str/bytes) o dict ya decodificado
+        """
+        received_at = time.perf_counter()
+        message = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        data = message.get('data', message)
+        event = data.get('e')
+
+        if event == 'depthUpdate':
+            # El libro tiene su propio lock y no despierta a la estrategia
+            if self.order_book is not None:
+                self.order_book.handle_diff(data)
+            return
+
+        with self._lock:
+            price_changed = False
+            if event in ('aggTrade', 'trade'):
+                self._last_price = float(data['p'])
+                self._last_event_ms = data.get('T') or data.get('E')
+                price_changed = True
+            elif event == 'kline':
+                k = data['k']
+                self._upsert_candle([int(k['t']), float(k['o']), float(k['h']),
+                                     float(k['l']), float(k['c']), float(k['v'])])
+                if self._last_price is None:
+                    self._last_price = float(k['c'])
+                self._last_event_ms = data.get('E')
+                price_changed = bool(k.get('x'))  # El cierre de vela también despierta a la estrategia
+            elif event == 'bookTicker' or ('b' in data and 'a' in data and 'u' in data):
+                self._bid = float(data['b'])
+                self._ask = float(data['a'])
+                self._last_event_ms = data.get('E') or self._last_event_ms
+            else:
+                return
+            self.last_update = time.monotonic()
+            self.messages_received += 1
+            if price_changed:
+                self.sequence += 1
+                self.last_tick_at = received_at
+                self._tick_condition.notify_all()
+
+    def wait_for_update(self, last_sequence: int, timeout: Optional[float] = None) -> int:
+        """
+        Bloquea hasta que llegue un tick posterior a ``last_sequence``
+
+        Si llegan varios ticks mientras la estrategia está ocupada, se agrupan:
+        al despertar solo importa el estado más reciente.
+
+        Args:
+            last_sequence: Último número de secuencia procesado
+            timeout: Segundos máximos de espera
+
+        Returns:
+            Número de secuencia actual (igual a ``last_sequence`` si expiró el timeout)
+        """
+        with self._tick_condition:
+            self._tick_condition.wait_for(lambda: self.sequence != last_sequence, timeout)
+            return self.sequence
+
+    def _upsert_candle(self, candle: list):
+        # Llamar con el lock tomado
+        self._candles.upsert(candle)
+
+    # ------------------------------------------------------------------
+    # Lectura local (sin red)
+    # ------------------------------------------------------------------
+
+    def is_fresh(self) -> bool:
+        """True si se recibió algún mensaje en los últimos ``stale_after`` segundos"""
+        return self.last_update is not None and time.monotonic() - self.last_update <= self.stale_after
+
+    def get_current_price(self) -> Optional[float]:
+        """
+        Devuelve el último precio negociado, o None si el feed está caído o viejo
+        """
+        if not self.is_fresh():
+            return None
+        return self._last_price
+
+    def fetch_ticker(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Ticker local con la forma de ``ccxt.Exchange.fetch_ticker``
+
+        Raises:
+            RuntimeError: Si el feed no tiene datos recientes
+        """
+        with self._lock:
+            price, bid, ask, ts = self._last_price, self._bid, self._ask, self._last_event_ms
+        if price is None or not self.is_fresh():
+            raise RuntimeError("Feed de mercado sin datos recientes")
+        return {
+            'symbol': symbol or self.symbol,
+            'last': price,
+            'close': price,
+            'bid': bid,
+            'ask': ask,
+            'timestamp': ts,
+        }
+
+    def covers(self, since: int) -> bool:
+        """
+        True si el buffer contiene todas las velas desde ``since`` (ms), sin huecos
+
+        Tras una reconexión el stream sigue por la vela en curso: las que se
+        cerraron con la conexión caída faltan en el buffer y la EMA se las
+        saltaría, así que en ese caso hay que pedirlas por REST.
+        """
+        with self._lock:
+            return self._candles.contiguous_since(since, self.timeframe_ms)
+
+    def fetch_ohlcv(self, symbol: Optional[str] = None, timeframe: Optional[str] = None,
+                    since: Optional[int] = None, limit: Optional[int] = None) -> List[list]:
+        """
+        Velas del buffer con la forma de ``ccxt.Exchange.fetch_ohlcv``
+
+        Igual que en el exchange, la última vela puede ser la que está en curso.
+        """
+        with self._lock:
+            return self._candles.to_list(since, limit)
+
+
+class MarketDataHub:
+    """
+    Un solo stream WebSocket para varios símbolos
+
+    Reparte cada mensaje al MarketDataFeed de su símbolo (que no abre conexión
+    propia) y avisa de cualquier tick con una única condición, para que un
+    motor con N estrategias espere en un solo sitio.
+    """
+
+    def __init__(self, symbols: List[str], timeframe: str = '1m', use_futures: bool = True,
+                 url: Optional[str] = None, use_testnet: bool = False, order_books: Optional[Dict[str, Any]] = None,
+                 **feed_options):
+        """
+        Args:
+            symbols: Pares de trading
+            timeframe: Timeframe de las velas
+            use_futures: Si se usan los streams de Futures
+            url: URL del stream (por defecto se construye a partir de los símbolos)
+            use_testnet: Si se usa el testnet de Futures
+            order_books: order_book.OrderBook por símbolo (se suscribe a la profundidad de todos)
+            **feed_options: Opciones para cada MarketDataFeed (max_candles, stale_after)
+        """
+        order_books = order_books or {}
+        self.url = url or build_stream_url(symbols, timeframe, use_futures, use_testnet, depth=bool(order_books))
+        self.connected = threading.Event()
+        self.feeds: Dict[str, MarketDataFeed] = {}
+        self._routes: Dict[str, MarketDataFeed] = {}
+        for symbol in symbols:
+            feed = MarketDataFeed(symbol, timeframe, use_futures, url=self.url,
+                                  order_book=order_books.get(symbol), **feed_options)
+            feed.connected = self.connected  # La conexión es la del hub
+            self.feeds[symbol] = feed
+            self._routes[stream_symbol(symbol).upper()] = feed
+
+        self._tick_condition = threading.Condition()
+        self.sequence = 0  # Se incrementa con cada tick de cualquier símbolo
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        Arranca el hilo consumidor del stream compartido
+        """
+        if ws_connect is None:
+            raise RuntimeError("Módulo 'websockets' no disponible. Instala con: pip install websockets")
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="market-data-hub", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Detiene el hilo consumidor
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.connected.clear()
+
+    def _run(self):
+        run_stream(self.url, self.handle_message, self._stop_event, self.connected)
+
+    def handle_message(self, raw):
+        """
+        Entrega el mensaje al feed de su símbolo
+
+        Args:
+            raw: Mensaje JSON (str/bytes) o dict ya decodificado
+        """
+        message = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        data = message.get('data', message)
+        feed = self._routes.get(data.get('s'))
+        if feed is None:
+            return
+        before = feed.sequence
+        feed.handle_message(data)
+        if feed.sequence != before:
+            with self._tick_condition:
+                self.sequence += 1
+                self._tick_condition.notify_all()
+
+    def wait_for_update(self, last_sequence: int, timeout: Optional[float] = None) -> int:
+        """
+        Bloquea hasta que llegue un tick de cualquier símbolo posterior a ``last_sequence``
+
+        Returns:
+            Número de secuencia actual (igual a ``last_sequence`` si expiró el timeout)
+        """
+        with self._tick_condition:
+            self._tick_condition.wait_for(lambda: self.sequence != last_sequence, timeout)
+            return self.sequence
@@ -0,0 +1,282 @@
+"""
+Filtros de mercado por símbolo (tick size, step size, notional mínimo, cantidad máxima)
+
+Binance rechaza las órdenes cuyo precio no es múltiplo del tick size, cuya
+cantidad no es múltiplo del step size o cuyo notional no llega al mínimo
+(-1111, -4014, -4164...). En lugar de redondear con decimales fijos de DOGE,
+los filtros se leen una sola vez de load_markets() y se guardan por exchange
+y símbolo; después cada orden se cuantiza con aritmética de floats sobre
+valores precalculados, sin Decimal ni strings.
+"""
+
+import math
+import weakref
+from typing import Optional, Dict, Any, Iterable
+
+# Mismo valor que ccxt.DECIMAL_PLACES (sin importar ccxt solo por la constante)
+DECIMAL_PLACES = 2
+
+# Valores que usaba el bot antes de leer los filtros (DOGE/USDT en Futures)
+DEFAULT_TICK_SIZE = 0.0001
+DEFAULT_STEP_SIZE = 0.1
+DEFAULT_MIN_NOTIONAL = 5.0
+
+# Margen sobre el notional mínimo en órdenes de mercado (5 USDT → 5.5 USDT)
+# para que el precio de ejecución no deje la orden por debajo del mínimo
+NOTIONAL_BUFFER = 1.1
+
+# Tolerancia relativa al step para absorber errores de float (0.3 / 0.1 = 2.9999999999999996)
+_EPSILON = 1e-9
+
+
+def _decimals(step: float) -> int:
+    """Decimales necesarios para representar un múltiplo de step"""
+    fraction = f"{step:.10f}".rstrip('0').split('.')[1]
+    return len(fraction)
+
+
+class SymbolFilters:
+    """
+    Filtros de un símbolo con funciones de cuantización
+
+    Todas las funciones devuelven floats ya redondeados al número de
+    decimales del tick o del step, listos para enviar al exchange.
+    """
+
+    __slots__ = ('symbol', 'tick_size', 'step_size', 'min_qty', 'max_qty', 'market_max_qty',
+                 'min_notional', '_price_decimals', '_amount_decimals')
+
+    def __init__(self, symbol: str, tick_size: float = DEFAULT_TICK_SIZE,
+                 step_size: float = DEFAULT_STEP_SIZE, min_qty: float = 0.0,
+                 max_qty: float = math.inf, market_max_qty: Optional[float] = None,
+                 min_notional: float = DEFAULT_MIN_NOTIONAL):
+        """
+        Args:
+            symbol: Par de trading
+            tick_size: Incremento mínimo de precio (PRICE_FILTER)
+            step_size: Incremento mínimo de cantidad (LOT_SIZE)
+            min_qty: Cantidad mínima por orden
+            max_qty: Cantidad máxima por orden LIMIT
+            market_max_qty: Cantidad máxima por orden de mercado (MARKET_LOT_SIZE)
+            min_notional: Notional mínimo (precio × cantidad) en USDT
+        """
+        self.symbol = symbol
+        self.tick_size = tick_size
+        self.step_size = step_size
+        self.min_qty = min_qty
+        self.max_qty = max_qty
+        self.market_max_qty = market_max_qty if market_max_qty is not None else max_qty
+        self.min_notional = min_notional
+        self._price_decimals = _decimals(tick_size)
+        self._amount_decimals = _decimals(step_size)
+
+    def __repr__(self):
+        return (f"SymbolFilters({self.symbol!r}, tick_size={self.tick_size}, step_size={self.step_size}, "
+                f"min_qty={self.min_qty}, max_qty={self.max_qty}, min_notional={self.min_notional})")
+
+    # ------------------------------------------------------------------
+    # Precio
+    # ------------------------------------------------------------------
+
+    def floor_price(self, price: float) -> float:
+        """Precio redondeado hacia abajo al tick (compras LIMIT)"""
+        return round(math.floor(price / self.tick_size + _EPSILON) * self.tick_size, self._price_decimals)
+
+    def ceil_price(self, price: float) -> float:
+        """Precio redondeado hacia arriba al tick (ventas LIMIT)"""
+        return round(math.ceil(price / self.tick_size - _EPSILON) * self.tick_size, self._price_decimals)
+
+    def round_price(self, price: float) -> float:
+        """Precio redondeado al tick más cercano (precios de activación)"""
+        return round(round(price / self.tick_size) * self.tick_size, self._price_decimals)
+
+    def limit_price(self, side: str, price: float) -> float:
+        """
+        Precio LIMIT cuantizado sin empeorarlo: las compras hacia abajo y las ventas hacia arriba
+
+        Args:
+            side: 'buy' o 'sell'
+            price: Precio deseado
+        """
+        if side == 'buy':
+            return self.floor_price(price)
+        return self.ceil_price(price)
+
+    # ------------------------------------------------------------------
+    # Cantidad
+    # ------------------------------------------------------------------
+
+    def floor_amount(self, amount: float) -> float:
+        """Cantidad redondeada hacia abajo al step"""
+        return round(math.floor(amount / self.step_size + _EPSILON) * self.step_size, self._amount_decimals)
+
+    def ceil_amount(self, amount: float) -> float:
+        """Cantidad redondeada hacia arriba al step"""
+        return round(math.ceil(amount / self.step_size - _EPSILON) * self.step_size, self._amount_decimals)
+
+    def round_amount(self, amount: float, market: bool = False) -> float:
+        """
+        Cantidad de cierre: al step más cercano y sin pasar de la cantidad máxima
+
+        Args:
+            amount: Cantidad de la posición
+            market: True para órdenes de mercado (límite MARKET_LOT_SIZE)
+        """
+        amount = round(round(amount / self.step_size) * self.step_size, self._amount_decimals)
+        max_qty = self.market_max_qty if market else self.max_qty
+        if amount > max_qty:
+            return self.floor_amount(max_qty)
+        return amount
+
+    def amount_for_notional(self, amount_usdt: float, price: float, market: bool = False) -> float:
+        """
+        Cantidad de entrada para invertir amount_usdt a price, cumpliendo los filtros
+
+        Se redondea hacia arriba al step y se sube hasta el notional mínimo
+        (con NOTIONAL_BUFFER en órdenes de mercado) y la cantidad mínima, sin
+        pasar de la cantidad máxima.
+
+        Args:
+            amount_usdt: Importe en USDT
+            price: Precio de la orden (o último precio en órdenes de mercado)
+            market: True para órdenes de mercado
+
+        Returns:
+            Cantidad de activo
+        """
+        min_notional = self.min_notional * NOTIONAL_BUFFER if market else self.min_notional
+        amount = self.ceil_amount(max(amount_usdt, min_notional) / price)
+        if amount < self.min_qty:
+            amount = self.ceil_amount(self.min_qty)
+        max_qty = self.market_max_qty if market else self.max_qty
+        if amount > max_qty:
+            return self.floor_amount(max_qty)
+        return amount
+
+    def meets_min_notional(self, amount: float, price: float) -> bool:
+        """True si la orden cumple el notional y la cantidad mínimos"""
+        return amount >= self.min_qty and amount * price >= self.min_notional
+
+
+def _float(value: Any, default: float) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+def filters_from_market(market: Dict[str, Any], precision_mode: Optional[int] = None) -> SymbolFilters:
+    """
+    Construye los filtros de un mercado de CCXT
+
+    Se leen los filtros originales de Binance (info['filters']) y, si no
+    están, los límites y la precisión unificados de CCXT.
+
+    Args:
+        market: Mercado de exchange.markets
+        precision_mode: exchange.precisionMode (TICK_SIZE o DECIMAL_PLACES)
+
+    Returns:
+        Filtros del símbolo
+    """
+    precision = market.get('precision') or {}
+    limits = market.get('limits') or {}
+    amount_limits = limits.get('amount') or {}
+    market_limits = limits.get('market') or {}
+    cost_limits = limits.get('cost') or {}
+
+    def _step(value, default):
+        if value is None:
+            return default
+        if precision_mode == DECIMAL_PLACES:
+            return 10.0 ** -int(value)
+        return _float(value, default)
+
+    tick_size = _step(precision.get('price'), DEFAULT_TICK_SIZE)
+    step_size = _step(precision.get('amount'), DEFAULT_STEP_SIZE)
+    min_qty = _float(amount_limits.get('min'), 0.0)
+    max_qty = _float(amount_limits.get('max'), math.inf)
+    market_max_qty = _float(market_limits.get('max'), max_qty)
+    min_notional = _float(cost_limits.get('min'), DEFAULT_MIN_NOTIONAL)
+
+    for raw in (market.get('info') or {}).get('filters') or []:
+        kind = raw.get('filterType')
+        if kind == 'PRICE_FILTER':
+            tick_size = _float(raw.get('tickSize'), tick_size)
+        elif kind == 'LOT_SIZE':
+            step_size = _float(raw.get('stepSize'), step_size)
+            min_qty = _float(raw.get('minQty'), min_qty)
+            max_qty = _float(raw.get('maxQty'), max_qty)
+        elif kind == 'MARKET_LOT_SIZE':
+            market_max_qty = _float(raw.get('maxQty'), market_max_qty)
+        elif kind == 'MIN_NOTIONAL':
+            min_notional = _float(raw.get('notional') or raw.get('minNotional'), min_notional)
+        elif kind == 'NOTIONAL':
+            min_notional = _float(raw.get('minNotional'), min_notional)
+
+    return SymbolFilters(market.get('symbol', ''), tick_size, step_size, min_qty, max_qty,
+                         market_max_qty, min_notional)
+
+
+# Filtros ya construidos: exchange → {símbolo → SymbolFilters}
+_cache: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+
+def find_market(markets: Dict[str, Any], symbol: str) -> Optional[Dict[str, Any]]:
+    """
+    Mercado de un símbolo, prefiriendo el contrato perpetuo ('DOGE/USDT' → 'DOGE/USDT:USDT')
+    """
+    if ':' not in symbol and '/' in symbol:
+        quote = symbol.split('/')[1]
+        market = markets.get(f"{symbol}:{quote}")
+        if market is not None:
+            return market
+    return markets.get(symbol)
+
+
+def load_filters(exchange, symbols: Optional[Iterable[str]] = None) -> Dict[str, SymbolFilters]:
+    """
+    Construye y guarda los filtros de los símbolos indicados (llamar tras load_markets)
+
+    Args:
+        exchange: Instancia del exchange de CCXT con los mercados cargados
+        symbols: Símbolos a preparar (None para todos los mercados)
+
+    Returns:
+        Filtros del exchange por símbolo
+    """
+    markets = getattr(exchange, 'markets', None)
+    if not isinstance(markets, dict):
+        return {}
+    cached = _cache.setdefault(exchange, {})
+    precision_mode = getattr(exchange, 'precisionMode', None)
+    for symbol in (symbols if symbols is not None else list(markets)):
+        market = find_market(markets, symbol)
+        if market is not None:
+            cached[symbol] = filters_from_market(market, precision_mode)
+    return cached
+
+
+def get_filters(exchange, symbol: str) -> SymbolFilters:
+    """
+    Filtros de un símbolo (del caché; se construyen la primera vez si hace falta)
+
+    Si el exchange no tiene mercados cargados o no conoce el símbolo se
+    devuelven los valores por defecto de DOGE, sin guardarlos.
+
+    Args:
+        exchange: Instancia del exchange de CCXT
+        symbol: Par de trading
+
+    Returns:
+        Filtros del símbolo
+    """
+    try:
+        return _cache[exchange][symbol]
+    except (KeyError, TypeError):
+        pass
+    filters = load_filters(exchange, [symbol]).get(symbol)
+    if filters is None:
+        return SymbolFilters(symbol)
+    return filters
@@ -0,0 +1,413 @@
+"""
+Métricas de las llamadas al exchange: latencia por endpoint, errores y peso
+
+Todas las llamadas del bot al exchange (utils.py, main.py, batch_orders.py)
+pasan por los métodos del exchange de CCXT, así que la instrumentación se
+engancha en el exchange y no en cada llamada:
+
+- Cada método unificado que usa el bot (fetch_ticker, fetch_ohlcv,
+  fetch_balance, fetch_positions, create_*_order, cancel_order...) registra su
+  latencia en un histograma propio y los errores por tipo de excepción, aunque
+  luego utils.py los convierta en un print.
+- Las llamadas directas a la API (fapiPrivate_post_leverage, positionRisk,
+  batchOrders...) se registran por ruta en fetch2.
+- El peso de cada petición (coste de CCXT) se suma al endpoint que la originó y
+  se guarda el último peso usado que informa Binance.
+
+Las métricas se exponen en un endpoint HTTP local (/metrics en formato
+Prometheus y /metrics.json) y en un resumen periódico en consola.
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, Mapping
+
+import config
+from latency import LatencyHistogram
+
+
+# Métodos unificados de CCXT que usa el bot
+INSTRUMENTED_METHODS = (
+    'fetch_ticker', 'fetch_ohlcv', 'fetch_order_book', 'fetch_balance', 'fetch_positions', 'fetch_order',
+    'fetch_open_orders', 'create_order', 'create_limit_buy_order', 'create_limit_sell_order',
+    'create_market_buy_order', 'create_market_sell_order', 'edit_order', 'cancel_order', 'cancel_all_orders',
+)
+
+USED_WEIGHT_HEADER = 'x-mbx-used-weight-1m'
+
+# Llamada en curso (para no contar dos veces create_limit_buy_order -> create_order -> fetch2)
+_current_call: contextvars.ContextVar = contextvars.ContextVar('metrics_current_call', default=None)
+
+
+class EndpointStats:
+    """
+    Latencia, llamadas, errores y peso de un endpoint
+    """
+
+    __slots__ = ('name', 'latency', 'errors', 'weight')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latency = LatencyHistogram(name)
+        self.errors: Dict[str, int] = {}
+        self.weight = 0.0
+
+    @property
+    def calls(self) -> int:
+        return self.latency.count
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+
+class MetricsRegistry:
+    """
+    Métricas de todos los endpoints del proceso (seguro entre hilos)
+    """
+
+    def __init__(self):
+        self._endpoints: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+        self.used_weight: Optional[int] = None  # Último x-mbx-used-weight-1m de Binance
+        self.started = time.monotonic()
+
+    def endpoint(self, name: str) -> EndpointStats:
+        """Estadísticas de un endpoint (se crean al primer uso)"""
+        stats = self._endpoints.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self._endpoints.setdefault(name, EndpointStats(name))
+        return stats
+
+    def record(self, name: str, seconds: float, error: Optional[BaseException] = None):
+        """
+        Registra una llamada terminada
+
+        Args:
+            name: Endpoint (método de CCXT o ruta de la API)
+            seconds: Duración de la llamada
+            error: Excepción si la llamada falló
+        """
+        stats = self.endpoint(name)
+        stats.latency.record(seconds)
+        if error is not None:
+            kind = type(error).__name__
+            with self._lock:
+                stats.errors[kind] = stats.errors.get(kind, 0) + 1
+
+    def add_weight(self, name: str, weight: float):
+        """Suma el peso de una petición al endpoint que la originó"""
+        stats = self.endpoint(name)
+        with self._lock:
+            stats.weight += weight
+
+    def update_used_weight(self, headers: Optional[Mapping[str, Any]]):
+        """Guarda el peso usado por minuto que informa Binance en la respuesta"""
+        for key, value in (headers or {}).items():
+            if key.lower() == USED_WEIGHT_HEADER:
+                try:
+                    self.used_weight = int(value)
+                except (TypeError, ValueError):
+                    pass
+                return
+
+    def reset(self):
+        """Borra todas las métricas"""
+        with self._lock:
+            self._endpoints = {}
+            self.used_weight = None
+            self.started = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Estado de todas las métricas como dict (para /metrics.json)
+        """
+        with self._lock:
+            endpoints = sorted(self._endpoints.values(), key=lambda s: s.name)
+            errors = {s.name: dict(s.errors) for s in endpoints}
+            weights = {s.name: s.weight for s in endpoints}
+        return {
+            'uptime_seconds': time.monotonic() - self.started,
+            'used_weight_1m': self.used_weight,
+            'endpoints': {
+                s.name: dict(s.latency.snapshot(), errors=errors[s.name], weight=weights[s.name])
+                for s in endpoints
+            },
+        }
+
+    def prometheus(self) -> str:
+        """
+        Métricas en formato de texto de Prometheus
+        """
+        snap = self.snapshot()
+        lines = [
+            '# HELP exchange_request_duration_ms Latencia de las llamadas al exchange',
+            '# TYPE exchange_request_duration_ms histogram',
+        ]
+        for name, stats in snap['endpoints'].items():
+            label = f'endpoint="{name}"'
+            for bound, cumulative in stats['buckets']:
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                lines.append(f'exchange_request_duration_ms_bucket{{{label},le="{le}"}} {cumulative}')
+            lines.append(f'exchange_request_duration_ms_sum{{{label}}} {stats["sum_ms"]:.3f}')
+            lines.append(f'exchange_request_duration_ms_count{{{label}}} {stats["count"]}')
+        lines += ['# HELP exchange_request_errors_total Errores por endpoint y tipo',
+                  '# TYPE exchange_request_errors_total counter']
+        for name, stats in snap['endpoints'].items():
+            for kind, count in sorted(stats['errors'].items()):
+                lines.append(f'exchange_request_errors_total{{endpoint="{name}",error="{kind}"}} {count}')
+        lines += ['# HELP exchange_request_weight_total Peso de Binance consumido por endpoint',
+                  '# TYPE exchange_request_weight_total counter']
+        for name, stats in snap['endpoints'].items():
+            lines.append(f'exchange_request_weight_total{{endpoint="{name}"}} {stats["weight"]:g}')
+        if snap['used_weight_1m'] is not None:
+            lines += ['# HELP exchange_used_weight_1m Peso usado en el último minuto (x-mbx-used-weight-1m)',
+                      '# TYPE exchange_used_weight_1m gauge',
+                      f'exchange_used_weight_1m {snap["used_weight_1m"]}']
+        return "\n".join(lines) + "\n"
+
+    def format(self) -> str:
+        """
+        Resumen en texto por endpoint para mostrar en consola
+        """
+        snap = self.snapshot()
+        if not snap['endpoints']:
+            return "📊 Métricas del exchange: sin llamadas"
+        lines = [f"📊 Métricas del exchange ({snap['uptime_seconds'] / 60:.1f} min, "
+                 f"peso usado: {snap['used_weight_1m']})",
+                 f"   {'Endpoint':<28} {'Llamadas':>8} {'Errores':>7} {'p50 ms':>8} {'p99 ms':>8} "
+                 f"{'máx ms':>8} {'Peso':>6}"]
+        for name, stats in snap['endpoints'].items():
+            errors = sum(stats['errors'].values())
+            lines.append(f"   {name:<28} {stats['count']:>8} {errors:>7} {stats['p50_ms'] or 0:>8.2f} "
+                         f"{stats['p99_ms'] or 0:>8.2f} {stats['max_ms'] or 0:>8.2f} {stats['weight']:>6g}")
+        return "\n".join(lines)
+
+
+_default_registry: Optional[MetricsRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_registry() -> MetricsRegistry:
+    """
+    Registro de métricas compartido por todo el proceso
+    """
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = MetricsRegistry()
+        return _default_registry
+
+
+def _wrap_method(method, name: str, registry: MetricsRegistry):
+    """Envuelve un método del exchange (síncrono o corrutina) midiendo solo la llamada exterior"""
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def timed_async(*args, **kwargs):
+            if _current_call.get() is not None:
+                return await method(*args, **kwargs)
+            token = _current_call.set(name)
+            started = time.perf_counter()
+            error = None
+            try:
+                return await method(*args, **kwargs)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                registry.record(name, time.perf_counter() - started, error)
+                _current_call.reset(token)
+        return timed_async
+
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        if _current_call.get() is not None:
+            return method(*args, **kwargs)
+        token = _current_call.set(name)
+        started = time.perf_counter()
+        error = None
+        try:
+            return method(*args, **kwargs)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            registry.record(name, time.perf_counter() - started, error)
+            _current_call.reset(token)
+    return timed
+
+
+def instrument_ccxt(exchange, registry: Optional[MetricsRegistry] = None):
+    """
+    Mide todas las llamadas de un exchange CCXT (síncrono o ccxt.async_support)
+
+    Debe aplicarse después de rate_limit.instrument_ccxt para que la latencia
+    incluya la espera del planificador de peso.
+
+    Args:
+        exchange: Instancia de ccxt
+        registry: Registro de métricas (por defecto el compartido del proceso)
+
+    Returns:
+        El mismo exchange
+    """
+    registry = registry or get_registry()
+    for name in INSTRUMENTED_METHODS:
+        method = getattr(exchange, name, None)
+        if method is not None:
+            setattr(exchange, name, _wrap_method(method, name, registry))
+
+    original_fetch2 = exchange.fetch2
+
+    def endpoint_name(path, api, method):
+        api_name = api if isinstance(api, str) else '/'.join(api)
+        return f"{api_name} {method} {path}"
+
+    def add_weight(path, api, method, params, config):
+        try:
+            weight = exchange.calculate_rate_limiter_cost(api, method, path, params, config)
+        except Exception:
+            weight = 1
+        registry.add_weight(_current_call.get() or endpoint_name(path, api, method), weight)
+
+    if asyncio.iscoroutinefunction(original_fetch2):
+        async def fetch2_async(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            add_weight(path, api, method, params, config)
+            try:
+                if _current_call.get() is not None:
+                    return await original_fetch2(path, api, method, params, headers, body, config)
+                return await _wrap_method(original_fetch2, endpoint_name(path, api, method), registry)(
+                    path, api, method, params, headers, body, config)
+            finally:
+                registry.update_used_weight(exchange.last_response_headers)
+        exchange.fetch2 = fetch2_async
+    else:
+        def fetch2(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            add_weight(path, api, method, params, config)
+            try:
+                if _current_call.get() is not None:
+                    return original_fetch2(path, api, method, params, headers, body, config)
+                return _wrap_method(original_fetch2, endpoint_name(path, api, method), registry)(
+                    path, api, method, params, headers, body, config)
+            finally:
+                registry.update_used_weight(exchange.last_response_headers)
+        exchange.fetch2 = fetch2
+
+    exchange.metrics_registry = registry
+    return exchange
+
+
+def instrument_binance_client(client, registry: Optional[MetricsRegistry] = None):
+    """
+    Mide las peticiones de Futures de python-binance (bot.py) por ruta
+
+    Args:
+        client: binance.client.Client
+        registry: Registro de métricas (por defecto el compartido del proceso)
+
+    Returns:
+        El mismo cliente
+    """
+    from rate_limit import futures_request_weight
+
+    registry = registry or get_registry()
+    original_request = client._request_futures_api
+
+    def request_futures_api(method, path, signed=False, version=1, **kwargs):
+        name = f"fapi {method.upper()} {path}"
+        registry.add_weight(name, futures_request_weight(path, kwargs.get('data') or kwargs.get('params')))
+        try:
+            return _wrap_method(original_request, name, registry)(method, path, signed, version, **kwargs)
+        finally:
+            response = getattr(client, 'response', None)
+            if response is not None:
+                registry.update_used_weight(response.headers)
+
+    client._request_futures_api = request_futures_api
+    client.metrics_registry = registry
+    return client
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = None
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/metrics':
+            body = self.registry.prometheus().encode()
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        elif path == '/metrics.json':
+            body = json.dumps(self.registry.snapshot(), default=str).encode()
+            content_type = 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MetricsServer:
+    """
+    Endpoint HTTP local con las métricas y resumen periódico en consola
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, host: str = config.METRICS_HOST,
+                 port: int = config.METRICS_PORT, summary_interval: float = config.METRICS_SUMMARY_INTERVAL):
+        """
+        Args:
+            registry: Registro de métricas (por defecto el compartido del proceso)
+            host: Dirección de escucha (solo local por defecto)
+            port: Puerto del endpoint (0 = sin endpoint HTTP)
+            summary_interval: Segundos entre resúmenes en consola (0 = sin resumen periódico)
+        """
+        self.registry = registry or get_registry()
+        self.host = host
+        self.port = port
+        self.summary_interval = summary_interval
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+
+    @property
+    def url(self) -> Optional[str]:
+        if self._server is None:
+            return None
+        return f"http://{self.host}:{self._server.server_address[1]}/metrics"
+
+    def start(self):
+        """
+        Arranca el resumen periódico y el endpoint en hilos de fondo
+
+        Raises:
+            OSError: Si el puerto del endpoint no está disponible (el resumen sigue activo)
+        """
+        if self.summary_interval > 0:
+            threading.Thread(target=self._summary_loop, name='metrics-summary', daemon=True).start()
+        if self.port:
+            handler = type('MetricsHandler', (_MetricsHandler,), {'registry': self.registry})
+            self._server = ThreadingHTTPServer((self.host, self.port), handler)
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+
+    def _summary_loop(self):
+        while not self._stop.wait(self.summary_interval):
+            print("\n" + self.registry.format())
+
+    def stop(self):
+        """Detiene el endpoint y el resumen periódico"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,319 @@
+"""
+Libro de órdenes L2 local (snapshot REST + stream de profundidad de Binance)
+
+Sigue el procedimiento de Binance para un libro local:
+
+1. Los eventos ``depthUpdate`` se guardan mientras se pide el snapshot
+   (``/fapi/v1/depth`` o ``/api/v3/depth``).
+2. Se descartan los eventos con ``u`` anterior al ``lastUpdateId`` del snapshot
+   y el primero que se aplica tiene que contenerlo (``U <= lastUpdateId + 1 <= u + 1``).
+3. Cada evento siguiente continúa al anterior: en Futures ``pu`` es el ``u``
+   anterior y en Spot ``U`` es el ``u`` anterior + 1. Si no, hay un hueco y el
+   libro se descarta hasta el siguiente snapshot.
+4. Las cantidades son absolutas; 0 elimina el nivel.
+
+Con el libro sincronizado, ``entry_price`` elige el precio de entrada a partir
+del mejor bid/ask en lugar del último precio negociado (que suele estar viejo).
+"""
+
+import bisect
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import market_data
+from market_data import FUTURES_STREAM_URL, FUTURES_TESTNET_STREAM_URL, SPOT_STREAM_URL, depth_stream, run_stream
+
+
+MAX_BUFFERED_EVENTS = 1000
+SNAPSHOT_RETRY_SECONDS = 1.0
+
+ENTRY_MODES = ('join', 'improve', 'cross', 'last')
+
+Level = Tuple[float, float]
+
+
+class OrderBook:
+    """
+    Libro L2 de un símbolo mantenido con snapshot + diferencias
+
+    Los precios de cada lado se guardan en una lista ordenada (bisect) y las
+    cantidades en un diccionario, así que el mejor nivel se lee en O(1).
+    """
+
+    def __init__(self, symbol: str, load_snapshot: Optional[Callable[[], Dict[str, Any]]] = None,
+                 stale_after: float = 5.0, background: bool = True):
+        """
+        Args:
+            symbol: Par de trading
+            load_snapshot: Función que devuelve el snapshot REST (lastUpdateId/nonce, bids, asks)
+            stale_after: Segundos sin eventos tras los que el libro se considera viejo
+            background: Pedir el snapshot en un hilo aparte (los eventos se siguen guardando)
+        """
+        self.symbol = symbol
+        self.load_snapshot = load_snapshot
+        self.stale_after = stale_after
+        self.background = background
+
+        self._lock = threading.Lock()
+        self._bids: Dict[float, float] = {}
+        self._asks: Dict[float, float] = {}
+        self._bid_prices: List[float] = []  # Ascendente: el mejor bid es el último
+        self._ask_prices: List[float] = []  # Ascendente: el mejor ask es el primero
+        self._buffer: deque = deque(maxlen=MAX_BUFFERED_EVENTS)
+        self._last_update_id: Optional[int] = None
+        self._first_event = False  # El siguiente evento es el primero tras el snapshot
+        self._snapshot_pending = False
+        self._last_snapshot_request = 0.0
+
+        self.synced = False
+        self.last_update: Optional[float] = None  # time.monotonic() del último evento aplicado
+        self.gaps = 0
+        self.snapshots = 0
+
+    # ------------------------------------------------------------------
+    # Snapshot y diferencias
+    # ------------------------------------------------------------------
+
+    def apply_snapshot(self, snapshot: Dict[str, Any]):
+        """
+        Reconstruye el libro desde un snapshot y aplica los eventos guardados
+
+        Args:
+            snapshot: Respuesta de depth (``lastUpdateId``) o de ``fetch_order_book`` de CCXT (``nonce``)
+        """
+        last_update_id = snapshot.get('lastUpdateId', snapshot.get('nonce'))
+        if last_update_id is None:
+            raise ValueError("Snapshot sin lastUpdateId")
+        with self._lock:
+            self._bids = {float(p): float(q) for p, q, *_ in snapshot.get('bids', []) if float(q) > 0}
+            self._asks = {float(p): float(q) for p, q, *_ in snapshot.get('asks', []) if float(q) > 0}
+            self._bid_prices = sorted(self._bids)
+            self._ask_prices = sorted(self._asks)
+            self._last_update_id = int(last_update_id)
+            self._first_event = True
+            self._snapshot_pending = False
+            self.synced = True
+            self.snapshots += 1
+            self.last_update = time.monotonic()
+            buffered, self._buffer = list(self._buffer), deque(maxlen=MAX_BUFFERED_EVENTS)
+            for event in buffered:
+                if not self._apply_event(event):
+                    break
+
+    def handle_diff(self, event: Dict[str, Any]):
+        """
+        Aplica un evento ``depthUpdate`` (o lo guarda si falta el snapshot)
+
+        Args:
+            event: Datos del evento (U, u, pu en Futures, b, a)
+        """
+        request = False
+        with self._lock:
+            if self.synced:
+                self._apply_event(event)
+            else:
+                self._buffer.append(event)
+            if not self.synced and not self._snapshot_pending and \
+                    time.monotonic() - self._last_snapshot_request >= SNAPSHOT_RETRY_SECONDS:
+                self._snapshot_pending = request = True
+                self._last_snapshot_request = time.monotonic()
+        if request:
+            self._request_snapshot()
+
+    def _apply_event(self, event: Dict[str, Any]) -> bool:
+        # Llamar con el lock tomado; devuelve False si hay un hueco
+        first_id, final_id = int(event['U']), int(event['u'])
+        if final_id < self._last_update_id:
+            return True  # Anterior al snapshot
+        if self._first_event:
+            continuous = first_id <= self._last_update_id + 1
+        elif 'pu' in event:
+            continuous = int(event['pu']) == self._last_update_id
+        else:
+            continuous = first_id == self._last_update_id + 1
+        if not continuous:
+            self.gaps += 1
+            self.synced = False
+            self._buffer.clear()
+            self._buffer.append(event)
+            print(f"⚠️  Hueco en el libro de {self.symbol} (último {self._last_update_id}, "
+                  f"llegó U={first_id} u={final_id}). Resincronizando...")
+            return False
+
+        self._update_side(self._bids, self._bid_prices, event.get('b', ()))
+        self._update_side(self._asks, self._ask_prices, event.get('a', ()))
+        self._last_update_id = final_id
+        self._first_event = False
+        self.last_update = time.monotonic()
+        return True
+
+    @staticmethod
+    def _update_side(levels: Dict[float, float], prices: List[float], changes):
+        for price, quantity in changes:
+            price, quantity = float(price), float(quantity)
+            if quantity > 0:
+                if price not in levels:
+                    bisect.insort(prices, price)
+                levels[price] = quantity
+            elif levels.pop(price, None) is not None:
+                del prices[bisect.bisect_left(prices, price)]
+
+    def _request_snapshot(self):
+        if self.load_snapshot is None:
+            return
+        if self.background:
+            threading.Thread(target=self._load_snapshot, name=f"order-book-{self.symbol}", daemon=True).start()
+        else:
+            self._load_snapshot()
+
+    def _load_snapshot(self):
+        try:
+            self.apply_snapshot(self.load_snapshot())
+        except Exception as e:
+            print(f"⚠️  No se pudo descargar el libro de {self.symbol}: {e}")
+            with self._lock:
+                self._snapshot_pending = False
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def is_fresh(self) -> bool:
+        """True si el libro está sincronizado y recibió eventos en los últimos ``stale_after`` segundos"""
+        return self.synced and self.last_update is not None and \
+            time.monotonic() - self.last_update <= self.stale_after
+
+    def best_bid(self) -> Optional[Level]:
+        with self._lock:
+            if not self._bid_prices:
+                return None
+            price = self._bid_prices[-1]
+            return price, self._bids[price]
+
+    def best_ask(self) -> Optional[Level]:
+        with self._lock:
+            if not self._ask_prices:
+                return None
+            price = self._ask_prices[0]
+            return price, self._asks[price]
+
+    def bids(self, depth: int = 10) -> List[Level]:
+        """Mejores ``depth`` niveles de compra, del mejor al peor"""
+        with self._lock:
+            return [(p, self._bids[p]) for p in self._bid_prices[:-depth - 1:-1]]
+
+    def asks(self, depth: int = 10) -> List[Level]:
+        """Mejores ``depth`` niveles de venta, del mejor al peor"""
+        with self._lock:
+            return [(p, self._asks[p]) for p in self._ask_prices[:depth]]
+
+
+def entry_price(book: OrderBook, side: str, amount: float, mode: str, filters,
+                max_queue_ahead_usdt: float = 0.0) -> Optional[float]:
+    """
+    Precio LIMIT de entrada a partir del libro
+
+    - ``join``: el mejor precio de nuestro lado (bid para comprar, ask para
+      vender): maker, se llena en cuanto el otro lado llega al precio. Si por
+      delante hay más de ``max_queue_ahead_usdt`` y el spread lo permite, se
+      mejora un tick para ser el primero de la cola.
+    - ``improve``: un tick dentro del spread (si hay hueco; si no, ``join``).
+    - ``cross``: el nivel del otro lado donde se completa ``amount``: se llena
+      al instante hasta ese precio (taker).
+    - ``last``: None (se usa el último precio negociado).
+
+    Args:
+        book: Libro sincronizado
+        side: 'buy' o 'sell'
+        amount: Cantidad de la orden (en la moneda base)
+        mode: Uno de ENTRY_MODES
+        filters: market_filters.SymbolFilters del símbolo (tick size)
+        max_queue_ahead_usdt: Notional por delante en el mejor nivel a partir del cual se mejora un tick (0 = nunca)
+
+    Returns:
+        Precio cuantizado al tick, o None si el modo es 'last' o falta un lado del libro
+    """
+    if mode not in ENTRY_MODES:
+        raise ValueError(f"ENTRY_PRICE_MODE desconocido: {mode!r} (opciones: {', '.join(ENTRY_MODES)})")
+    if mode == 'last':
+        return None
+    bid, ask = book.best_bid(), book.best_ask()
+    if bid is None or ask is None:
+        return None
+    tick = filters.tick_size
+    sign = 1 if side == 'buy' else -1
+    (own_price, own_quantity), other_price = (bid, ask[0]) if side == 'buy' else (ask, bid[0])
+
+    if mode == 'cross':
+        levels = book.asks(MAX_BUFFERED_EVENTS) if side == 'buy' else book.bids(MAX_BUFFERED_EVENTS)
+        remaining = amount
+        for price, quantity in levels:
+            remaining -= quantity
+            if remaining <= 0:
+                break
+        return filters.round_price(price)
+
+    has_room = abs(other_price - own_price) > tick * 1.5  # Queda al menos un tick libre dentro del spread
+    improve = mode == 'improve' or \
+        (max_queue_ahead_usdt > 0 and own_quantity * own_price > max_queue_ahead_usdt)
+    if improve and has_room:
+        return filters.round_price(own_price + sign * tick)
+    return filters.round_price(own_price)
+
+
+class OrderBookStream:
+    """
+    Libro local con su propio stream de profundidad (para bot.py, que no usa MarketDataFeed)
+    """
+
+    def __init__(self, book: OrderBook, use_futures: bool = True, use_testnet: bool = False,
+                 url: Optional[str] = None):
+        """
+        Args:
+            book: Libro que se mantiene
+            use_futures: Si se usan los streams de Futures
+            use_testnet: Si se usa el testnet de Futures
+            url: URL del stream (por defecto la de profundidad del símbolo del libro)
+        """
+        if url is None:
+            base = SPOT_STREAM_URL if not use_futures else \
+                FUTURES_TESTNET_STREAM_URL if use_testnet else FUTURES_STREAM_URL
+            url = base + depth_stream(book.symbol)
+        self.book = book
+        self.url = url
+        self.connected = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        Arranca el hilo consumidor del stream de profundidad
+        """
+        if market_data.ws_connect is None:
+            raise RuntimeError("Módulo 'websockets' no disponible. Instala con: pip install websockets")
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"order-book-stream-{self.book.symbol}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Detiene el hilo consumidor
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.connected.clear()
+
+    def _run(self):
+        run_stream(self.url, self.handle_message, self._stop_event, self.connected, label='Stream de profundidad')
+
+    def handle_message(self, raw):
+        message = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        data = message.get('data', message)
+        if data.get('e') == 'depthUpdate':
+            self.book.handle_diff(data)
@@ -0,0 +1,409 @@
+"""
+Máquina de estados de órdenes y posición de un símbolo
+
+El bot ya no supone que una orden se ejecutó al colocarla: cada orden pasa
+por NEW → PARTIALLY_FILLED → FILLED (o CANCELED) según los eventos del
+exchange (stream de usuario o reconciliación periódica), y la posición pasa
+por FLAT → ENTRY_PENDING → OPEN → EXIT_PENDING → FLAT.
+
+Con la posición abierta el bot puede dejar en el exchange su take profit
+(LIMIT reduceOnly) y su stop loss (STOP_MARKET closePosition). La posición
+sigue en OPEN y pasa a FLAT cuando el exchange informa de que una de ellas
+se ejecutó, aunque el bot no estuviera mirando en ese momento.
+
+La estrategia lee siempre este estado local, sin llamadas al exchange.
+"""
+
+from typing import Optional, Dict, Any, List
+
+# Estados de orden
+NEW = 'NEW'
+PARTIALLY_FILLED = 'PARTIALLY_FILLED'
+FILLED = 'FILLED'
+CANCELED = 'CANCELED'
+FINAL_STATUSES = (FILLED, CANCELED)
+
+# Fases de la posición
+FLAT = 'FLAT'
+ENTRY_PENDING = 'ENTRY_PENDING'
+OPEN = 'OPEN'
+EXIT_PENDING = 'EXIT_PENDING'
+
+# Transiciones que devuelve PositionState
+ENTRY_PARTIAL = 'ENTRY_PARTIAL'
+ENTRY_FILLED = 'ENTRY_FILLED'
+ENTRY_CANCELED = 'ENTRY_CANCELED'
+EXIT_PARTIAL = 'EXIT_PARTIAL'
+EXIT_FILLED = 'EXIT_FILLED'
+EXIT_CANCELED = 'EXIT_CANCELED'
+ADOPTED = 'ADOPTED'    # Posición abierta fuera del bot (o entrada cuyo evento se perdió)
+CLOSED = 'CLOSED'      # Posición cerrada fuera del bot (manual, liquidación)
+RESIZED = 'RESIZED'    # Cantidad o precio de entrada corregidos por el exchange
+PROTECTION_CANCELED = 'PROTECTION_CANCELED'  # Take profit o stop loss del exchange cancelado sin ejecutarse
+
+# Estados de Binance y de CCXT que se reducen a los cuatro de la máquina
+_STATUS_ALIASES = {
+    'new': NEW,
+    'open': NEW,
+    'partially_filled': PARTIALLY_FILLED,
+    'filled': FILLED,
+    'closed': FILLED,
+    'canceled': CANCELED,
+    'cancelled': CANCELED,
+    'expired': CANCELED,
+    'expired_in_match': CANCELED,
+    'rejected': CANCELED,
+}
+
+
+def normalize_status(status: Optional[str], filled: float = 0.0) -> Optional[str]:
+    """
+    Convierte un estado de Binance ('PARTIALLY_FILLED') o de CCXT ('open') a la máquina
+
+    Args:
+        status: Estado de la orden
+        filled: Cantidad ejecutada (CCXT no distingue 'open' de parcialmente ejecutada)
+
+    Returns:
+        NEW, PARTIALLY_FILLED, FILLED, CANCELED o None si el estado es desconocido
+    """
+    normalized = _STATUS_ALIASES.get(str(status).lower())
+    if normalized == NEW and filled > 0:
+        return PARTIALLY_FILLED
+    return normalized
+
+
+class TrackedOrder:
+    """
+    Orden del bot con su estado y su ejecución acumulada
+    """
+
+    def __init__(self, order_id: str, side: str, amount: float, price: float, order_type: str = 'LIMIT'):
+        """
+        Args:
+            order_id: ID de la orden en el exchange
+            side: 'buy' o 'sell'
+            amount: Cantidad de la orden
+            price: Precio límite
+            order_type: 'LIMIT' o 'MARKET'
+        """
+        self.id = str(order_id)
+        self.side = side
+        self.amount = amount
+        self.price = price
+        self.type = order_type
+        self.status = NEW
+        self.filled = 0.0
+        self.average = 0.0
+
+    @property
+    def is_final(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    def apply(self, status: str, filled: float, average: float) -> bool:
+        """
+        Aplica una actualización del exchange
+
+        Las actualizaciones viejas o desordenadas (menos cantidad ejecutada, u
+        órdenes ya finalizadas) se ignoran.
+
+        Returns:
+            True si la orden cambió
+        """
+        if self.is_final or filled < self.filled:
+            return False
+        if status == self.status and filled == self.filled:
+            return False
+        if status == NEW and filled > 0:
+            status = PARTIALLY_FILLED
+        self.status = status
+        self.filled = filled
+        if average:
+            self.average = average
+        return True
+
+
+class PositionState:
+    """
+    Estado de la posición de un símbolo y de sus órdenes de entrada y salida
+    """
+
+    def __init__(self):
+        self.phase = FLAT
+        self.side: Optional[str] = None  # 'LONG' o 'SHORT'
+        self.amount = 0.0                # Cantidad ejecutada (siempre positiva)
+        self.entry_price = 0.0
+        self.entry_order: Optional[TrackedOrder] = None
+        self.exit_order: Optional[TrackedOrder] = None
+        self.exit_price = 0.0  # Precio medio de la última salida ejecutada
+        self._exit_start_amount = 0.0
+        # Salidas residentes en el exchange (take profit y stop loss)
+        self.take_profit_order: Optional[TrackedOrder] = None
+        self.stop_order: Optional[TrackedOrder] = None
+        self.leftover_orders: List[TrackedOrder] = []  # Órdenes vivas cuando la posición se cerró fuera del bot
+        self._flat_reported = False
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    @property
+    def in_position(self) -> bool:
+        """True si hay posición u orden de entrada en curso (el bot no debe abrir otra)"""
+        return self.phase != FLAT
+
+    @property
+    def is_pending(self) -> bool:
+        """True si se espera la ejecución de una orden del bot"""
+        return self.phase in (ENTRY_PENDING, EXIT_PENDING)
+
+    @property
+    def active_order(self) -> Optional[TrackedOrder]:
+        """Orden viva del bot (la de salida tiene prioridad)"""
+        for order in (self.exit_order, self.entry_order):
+            if order is not None and not order.is_final:
+                return order
+        return None
+
+    def live_orders(self) -> List[TrackedOrder]:
+        """Órdenes del bot que el exchange todavía debería tener abiertas"""
+        return [o for o in (self.entry_order, self.exit_order, self.take_profit_order, self.stop_order)
+                if o is not None and not o.is_final]
+
+    def protective_orders(self) -> List[TrackedOrder]:
+        """Take profit y stop loss del exchange que siguen vivos"""
+        return [o for o in (self.take_profit_order, self.stop_order) if o is not None and not o.is_final]
+
+    @property
+    def has_stop(self) -> bool:
+        """True si el stop loss está en el exchange (la estrategia no tiene que vigilarlo)"""
+        return self.stop_order is not None and not self.stop_order.is_final
+
+    @property
+    def has_take_profit(self) -> bool:
+        """True si el take profit está en el exchange"""
+        return self.take_profit_order is not None and not self.take_profit_order.is_final
+
+    @property
+    def has_limit_exit(self) -> bool:
+        """True si el cierre en curso es el take profit LIMIT del bot (el stop loss sigue a cargo del bot)"""
+        return self.phase == EXIT_PENDING and self.exit_order is not None and self.exit_order.type == 'LIMIT'
+
+    def signed_amount(self) -> float:
+        return -self.amount if self.side == 'SHORT' else self.amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        order = self.active_order
+        return {
+            'phase': self.phase,
+            'side': self.side,
+            'amount': self.amount,
+            'entry_price': self.entry_price,
+            'active_order_id': order.id if order else None,
+            'active_order_status': order.status if order else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Órdenes colocadas por el bot
+    # ------------------------------------------------------------------
+
+    def entry_placed(self, order_id: str, side: str, amount: float, price: float):
+        """
+        Registra la orden de entrada recién colocada (FLAT → ENTRY_PENDING)
+
+        Args:
+            order_id: ID de la orden
+            side: 'LONG' o 'SHORT'
+            amount: Cantidad de la orden
+            price: Precio límite
+        """
+        self.entry_order = TrackedOrder(order_id, 'buy' if side == 'LONG' else 'sell', amount, price)
+        self.exit_order = None
+        self.take_profit_order = None
+        self.stop_order = None
+        self.phase = ENTRY_PENDING
+        self.side = side
+        self.amount = 0.0
+        self.entry_price = price
+
+    def exit_placed(self, order_id: str, amount: float, price: float, order_type: str = 'LIMIT'):
+        """
+        Registra la orden de cierre recién colocada (OPEN → EXIT_PENDING)
+        """
+        self.exit_order = TrackedOrder(order_id, 'sell' if self.side == 'LONG' else 'buy', amount, price,
+                                       order_type)
+        self.phase = EXIT_PENDING
+        self._exit_start_amount = self.amount
+
+    def protection_placed(self, take_profit_id: Optional[str], take_profit_price: float,
+                          stop_id: Optional[str], stop_price: float):
+        """
+        Registra el take profit y el stop loss colocados en el exchange (la fase sigue en OPEN)
+
+        Args:
+            take_profit_id: ID de la orden LIMIT reduceOnly (None si no se colocó)
+            take_profit_price: Precio límite del take profit
+            stop_id: ID de la orden STOP_MARKET closePosition (None si no se colocó)
+            stop_price: Precio de activación del stop loss
+        """
+        exit_side = 'sell' if self.side == 'LONG' else 'buy'
+        if take_profit_id is not None:
+            self.take_profit_order = TrackedOrder(take_profit_id, exit_side, self.amount, take_profit_price)
+        if stop_id is not None:
+            self.stop_order = TrackedOrder(stop_id, exit_side, self.amount, stop_price)
+        self._exit_start_amount = self.amount
+
+    def entry_repriced(self, order_id: str, price: float):
+        """
+        Registra la orden de entrada movida a otro precio (la fase sigue en ENTRY_PENDING)
+
+        Solo se mueven entradas sin ejecución, así que la orden empieza de cero.
+        Con modify el ID es el mismo; con cancel-replace es el de la nueva orden.
+
+        Args:
+            order_id: ID de la orden en el exchange tras el cambio
+            price: Nuevo precio límite
+        """
+        entry = self.entry_order
+        self.entry_order = TrackedOrder(order_id, entry.side, entry.amount, price)
+        self.entry_price = price
+
+    def adopt(self, side: str, amount: float, entry_price: float):
+        """
+        Adopta una posición abierta encontrada en el exchange (→ OPEN)
+        """
+        self.phase = OPEN
+        self.side = side
+        self.amount = amount
+        self.entry_price = entry_price
+        self.entry_order = None
+        self.exit_order = None
+
+    def reset(self):
+        self.__init__()
+
+    # ------------------------------------------------------------------
+    # Eventos del exchange
+    # ------------------------------------------------------------------
+
+    def on_order_update(self, order_id, status: Optional[str], filled: float,
+                        average: float = 0.0) -> Optional[str]:
+        """
+        Aplica una actualización de orden (ORDER_TRADE_UPDATE o consulta REST)
+
+        Args:
+            order_id: ID de la orden
+            status: Estado de Binance o CCXT
+            filled: Cantidad ejecutada acumulada
+            average: Precio medio de ejecución
+
+        Returns:
+            Transición producida (ENTRY_FILLED, EXIT_FILLED...) o None
+        """
+        order_id = str(order_id)
+        status = normalize_status(status, filled)
+        if status is None:
+            return None
+
+        entry, exit_ = self.entry_order, self.exit_order
+        if entry is not None and entry.id == order_id and self.phase == ENTRY_PENDING:
+            if not entry.apply(status, filled, average):
+                return None
+            if entry.filled > 0:
+                self.amount = entry.filled
+                self.entry_price = entry.average or entry.price
+            if entry.status == PARTIALLY_FILLED:
+                return ENTRY_PARTIAL
+            if entry.status == FILLED:
+                self.phase = OPEN
+                return ENTRY_FILLED
+            # Cancelada: si se llegó a ejecutar una parte, esa parte es la posición
+            if entry.filled > 0:
+                self.phase = OPEN
+            else:
+                self.reset()
+            return ENTRY_CANCELED
+
+        if exit_ is not None and exit_.id == order_id and self.phase == EXIT_PENDING:
+            if not exit_.apply(status, filled, average):
+                return None
+            if exit_.status == FILLED:
+                self.exit_price = exit_.average or exit_.price
+                self.phase = FLAT
+                self.amount = 0.0
+                return EXIT_FILLED
+            self.amount = max(self._exit_start_amount - exit_.filled, 0.0)
+            if exit_.status == PARTIALLY_FILLED:
+                return EXIT_PARTIAL
+            self.phase = OPEN if self.amount > 0 else FLAT
+            return EXIT_CANCELED
+
+        for order in (self.take_profit_order, self.stop_order):
+            if order is not None and order.id == order_id and self.phase == OPEN:
+                if not order.apply(status, filled, average):
+                    return None
+                if order.status == FILLED:
+                    self.exit_price = order.average or order.price
+                    self.phase = FLAT
+                    self.amount = 0.0
+                    return EXIT_FILLED
+                if order.filled > 0:
+                    self.amount = max(self._exit_start_amount - order.filled, 0.0)
+                if order.status == PARTIALLY_FILLED:
+                    return EXIT_PARTIAL
+                if order.status == CANCELED:
+                    return PROTECTION_CANCELED
+                return None
+
+        return None
+
+    def on_position_update(self, signed_amount: float, entry_price: float) -> Optional[str]:
+        """
+        Aplica la posición que informa el exchange (ACCOUNT_UPDATE o reconciliación)
+
+        Mientras hay una orden del bot en curso, el cambio de fase lo decide el
+        evento de la orden (trae el precio de ejecución); aquí solo se ajustan
+        cantidad y precio de entrada.
+
+        Args:
+            signed_amount: Cantidad de la posición (negativa en SHORT)
+            entry_price: Precio medio de entrada
+
+        Returns:
+            ADOPTED, CLOSED, RESIZED o None si no hubo cambios
+        """
+        amount = abs(signed_amount)
+        side = 'LONG' if signed_amount > 0 else 'SHORT'
+
+        if self.phase == FLAT:
+            if amount == 0:
+                return None
+            self.adopt(side, amount, entry_price)
+            return ADOPTED
+
+        if self.phase == OPEN:
+            if amount == 0:
+                if self.protective_orders() and not self._flat_reported:
+                    # Casi seguro que se ejecutó el take profit o el stop loss: su evento
+                    # (o la siguiente reconciliación) trae el precio de salida
+                    self._flat_reported = True
+                    return None
+                leftovers = self.protective_orders()
+                self.reset()
+                self.leftover_orders = leftovers
+                return CLOSED
+            self._flat_reported = False
+            if amount == self.amount and side == self.side and entry_price == self.entry_price:
+                return None
+            self.side, self.amount, self.entry_price = side, amount, entry_price
+            return RESIZED
+
+        if amount == 0:
+            # Orden en curso: esperar a su evento
+            return None
+        if self.phase == ENTRY_PENDING:
+            self.amount = amount
+            self.entry_price = entry_price
+        else:
+            self.amount = amount
+        return None
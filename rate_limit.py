@@ -0,0 +1,359 @@
+"""
+Planificador central de peticiones con contabilidad de peso de Binance
+
+Binance limita por peso de petición por minuto e IP (x-mbx-used-weight-1m) y
+responde 429 (y 418 si se insiste) al pasarse. El throttle de CCXT
+(enableRateLimit) solo espacia las peticiones de una instancia y no sabe cuánto
+peso lleva gastado la cuenta. Este módulo mantiene un token bucket compartido
+por todas las llamadas del proceso (CCXT y python-binance):
+
+- Cada petición reserva su peso antes de salir.
+- Tras cada respuesta, el bucket se ajusta al peso real que informa Binance.
+- La colocación y cancelación de órdenes tiene prioridad: puede usar la
+  reserva del bucket, y las consultas informativas esperan mientras haya
+  órdenes en cola.
+- Las consultas informativas (polling) no tocan la reserva, así que frenan
+  antes de llegar al límite.
+- Tras un 429/418 se bloquea todo hasta el Retry-After indicado.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Optional, Dict, Any, Mapping
+
+import config
+
+
+PRIORITY_ORDER = 0  # Colocar/cancelar órdenes
+PRIORITY_POLL = 1   # Consultas informativas (precios, posiciones, balance)
+
+USED_WEIGHT_HEADER = 'x-mbx-used-weight-1m'
+
+# Endpoints de órdenes (mismo nombre en CCXT y en las rutas de Binance)
+ORDER_PATHS = {'order', 'batchOrders', 'allOpenOrders', 'countdownCancelAll'}
+ORDER_METHODS = {'POST', 'DELETE', 'PUT'}
+
+# Peso de los endpoints de Futures que usa python-binance (bot.py)
+FUTURES_WEIGHTS = {
+    'positionRisk': 5,
+    'account': 5,
+    'balance': 5,
+    'batchOrders': 5,
+    'depth': 5,
+    'klines': 5,
+    'userTrades': 5,
+    'allOrders': 5,
+}
+
+
+def is_order_request(path: str, method: str) -> bool:
+    """
+    True si la petición coloca, modifica o cancela órdenes
+    """
+    return path in ORDER_PATHS and method.upper() in ORDER_METHODS
+
+
+def futures_request_weight(path: str, params: Optional[Mapping[str, Any]] = None) -> int:
+    """
+    Peso aproximado de una petición a la API de Futures
+
+    Args:
+        path: Ruta del endpoint (ej: 'positionRisk', 'ticker/price')
+        params: Parámetros de la petición
+
+    Returns:
+        Peso de la petición
+    """
+    has_symbol = bool(params and params.get('symbol'))
+    if path == 'openOrders':
+        return 1 if has_symbol else 40
+    if path in ('ticker/price', 'ticker/bookTicker'):
+        return 1 if has_symbol else 2
+    return FUTURES_WEIGHTS.get(path, 1)
+
+
+class RateLimitScheduler:
+    """
+    Token bucket de peso compartido por todas las llamadas al exchange
+    """
+
+    def __init__(self, weight_limit: int = config.RATE_LIMIT_WEIGHT_PER_MINUTE,
+                 order_reserve: float = config.RATE_LIMIT_ORDER_RESERVE):
+        """
+        Args:
+            weight_limit: Peso máximo por minuto de la IP
+            order_reserve: Fracción del bucket reservada para órdenes
+        """
+        self.weight_limit = weight_limit
+        self.refill_per_second = weight_limit / 60.0
+        self.reserve = weight_limit * order_reserve
+
+        self._condition = threading.Condition()
+        self._tokens = float(weight_limit)
+        self._updated = time.monotonic()
+        self._orders_waiting = 0
+        self.banned_until = 0.0
+
+        # Estadísticas
+        self.used_weight: Optional[int] = None  # Último peso informado por Binance
+        self.requests = 0
+        self.throttled = 0        # Peticiones que tuvieron que esperar
+        self.wait_seconds = 0.0
+        self.rate_limited = 0     # Respuestas 429/418
+
+    def _refill(self, now: float):
+        # Llamar con la condición tomada
+        self._tokens = min(self.weight_limit, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        """Peso disponible ahora mismo"""
+        with self._condition:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def acquire(self, weight: float = 1, priority: int = PRIORITY_POLL) -> float:
+        """
+        Reserva peso para una petición, esperando si hace falta
+
+        Args:
+            weight: Peso de la petición
+            priority: PRIORITY_ORDER o PRIORITY_POLL
+
+        Returns:
+            Segundos de espera
+        """
+        is_order = priority == PRIORITY_ORDER
+        weight = min(weight, self.weight_limit - (0 if is_order else self.reserve))
+        started = time.monotonic()
+        with self._condition:
+            if is_order:
+                self._orders_waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now < self.banned_until:
+                        self._condition.wait(self.banned_until - now)
+                        continue
+
+                    floor = 0.0 if is_order else self.reserve
+                    if not is_order and self._orders_waiting:
+                        # Las órdenes en cola pasan primero
+                        self._condition.wait(0.05)
+                        continue
+                    if self._tokens - weight >= floor:
+                        self._tokens -= weight
+                        break
+                    missing = weight + floor - self._tokens
+                    self._condition.wait(max(missing / self.refill_per_second, 0.001))
+            finally:
+                if is_order:
+                    self._orders_waiting -= 1
+                    self._condition.notify_all()
+
+            self.requests += 1
+            waited = time.monotonic() - started
+            if waited > 0.001:
+                self.throttled += 1
+                self.wait_seconds += waited
+            return waited
+
+    def _take_now(self, weight: float, priority: int) -> bool:
+        # Reserva el peso solo si no hay que esperar (misma regla que acquire)
+        is_order = priority == PRIORITY_ORDER
+        floor = 0.0 if is_order else self.reserve
+        weight = min(weight, self.weight_limit - floor)
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self.banned_until or (not is_order and self._orders_waiting) or \
+                    self._tokens - weight < floor:
+                return False
+            self._tokens -= weight
+            self.requests += 1
+            return True
+
+    async def acquire_async(self, weight: float = 1, priority: int = PRIORITY_POLL) -> float:
+        """
+        Versión de acquire para asyncio (ccxt.async_support)
+
+        Si hay peso disponible se reserva sin salir del event loop; si hay que
+        esperar, la espera se hace en un hilo para no bloquear las demás tareas.
+
+        Returns:
+            Segundos de espera
+        """
+        if self._take_now(weight, priority):
+            return 0.0
+        return await asyncio.get_running_loop().run_in_executor(None, self.acquire, weight, priority)
+
+    def update_from_headers(self, headers: Optional[Mapping[str, Any]]):
+        """
+        Ajusta el bucket al peso usado que informa Binance en la respuesta
+
+        Args:
+            headers: Cabeceras HTTP de la respuesta
+        """
+        if not headers:
+            return
+        used = None
+        for key, value in headers.items():
+            if key.lower() == USED_WEIGHT_HEADER:
+                used = value
+                break
+        if used is None:
+            return
+        try:
+            used = int(used)
+        except (TypeError, ValueError):
+            return
+        with self._condition:
+            self.used_weight = used
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, float(self.weight_limit - used))
+
+    def on_rate_limited(self, headers: Optional[Mapping[str, Any]] = None, default_wait: float = 60.0):
+        """
+        Bloquea todas las peticiones tras un 429/418 hasta el Retry-After
+
+        Args:
+            headers: Cabeceras HTTP de la respuesta de error
+            default_wait: Espera si la respuesta no trae Retry-After
+        """
+        wait = default_wait
+        for key, value in (headers or {}).items():
+            if key.lower() == 'retry-after':
+                try:
+                    wait = float(value)
+                except (TypeError, ValueError):
+                    pass
+                break
+        with self._condition:
+            self.rate_limited += 1
+            self.banned_until = max(self.banned_until, time.monotonic() + wait)
+            self._tokens = 0.0
+        print(f"⛔ Límite de peticiones de Binance alcanzado. Pausando peticiones {wait:.0f}s")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Estado y estadísticas del planificador
+        """
+        with self._condition:
+            self._refill(time.monotonic())
+            return {
+                'weight_limit': self.weight_limit,
+                'available': self._tokens,
+                'used_weight': self.used_weight,
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'wait_seconds': self.wait_seconds,
+                'rate_limited': self.rate_limited,
+            }
+
+
+_default_scheduler: Optional[RateLimitScheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """
+    Planificador compartido por todo el proceso
+    """
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RateLimitScheduler()
+        return _default_scheduler
+
+
+def instrument_ccxt(exchange, scheduler: Optional[RateLimitScheduler] = None):
+    """
+    Hace que todas las peticiones de un exchange CCXT pasen por el planificador
+
+    Sustituye al throttle de CCXT (enableRateLimit): el peso de cada petición
+    se estima con el coste que CCXT asigna al endpoint y se corrige con la
+    cabecera de peso usado de cada respuesta.
+
+    Args:
+        exchange: Instancia de ccxt o de ccxt.async_support
+        scheduler: Planificador (por defecto el compartido del proceso)
+
+    Returns:
+        El mismo exchange
+    """
+    import ccxt
+
+    scheduler = scheduler or get_scheduler()
+    original_fetch2 = exchange.fetch2
+
+    def request_weight(path, api, method, params, config):
+        weight = exchange.calculate_rate_limiter_cost(api, method, path, params, config)
+        return weight, PRIORITY_ORDER if is_order_request(path, method) else PRIORITY_POLL
+
+    if asyncio.iscoroutinefunction(original_fetch2):
+        async def fetch2_async(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            await scheduler.acquire_async(*request_weight(path, api, method, params, config))
+            try:
+                return await original_fetch2(path, api, method, params, headers, body, config)
+            except (ccxt.DDoSProtection, ccxt.RateLimitExceeded):  # 429/418
+                scheduler.on_rate_limited(exchange.last_response_headers)
+                raise
+            finally:
+                scheduler.update_from_headers(exchange.last_response_headers)
+
+        exchange.fetch2 = fetch2_async
+    else:
+        def fetch2(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            scheduler.acquire(*request_weight(path, api, method, params, config))
+            try:
+                return original_fetch2(path, api, method, params, headers, body, config)
+            except (ccxt.DDoSProtection, ccxt.RateLimitExceeded):  # 429/418
+                scheduler.on_rate_limited(exchange.last_response_headers)
+                raise
+            finally:
+                scheduler.update_from_headers(exchange.last_response_headers)
+
+        exchange.fetch2 = fetch2
+    exchange.enableRateLimit = False
+    exchange.rate_limit_scheduler = scheduler
+    return exchange
+
+
+def instrument_binance_client(client, scheduler: Optional[RateLimitScheduler] = None):
+    """
+    Hace que las peticiones de Futures de python-binance pasen por el planificador
+
+    Args:
+        client: binance.client.Client
+        scheduler: Planificador (por defecto el compartido del proceso)
+
+    Returns:
+        El mismo cliente
+    """
+    from binance.exceptions import BinanceAPIException
+
+    scheduler = scheduler or get_scheduler()
+    original_request = client._request_futures_api
+
+    def request_futures_api(method, path, signed=False, version=1, **kwargs):
+        params = kwargs.get('data') or kwargs.get('params')
+        weight = futures_request_weight(path, params)
+        priority = PRIORITY_ORDER if is_order_request(path, method) else PRIORITY_POLL
+        scheduler.acquire(weight, priority)
+        try:
+            return original_request(method, path, signed, version, **kwargs)
+        except BinanceAPIException as e:
+            if e.status_code in (418, 429):
+                scheduler.on_rate_limited(getattr(e.response, 'headers', None))
+            raise
+        finally:
+            response = getattr(client, 'response', None)
+            if response is not None:
+                scheduler.update_from_headers(response.headers)
+
+    client._request_futures_api = request_futures_api
+    client.rate_limit_scheduler = scheduler
+    return client
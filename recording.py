@@ -0,0 +1,542 @@
+"""
+Grabación y reproducción del tráfico con el exchange
+
+El grabador se engancha en el exchange de CCXT que usa ScalpingBot y en el
+cliente de python-binance de bot.py igual que metrics.py (métodos de la
+instancia), y guarda cada petición con su respuesta o error, la hora y la
+duración en un registro binario compacto:
+
+- Cabecera del archivo: ``MAGIC`` + versión.
+- Cada registro: flags, hora (epoch), duración y longitud (``RECORD_HEADER``)
+  seguidos de un JSON ``[origen, método, args, kwargs, resultado, error]``,
+  comprimido con zlib si pasa de ``COMPRESS_MIN_BYTES`` (los mercados y las
+  velas ocupan una décima parte).
+
+Solo se graba la llamada más externa: create_limit_buy_order se guarda una
+vez aunque por dentro llame a create_order y a fetch2.
+
+El reproductor devuelve las respuestas grabadas en el mismo orden para cada
+método, sin red, lo más rápido posible o al ritmo original (``speed=1``), así
+que un arranque o una sesión grabada se puede perfilar o usar como test de
+regresión:
+
+    exchange = recording.replay_exchange('data/traffic/ccxt-20260101-120000-1234.rec')
+    bot = ScalpingBot('automatic', exchange=exchange)
+
+Uso (resumen de un registro):
+    python recording.py data/traffic/ccxt-20260101-120000-1234.rec [--dump]
+"""
+
+import argparse
+import asyncio
+import builtins
+import contextvars
+import functools
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import config
+import metrics
+
+
+MAGIC = b'SCRL'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sB')
+# flags, hora de inicio (epoch), duración en segundos, longitud del JSON
+RECORD_HEADER = struct.Struct('<BddI')
+
+FLAG_ZLIB = 0x01
+FLAG_ERROR = 0x02
+
+COMPRESS_MIN_BYTES = 512
+
+SOURCE_CCXT = 'ccxt'
+SOURCE_BINANCE = 'binance'
+
+# Métodos de CCXT que se graban: los de metrics.py, las llamadas directas a la
+# API que usa el bot y lo que piden load_markets y load_time_difference
+RECORDED_METHODS = metrics.INSTRUMENTED_METHODS + (
+    'fetch_markets', 'fetch_currencies', 'fetch_time',
+    'fapiPrivate_post_leverage', 'fapiPrivate_post_margintype', 'fapiPrivateV2GetPositionRisk',
+    'fapiPrivatePostBatchOrders', 'fapiPrivateDeleteBatchOrders',
+)
+
+# Llamada grabándose (para no guardar dos veces las llamadas anidadas)
+_recording_call: contextvars.ContextVar = contextvars.ContextVar('recording_call', default=False)
+
+
+class Record(NamedTuple):
+    """Una petición grabada"""
+    timestamp: float
+    duration: float
+    source: str
+    method: str
+    args: List[Any]
+    kwargs: Dict[str, Any]
+    result: Any
+    error: Optional[Dict[str, Any]]
+
+
+class ReplayMismatch(Exception):
+    """La petición no está en el registro (o no coincide con la grabada)"""
+
+
+class RecordedError(Exception):
+    """Error grabado cuyo tipo no se puede reconstruir"""
+
+
+class TrafficRecorder:
+    """
+    Escribe registros en el archivo de tráfico (seguro entre hilos)
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Archivo del registro (se crea el directorio; si existe se añade al final)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(FILE_HEADER.pack(MAGIC, VERSION))
+            self._file.flush()
+
+    def write(self, source: str, method: str, args, kwargs, timestamp: float, duration: float,
+              result: Any = None, error: Optional[BaseException] = None):
+        """
+        Añade una petición al registro
+
+        Args:
+            source: SOURCE_CCXT o SOURCE_BINANCE
+            method: Nombre del método llamado
+            args: Argumentos posicionales
+            kwargs: Argumentos con nombre
+            timestamp: Hora de inicio (time.time())
+            duration: Segundos hasta la respuesta
+            result: Respuesta
+            error: Excepción lanzada (en lugar de respuesta)
+        """
+        payload = json.dumps([source, method, list(args), kwargs, result,
+                              describe_error(error) if error is not None else None],
+                             separators=(',', ':'), default=str).encode()
+        flags = FLAG_ERROR if error is not None else 0
+        if len(payload) >= COMPRESS_MIN_BYTES:
+            payload = zlib.compress(payload)
+            flags |= FLAG_ZLIB
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(RECORD_HEADER.pack(flags, timestamp, duration, len(payload)) + payload)
+            # Cada registro llega al disco aunque el bot se cierre de golpe
+            self._file.flush()
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def describe_error(error: BaseException) -> Dict[str, Any]:
+    """Tipo, módulo y mensaje de una excepción (y código/estado HTTP de BinanceAPIException)"""
+    described = {'type': type(error).__name__, 'module': type(error).__module__, 'message': str(error)}
+    for attribute in ('code', 'status_code'):
+        value = getattr(error, attribute, None)
+        if isinstance(value, (int, str)):
+            described[attribute] = value
+    if hasattr(error, 'message') and isinstance(error.message, str):
+        described['message'] = error.message
+    return described
+
+
+def rebuild_error(error: Dict[str, Any]) -> BaseException:
+    """
+    Excepción equivalente a la grabada, para que el bot la maneje igual
+
+    Args:
+        error: Descripción de describe_error
+
+    Returns:
+        Excepción de CCXT, BinanceAPIException, de builtins o RecordedError
+    """
+    name, module, message = error['type'], error.get('module', ''), error.get('message', '')
+    if module.startswith('ccxt'):
+        import ccxt
+        cls = getattr(ccxt, name, None)
+        if isinstance(cls, type) and issubclass(cls, Exception):
+            return cls(message)
+    if module.startswith('binance') and name == 'BinanceAPIException':
+        from binance.exceptions import BinanceAPIException
+        return BinanceAPIException(None, error.get('status_code', 400),
+                                   json.dumps({'code': error.get('code', 0), 'msg': message}))
+    cls = getattr(builtins, name, None)
+    if isinstance(cls, type) and issubclass(cls, Exception):
+        try:
+            return cls(message)
+        except TypeError:
+            pass
+    return RecordedError(f"{name}: {message}")
+
+
+def read_log(path: str) -> Iterator[Record]:
+    """
+    Lee los registros de un archivo de tráfico
+
+    Un registro incompleto al final (el bot se cortó mientras escribía) se ignora.
+
+    Args:
+        path: Archivo del registro
+
+    Returns:
+        Iterador de Record en el orden en que se grabaron
+    """
+    with open(path, 'rb') as f:
+        header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size:
+            return
+        magic, version = FILE_HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} no es un registro de tráfico")
+        if version != VERSION:
+            raise ValueError(f"Versión de registro no soportada: {version}")
+        while True:
+            head = f.read(RECORD_HEADER.size)
+            if len(head) < RECORD_HEADER.size:
+                return
+            flags, timestamp, duration, length = RECORD_HEADER.unpack(head)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            if flags & FLAG_ZLIB:
+                payload = zlib.decompress(payload)
+            source, method, args, kwargs, result, error = json.loads(payload)
+            yield Record(timestamp, duration, source, method, args, kwargs, result, error)
+
+
+def open_log(source: str, directory: Optional[str] = None) -> TrafficRecorder:
+    """
+    Crea el registro de tráfico de este arranque (un archivo por proceso)
+
+    Args:
+        source: Prefijo del archivo (SOURCE_CCXT o SOURCE_BINANCE)
+        directory: Directorio (por defecto config.TRAFFIC_LOG_DIR)
+
+    Returns:
+        Grabador abierto
+    """
+    name = f"{source}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.rec"
+    recorder = TrafficRecorder(os.path.join(directory or config.TRAFFIC_LOG_DIR, name))
+    print(f"🎙️  Grabando tráfico con el exchange en {recorder.path}")
+    return recorder
+
+
+def _record_method(method: Callable, name: str, source: str, recorder: TrafficRecorder) -> Callable:
+    """Envuelve un método (síncrono o corrutina) para grabar la llamada más externa"""
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def recorded_async(*args, **kwargs):
+            if _recording_call.get():
+                return await method(*args, **kwargs)
+            token = _recording_call.set(True)
+            timestamp, started = time.time(), time.perf_counter()
+            try:
+                result = await method(*args, **kwargs)
+            except Exception as e:
+                recorder.write(source, name, args, kwargs, timestamp, time.perf_counter() - started, error=e)
+                raise
+            finally:
+                _recording_call.reset(token)
+            recorder.write(source, name, args, kwargs, timestamp, time.perf_counter() - started, result)
+            return result
+        return recorded_async
+
+    @functools.wraps(method)
+    def recorded(*args, **kwargs):
+        if _recording_call.get():
+            return method(*args, **kwargs)
+        token = _recording_call.set(True)
+        timestamp, started = time.time(), time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except Exception as e:
+            recorder.write(source, name, args, kwargs, timestamp, time.perf_counter() - started, error=e)
+            raise
+        finally:
+            _recording_call.reset(token)
+        recorder.write(source, name, args, kwargs, timestamp, time.perf_counter() - started, result)
+        return result
+    return recorded
+
+
+def record_ccxt(exchange, recorder: TrafficRecorder):
+    """
+    Graba las llamadas de un exchange CCXT (síncrono o ccxt.async_support)
+
+    Debe aplicarse después de metrics.instrument_ccxt para que la duración
+    grabada sea la que ve el bot.
+
+    Args:
+        exchange: Instancia de ccxt
+        recorder: Registro donde se escribe
+
+    Returns:
+        El mismo exchange
+    """
+    for name in RECORDED_METHODS:
+        method = getattr(exchange, name, None)
+        if method is not None:
+            setattr(exchange, name, _record_method(method, name, SOURCE_CCXT, recorder))
+    exchange.traffic_recorder = recorder
+    return exchange
+
+
+def record_binance_client(client, recorder: TrafficRecorder):
+    """
+    Graba las peticiones de Futures de un cliente de python-binance
+
+    Todos los métodos futures_* pasan por ``_request_futures_api``.
+
+    Args:
+        client: binance.client.Client
+        recorder: Registro donde se escribe
+
+    Returns:
+        El mismo cliente
+    """
+    client._request_futures_api = _record_method(client._request_futures_api, '_request_futures_api',
+                                                 SOURCE_BINANCE, recorder)
+    client.traffic_recorder = recorder
+    return client
+
+
+class TrafficPlayer:
+    """
+    Respuestas grabadas, en orden, por método
+
+    Cada método tiene su propia cola, así que las llamadas concurrentes (hilos
+    o asyncio.gather) reciben lo mismo aunque se intercalen en otro orden.
+    """
+
+    def __init__(self, records: Iterable[Record], speed: Optional[float] = None, check_args: bool = False):
+        """
+        Args:
+            records: Registros grabados (read_log)
+            speed: None = lo más rápido posible; 1.0 = ritmo original; 2.0 = el doble de rápido...
+            check_args: Comprobar que los argumentos coinciden con los grabados
+        """
+        self.speed = speed
+        self.check_args = check_args
+        self._queues: Dict[tuple, deque] = defaultdict(deque)
+        self._origin = None
+        self._started = None
+        self._lock = threading.Lock()
+        for record in records:
+            if self._origin is None:
+                self._origin = record.timestamp
+            self._queues[(record.source, record.method)].append(record)
+
+    def methods(self, source: str) -> List[str]:
+        """Métodos con respuestas grabadas para un origen"""
+        return [method for (s, method) in self._queues if s == source]
+
+    @property
+    def remaining(self) -> int:
+        """Respuestas grabadas que aún no se han pedido"""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def take(self, source: str, method: str, args=(), kwargs=None) -> Record:
+        """
+        Siguiente respuesta grabada del método
+
+        Raises:
+            ReplayMismatch: Si no quedan respuestas o los argumentos no coinciden
+        """
+        with self._lock:
+            queue = self._queues.get((source, method))
+            if not queue:
+                raise ReplayMismatch(f"No quedan respuestas grabadas de {method}")
+            record = queue.popleft()
+            if self._started is None:
+                self._started = time.monotonic()
+        if self.check_args and _normalize([list(args), kwargs or {}]) != [record.args, record.kwargs]:
+            raise ReplayMismatch(f"{method} llamado con {list(args)} {kwargs or {}}, "
+                                 f"grabado con {record.args} {record.kwargs}")
+        return record
+
+    def delay(self, record: Record) -> float:
+        """Segundos que faltan para que llegue la respuesta al ritmo grabado (0 sin ritmo)"""
+        if not self.speed:
+            return 0.0
+        due = (record.timestamp + record.duration - self._origin) / self.speed
+        return max(0.0, due - (time.monotonic() - self._started))
+
+    def respond(self, source: str, method: str, args=(), kwargs=None) -> Any:
+        """Respuesta grabada (o la excepción grabada) esperando al ritmo configurado"""
+        record = self.take(source, method, args, kwargs)
+        delay = self.delay(record)
+        if delay:
+            time.sleep(delay)
+        if record.error is not None:
+            raise rebuild_error(record.error)
+        return record.result
+
+    async def respond_async(self, source: str, method: str, args=(), kwargs=None) -> Any:
+        record = self.take(source, method, args, kwargs)
+        delay = self.delay(record)
+        if delay:
+            await asyncio.sleep(delay)
+        if record.error is not None:
+            raise rebuild_error(record.error)
+        return record.result
+
+
+def _normalize(value):
+    """Mismo valor que se lee del registro (tuplas como listas, tipos raros como texto)"""
+    return json.loads(json.dumps(value, default=str))
+
+
+def _replay_method(player: TrafficPlayer, name: str, source: str, asynchronous: bool) -> Callable:
+    if asynchronous:
+        async def replayed_async(*args, **kwargs):
+            return await player.respond_async(source, name, args, kwargs)
+        return replayed_async
+
+    def replayed(*args, **kwargs):
+        return player.respond(source, name, args, kwargs)
+    return replayed
+
+
+def replay_ccxt(exchange, player: TrafficPlayer):
+    """
+    Sustituye la red de un exchange CCXT por las respuestas grabadas
+
+    Los métodos grabados responden desde el registro; cualquier otra petición
+    (fetch2) lanza ReplayMismatch en lugar de salir a la red.
+
+    Args:
+        exchange: Instancia de ccxt (síncrona o ccxt.async_support), sin conectar
+        player: Respuestas grabadas
+
+    Returns:
+        El mismo exchange
+    """
+    asynchronous = asyncio.iscoroutinefunction(exchange.fetch2)
+    for name in player.methods(SOURCE_CCXT):
+        setattr(exchange, name, _replay_method(player, name, SOURCE_CCXT, asynchronous))
+
+    def unrecorded(path, api='public', method='GET', *args, **kwargs):
+        raise ReplayMismatch(f"Petición no grabada: {api} {method} {path}")
+
+    if asynchronous:
+        async def unrecorded_async(*args, **kwargs):
+            unrecorded(*args, **kwargs)
+        exchange.fetch2 = unrecorded_async
+    else:
+        exchange.fetch2 = unrecorded
+    exchange.traffic_player = player
+    return exchange
+
+
+def replay_binance_client(client, player: TrafficPlayer):
+    """
+    Sustituye las peticiones de Futures de un cliente de python-binance por las grabadas
+
+    Args:
+        client: binance.client.Client (creado con ping=False para no salir a la red)
+        player: Respuestas grabadas
+
+    Returns:
+        El mismo cliente
+    """
+    client._request_futures_api = _replay_method(player, '_request_futures_api', SOURCE_BINANCE, False)
+    client.traffic_player = player
+    return client
+
+
+def replay_exchange(path: str, speed: Optional[float] = None, check_args: bool = False,
+                    market_type: Optional[str] = None):
+    """
+    ccxt.binance que reproduce un registro, con la hora y los mercados grabados ya cargados
+
+    Args:
+        path: Archivo del registro
+        speed: None = lo más rápido posible; 1.0 = ritmo original
+        check_args: Comprobar que los argumentos coinciden con los grabados
+        market_type: 'future' o 'spot' (por defecto según config.USE_FUTURES)
+
+    Returns:
+        Instancia de ccxt.binance lista para ScalpingBot(exchange=...)
+    """
+    import ccxt
+
+    market_type = market_type or ('future' if config.USE_FUTURES else 'spot')
+    exchange = ccxt.binance({'options': {'defaultType': market_type}})
+    player = TrafficPlayer(read_log(path), speed, check_args)
+    replay_ccxt(exchange, player)
+    methods = player.methods(SOURCE_CCXT)
+    if 'fetch_time' in methods:
+        exchange.load_time_difference()
+    if 'fetch_markets' in methods:
+        exchange.load_markets()
+    return exchange
+
+
+def is_attached(exchange) -> bool:
+    """True si el exchange está grabando o reproduciendo tráfico"""
+    return isinstance(getattr(exchange, 'traffic_recorder', None), TrafficRecorder) or \
+        isinstance(getattr(exchange, 'traffic_player', None), TrafficPlayer)
+
+
+def summarize(records: Iterable[Record]) -> Dict[str, Dict[str, float]]:
+    """
+    Llamadas, errores y duración media/máxima (ms) por método
+
+    Args:
+        records: Registros (read_log)
+
+    Returns:
+        Diccionario {"origen método": {'calls', 'errors', 'mean_ms', 'max_ms'}}
+    """
+    summary: Dict[str, Dict[str, float]] = {}
+    for record in records:
+        stats = summary.setdefault(f"{record.source} {record.method}",
+                                   {'calls': 0, 'errors': 0, 'mean_ms': 0.0, 'max_ms': 0.0})
+        stats['calls'] += 1
+        stats['errors'] += record.error is not None
+        stats['mean_ms'] += (record.duration * 1000 - stats['mean_ms']) / stats['calls']
+        stats['max_ms'] = max(stats['max_ms'], record.duration * 1000)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Resumen de un registro de tráfico con el exchange')
+    parser.add_argument('path', help='Archivo .rec grabado con RECORD_TRAFFIC')
+    parser.add_argument('--dump', action='store_true', help='Imprimir cada petición como una línea JSON')
+    args = parser.parse_args(argv)
+
+    if args.dump:
+        for record in read_log(args.path):
+            print(json.dumps(record._asdict(), default=str))
+        return 0
+
+    summary = summarize(read_log(args.path))
+    print(f"📼 {args.path}: {sum(s['calls'] for s in summary.values())} peticiones")
+    for name, stats in sorted(summary.items(), key=lambda item: -item[1]['calls']):
+        print(f"   {name:<45} {stats['calls']:>6}  errores {stats['errors']:>4}  "
+              f"media {stats['mean_ms']:8.1f} ms  máx {stats['max_ms']:8.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
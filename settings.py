@@ -0,0 +1,161 @@
+"""
+Configuración desde variables de entorno o archivo para despliegues sin TTY
+
+Cualquier constante de config.py se puede sustituir sin editar el archivo:
+
+- Un archivo JSON con las mismas claves (``{"SYMBOL": "XRP/USDT", "LEVERAGE": 5}``)
+- Variables de entorno con el prefijo ``SCALPER_`` (``SCALPER_LEVERAGE=5``)
+
+Orden de prioridad: config.py < archivo < entorno. Los valores de texto se
+convierten al tipo de la constante original (bool, int, float, lista separada
+por comas o texto). Una clave desconocida o un valor que no se puede convertir
+es un error: el arranque falla en vez de operar con una configuración a medias.
+
+Los valores se aplican sobre el módulo ``config``, así que hay que llamar a
+``apply`` antes de importar el bot (algunos módulos, como transport.py y
+metrics.py, usan constantes de config.py como valores por defecto).
+"""
+
+import json
+import os
+from typing import Any, Dict, Mapping, Optional
+
+import config
+
+
+ENV_PREFIX = 'SCALPER_'
+
+# Variables con el prefijo que no son constantes de config.py (las usa headless.py)
+RESERVED = ('CONFIG_FILE', 'CONFIRM_REAL_TRADING')
+
+_TRUE = ('1', 'true', 'yes', 'si', 'sí', 'on')
+_FALSE = ('0', 'false', 'no', 'off', '')
+
+
+def is_true(value: Optional[str]) -> bool:
+    """True si un texto del entorno significa 'activado' (1, true, yes, si, on)"""
+    return value is not None and value.strip().lower() in _TRUE
+
+
+def _settable(name: str) -> bool:
+    return name.isupper() and not name.startswith('_') and hasattr(config, name)
+
+
+def coerce(name: str, value: Any) -> Any:
+    """
+    Convierte un valor al tipo de la constante de config.py
+
+    Args:
+        name: Nombre de la constante (ej: 'LEVERAGE')
+        value: Valor del archivo (tipos JSON) o del entorno (texto)
+
+    Returns:
+        Valor convertido
+
+    Raises:
+        ValueError: Si la constante no existe o el valor no es del tipo esperado
+    """
+    if not _settable(name):
+        raise ValueError(f"Clave de configuración desconocida: {name}")
+    current = getattr(config, name)
+
+    if isinstance(current, bool):
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in _TRUE + _FALSE:
+            return value.strip().lower() in _TRUE
+    elif isinstance(current, (int, float)):
+        if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+            try:
+                number = float(value)
+            except ValueError:
+                pass
+            else:
+                # Un entero sigue siendo entero (LEVERAGE=5); los decimales se respetan (LOOP_INTERVAL=0.5)
+                return int(number) if isinstance(current, int) and number.is_integer() else number
+    elif isinstance(current, list):
+        if isinstance(value, list):
+            return value
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(',') if item.strip()]
+    elif isinstance(value, str):
+        return value
+    raise ValueError(f"Valor inválido para {name} ({type(current).__name__}): {value!r}")
+
+
+def from_file(path: str) -> Dict[str, Any]:
+    """
+    Lee un archivo JSON de configuración
+
+    Args:
+        path: Ruta del archivo (objeto JSON con claves de config.py)
+
+    Returns:
+        Dict clave -> valor convertido
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: se esperaba un objeto JSON con claves de config.py")
+    return {name: coerce(name, value) for name, value in data.items()}
+
+
+def from_env(environ: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+    """
+    Lee las variables de entorno con el prefijo SCALPER_
+
+    Args:
+        environ: Entorno (por defecto os.environ)
+
+    Returns:
+        Dict clave -> valor convertido
+    """
+    environ = os.environ if environ is None else environ
+    overrides = {}
+    for key, value in environ.items():
+        if key.startswith(ENV_PREFIX) and key[len(ENV_PREFIX):] not in RESERVED:
+            name = key[len(ENV_PREFIX):]
+            overrides[name] = coerce(name, value)
+    return overrides
+
+
+def load(path: Optional[str] = None, environ: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+    """
+    Combina archivo y entorno (el entorno tiene prioridad)
+
+    Args:
+        path: Archivo JSON (por defecto SCALPER_CONFIG_FILE, si está definida)
+        environ: Entorno (por defecto os.environ)
+
+    Returns:
+        Dict clave -> valor con todos los cambios sobre config.py
+    """
+    environ = os.environ if environ is None else environ
+    path = path or environ.get(ENV_PREFIX + 'CONFIG_FILE')
+    overrides = from_file(path) if path else {}
+    overrides.update(from_env(environ))
+    # Un solo par indicado con SYMBOL: el motor multi-símbolo no debe seguir con el de config.py
+    if 'SYMBOL' in overrides and 'SYMBOLS' not in overrides:
+        overrides['SYMBOLS'] = [overrides['SYMBOL']]
+    return overrides
+
+
+def apply(overrides: Dict[str, Any]):
+    """
+    Sustituye las constantes de config.py
+
+    Args:
+        overrides: Dict clave -> valor (ver ``load``)
+    """
+    for name, value in overrides.items():
+        setattr(config, name, value)
+
+
+def describe(overrides: Dict[str, Any]) -> str:
+    """Resumen de los cambios sin mostrar las credenciales"""
+    items = []
+    for name, value in sorted(overrides.items()):
+        if name in ('API_KEY', 'API_SECRET'):
+            value = '***'
+        items.append(f"{name}={value}")
+    return ', '.join(items) or 'sin cambios sobre config.py'
@@ -0,0 +1,826 @@
+"""
+Exchange simulado de Binance Futures (motor de emparejamiento local)
+
+Sustituye a los diccionarios fijos que devuelven las funciones de utils.py sin
+trading real: las órdenes se colocan, se ejecutan (total o parcialmente) y se
+cancelan como en el exchange, con la misma interfaz de CCXT que usa el bot.
+
+- Órdenes LIMIT, MARKET, STOP/STOP_MARKET y TAKE_PROFIT/TAKE_PROFIT_MARKET,
+  con reduceOnly y closePosition
+- Libro de las órdenes propias con prioridad precio-tiempo: cada tick (precio y
+  cantidad negociada) ejecuta las órdenes que cruza, de la mejor a la peor y, a
+  igual precio, de la más antigua a la más nueva, hasta agotar la cantidad
+- Posición one-way por símbolo con precio medio, PnL realizado y no realizado,
+  apalancamiento, margen inicial y comisiones maker/taker
+- Endpoints de Binance que usa el bot: positionRisk y batchOrders (colocar y cancelar)
+
+Los precios llegan como ticks grabados o sintéticos (``tick``, ``replay``,
+``random_walk``), del feed WebSocket (``attach_feed``) o del exchange real, al
+que se delegan ``fetch_ticker``, ``fetch_ohlcv`` y los mercados. Las órdenes
+nunca salen del proceso.
+
+Simplificaciones: la liquidez la marca la cantidad de cada tick (sin cantidad
+es ilimitada), las órdenes que cruzan al llegar se ejecutan enteras como taker
+al mejor precio, y no hay liquidación ni funding.
+"""
+
+import bisect
+import itertools
+import random
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
+
+import ccxt
+
+import batch_orders
+import market_filters
+
+
+# Comisiones de Futures USDT-M sin descuentos (nivel VIP 0)
+MAKER_FEE = 0.0002
+TAKER_FEE = 0.0004
+
+_EPSILON = 1e-9
+
+# Estados de Binance → estados unificados de CCXT
+_CCXT_STATUS = {
+    'NEW': 'open',
+    'PARTIALLY_FILLED': 'open',
+    'FILLED': 'closed',
+    'CANCELED': 'canceled',
+    'EXPIRED': 'expired',
+}
+_FINAL = ('FILLED', 'CANCELED', 'EXPIRED')
+
+_ORDER_TYPES = ('LIMIT', 'MARKET', 'STOP', 'STOP_MARKET', 'TAKE_PROFIT', 'TAKE_PROFIT_MARKET')
+_TRIGGERED_TYPES = ('STOP', 'STOP_MARKET', 'TAKE_PROFIT', 'TAKE_PROFIT_MARKET')
+
+# Rechazos de Binance: código → (excepción de CCXT, mensaje)
+_REJECTIONS = {
+    -1102: (ccxt.BadRequest, 'Mandatory parameter was not sent, was empty/null, or malformed.'),
+    -1116: (ccxt.InvalidOrder, 'Invalid orderType.'),
+    -2011: (ccxt.OrderNotFound, 'Unknown order sent.'),
+    -2019: (ccxt.InsufficientFunds, 'Margin is insufficient.'),
+    -2021: (ccxt.OrderImmediatelyFillable, 'Order would immediately trigger.'),
+    -2022: (ccxt.InvalidOrder, 'ReduceOnly Order is rejected.'),
+    -4003: (ccxt.InvalidOrder, 'Quantity less than or equal to zero.'),
+}
+
+
+class _Rejected(Exception):
+    """Orden rechazada por el simulador (se convierte a la excepción de CCXT o a {code, msg})"""
+
+    def __init__(self, code: int):
+        super().__init__(_REJECTIONS[code][1])
+        self.code = code
+
+    def to_ccxt(self) -> ccxt.BaseError:
+        error_class, msg = _REJECTIONS[self.code]
+        return error_class(f'binance {{"code":{self.code},"msg":"{msg}"}}')
+
+
+def _is_true(value: Any) -> bool:
+    return value is True or str(value).lower() == 'true'
+
+
+class _Order:
+    """Orden del simulador (estado de Binance)"""
+
+    __slots__ = ('id', 'client_id', 'symbol', 'type', 'side', 'amount', 'price', 'stop_price',
+                 'reduce_only', 'close_position', 'time_in_force', 'status', 'filled', 'cost',
+                 'fee', 'timestamp', 'update_time', 'triggered')
+
+    def __init__(self, order_id: str, symbol: str, order_type: str, side: str, amount: float,
+                 price: Optional[float], stop_price: Optional[float], reduce_only: bool,
+                 close_position: bool, time_in_force: str, client_id: Optional[str], timestamp: int):
+        self.id = order_id
+        self.client_id = client_id or f"sim_{order_id}"
+        self.symbol = symbol
+        self.type = order_type
+        self.side = side
+        self.amount = amount
+        self.price = price
+        self.stop_price = stop_price
+        self.reduce_only = reduce_only or close_position
+        self.close_position = close_position
+        self.time_in_force = time_in_force
+        self.status = 'NEW'
+        self.filled = 0.0
+        self.cost = 0.0
+        self.fee = 0.0
+        self.timestamp = timestamp
+        self.update_time = timestamp
+        self.triggered = False
+
+    @property
+    def remaining(self) -> float:
+        return max(self.amount - self.filled, 0.0)
+
+    @property
+    def average(self) -> Optional[float]:
+        return self.cost / self.filled if self.filled > 0 else None
+
+    def to_binance(self, market_id: str) -> Dict[str, Any]:
+        """Respuesta de la API de Futures (formato de /fapi/v1/order)"""
+        return {
+            'orderId': int(self.id),
+            'symbol': market_id,
+            'status': self.status,
+            'clientOrderId': self.client_id,
+            'price': str(self.price or 0),
+            'avgPrice': str(self.average or 0),
+            'origQty': str(self.amount),
+            'executedQty': str(self.filled),
+            'cumQuote': str(self.cost),
+            'timeInForce': self.time_in_force,
+            'type': self.type,
+            'reduceOnly': self.reduce_only,
+            'closePosition': self.close_position,
+            'side': self.side.upper(),
+            'positionSide': 'BOTH',
+            'stopPrice': str(self.stop_price or 0),
+            'updateTime': self.update_time,
+        }
+
+
+class _Position:
+    """Posición one-way de un símbolo (cantidad con signo)"""
+
+    __slots__ = ('amount', 'entry_price', 'realized_pnl', 'leverage', 'margin_type')
+
+    def __init__(self, leverage: int, margin_type: str):
+        self.amount = 0.0
+        self.entry_price = 0.0
+        self.realized_pnl = 0.0
+        self.leverage = leverage
+        self.margin_type = margin_type
+
+
+class SimulatedExchange:
+    """
+    Exchange de Futures en memoria con la interfaz de CCXT que usa el bot
+    """
+
+    id = 'binance'
+
+    def __init__(self, exchange: Optional[ccxt.Exchange] = None, balance: float = 1000.0,
+                 leverage: int = 1, margin_type: str = 'isolated', maker_fee: float = MAKER_FEE,
+                 taker_fee: float = TAKER_FEE, markets: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            exchange: Exchange real para precios, velas y mercados (None para usar solo ticks)
+            balance: Balance inicial en USDT
+            leverage: Apalancamiento por defecto de cada símbolo
+            margin_type: 'isolated' o 'cross' (solo informativo en positionRisk)
+            maker_fee: Comisión de las órdenes que esperan en el libro
+            taker_fee: Comisión de las órdenes que cruzan al llegar (y de los stops)
+            markets: Mercados en formato CCXT si no hay exchange (por defecto, los filtros de DOGE)
+        """
+        self.exchange = exchange
+        self.wallet_balance = float(balance)
+        self.leverage = leverage
+        self.margin_type = margin_type
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self._markets = markets
+
+        self._ids = itertools.count(1)
+        self._sequence = itertools.count()
+        self._orders: Dict[str, _Order] = {}
+        self._open: Dict[str, _Order] = {}  # Órdenes vivas (el historial completo queda en _orders)
+        self._positions: Dict[str, _Position] = {}
+        # Libro propio por símbolo: (clave de precio, secuencia, orden) ordenado por prioridad
+        self._bids: Dict[str, list] = {}
+        self._asks: Dict[str, list] = {}
+        self._triggers: Dict[str, List[_Order]] = {}  # Stops y take profits sin activar
+        self._quotes: Dict[str, Tuple[float, float, float, int]] = {}  # último, bid, ask, timestamp
+        self._symbols: Dict[str, str] = {}  # ID de mercado → símbolo tal como lo usa el bot
+        self._feeds: Dict[str, Any] = {}
+
+    # ------------------------------------------------------------------
+    # Mercados y datos de mercado
+    # ------------------------------------------------------------------
+
+    @property
+    def markets(self) -> Dict[str, Any]:
+        if self.exchange is not None:
+            return self.exchange.markets
+        if self._markets is None:
+            self._markets = {}
+        for symbol in self._symbols.values():
+            if market_filters.find_market(self._markets, symbol) is None:
+                self._markets[symbol] = self._default_market(symbol)
+        return self._markets
+
+    @property
+    def markets_by_id(self) -> Dict[str, list]:
+        if self.exchange is not None:
+            return self.exchange.markets_by_id
+        by_id: Dict[str, list] = {}
+        for market in self.markets.values():
+            by_id.setdefault(market['id'], []).append(market)
+        return by_id
+
+    @property
+    def precisionMode(self):
+        return getattr(self.exchange, 'precisionMode', ccxt.TICK_SIZE)
+
+    @staticmethod
+    def _default_market(symbol: str) -> Dict[str, Any]:
+        return {
+            'id': batch_orders.market_id(symbol),
+            'symbol': symbol,
+            'precision': {'price': market_filters.DEFAULT_TICK_SIZE, 'amount': market_filters.DEFAULT_STEP_SIZE},
+            'limits': {'amount': {}, 'market': {}, 'cost': {'min': market_filters.DEFAULT_MIN_NOTIONAL}},
+        }
+
+    def load_markets(self, reload: bool = False, params: Optional[dict] = None) -> Dict[str, Any]:
+        if self.exchange is not None:
+            return self.exchange.load_markets(reload)
+        return self.markets
+
+    def load_time_difference(self, params: Optional[dict] = None):
+        if self.exchange is not None:
+            return self.exchange.load_time_difference()
+        return 0
+
+    def fetch_ticker(self, symbol: str, params: Optional[dict] = None) -> Dict[str, Any]:
+        """Ticker del exchange real (que además alimenta el simulador) o el último tick"""
+        if self.exchange is not None:
+            ticker = self.exchange.fetch_ticker(symbol)
+            if ticker.get('last') is not None:
+                self.tick(symbol, ticker['last'], bid=ticker.get('bid'), ask=ticker.get('ask'),
+                          timestamp=ticker.get('timestamp'))
+            return ticker
+        key = self._key(symbol)
+        self._sync(key)
+        if key not in self._quotes:
+            raise ccxt.ExchangeError(f"Simulador sin precio para {symbol}")
+        last, bid, ask, timestamp = self._quotes[key]
+        return {'symbol': symbol, 'last': last, 'close': last, 'bid': bid, 'ask': ask,
+                'timestamp': timestamp, 'datetime': self.iso8601(timestamp)}
+
+    def fetch_order_book(self, symbol: str, limit: Optional[int] = None,
+                         params: Optional[dict] = None) -> Dict[str, Any]:
+        """Libro del exchange real (para el libro local del bot; las órdenes simuladas no aparecen)"""
+        if self.exchange is None:
+            raise ccxt.NotSupported("El simulador sin exchange no tiene libro de órdenes")
+        return self.exchange.fetch_order_book(symbol, limit)
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: Optional[int] = None,
+                    limit: Optional[int] = None, params: Optional[dict] = None) -> list:
+        if self.exchange is None:
+            raise ccxt.NotSupported("El simulador sin exchange no tiene velas")
+        return self.exchange.fetch_ohlcv(symbol, timeframe, since, limit)
+
+    @staticmethod
+    def iso8601(timestamp: Optional[int]) -> Optional[str]:
+        if timestamp is None:
+            return None
+        return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).isoformat(timespec='milliseconds')
+
+    # ------------------------------------------------------------------
+    # Ticks
+    # ------------------------------------------------------------------
+
+    def attach_feed(self, symbol: str, feed):
+        """
+        Lee el precio del feed WebSocket antes de cada operación del símbolo
+
+        Args:
+            symbol: Par de trading
+            feed: Objeto con get_current_price() (MarketDataFeed)
+        """
+        self._feeds[self._key(symbol)] = feed
+
+    def _sync(self, key: str):
+        feed = self._feeds.get(key)
+        if feed is None:
+            return
+        price = feed.get_current_price()
+        if price is not None and (key not in self._quotes or self._quotes[key][0] != price):
+            self.tick(self._symbols[key], price)
+
+    def tick(self, symbol: str, price: float, quantity: Optional[float] = None,
+             bid: Optional[float] = None, ask: Optional[float] = None, timestamp: Optional[int] = None):
+        """
+        Aplica una operación del mercado: activa stops y ejecuta las órdenes que cruza
+
+        Args:
+            symbol: Par de trading
+            price: Precio negociado
+            quantity: Cantidad negociada (liquidez para las órdenes del libro; None = ilimitada)
+            bid: Mejor compra (por defecto el precio)
+            ask: Mejor venta (por defecto el precio)
+            timestamp: Hora del tick en ms (por defecto la del sistema)
+        """
+        key = self._key(symbol)
+        timestamp = timestamp if timestamp is not None else self.milliseconds()
+        self._quotes[key] = (price, bid or price, ask or price, timestamp)
+
+        if self._triggers.get(key):
+            self._activate_triggers(key, price)
+
+        liquidity = float('inf') if quantity is None else quantity
+        # Compras en el libro a ese precio o por encima: ejecutadas por vendedores al precio límite
+        self._match(key, self._bids.get(key), lambda order: order.price >= price, liquidity)
+        self._match(key, self._asks.get(key), lambda order: order.price <= price, liquidity)
+
+    def replay(self, symbol: str, ticks: Iterable[Tuple[int, float, Optional[float]]]):
+        """
+        Aplica una secuencia de ticks grabados o sintéticos
+
+        Args:
+            symbol: Par de trading
+            ticks: (timestamp en ms, precio, cantidad) en orden cronológico
+        """
+        for timestamp, price, quantity in ticks:
+            self.tick(symbol, price, quantity, timestamp=timestamp)
+
+    def _match(self, key: str, book: Optional[list], crosses, liquidity: float):
+        while book and liquidity > _EPSILON:
+            _, _, order = book[0]
+            if not crosses(order):
+                return
+            quantity = min(order.remaining, liquidity)
+            filled = self._fill(key, order, quantity, order.price, maker=True)
+            liquidity -= filled
+            if order.status in _FINAL:
+                self._unlist(key, order)
+            elif filled <= _EPSILON:
+                return
+
+    def _activate_triggers(self, key: str, price: float):
+        pending = self._triggers[key]
+        for order in [o for o in pending if self._triggered(o, price)]:
+            pending.remove(order)
+            order.triggered = True
+            order.update_time = self._quotes[key][3]
+            if order.type in ('STOP', 'TAKE_PROFIT'):
+                self._execute_or_rest(key, order)
+            else:
+                self._execute_market(key, order)
+
+    @staticmethod
+    def _triggered(order: _Order, price: float) -> bool:
+        # STOP: compra si sube hasta el precio, venta si baja; TAKE_PROFIT al revés
+        rising = order.side == 'buy'
+        if order.type.startswith('TAKE_PROFIT'):
+            rising = not rising
+        return price >= order.stop_price if rising else price <= order.stop_price
+
+    # ------------------------------------------------------------------
+    # Ejecución y posición
+    # ------------------------------------------------------------------
+
+    def _position(self, key: str) -> _Position:
+        position = self._positions.get(key)
+        if position is None:
+            position = self._positions[key] = _Position(self.leverage, self.margin_type)
+        return position
+
+    def _reducible(self, key: str, side: str) -> float:
+        """Cantidad que una orden de este lado puede reducir de la posición"""
+        amount = self._position(key).amount
+        if (side == 'sell' and amount > 0) or (side == 'buy' and amount < 0):
+            return abs(amount)
+        return 0.0
+
+    def _fill(self, key: str, order: _Order, quantity: float, price: float, maker: bool) -> float:
+        """
+        Ejecuta parte de una orden y actualiza posición, balance y comisiones
+
+        Returns:
+            Cantidad ejecutada (menor que la pedida si es reduceOnly y la posición no da para más)
+        """
+        if order.reduce_only:
+            quantity = min(quantity, self._reducible(key, order.side))
+            if quantity <= _EPSILON:
+                self._finish(order, 'EXPIRED')
+                return 0.0
+
+        position = self._position(key)
+        signed = quantity if order.side == 'buy' else -quantity
+        fee = quantity * price * (self.maker_fee if maker else self.taker_fee)
+        self.wallet_balance -= fee
+
+        if position.amount == 0 or (position.amount > 0) == (signed > 0):
+            amount = position.amount + signed
+            position.entry_price = (abs(position.amount) * position.entry_price + quantity * price) / abs(amount)
+            position.amount = amount
+        else:
+            closed = min(quantity, abs(position.amount))
+            pnl = (price - position.entry_price) * closed * (1 if position.amount > 0 else -1)
+            self.wallet_balance += pnl
+            position.realized_pnl += pnl
+            position.amount += signed
+            if abs(position.amount) <= _EPSILON:
+                position.amount, position.entry_price = 0.0, 0.0
+            elif quantity > closed:
+                position.entry_price = price  # La orden dio la vuelta a la posición
+
+        order.filled += quantity
+        order.cost += quantity * price
+        order.fee += fee
+        order.update_time = self._quotes[key][3]
+        if order.remaining <= _EPSILON:
+            self._finish(order, 'FILLED')
+        else:
+            order.status = 'PARTIALLY_FILLED'
+
+        if position.amount == 0:
+            self._expire_reduce_only(key, order)
+        return quantity
+
+    def _finish(self, order: _Order, status: str):
+        order.status = status
+        self._open.pop(order.id, None)
+        key = self._key(order.symbol)
+        if key in self._quotes:
+            order.update_time = self._quotes[key][3]
+
+    def _expire_reduce_only(self, key: str, current: _Order):
+        # Como en Binance: sin posición, las órdenes reduceOnly del libro caducan
+        for book in (self._bids.get(key), self._asks.get(key)):
+            for _, _, order in list(book or []):
+                if order is not current and order.reduce_only and not order.close_position:
+                    self._finish(order, 'EXPIRED')
+                    self._unlist(key, order)
+
+    def _execute_market(self, key: str, order: _Order):
+        if key not in self._quotes:
+            self._finish(order, 'EXPIRED')
+            return
+        _, bid, ask, _ = self._quotes[key]
+        if order.close_position:
+            order.amount = self._reducible(key, order.side)
+        self._fill(key, order, order.remaining, ask if order.side == 'buy' else bid, maker=False)
+        if order.status not in _FINAL:
+            self._finish(order, 'EXPIRED')
+
+    def _execute_or_rest(self, key: str, order: _Order):
+        """Orden LIMIT: cruza entera al mejor precio o espera en el libro"""
+        _, bid, ask, _ = self._quotes.get(key, (None, None, None, None))
+        if order.side == 'buy' and ask is not None and order.price >= ask:
+            self._fill(key, order, order.remaining, ask, maker=False)
+        elif order.side == 'sell' and bid is not None and order.price <= bid:
+            self._fill(key, order, order.remaining, bid, maker=False)
+        if order.status not in _FINAL:
+            self._list(key, order)
+
+    def _list(self, key: str, order: _Order):
+        if order.side == 'buy':
+            bisect.insort(self._bids.setdefault(key, []), (-order.price, next(self._sequence), order))
+        else:
+            bisect.insort(self._asks.setdefault(key, []), (order.price, next(self._sequence), order))
+
+    def _unlist(self, key: str, order: _Order):
+        if order.triggered or order.type not in _TRIGGERED_TYPES:
+            book = self._bids.get(key) if order.side == 'buy' else self._asks.get(key)
+            for i, (_, _, listed) in enumerate(book or []):
+                if listed is order:
+                    del book[i]
+                    return
+        pending = self._triggers.get(key)
+        if pending and order in pending:
+            pending.remove(order)
+
+    # ------------------------------------------------------------------
+    # Margen y balance
+    # ------------------------------------------------------------------
+
+    def _mark_price(self, key: str, position: _Position) -> float:
+        return self._quotes[key][0] if key in self._quotes else position.entry_price
+
+    def _unrealized_pnl(self, key: str, position: _Position) -> float:
+        return (self._mark_price(key, position) - position.entry_price) * position.amount
+
+    def _used_margin(self) -> float:
+        used = 0.0
+        for key, position in self._positions.items():
+            used += abs(position.amount) * position.entry_price / position.leverage
+        for order in self._open.values():
+            if not order.reduce_only:
+                key = self._key(order.symbol)
+                price = order.price or order.stop_price or self._quotes.get(key, (0.0,))[0]
+                used += order.remaining * price / self._position(key).leverage
+        return used
+
+    def available_balance(self) -> float:
+        """Balance disponible para nuevas órdenes (balance + PnL no realizado - margen usado)"""
+        unrealized = sum(self._unrealized_pnl(key, p) for key, p in self._positions.items())
+        return self.wallet_balance + unrealized - self._used_margin()
+
+    def _check_margin(self, key: str, order: _Order, price: float):
+        # La parte que reduce la posición no necesita margen
+        opening = max(order.amount - self._reducible(key, order.side), 0.0)
+        required = opening * price / self._position(key).leverage + order.amount * price * self.taker_fee
+        if opening > 0 and required > self.available_balance() + _EPSILON:
+            raise _Rejected(-2019)
+
+    def fetch_balance(self, params: Optional[dict] = None) -> Dict[str, Any]:
+        for key in list(self._feeds):
+            self._sync(key)
+        free = self.available_balance()
+        used = self._used_margin()
+        total = self.wallet_balance
+        return {
+            'info': {'totalWalletBalance': str(total), 'availableBalance': str(free)},
+            'USDT': {'free': free, 'used': used, 'total': total},
+            'free': {'USDT': free},
+            'used': {'USDT': used},
+            'total': {'USDT': total},
+        }
+
+    # ------------------------------------------------------------------
+    # Órdenes
+    # ------------------------------------------------------------------
+
+    def _key(self, symbol: str) -> str:
+        key = batch_orders.market_id(symbol)
+        self._symbols.setdefault(key, symbol)
+        return key
+
+    def _place(self, symbol: str, order_type: str, side: str, amount: Optional[float],
+               price: Optional[float] = None, params: Optional[dict] = None) -> _Order:
+        params = params or {}
+        order_type = str(order_type).upper()
+        side = str(side).lower()
+        if order_type not in _ORDER_TYPES or side not in ('buy', 'sell'):
+            raise _Rejected(-1116)
+        key = self._key(symbol)
+        self._sync(key)
+
+        stop_price = params.get('stopPrice', params.get('triggerPrice'))
+        stop_price = float(stop_price) if stop_price is not None else None
+        price = float(price) if price is not None else None
+        close_position = _is_true(params.get('closePosition', False))
+        reduce_only = _is_true(params.get('reduceOnly', False))
+        amount = float(amount or 0.0)
+
+        if (order_type in ('LIMIT', 'STOP', 'TAKE_PROFIT') and not price) or \
+                (order_type in _TRIGGERED_TYPES and not stop_price):
+            raise _Rejected(-1102)
+        if amount <= 0 and not close_position:
+            raise _Rejected(-4003)
+        if (reduce_only or close_position) and order_type not in _TRIGGERED_TYPES and \
+                self._reducible(key, side) <= _EPSILON:
+            raise _Rejected(-2022)
+
+        timestamp = self._quotes[key][3] if key in self._quotes else self.milliseconds()
+        order = _Order(str(next(self._ids)), symbol, order_type, side, amount, price, stop_price, reduce_only,
+                       close_position, params.get('timeInForce', 'GTC'),
+                       params.get('clientOrderId', params.get('newClientOrderId')), timestamp)
+
+        if order_type in _TRIGGERED_TYPES:
+            if key in self._quotes and self._triggered(order, self._quotes[key][0]):
+                raise _Rejected(-2021)
+            if not order.reduce_only:
+                self._check_margin(key, order, price or stop_price)
+            self._orders[order.id] = self._open[order.id] = order
+            self._triggers.setdefault(key, []).append(order)
+            return order
+
+        if not order.reduce_only:
+            if price is None and key not in self._quotes:
+                raise ccxt.ExchangeError(f"Simulador sin precio para {symbol}")
+            self._check_margin(key, order, price or self._quotes[key][0])
+        self._orders[order.id] = self._open[order.id] = order
+        if order_type == 'MARKET':
+            self._execute_market(key, order)
+        else:
+            self._execute_or_rest(key, order)
+        return order
+
+    def _to_ccxt(self, order: _Order) -> Dict[str, Any]:
+        """Orden en formato unificado de CCXT"""
+        return {
+            'id': order.id,
+            'clientOrderId': order.client_id,
+            'timestamp': order.timestamp,
+            'datetime': self.iso8601(order.timestamp),
+            'lastTradeTimestamp': order.update_time if order.filled > 0 else None,
+            'symbol': order.symbol,
+            'type': order.type.lower(),
+            'timeInForce': order.time_in_force,
+            'side': order.side,
+            'price': order.price,
+            'stopPrice': order.stop_price,
+            'triggerPrice': order.stop_price,
+            'amount': order.amount,
+            'filled': order.filled,
+            'remaining': order.remaining,
+            'average': order.average,
+            'cost': order.cost,
+            'status': _CCXT_STATUS[order.status],
+            'fee': {'cost': order.fee, 'currency': 'USDT'},
+            'reduceOnly': order.reduce_only,
+            'postOnly': False,
+            'trades': [],
+            'info': order.to_binance(self._key(order.symbol)),
+        }
+
+    def create_order(self, symbol: str, type: str, side: str, amount: Optional[float],
+                     price: Optional[float] = None, params: Optional[dict] = None) -> Dict[str, Any]:
+        try:
+            return self._to_ccxt(self._place(symbol, type, side, amount, price, params))
+        except _Rejected as e:
+            raise e.to_ccxt() from None
+
+    def create_limit_buy_order(self, symbol: str, amount: float, price: float,
+                               params: Optional[dict] = None) -> Dict[str, Any]:
+        return self.create_order(symbol, 'limit', 'buy', amount, price, params)
+
+    def create_limit_sell_order(self, symbol: str, amount: float, price: float,
+                                params: Optional[dict] = None) -> Dict[str, Any]:
+        return self.create_order(symbol, 'limit', 'sell', amount, price, params)
+
+    def create_market_buy_order(self, symbol: str, amount: float, params: Optional[dict] = None) -> Dict[str, Any]:
+        return self.create_order(symbol, 'market', 'buy', amount, None, params)
+
+    def create_market_sell_order(self, symbol: str, amount: float, params: Optional[dict] = None) -> Dict[str, Any]:
+        return self.create_order(symbol, 'market', 'sell', amount, None, params)
+
+    def _cancel(self, order_id: Any) -> _Order:
+        order = self._orders.get(str(order_id))
+        if order is None or order.status in _FINAL:
+            raise _Rejected(-2011)
+        self._unlist(self._key(order.symbol), order)
+        self._finish(order, 'CANCELED')
+        return order
+
+    def cancel_order(self, id: str, symbol: Optional[str] = None, params: Optional[dict] = None) -> Dict[str, Any]:
+        try:
+            return self._to_ccxt(self._cancel(id))
+        except _Rejected as e:
+            raise e.to_ccxt() from None
+
+    def edit_order(self, id: str, symbol: str, type: str, side: str, amount: Optional[float] = None,
+                   price: Optional[float] = None, params: Optional[dict] = None) -> Dict[str, Any]:
+        """
+        Modifica el precio (y la cantidad) de una orden LIMIT abierta, como PUT /fapi/v1/order
+
+        Mantiene el ID, pierde la prioridad en la cola y, si el nuevo precio
+        cruza el libro, se ejecuta al momento.
+        """
+        try:
+            order = self._orders.get(str(id))
+            if order is None or order.status in _FINAL:
+                raise _Rejected(-2011)
+            if order.type != 'LIMIT' or str(type).upper() != 'LIMIT':
+                raise _Rejected(-1116)
+            if not price:
+                raise _Rejected(-1102)
+            amount = order.amount if amount is None else float(amount)
+            if amount <= order.filled:
+                raise _Rejected(-4003)
+            key = self._key(order.symbol)
+            self._sync(key)
+            if order.status in _FINAL:  # Se ejecutó con el último precio
+                raise _Rejected(-2011)
+            self._unlist(key, order)
+            order.price = float(price)
+            order.amount = amount
+            order.update_time = self._quotes[key][3] if key in self._quotes else self.milliseconds()
+            self._execute_or_rest(key, order)
+            return self._to_ccxt(order)
+        except _Rejected as e:
+            raise e.to_ccxt() from None
+
+    def cancel_all_orders(self, symbol: Optional[str] = None, params: Optional[dict] = None) -> List[Dict[str, Any]]:
+        key = self._key(symbol) if symbol else None
+        return [self._to_ccxt(self._cancel(o.id)) for o in list(self._open.values())
+                if key is None or self._key(o.symbol) == key]
+
+    def fetch_order(self, id: str, symbol: Optional[str] = None, params: Optional[dict] = None) -> Dict[str, Any]:
+        order = self._orders.get(str(id))
+        if order is None:
+            raise _Rejected(-2011).to_ccxt()
+        self._sync(self._key(order.symbol))
+        return self._to_ccxt(order)
+
+    def fetch_open_orders(self, symbol: Optional[str] = None, since: Optional[int] = None,
+                          limit: Optional[int] = None, params: Optional[dict] = None) -> List[Dict[str, Any]]:
+        key = self._key(symbol) if symbol else None
+        if key is not None:
+            self._sync(key)
+        return [self._to_ccxt(o) for o in self._open.values() if key is None or self._key(o.symbol) == key]
+
+    def parse_order(self, order: Dict[str, Any], market: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Respuesta de Binance (batchOrders) → orden de CCXT"""
+        return self._to_ccxt(self._orders[str(order['orderId'])])
+
+    # ------------------------------------------------------------------
+    # Posiciones y endpoints de Futures
+    # ------------------------------------------------------------------
+
+    def fetch_positions(self, symbols: Optional[List[str]] = None,
+                        params: Optional[dict] = None) -> List[Dict[str, Any]]:
+        keys = [self._key(s) for s in symbols] if symbols else list(self._positions)
+        positions = []
+        for key in keys:
+            self._sync(key)
+            position = self._position(key)
+            mark_price = self._mark_price(key, position)
+            positions.append({
+                'symbol': self._symbols[key],
+                'contracts': abs(position.amount),
+                'side': ('long' if position.amount > 0 else 'short') if position.amount else None,
+                'entryPrice': position.entry_price,
+                'markPrice': mark_price,
+                'notional': abs(position.amount) * mark_price,
+                'unrealizedPnl': self._unrealized_pnl(key, position),
+                'leverage': position.leverage,
+                'marginMode': position.margin_type,
+                'initialMargin': abs(position.amount) * position.entry_price / position.leverage,
+                'info': self._position_risk_row(key),
+            })
+        return positions
+
+    def _position_risk_row(self, key: str) -> Dict[str, str]:
+        position = self._position(key)
+        return {
+            'symbol': key,
+            'positionAmt': str(position.amount),
+            'entryPrice': str(position.entry_price),
+            'markPrice': str(self._mark_price(key, position)),
+            'unRealizedProfit': str(self._unrealized_pnl(key, position)),
+            'leverage': str(position.leverage),
+            'marginType': position.margin_type,
+            'positionSide': 'BOTH',
+        }
+
+    def fapiPrivateV2GetPositionRisk(self, params: Optional[dict] = None) -> List[Dict[str, str]]:
+        symbol = (params or {}).get('symbol')
+        keys = [symbol.upper()] if symbol else list(self._positions)
+        for key in keys:
+            self._symbols.setdefault(key, key)
+            self._sync(key)
+        return [self._position_risk_row(key) for key in keys]
+
+    def fapiPrivatePostBatchOrders(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Coloca un lote de órdenes (formato de batch_orders.order_request)"""
+        results = []
+        for request in params['batchOrders']:
+            symbol = self._symbols.get(request['symbol'], request['symbol'])
+            extra = {name: request[name] for name in ('stopPrice', 'reduceOnly', 'closePosition',
+                                                      'timeInForce', 'newClientOrderId') if name in request}
+            try:
+                order = self._place(symbol, request['type'], request['side'], request.get('quantity'),
+                                    request.get('price'), extra)
+                results.append(order.to_binance(self._key(symbol)))
+            except _Rejected as e:
+                results.append({'code': e.code, 'msg': str(e)})
+        return results
+
+    def fapiPrivateDeleteBatchOrders(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Cancela un lote de órdenes por ID"""
+        results = []
+        for order_id in params['orderidlist']:
+            try:
+                order = self._cancel(order_id)
+                results.append(order.to_binance(self._key(order.symbol)))
+            except _Rejected as e:
+                results.append({'code': e.code, 'msg': str(e)})
+        return results
+
+    def set_leverage(self, leverage: int, symbol: str, params: Optional[dict] = None) -> Dict[str, Any]:
+        return self.fapiPrivate_post_leverage({'symbol': batch_orders.market_id(symbol), 'leverage': leverage})
+
+    def fapiPrivate_post_leverage(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._symbols.setdefault(params['symbol'], params['symbol'])
+        self._position(params['symbol']).leverage = int(params['leverage'])
+        return {'symbol': params['symbol'], 'leverage': int(params['leverage'])}
+
+    def fapiPrivate_post_margintype(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._symbols.setdefault(params['symbol'], params['symbol'])
+        margin_type = 'isolated' if str(params['marginType']).upper() == 'ISOLATED' else 'cross'
+        self._position(params['symbol']).margin_type = margin_type
+        return {'code': 200, 'msg': 'success'}
+
+    def milliseconds(self) -> int:
+        return int(ccxt.Exchange.milliseconds())
+
+
+def random_walk(price: float, steps: int, volatility: float = 0.0005, quantity: Optional[float] = None,
+                start: int = 0, interval_ms: int = 100, seed: Optional[int] = None
+                ) -> Iterator[Tuple[int, float, Optional[float]]]:
+    """
+    Ticks sintéticos: paseo aleatorio del precio (para pruebas y benchmarks)
+
+    Args:
+        price: Precio inicial
+        steps: Número de ticks
+        volatility: Desviación típica de cada paso (fracción del precio)
+        quantity: Cantidad negociada en cada tick (None = liquidez ilimitada)
+        start: Timestamp del primer tick en ms
+        interval_ms: Milisegundos entre ticks
+        seed: Semilla para repetir la misma serie
+
+    Returns:
+        Iterador de (timestamp en ms, precio, cantidad)
+    """
+    rng = random.Random(seed)
+    for i in range(steps):
+        price *= 1 + rng.gauss(0.0, volatility)
+        yield start + i * interval_ms, price, quantity
@@ -0,0 +1,299 @@
+"""
+Barrido de parámetros vectorizado con NumPy
+
+Evalúa a la vez una rejilla de combinaciones de EMA_PERIOD, STOP_LOSS_PERCENT,
+TAKE_PROFIT_PERCENT y TARGET_PROFIT_USDT sobre las mismas velas. El núcleo
+recorre el tiempo una sola vez y mantiene el estado de todas las combinaciones
+en arrays, con el mismo modelo de ejecución que backtest.Backtester (los
+resultados coinciden con él combinación a combinación). La rejilla se puede
+repartir entre varios procesos.
+
+Uso:
+    python sweep.py velas.csv --ema 8,12,20 --stop-loss 0.2:1.0:0.2 --target-profit 1,2,3 --workers 4
+
+Los rangos se escriben como lista (a,b,c) o como inicio:fin:paso (fin incluido).
+Con --symbol las velas se leen de la caché local (candle_store.py) sin copia.
+"""
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Sequence
+
+import numpy as np
+
+import config
+from indicators import IncrementalEMA
+
+
+RESULT_FIELDS = ('total_trades', 'winning_trades', 'losing_trades', 'total_profit_usd',
+                 'total_fees_usd', 'max_drawdown_usd', 'orders_canceled')
+
+
+def build_grid(ema_periods: Sequence[int], stop_loss_percents: Sequence[float],
+               take_profit_percents: Sequence[float], target_profits_usdt: Sequence[float]) -> Dict[str, np.ndarray]:
+    """
+    Construye el producto cartesiano de parámetros
+
+    Returns:
+        Dict con un array por parámetro, todos de longitud N (número de combinaciones)
+    """
+    combos = list(itertools.product(ema_periods, stop_loss_percents, take_profit_percents, target_profits_usdt))
+    return {
+        'ema_period': np.array([c[0] for c in combos], dtype=np.int64),
+        'stop_loss_percent': np.array([c[1] for c in combos], dtype=np.float64),
+        'take_profit_percent': np.array([c[2] for c in combos], dtype=np.float64),
+        'target_profit_usdt': np.array([c[3] for c in combos], dtype=np.float64),
+    }
+
+
+def ema_series(closes: np.ndarray, period: int) -> np.ndarray:
+    """
+    EMA de toda la serie con la misma aritmética que IncrementalEMA
+
+    Args:
+        closes: Precios de cierre
+        period: Periodo de la EMA
+
+    Returns:
+        Array con la EMA en cada vela
+    """
+    ema = IncrementalEMA(period)
+    update = ema.update
+    return np.fromiter((update(c) for c in closes.tolist()), dtype=np.float64, count=len(closes))
+
+
+def sweep_kernel(candles: np.ndarray, grid: Dict[str, np.ndarray],
+                 position_size_usdt: float = config.POSITION_SIZE_USDT,
+                 leverage: int = config.LEVERAGE,
+                 use_futures: bool = config.USE_FUTURES,
+                 enable_short_positions: bool = config.ENABLE_SHORT_POSITIONS,
+                 cooldown_seconds: int = config.COOLDOWN_SECONDS,
+                 maker_fee: float = 0.0002,
+                 taker_fee: float = 0.0005,
+                 entry_timeout_candles: int = 5) -> Dict[str, np.ndarray]:
+    """
+    Simula todas las combinaciones de la rejilla en un solo recorrido temporal
+
+    Args:
+        candles: Array (T, 6) con timestamp, open, high, low, close, volume
+        grid: Rejilla de parámetros (ver build_grid)
+        (resto): Igual que en backtest.Backtester
+
+    Returns:
+        Dict con un array de longitud N por cada campo de RESULT_FIELDS
+    """
+    candles = np.asarray(candles, dtype=np.float64)
+    timestamps = candles[:, 0].astype(np.int64)
+    opens, highs, lows, closes = candles[:, 1], candles[:, 2], candles[:, 3], candles[:, 4]
+
+    periods = grid['ema_period']
+    sl = grid['stop_loss_percent']
+    tp_pct = grid['take_profit_percent']
+    target = grid['target_profit_usdt']
+    n = len(periods)
+
+    lev = float(leverage if use_futures else 1)
+    enable_short = enable_short_positions and use_futures
+    cooldown_ms = cooldown_seconds * 1000
+
+    # EMA precalculada una vez por periodo distinto; ema_t[t] da la fila de ese instante
+    unique_periods, period_index = np.unique(periods, return_inverse=True)
+    ema_t = np.ascontiguousarray(np.stack([ema_series(closes, int(p)) for p in unique_periods], axis=1))
+    ready_from = periods - 1  # Índice de la primera vela con la EMA lista
+
+    # Estado por combinación: 0 = sin posición, 1 = entrada pendiente, 2 = en posición
+    state = np.zeros(n, dtype=np.int8)
+    side = np.zeros(n)  # +1 LONG, -1 SHORT
+    limit_price = np.ones(n)
+    age = np.zeros(n, dtype=np.int64)
+    entry_price = np.ones(n)
+    amount = np.zeros(n)
+    tp_price = np.zeros(n)
+    stop_price = np.zeros(n)
+    entry_fee = np.zeros(n)
+    last_close = np.full(n, np.iinfo(np.int64).min // 2, dtype=np.int64)
+
+    trades = np.zeros(n, dtype=np.int64)
+    wins = np.zeros(n, dtype=np.int64)
+    pnl_total = np.zeros(n)
+    fees_total = np.zeros(n)
+    equity = np.zeros(n)
+    peak = np.zeros(n)
+    max_dd = np.zeros(n)
+    canceled = np.zeros(n, dtype=np.int64)
+
+    for t in range(len(closes)):
+        ts = timestamps[t]
+        open_, high, low, close = opens[t], highs[t], lows[t], closes[t]
+
+        in_pos = state == 2
+        pend = state == 1
+
+        # 1. Posiciones abiertas: stop loss (conservador) y luego take profit
+        if in_pos.any():
+            is_long = side > 0
+            adverse = np.where(is_long, low, high)
+            pl = ((adverse - entry_price) / entry_price) * 100 * side
+            stop = in_pos & (pl <= -sl) & ~(pl >= tp_pct)
+            take = in_pos & ~stop & np.where(is_long, high >= tp_price, low <= tp_price)
+            closing = stop | take
+            if closing.any():
+                exit_price = np.where(stop, np.where(is_long, np.minimum(stop_price, open_),
+                                                     np.maximum(stop_price, open_)), tp_price)
+                fee_rate = np.where(stop, taker_fee, maker_fee)
+                exit_pl = ((exit_price - entry_price) / entry_price) * 100 * side
+                gross = side * (exit_price - entry_price) * amount * lev
+                fees = entry_fee + amount * lev * exit_price * fee_rate
+                net = gross - fees
+
+                trades += closing
+                wins += closing & (exit_pl >= 0)
+                pnl_total += np.where(closing, net, 0.0)
+                fees_total += np.where(closing, fees, 0.0)
+                equity += np.where(closing, net, 0.0)
+                np.maximum(peak, equity, out=peak)
+                np.maximum(max_dd, peak - equity, out=max_dd)
+                last_close[closing] = ts
+                state[closing] = 0
+
+        # 2. Entradas pendientes: llenado o cancelación por timeout
+        if pend.any():
+            is_long = side > 0
+            filled = pend & np.where(is_long, low <= limit_price, high >= limit_price)
+            if filled.any():
+                entry = limit_price
+                new_amount = position_size_usdt / entry
+                change = target / (new_amount * lev)
+                entry_price = np.where(filled, entry, entry_price)
+                amount = np.where(filled, new_amount, amount)
+                tp_price = np.where(filled, np.where(is_long, entry + change, entry - change), tp_price)
+                stop_price = np.where(filled, np.where(is_long, entry * (1 - sl / 100), entry * (1 + sl / 100)),
+                                      stop_price)
+                entry_fee = np.where(filled, new_amount * lev * entry * maker_fee, entry_fee)
+                state[filled] = 2
+            waiting = pend & ~filled
+            age += waiting
+            expired = waiting & (age >= entry_timeout_candles)
+            canceled += expired
+            state[expired] = 0
+
+        # 3. Señales sobre la vela cerrada
+        flat = (state == 0) & (t >= ready_from) & (ts - last_close >= cooldown_ms)
+        if flat.any():
+            ema = ema_t[t][period_index]
+            buy = flat & (close > ema)
+            short = flat & ~buy & (close < ema) if enable_short else np.zeros(n, dtype=bool)
+            entering = buy | short
+            if entering.any():
+                side = np.where(buy, 1.0, np.where(short, -1.0, side))
+                limit_price[entering] = close
+                age[entering] = 0
+                state[entering] = 1
+
+    return {
+        'total_trades': trades,
+        'winning_trades': wins,
+        'losing_trades': trades - wins,
+        'total_profit_usd': pnl_total,
+        'total_fees_usd': fees_total,
+        'max_drawdown_usd': max_dd,
+        'orders_canceled': canceled,
+    }
+
+
+def _run_chunk(args):
+    candles, grid, kwargs = args
+    return sweep_kernel(candles, grid, **kwargs)
+
+
+def run_sweep(candles: np.ndarray, grid: Dict[str, np.ndarray], workers: int = 1,
+              **kwargs) -> List[Dict[str, Any]]:
+    """
+    Ejecuta el barrido, opcionalmente repartido entre varios procesos
+
+    Args:
+        candles: Array (T, 6) de velas
+        grid: Rejilla de parámetros (ver build_grid)
+        workers: Número de procesos (1 = en el proceso actual)
+        **kwargs: Parámetros fijos para sweep_kernel
+
+    Returns:
+        Lista de dicts (uno por combinación) con parámetros y resultados
+    """
+    candles = np.asarray(candles, dtype=np.float64)
+    n = len(grid['ema_period'])
+    workers = max(1, min(workers, n))
+
+    if workers == 1:
+        parts = [sweep_kernel(candles, grid, **kwargs)]
+        chunks = [np.arange(n)]
+    else:
+        # Agrupar por periodo de EMA para que cada proceso calcule pocas EMAs
+        order = np.argsort(grid['ema_period'], kind='stable')
+        chunks = np.array_split(order, workers)
+        jobs = [(candles, {k: v[idx] for k, v in grid.items()}, kwargs) for idx in chunks]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_chunk, jobs))
+
+    results: List[Dict[str, Any]] = [None] * n
+    for idx, part in zip(chunks, parts):
+        for j, combo in enumerate(idx):
+            row = {k: v[combo].item() for k, v in grid.items()}
+            row.update({field: part[field][j].item() for field in RESULT_FIELDS})
+            row['win_rate'] = row['winning_trades'] / row['total_trades'] * 100 if row['total_trades'] else 0
+            results[combo] = row
+    return results
+
+
+def _parse_range(text: str, cast=float) -> List:
+    if ':' in text:
+        start, stop, step = (float(x) for x in text.split(':'))
+        values = np.arange(start, stop + step / 2, step)
+        return [cast(round(v, 10)) for v in values]
+    return [cast(x) for x in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Barrido de parámetros vectorizado')
+    parser.add_argument('path', nargs='?', help='Archivo de velas (.csv o .parquet)')
+    parser.add_argument('--symbol', help='Leer las velas de la caché local en vez de un archivo')
+    parser.add_argument('--timeframe', default=config.TIMEFRAME, help='Timeframe de la caché local')
+    parser.add_argument('--ema', default=str(config.EMA_PERIOD), help='Periodos de EMA')
+    parser.add_argument('--stop-loss', default=str(config.STOP_LOSS_PERCENT), help='Stop loss en %%')
+    parser.add_argument('--take-profit', default=str(config.TAKE_PROFIT_PERCENT), help='Take profit en %%')
+    parser.add_argument('--target-profit', default=str(config.TARGET_PROFIT_USDT), help='Ganancia objetivo USDT')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Procesos en paralelo')
+    parser.add_argument('--top', type=int, default=10, help='Mejores combinaciones a mostrar')
+    args = parser.parse_args()
+
+    if args.path is not None:
+        from backtest import load_candles
+        candles = np.array(load_candles(args.path), dtype=np.float64)
+    elif args.symbol is not None:
+        from candle_store import CandleStore
+        candles = CandleStore().read(args.symbol, args.timeframe)
+    else:
+        parser.error("Indica un archivo de velas o --symbol")
+    grid = build_grid(_parse_range(args.ema, int), _parse_range(args.stop_loss),
+                      _parse_range(args.take_profit), _parse_range(args.target_profit))
+    n = len(grid['ema_period'])
+    print(f"🔎 {n} combinaciones × {len(candles):,} velas con {args.workers} procesos...")
+
+    started = time.perf_counter()
+    results = run_sweep(candles, grid, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    results.sort(key=lambda r: r['total_profit_usd'], reverse=True)
+    print(f"✅ Barrido completado en {elapsed:.1f}s\n")
+    print(f"{'EMA':>4} {'SL%':>6} {'TP%':>6} {'Target':>7} {'Trades':>7} {'Win%':>6} {'P/L USD':>10} {'MaxDD':>8}")
+    for r in results[:args.top]:
+        print(f"{r['ema_period']:>4} {r['stop_loss_percent']:>6.2f} {r['take_profit_percent']:>6.2f} "
+              f"{r['target_profit_usdt']:>7.2f} {r['total_trades']:>7} {r['win_rate']:>6.1f} "
+              f"{r['total_profit_usd']:>10.2f} {r['max_drawdown_usd']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
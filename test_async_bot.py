@@ -0,0 +1,129 @@
+"""
+Test para el bot asíncrono: las peticiones independientes de un ciclo
+deben ir en paralelo (un round trip) en lugar de una detrás de otra
+"""
+
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from async_bot import AsyncScalpingBot
+
+
+RTT = 0.05  # Latencia simulada por petición REST (segundos)
+
+
+class FakeAsyncExchange:
+    """Exchange asíncrono falso con latencia fija por petición"""
+
+    def __init__(self, closes):
+        self.closes = closes
+        self.calls = []
+        self.orders = []
+
+    async def _call(self, name):
+        self.calls.append(name)
+        await asyncio.sleep(RTT)
+
+    async def fetch_ticker(self, symbol):
+        await self._call('fetch_ticker')
+        return {'last': self.closes[-1]}
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        await self._call('fetch_ohlcv')
+        now_ms = int(time.time() * 1000)
+        current_open = now_ms - now_ms % 60000
+        n = len(self.closes)
+        return [[current_open - (n - 1 - i) * 60000, c, c, c, c, 1.0] for i, c in enumerate(self.closes)]
+
+    async def fetch_balance(self):
+        await self._call('fetch_balance')
+        return {'free': {'USDT': 200.0}}
+
+    async def create_limit_buy_order(self, symbol, amount, price):
+        await self._call('create_limit_buy_order')
+        order = {'id': str(len(self.orders) + 1), 'amount': amount, 'price': price, 'side': 'buy'}
+        self.orders.append(order)
+        return order
+
+    async def create_limit_sell_order(self, symbol, amount, price):
+        await self._call('create_limit_sell_order')
+        order = {'id': str(len(self.orders) + 1), 'amount': amount, 'price': price, 'side': 'sell'}
+        self.orders.append(order)
+        return order
+
+
+def _configure(mock_config):
+    mock_config.SYMBOL = 'DOGE/USDT'
+    mock_config.TIMEFRAME = '1m'
+    mock_config.EMA_PERIOD = 3
+    mock_config.POSITION_SIZE_USDT = 5
+    mock_config.USE_DYNAMIC_POSITION_SIZE = True
+    mock_config.POSITION_SIZE_PERCENT = 10
+    mock_config.TAKE_PROFIT_PERCENT = 0.6
+    mock_config.STOP_LOSS_PERCENT = 0.4
+    mock_config.TARGET_PROFIT_USDT = 2.0
+    mock_config.LOOP_INTERVAL = 3
+    mock_config.ENABLE_REAL_TRADING = True
+    mock_config.COOLDOWN_SECONDS = 60
+    mock_config.ENABLE_SHORT_POSITIONS = True
+    mock_config.USE_FUTURES = True
+    mock_config.LEVERAGE = 10
+    mock_config.MARGIN_MODE = 'isolated'
+    mock_config.USE_SANDBOX = False
+    mock_config.EVENT_DRIVEN = False
+
+
+class TestAsyncScalpingBot(unittest.IsolatedAsyncioTestCase):
+    """Tests para AsyncScalpingBot"""
+
+    def _make_bot(self, closes):
+        exchange = FakeAsyncExchange(closes)
+        with patch('main.config') as mock_config, \
+                patch('async_bot.config', mock_config), \
+                patch('async_bot.ccxt_async.binance', return_value=exchange):
+            _configure(mock_config)
+            bot = AsyncScalpingBot()
+        return bot, exchange
+
+    async def test_cycle_reads_run_concurrently(self):
+        """Test: Ticker, velas y balance se piden en un único round trip"""
+        bot, exchange = self._make_bot([0.080, 0.080, 0.080, 0.080, 0.080])
+
+        start = time.perf_counter()
+        await bot._trading_cycle_automatic_async()
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(sorted(exchange.calls), ['fetch_balance', 'fetch_ohlcv', 'fetch_ticker'])
+        self.assertLess(elapsed, 2 * RTT)  # Secuencial serían 3 * RTT
+        self.assertFalse(bot.in_position)  # Precio == EMA: sin señal
+
+    async def test_entry_costs_two_round_trips(self):
+        """Test: Una entrada cuesta lecturas en paralelo + la orden, con un solo fetch_balance"""
+        bot, exchange = self._make_bot([0.080, 0.080, 0.080, 0.080, 0.081])
+
+        start = time.perf_counter()
+        await bot._trading_cycle_automatic_async()
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(exchange.calls.count('fetch_balance'), 1)
+        self.assertEqual(exchange.calls[-1], 'create_limit_buy_order')
+        self.assertLess(elapsed, 3 * RTT)  # Secuencial serían 4 * RTT
+        self.assertTrue(bot.in_position)
+        self.assertEqual(bot.position_side, 'LONG')
+        self.assertEqual(bot.position_size_used, 20.0)  # 10% de 200 USDT
+
+    async def test_no_refetch_while_candle_open(self):
+        """Test: Tras inicializar la EMA, un ciclo en posición solo pide el ticker"""
+        bot, exchange = self._make_bot([0.080, 0.080, 0.080, 0.080, 0.081])
+        await bot._trading_cycle_automatic_async()
+        exchange.calls.clear()
+
+        await bot._trading_cycle_automatic_async()
+
+        self.assertEqual(exchange.calls, ['fetch_ticker'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,115 @@
+"""
+Test para el backtester offline
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+import utils
+from backtest import Backtester, load_candles, save_candles_csv
+
+
+def _flat(start_ts, n, price):
+    return [(start_ts + i * 60000, price, price, price, price, 1.0) for i in range(n)]
+
+
+class TestBacktester(unittest.TestCase):
+    """Tests para Backtester"""
+
+    def _backtester(self, **kwargs):
+        params = dict(ema_period=3, take_profit_percent=0.6, stop_loss_percent=0.4,
+                      target_profit_usdt=2.0, position_size_usdt=10.0, leverage=10,
+                      use_futures=True, enable_short_positions=True, cooldown_seconds=0,
+                      maker_fee=0.0, taker_fee=0.0, entry_timeout_candles=2)
+        params.update(kwargs)
+        return Backtester(**params)
+
+    def test_long_take_profit(self):
+        """Test: Entrada LONG que se llena y cierra en el take profit de 2 USDT"""
+        candles = _flat(0, 5, 0.08)
+        candles.append((300000, 0.08, 0.081, 0.08, 0.081, 1.0))    # Señal LONG a 0.081
+        candles.append((360000, 0.081, 0.081, 0.0809, 0.081, 1.0))  # Se llena la entrada
+        candles.append((420000, 0.081, 0.0840, 0.081, 0.0835, 1.0))  # Toca el take profit
+
+        result = self._backtester(enable_short_positions=False).run(candles)
+
+        self.assertEqual(result.total_trades, 1)
+        trade = result.trades[0]
+        expected_tp = utils.calculate_take_profit_price_for_fixed_usd(0.081, 10.0, 2.0, 10, 'LONG')
+        self.assertEqual(trade['side'], 'LONG')
+        self.assertEqual(trade['exit_price'], expected_tp)
+        self.assertAlmostEqual(trade['profit_loss_usd'], 2.0, places=9)
+        self.assertEqual(result.winning_trades, 1)
+        self.assertEqual(result.win_rate, 100.0)
+
+    def test_short_stop_loss_with_fees(self):
+        """Test: SHORT que toca el stop loss; se aplican comisiones maker y taker"""
+        candles = _flat(0, 5, 0.08)
+        candles.append((300000, 0.08, 0.08, 0.079, 0.079, 1.0))    # Señal SHORT a 0.079
+        candles.append((360000, 0.079, 0.0791, 0.079, 0.079, 1.0))  # Se llena la entrada
+        candles.append((420000, 0.079, 0.0800, 0.079, 0.0799, 1.0))  # Sube por encima del stop
+
+        result = self._backtester(maker_fee=0.0002, taker_fee=0.0005).run(candles)
+
+        self.assertEqual(result.total_trades, 1)
+        trade = result.trades[0]
+        stop_price = 0.079 * 1.004
+        self.assertTrue(trade['reason'].startswith('STOP LOSS'))
+        self.assertAlmostEqual(trade['exit_price'], stop_price)
+        amount = 10.0 / 0.079
+        gross = (0.079 - stop_price) * amount * 10
+        fees = amount * 10 * (0.079 * 0.0002 + stop_price * 0.0005)
+        self.assertAlmostEqual(trade['profit_loss_usd'], gross - fees)
+        self.assertEqual(result.losing_trades, 1)
+        self.assertAlmostEqual(result.max_drawdown_usd, -(gross - fees))
+
+    def test_unfilled_entry_is_canceled(self):
+        """Test: Una entrada LIMIT que el precio no vuelve a tocar se cancela"""
+        candles = _flat(0, 5, 0.08)
+        candles.append((300000, 0.08, 0.081, 0.08, 0.081, 1.0))
+        candles += [(360000 + i * 60000, 0.082, 0.083, 0.0815, 0.082, 1.0) for i in range(3)]
+
+        result = self._backtester(enable_short_positions=False).run(candles)
+
+        self.assertEqual(result.total_trades, 0)
+        self.assertGreaterEqual(result.orders_canceled, 1)
+
+    def test_random_walk_stats_are_consistent(self):
+        """Test: Las estadísticas agregadas cuadran con la lista de trades"""
+        rng = random.Random(3)
+        price = 0.08
+        candles = []
+        for i in range(5000):
+            open_ = price
+            price *= 1 + rng.gauss(0, 0.002)
+            high = max(open_, price) * (1 + abs(rng.gauss(0, 0.001)))
+            low = min(open_, price) * (1 - abs(rng.gauss(0, 0.001)))
+            candles.append((i * 60000, open_, high, low, price, 1.0))
+
+        result = self._backtester(ema_period=12, cooldown_seconds=60).run(candles)
+
+        self.assertGreater(result.total_trades, 0)
+        self.assertEqual(result.winning_trades + result.losing_trades, result.total_trades)
+        self.assertAlmostEqual(result.total_profit_usd, sum(t['profit_loss_usd'] for t in result.trades))
+        for previous, trade in zip(result.trades, result.trades[1:]):
+            self.assertGreaterEqual(trade['signal_time'] - previous['exit_time'], 60000)
+
+
+class TestLoadCandles(unittest.TestCase):
+    """Tests para la carga de velas"""
+
+    def test_csv_round_trip(self):
+        """Test: Guardar y cargar velas en CSV (con cabecera, desordenadas)"""
+        candles = [[120000, 1.0, 2.0, 0.5, 1.5, 10.0], [60000, 1.0, 1.1, 0.9, 1.0, 5.0]]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'velas.csv')
+            save_candles_csv(path, candles)
+            loaded = load_candles(path)
+
+        self.assertEqual(loaded, [(60000, 1.0, 1.1, 0.9, 1.0, 5.0), (120000, 1.0, 2.0, 0.5, 1.5, 10.0)])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,188 @@
+"""
+Test para la colocación y cancelación de órdenes en lote
+"""
+
+import json
+import unittest
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import ccxt
+
+import utils
+from batch_orders import cancel_batch_orders, create_batch_orders, order_request
+
+
+def _accepted(request, order_id):
+    return {'orderId': order_id, 'symbol': request['symbol'], 'status': 'NEW', 'clientOrderId': f"c{order_id}",
+            'price': request.get('price', '0'), 'avgPrice': '0', 'origQty': request.get('quantity', '0'),
+            'executedQty': '0', 'type': request['type'], 'side': request['side'],
+            'stopPrice': request.get('stopPrice', '0'), 'updateTime': 1700000000000}
+
+
+class FakeBatchExchange(ccxt.binance):
+    """Binance sin red: responde a los endpoints batch y registra cada petición"""
+
+    def __init__(self, reject=()):
+        super().__init__({'options': {'defaultType': 'future'}})
+        self.reject = set(reject)  # Posiciones (globales) de las órdenes que Binance rechaza
+        self.placed = []
+        self.requests = []
+        self.canceled = []
+
+    def fapiPrivatePostBatchOrders(self, params):
+        batch = params['batchOrders']
+        self.requests.append(('POST', len(batch)))
+        response = []
+        for request in batch:
+            index = len(self.placed)
+            self.placed.append(request)
+            if index in self.reject:
+                response.append({'code': -2019, 'msg': 'Margin is insufficient.'})
+            else:
+                response.append(_accepted(request, 1000 + index))
+        return response
+
+    def fapiPrivateDeleteBatchOrders(self, params):
+        ids = params['orderidlist']
+        self.requests.append(('DELETE', len(ids)))
+        response = []
+        for order_id in ids:
+            if order_id == '404':
+                response.append({'code': -2011, 'msg': 'Unknown order sent.'})
+            else:
+                self.canceled.append(order_id)
+                response.append({'orderId': order_id, 'status': 'CANCELED', 'symbol': params['symbol']})
+        return response
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params={}):
+        self.requests.append(('GET', 'openOrders'))
+        return [{'id': str(i), 'type': 'stop_market'} for i in range(1, 13)] + [{'id': '99', 'type': 'limit'}]
+
+
+class TestOrderRequests(unittest.TestCase):
+    """Tests para la construcción de órdenes"""
+
+    def test_order_request_format(self):
+        """Test: Parámetros en el formato de la API de Futures"""
+        request = order_request('DOGE/USDT:USDT', 'sell', 'limit', 125.5, price=0.0000123, reduce_only=True)
+        self.assertEqual(request, {'symbol': 'DOGEUSDT', 'side': 'SELL', 'type': 'LIMIT', 'quantity': '125.5',
+                                   'price': '0.0000123', 'timeInForce': 'GTC', 'reduceOnly': 'true'})
+
+    def test_protective_exits_format(self):
+        """Test: Take profit LIMIT reduceOnly y stop loss STOP_MARKET que cierra la posición"""
+        tp = order_request('DOGE/USDT', 'sell', 'LIMIT', 100, price=0.081, reduce_only=True)
+        sl = order_request('DOGE/USDT', 'sell', 'STOP_MARKET', stop_price=0.0797, close_position=True)
+        self.assertEqual((tp['type'], tp['quantity'], tp['reduceOnly']), ('LIMIT', '100', 'true'))
+        self.assertEqual((sl['side'], sl['type'], sl['stopPrice'], sl['closePosition']),
+                         ('SELL', 'STOP_MARKET', '0.0797', 'true'))
+        self.assertNotIn('quantity', sl)
+        self.assertNotIn('reduceOnly', sl)
+
+
+class TestBatchOrders(unittest.TestCase):
+    """Tests para create_batch_orders y cancel_batch_orders"""
+
+    def test_exits_in_one_round_trip(self):
+        """Test: Take profit y stop loss salen en una sola petición"""
+        exchange = FakeBatchExchange()
+        tp, sl = create_batch_orders(exchange, [
+            order_request('DOGE/USDT', 'sell', 'LIMIT', 100, price=0.081, reduce_only=True),
+            order_request('DOGE/USDT', 'sell', 'STOP_MARKET', stop_price=0.0797, close_position=True),
+        ])
+
+        self.assertEqual(exchange.requests, [('POST', 2)])
+        self.assertEqual(tp['id'], '1000')
+        self.assertEqual(tp['status'], 'open')
+        self.assertEqual(tp['amount'], 100.0)
+        self.assertEqual(sl['id'], '1001')
+
+    def test_partial_failures_keep_positions(self):
+        """Test: Cada resultado queda en la posición de su orden y los lotes son de 5"""
+        exchange = FakeBatchExchange(reject={1, 5})
+        requests = [order_request('DOGE/USDT', 'buy', 'LIMIT', 10 + i, price=0.08) for i in range(7)]
+
+        with patch('builtins.print'):
+            orders = create_batch_orders(exchange, requests)
+
+        self.assertEqual(exchange.requests, [('POST', 5), ('POST', 2)])
+        self.assertEqual([o is None for o in orders], [False, True, False, False, False, True, False])
+        self.assertEqual(orders[6]['amount'], 16.0)
+
+    def test_cancel_in_batches_with_errors(self):
+        """Test: Cancelación en lotes de 10 con errores por orden"""
+        exchange = FakeBatchExchange()
+
+        with patch('builtins.print'):
+            results = cancel_batch_orders(exchange, 'DOGE/USDT', [str(i) for i in range(1, 12)] + ['404'])
+
+        self.assertEqual(exchange.requests, [('DELETE', 10), ('DELETE', 2)])
+        self.assertFalse(results['404'])
+        self.assertTrue(all(results[str(i)] for i in range(1, 12)))
+
+    def test_cancel_all_stop_orders_uses_batches(self):
+        """Test: cancel_all_stop_orders cancela 12 stops con dos peticiones en lugar de 12"""
+        exchange = FakeBatchExchange()
+
+        with patch('builtins.print'):
+            self.assertTrue(utils.cancel_all_stop_orders(exchange, 'DOGE/USDT'))
+
+        self.assertEqual(exchange.requests, [('GET', 'openOrders'), ('DELETE', 10), ('DELETE', 2)])
+        self.assertNotIn('99', exchange.canceled)
+
+    def test_simulation_does_not_touch_exchange(self):
+        """Test: En simulación se devuelven órdenes simuladas con IDs distintos"""
+        exchange = FakeBatchExchange()
+        with patch('builtins.print'):
+            orders = create_batch_orders(exchange, [order_request('DOGE/USDT', 'buy', 'LIMIT', 100, price=0.08)] * 3,
+                                         enable_real_trading=False)
+
+        self.assertEqual(exchange.requests, [])
+        self.assertEqual(len({o['id'] for o in orders}), 3)
+        self.assertTrue(all(o['simulated'] for o in orders))
+
+    def test_ccxt_request_encoding(self):
+        """Test: La petición real de CCXT lleva el lote como JSON firmado en un solo POST"""
+        exchange = ccxt.binance({'apiKey': 'key', 'secret': 'secret', 'options': {'defaultType': 'future'}})
+        sent = []
+
+        def fake_fetch(url, method='GET', headers=None, body=None):
+            sent.append((method, url, body))
+            return [_accepted({'symbol': 'DOGEUSDT', 'type': 'LIMIT', 'side': 'BUY', 'quantity': '100',
+                               'price': '0.08'}, 1)]
+
+        exchange.fetch = fake_fetch
+        orders = create_batch_orders(exchange, [order_request('DOGE/USDT', 'buy', 'LIMIT', 100, price=0.08)])
+
+        self.assertEqual(len(sent), 1)
+        method, url, body = sent[0]
+        self.assertEqual(method, 'POST')
+        self.assertTrue(urlparse(url).path.endswith('/fapi/v1/batchOrders'))
+        batch = json.loads(parse_qs(body)['batchOrders'][0])
+        self.assertEqual(batch[0]['quantity'], '100')
+        self.assertEqual(orders[0]['id'], '1')
+
+    def test_ccxt_cancel_encoding(self):
+        """Test: La cancelación en lote lleva orderidlist codificado igual en la URL y en la firma"""
+        exchange = ccxt.binance({'apiKey': 'key', 'secret': 'secret', 'options': {'defaultType': 'future'}})
+        sent = []
+
+        def fake_fetch(url, method='GET', headers=None, body=None):
+            sent.append((method, url))
+            return [{'orderId': 123, 'status': 'CANCELED'}, {'orderId': 456, 'status': 'CANCELED'}]
+
+        exchange.fetch = fake_fetch
+        results = cancel_batch_orders(exchange, 'DOGE/USDT', ['123', '456'])
+
+        self.assertEqual(results, {'123': True, '456': True})
+        method, url = sent[0]
+        self.assertEqual(method, 'DELETE')
+        query = urlparse(url).query
+        self.assertIn('orderidlist=%5B123%2C456%5D', query)
+        self.assertNotIn('[', query)
+        self.assertNotIn(' ', query)
+        self.assertEqual(parse_qs(query)['orderidlist'], ['[123,456]'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -254,6 +254,51 @@ class TestErrorHandling(unittest.TestCase):
         self.assertEqual(mock_client.futures_create_order.call_count, 2)
 
 
+
+class TestConnect(unittest.TestCase):
+    """Tests para bot.connect"""
+
+    def _connect(self, **flags):
+        import bot
+        import config
+
+        settings = dict(USE_USER_DATA_STREAM=True, USE_RATE_LIMIT_SCHEDULER=True, USE_TUNED_TRANSPORT=False,
+                        USE_METRICS=False, RECORD_TRAFFIC=False, USE_ORDER_BOOK=False)
+        settings.update(flags)
+        with patch.multiple(config, **settings), patch.object(bot, 'Client') as client, \
+                patch.object(bot, 'UserDataStream') as stream, \
+                patch.object(bot.rate_limit, 'instrument_binance_client') as instrument, \
+                patch.object(bot, 'user_data', None):
+            bot.connect()
+            return bot.user_data, stream, instrument, client.return_value
+
+    def test_user_data_stream_flag(self):
+        """Test: Sin USE_USER_DATA_STREAM no se abre el stream de usuario y se consulta por REST"""
+        user_data, stream, _, _ = self._connect(USE_USER_DATA_STREAM=True)
+        stream.return_value.start.assert_called_once()
+        self.assertIs(user_data, stream.return_value)
+
+        user_data, stream, _, _ = self._connect(USE_USER_DATA_STREAM=False)
+        stream.assert_not_called()
+        self.assertIsNone(user_data)
+
+        import bot
+        client = Mock()
+        client.futures_position_information.return_value = [
+            {'symbol': '1000SHIBUSDT', 'entryPrice': '0.0123', 'positionAmt': '800'}]
+        with patch.object(bot, 'binance_client', client), patch.object(bot, 'user_data', None), \
+                patch('builtins.print'):
+            self.assertEqual(bot.esperar_posicion('1000SHIBUSDT', 0), (0.0123, '800'))
+
+    def test_rate_limit_scheduler_flag(self):
+        """Test: El planificador de peso solo se instala con USE_RATE_LIMIT_SCHEDULER"""
+        _, _, instrument, client = self._connect(USE_RATE_LIMIT_SCHEDULER=True)
+        instrument.assert_called_once_with(client)
+
+        _, _, instrument, _ = self._connect(USE_RATE_LIMIT_SCHEDULER=False)
+        instrument.assert_not_called()
+
+
 if __name__ == '__main__':
     # Ejecutar tests con output verbose
     print("Ejecutando tests para el manejo de error -2019...\n")
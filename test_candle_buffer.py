@@ -0,0 +1,94 @@
+"""
+Test para el buffer circular de velas y el camino en vivo sin pandas
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import Mock
+
+import pandas as pd
+
+import utils
+from candle_buffer import CandleBuffer
+
+
+def _candles(n, start=1_700_000_000_000):
+    return [[start + i * 60000, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i * 0.01, 10.0 * i] for i in range(n)]
+
+
+class TestCandleBuffer(unittest.TestCase):
+    """Tests para CandleBuffer"""
+
+    def test_wraps_around_in_chronological_order(self):
+        """Test: Al dar la vuelta se conservan las últimas velas en orden y sin copiar"""
+        buffer = CandleBuffer(5)
+        candles = _candles(12)
+        buffer.extend(candles)
+
+        self.assertEqual(len(buffer), 5)
+        self.assertEqual(buffer.to_list(), candles[-5:])
+        self.assertEqual(buffer.closes().tolist(), [c[4] for c in candles[-5:]])
+        self.assertEqual(buffer.first_timestamp, candles[-5][0])
+        self.assertTrue(buffer.view().base is not None)  # Vista del array reservado
+        self.assertFalse(buffer.view().flags.writeable)
+
+    def test_upsert_updates_open_candle(self):
+        """Test: La vela en curso se actualiza; las anteriores se ignoran"""
+        buffer = CandleBuffer(3)
+        buffer.extend(_candles(2))
+        open_candle = list(_candles(2)[-1])
+        open_candle[4] = 9.9
+
+        self.assertTrue(buffer.upsert(open_candle))
+        self.assertFalse(buffer.upsert(_candles(1)[0]))
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(buffer.last(), open_candle)
+        self.assertIsInstance(buffer.last()[0], int)
+
+    def test_since_and_limit(self):
+        """Test: to_list filtra como fetch_ohlcv (since y limit)"""
+        buffer = CandleBuffer.from_ohlcv(_candles(10))
+        candles = _candles(10)
+
+        self.assertEqual(buffer.to_list(since=candles[6][0]), candles[6:])
+        self.assertEqual(buffer.to_list(limit=2), candles[-2:])
+        self.assertEqual(buffer.to_list(since=candles[3][0], limit=2), candles[-2:])
+        self.assertEqual(CandleBuffer(4).to_list(), [])
+
+
+class TestLivePathWithoutPandas(unittest.TestCase):
+    """Tests para utils con CandleBuffer"""
+
+    def test_ema_matches_pandas(self):
+        """Test: La EMA sobre el buffer es idéntica a la de pandas"""
+        exchange = Mock()
+        exchange.fetch_ohlcv.return_value = _candles(60)
+
+        buffer = utils.get_ohlcv_buffer(exchange, 'DOGE/USDT', '1m', limit=60)
+        df = utils.get_ohlcv_data(exchange, 'DOGE/USDT', '1m', limit=60)
+
+        self.assertEqual(utils.calculate_ema(buffer, 20), utils.calculate_ema(df, 20))
+        self.assertIsInstance(df, pd.DataFrame)
+
+    def test_buffer_reused(self):
+        """Test: get_ohlcv_buffer reutiliza el buffer indicado sin reservar memoria nueva"""
+        exchange = Mock()
+        exchange.fetch_ohlcv.return_value = _candles(30)
+        buffer = CandleBuffer(30)
+
+        self.assertIs(utils.get_ohlcv_buffer(exchange, 'DOGE/USDT', '1m', limit=30, buffer=buffer), buffer)
+        self.assertIs(utils.get_ohlcv_buffer(exchange, 'DOGE/USDT', '1m', limit=30, buffer=buffer), buffer)
+        self.assertEqual(len(buffer), 30)
+
+    def test_bot_import_does_not_load_pandas(self):
+        """Test: Importar el bot no carga pandas (solo backtests y análisis)"""
+        code = "import sys, main, engine, async_bot; print('pandas' in sys.modules)"
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout.strip().splitlines()[-1], 'False', result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
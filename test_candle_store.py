@@ -0,0 +1,181 @@
+"""
+Test para la caché local de velas
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import utils
+from candle_store import CandleStore, RECORD_SIZE
+from indicators import IncrementalEMA
+from main import ScalpingBot
+
+
+MINUTE = 60000
+START = 1_700_000_000_000 - 1_700_000_000_000 % MINUTE
+
+
+class FakeExchange:
+    """Exchange con fetch_ohlcv paginado sobre una lista de velas"""
+
+    def __init__(self, candles):
+        self.candles = candles
+        self.calls = []
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=500):
+        self.calls.append({'since': since, 'limit': limit})
+        page = [c for c in self.candles if since is None or c[0] >= since]
+        return [list(c) for c in page[:limit]]
+
+
+def _candles(start, n, price=0.08):
+    return [[start + i * MINUTE, price, price * 1.001, price * 0.999, price + i * 1e-5, 1.0] for i in range(n)]
+
+
+class TestCandleStore(unittest.TestCase):
+    """Tests para CandleStore"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = CandleStore(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_sync_fetches_only_new_closed_candles(self):
+        """Test: El primer sync pagina el histórico y el siguiente solo pide lo nuevo"""
+        exchange = FakeExchange(_candles(START, 251))  # La última vela está en curso
+        now_ms = START + 250 * MINUTE + 30000
+
+        added = self.store.sync(exchange, 'DOGE/USDT', '1m', since=START, limit=100, now_ms=now_ms)
+
+        self.assertEqual(added, 250)
+        self.assertEqual(len(exchange.calls), 3)
+        self.assertEqual(self.store.last_timestamp('DOGE/USDT', '1m'), START + 249 * MINUTE)
+
+        # Se cierran dos velas más: solo se piden esas
+        exchange.candles = _candles(START, 253)
+        exchange.calls.clear()
+        added = self.store.sync(exchange, 'DOGE/USDT', '1m', limit=100, now_ms=now_ms + 2 * MINUTE)
+
+        self.assertEqual(added, 2)
+        self.assertEqual(exchange.calls, [{'since': START + 250 * MINUTE, 'limit': 100}])
+
+        # Sin velas nuevas cerradas no hay petición
+        exchange.calls.clear()
+        self.assertEqual(self.store.sync(exchange, 'DOGE/USDT', '1m', now_ms=now_ms + 2 * MINUTE), 0)
+        self.assertEqual(exchange.calls, [])
+
+    def test_range_read_is_zero_copy(self):
+        """Test: Las lecturas por rango son vistas de solo lectura del archivo"""
+        self.store.append('DOGE/USDT', '1m', _candles(START, 100))
+
+        window = self.store.read('DOGE/USDT', '1m', since=START + 10 * MINUTE, until=START + 20 * MINUTE)
+
+        self.assertEqual(window.shape, (10, 6))
+        self.assertEqual(window[0, 0], START + 10 * MINUTE)
+        self.assertIsInstance(window, np.memmap)
+        self.assertFalse(window.flags.writeable)
+        self.assertTrue(np.shares_memory(window, self.store.read('DOGE/USDT', '1m')))
+        self.assertEqual(self.store.read_last('DOGE/USDT', '1m', 3)[-1, 0], START + 99 * MINUTE)
+        self.assertEqual(self.store.read_list('DOGE/USDT', '1m', until=START + MINUTE)[0][0], START)
+
+    def test_append_skips_old_and_recovers_partial_record(self):
+        """Test: append ignora velas ya guardadas y descarta un registro a medias"""
+        self.store.append('DOGE/USDT', '1m', _candles(START, 10))
+        with open(self.store.path('DOGE/USDT', '1m'), 'ab') as f:
+            f.write(b'\x00' * (RECORD_SIZE // 2))  # Escritura interrumpida
+
+        added = self.store.append('DOGE/USDT', '1m', _candles(START + 5 * MINUTE, 10))
+
+        self.assertEqual(added, 5)
+        self.assertEqual(os.path.getsize(self.store.path('DOGE/USDT', '1m')), 15 * RECORD_SIZE)
+        self.assertEqual(self.store.find_gaps('DOGE/USDT', '1m'), [])
+
+    def test_fill_gaps(self):
+        """Test: Los huecos se detectan y se rellenan con el exchange"""
+        full = _candles(START, 50)
+        self.store.append('DOGE/USDT', '1m', full[:10] + full[20:30] + full[40:])
+        view_before = self.store.read('DOGE/USDT', '1m')
+
+        self.assertEqual(self.store.find_gaps('DOGE/USDT', '1m'),
+                         [(START + 10 * MINUTE, START + 20 * MINUTE), (START + 30 * MINUTE, START + 40 * MINUTE)])
+
+        filled = self.store.fill_gaps(FakeExchange(full), 'DOGE/USDT', '1m')
+
+        self.assertEqual(filled, 20)
+        self.assertEqual(self.store.find_gaps('DOGE/USDT', '1m'), [])
+        np.testing.assert_array_equal(self.store.read('DOGE/USDT', '1m'), np.array(full))
+        self.assertEqual(len(view_before), 30)  # Las vistas previas siguen siendo válidas
+
+    def test_get_ohlcv_data_uses_store(self):
+        """Test: get_ohlcv_data con caché devuelve velas cerradas y no repite descargas"""
+        exchange = FakeExchange(_candles(START, 1001))
+        with patch('candle_store.time.time', return_value=(START + 1000 * MINUTE + 1) / 1000):
+            df = utils.get_ohlcv_data(exchange, 'DOGE/USDT', '1m', limit=100, store=self.store)
+            utils.get_ohlcv_data(exchange, 'DOGE/USDT', '1m', limit=100, store=self.store)
+
+        self.assertEqual(len(df), 100)
+        self.assertEqual(len(exchange.calls), 1)
+
+
+class TestBotWarmStart(unittest.TestCase):
+    """Tests para el arranque de la EMA desde la caché"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _make_bot(self, exchange, store):
+        bot = ScalpingBot.__new__(ScalpingBot)
+        bot.exchange = exchange
+        bot.symbol = 'DOGE/USDT'
+        bot.timeframe = '1m'
+        bot.timeframe_ms = MINUTE
+        bot.ema_period = 12
+        bot.ema_engine = IncrementalEMA(12)
+        bot.market_data = None
+        bot.candle_store = store
+        return bot
+
+    def test_restart_downloads_only_missing_candles(self):
+        """Test: Tras un reinicio la EMA se inicializa desde disco y solo se piden las velas nuevas"""
+        candles = _candles(START, 31)
+        now_ms = START + 30 * MINUTE + 5000
+        store = CandleStore(self.root)
+        store.append('DOGE/USDT', '1m', candles[:25])  # Guardado antes de parar el bot
+        exchange = FakeExchange(candles)
+        bot = self._make_bot(exchange, store)
+
+        with patch('main.time.time', return_value=now_ms / 1000):
+            self.assertTrue(bot._sync_ema_candles())
+
+        self.assertEqual([c['since'] for c in exchange.calls], [START + 25 * MINUTE])
+        self.assertEqual(bot.ema_engine.last_timestamp, START + 29 * MINUTE)
+
+        expected = IncrementalEMA(12)
+        expected.seed([c[4] for c in candles[8:30]])
+        self.assertEqual(bot.ema_engine.value, expected.value)
+
+    def test_rest_candles_are_written_through(self):
+        """Test: Las velas cerradas recibidas por REST se guardan en la caché"""
+        candles = _candles(START, 23)
+        store = CandleStore(self.root)
+        exchange = FakeExchange(candles)
+        bot = self._make_bot(exchange, store)
+
+        self.assertTrue(bot._apply_ema_candles(candles, seed=True))
+
+        self.assertEqual(store.last_timestamp('DOGE/USDT', '1m'), START + 21 * MINUTE)
+        self.assertEqual(len(store.read('DOGE/USDT', '1m')), 22)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
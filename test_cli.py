@@ -0,0 +1,101 @@
+"""
+Test para la CLI (cli.py), la carga diferida de módulos y el arranque en frío
+"""
+
+import importlib
+import os
+import sys
+import unittest
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+import bench_cold_start  # noqa: E402
+import cli  # noqa: E402
+import config  # noqa: E402
+
+
+def _exchange(contracts):
+    exchange = Mock()
+    exchange.fetch_open_orders.return_value = [{'id': '1', 'type': 'limit', 'side': 'sell', 'amount': 3.0,
+                                                'price': 0.09}]
+    exchange.fetch_positions.return_value = [{'symbol': 'DOGE/USDT', 'contracts': contracts, 'entryPrice': 0.08,
+                                              'markPrice': 0.081, 'unrealizedPnl': 0.1, 'leverage': 10}]
+    return exchange
+
+
+class TestCommands(unittest.TestCase):
+    """Tests para los subcomandos"""
+
+    def test_backtest_passes_arguments_through(self):
+        """Test: backtest pasa sus opciones a backtest.main sin interpretarlas"""
+        with patch('backtest.main') as backtest_main:
+            self.assertEqual(cli.main(['backtest', 'velas.csv', '--ema', '12', '--trades']), 0)
+        backtest_main.assert_called_once_with(['velas.csv', '--ema', '12', '--trades'])
+
+    def test_flatten_cancels_and_closes_reduce_only(self):
+        """Test: flatten cancela las órdenes y cierra el SHORT con una compra reduceOnly"""
+        exchange = _exchange(-3)
+        with patch.object(cli, '_connect', return_value=exchange), patch.object(config, 'USE_FUTURES', True), \
+                patch('builtins.print'):
+            self.assertEqual(cli.main(['flatten', '--symbol', 'DOGE/USDT', '--yes']), 0)
+
+        exchange.cancel_all_orders.assert_called_once_with('DOGE/USDT')
+        exchange.create_order.assert_called_once_with('DOGE/USDT', 'market', 'buy', 3.0, None, {'reduceOnly': True})
+
+    def test_flatten_dry_run_changes_nothing(self):
+        """Test: Con --dry-run solo se muestra lo que se haría"""
+        exchange = _exchange(5)
+        with patch.object(cli, '_connect', return_value=exchange), patch.object(config, 'USE_FUTURES', True), \
+                patch('builtins.print') as printed:
+            self.assertEqual(cli.main(['flatten', '--symbol', 'DOGE/USDT', '--dry-run']), 0)
+
+        exchange.cancel_all_orders.assert_not_called()
+        exchange.create_order.assert_not_called()
+        self.assertIn('LONG 5.0', printed.call_args.args[0])
+
+    def test_unknown_arguments_rejected(self):
+        """Test: Los argumentos desconocidos fuera de backtest son un error"""
+        with patch('sys.stderr'), self.assertRaises(SystemExit):
+            cli.main(['status', '--bogus'])
+
+
+class TestLazyImports(unittest.TestCase):
+    """Tests para la carga diferida de módulos"""
+
+    def test_help_loads_no_heavy_modules(self):
+        """Test: cli.py --help no carga ccxt, numpy, pandas, keyboard ni python-binance"""
+        self.assertEqual(bench_cold_start.heavy_modules('cli_help'), [])
+
+    def test_backtest_does_not_load_ccxt(self):
+        """Test: El backtest no carga ccxt (utils, market_filters y batch_orders lo importan solo para tipos)"""
+        self.assertEqual(bench_cold_start.heavy_modules('import_backtest'), ['numpy'])
+
+    def test_bot_import_does_no_network_work(self):
+        """Test: Importar bot.py no crea el cliente de Binance ni cambia el apalancamiento"""
+        sys.modules.pop('bot', None)
+        try:
+            with patch('binance.client.Client') as client:
+                bot = importlib.import_module('bot')
+            client.assert_not_called()
+            self.assertIsNone(bot.binance_client)
+        finally:
+            sys.modules.pop('bot', None)
+
+
+class TestColdStart(unittest.TestCase):
+    """Tests para el presupuesto de arranque (benchmarks/bench_cold_start.py)"""
+
+    def test_every_case_has_budget(self):
+        """Test: Cada caso del benchmark tiene su presupuesto de arranque"""
+        self.assertEqual(sorted(bench_cold_start.load_thresholds()), sorted(bench_cold_start.CASES))
+
+    def test_cold_start_within_budget(self):
+        """Test: Ningún caso supera su presupuesto de arranque"""
+        results = bench_cold_start.run_suite(repeat=3)
+        failed = bench_cold_start.regressions(results, bench_cold_start.load_thresholds())
+        self.assertEqual(failed, [], f"Arranque lento (caso, ms, presupuesto): {failed}")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
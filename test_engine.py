@@ -0,0 +1,160 @@
+"""
+Test para el motor multi-símbolo
+"""
+
+import time
+import unittest
+from collections import Counter
+from unittest.mock import patch
+
+import ccxt
+
+import config
+from engine import TradingEngine
+from market_data import MarketDataHub, build_stream_url
+
+
+SYMBOLS = ['DOGE/USDT', 'XRP/USDT', '1000SHIB/USDT']
+
+
+class FakeExchange:
+    """Exchange mínimo que cuenta las llamadas por método"""
+
+    def __init__(self, positions=None):
+        self.calls = Counter()
+        self.positions = positions or []
+
+    def load_markets(self):
+        self.calls['load_markets'] += 1
+
+    def fapiPrivate_post_leverage(self, params):
+        self.calls['leverage:' + params['symbol']] += 1
+
+    def fapiPrivate_post_margintype(self, params):
+        self.calls['margintype:' + params['symbol']] += 1
+
+    def fetch_positions(self, symbols):
+        self.calls['fetch_positions'] += 1
+        return self.positions
+
+    def fetch_ticker(self, symbol):
+        self.calls['fetch_ticker'] += 1
+        return {'last': 0.08}
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls['fetch_ohlcv'] += 1
+        now_ms = int(time.time() * 1000)
+        current_open = now_ms - now_ms % 60000
+        return [[current_open - (29 - i) * 60000, 0.08, 0.08, 0.08, 0.08, 1.0] for i in range(30)]
+
+
+def _trade(symbol_id, price):
+    return {"stream": f"{symbol_id.lower()}@aggTrade",
+            "data": {"e": "aggTrade", "E": 1, "s": symbol_id, "p": str(price), "q": "1", "T": 1}}
+
+
+class TestTradingEngine(unittest.TestCase):
+    """Tests para TradingEngine"""
+
+    def setUp(self):
+        patcher = patch.multiple(config, ENABLE_REAL_TRADING=False, USE_DYNAMIC_POSITION_SIZE=False,
+                                 POSITION_SIZE_USDT=10, USE_FUTURES=True, EVENT_DRIVEN=True,
+                                 EMA_PERIOD=12, LOOP_INTERVAL=3, COOLDOWN_SECONDS=60)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _engine(self, exchange):
+        with patch('builtins.print'):
+            return TradingEngine(SYMBOLS, exchange=exchange)
+
+    def test_bots_share_one_exchange(self):
+        """Test: Un solo exchange, sin load_markets repetido y apalancamiento por símbolo"""
+        exchange = FakeExchange()
+        engine = self._engine(exchange)
+
+        self.assertEqual(len(engine.bots), 3)
+        self.assertTrue(all(bot.exchange is exchange for bot in engine.bots))
+        self.assertEqual(exchange.calls['load_markets'], 0)
+        for symbol_id in ('DOGEUSDT', 'XRPUSDT', '1000SHIBUSDT'):
+            self.assertEqual(exchange.calls['leverage:' + symbol_id], 1)
+
+    def test_existing_positions_in_one_request(self):
+        """Test: Las posiciones de todos los símbolos se cargan con una sola petición"""
+        exchange = FakeExchange(positions=[
+            {'symbol': 'XRP/USDT:USDT', 'contracts': -30, 'entryPrice': 0.5, 'unrealizedPnl': 0.1},
+            {'symbol': 'DOGE/USDT:USDT', 'contracts': 0},
+        ])
+        engine = self._engine(exchange)
+
+        with patch('builtins.print'):
+            engine._check_existing_positions()
+
+        self.assertEqual(exchange.calls['fetch_positions'], 1)
+        doge, xrp, shib = engine.bots
+        self.assertFalse(doge.in_position)
+        self.assertTrue(xrp.in_position)
+        self.assertEqual(xrp.position_side, 'SHORT')
+        self.assertFalse(shib.in_position)
+
+    def test_only_ticked_symbols_run(self):
+        """Test: Un tick despierta al motor y solo se evalúa el símbolo que lo recibió"""
+        exchange = FakeExchange()
+        engine = self._engine(exchange)
+        hub = MarketDataHub(SYMBOLS, '1m', max_candles=32)
+        engine.market_data = hub
+        for bot in engine.bots:
+            bot.market_data = hub.feeds[bot.symbol]
+
+        with patch('builtins.print'):
+            # Primer ciclo de todos (latido) para inicializar la EMA
+            self.assertEqual(engine.run_due_cycles(), 3)
+            self.assertEqual(engine.run_due_cycles(), 0)
+
+            hub.handle_message(_trade('XRPUSDT', 0.081))
+            self.assertEqual(hub.wait_for_update(0, timeout=0), 1)
+            self.assertEqual(engine.run_due_cycles(), 1)
+
+        doge, xrp, shib = engine.bots
+        self.assertEqual(engine.cycles, {'DOGE/USDT': 1, 'XRP/USDT': 2, '1000SHIB/USDT': 1})
+        self.assertTrue(xrp.in_position)
+        self.assertEqual(xrp.position_side, 'LONG')
+        self.assertFalse(doge.in_position)
+        self.assertEqual(xrp.decision_latency.count, 1)
+        self.assertGreater(engine.resource_usage()['XRP/USDT']['cpu_ms'], 0)
+
+    def test_errors_pause_only_that_symbol(self):
+        """Test: Un error de red pausa solo al símbolo afectado"""
+        engine = self._engine(FakeExchange())
+        failing = engine.bots[1]
+        failing._trading_cycle_automatic = lambda: (_ for _ in ()).throw(ccxt.NetworkError('timeout'))
+
+        with patch('builtins.print'):
+            self.assertEqual(engine.run_due_cycles(), 3)
+            for symbol in engine.symbols:
+                engine._last_cycle[symbol] = float('-inf')  # Forzar latido vencido
+            self.assertEqual(engine.run_due_cycles(), 2)
+
+        self.assertGreater(engine._paused_until['XRP/USDT'], time.monotonic())
+
+
+class TestMarketDataHub(unittest.TestCase):
+    """Tests para el stream compartido"""
+
+    def test_combined_url_and_routing(self):
+        """Test: Una URL con los streams de todos los símbolos y reparto por símbolo"""
+        url = build_stream_url(['DOGE/USDT', 'XRP/USDT'], '1m')
+        self.assertIn('dogeusdt@aggTrade', url)
+        self.assertIn('xrpusdt@kline_1m', url)
+
+        hub = MarketDataHub(['DOGE/USDT', 'XRP/USDT'], '1m')
+        hub.handle_message(_trade('DOGEUSDT', 0.08))
+        hub.handle_message(_trade('BTCUSDT', 50000))  # Símbolo ajeno: se ignora
+
+        self.assertEqual(hub.feeds['DOGE/USDT'].get_current_price(), 0.08)
+        self.assertIsNone(hub.feeds['XRP/USDT'].get_current_price())
+        self.assertEqual(hub.sequence, 1)
+        self.assertIs(hub.feeds['XRP/USDT'].connected, hub.connected)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,130 @@
+"""
+Test para el re-precio y la cancelación de entradas sin ejecutar (entry_manager.py)
+"""
+
+import unittest
+from unittest.mock import patch
+
+import config
+import entry_manager
+import order_state
+import sim_exchange
+from main import ScalpingBot
+from order_state import TrackedOrder
+
+
+SYMBOL = 'DOGE/USDT'
+
+
+class TestEntryChase(unittest.TestCase):
+    """Tests para EntryChase.decide"""
+
+    def setUp(self):
+        self.chase = entry_manager.EntryChase(timeout=10, max_reprices=2, max_chase_percent=0.5)
+        self.chase.start(0.08, now=100.0)
+        self.order = TrackedOrder('1', 'buy', 250, 0.08)
+
+    def test_waits_until_timeout(self):
+        """Test: Dentro del plazo, con la orden ya final o sin plazo configurado no se hace nada"""
+        self.assertIsNone(self.chase.decide(self.order, 0.0801, now=109.0))
+        self.order.apply(order_state.FILLED, 250, 0.08)
+        self.assertIsNone(self.chase.decide(self.order, 0.0801, now=200.0))
+
+        disabled = entry_manager.EntryChase(timeout=0, max_reprices=2, max_chase_percent=0.5)
+        disabled.start(0.08, now=100.0)
+        self.assertIsNone(disabled.decide(TrackedOrder('2', 'buy', 250, 0.08), 0.0801, now=1000.0))
+
+    def test_reprices_until_limit(self):
+        """Test: Vencido el plazo se mueve al nuevo precio; agotados los re-precios se cancela"""
+        decision = self.chase.decide(self.order, 0.0801, now=110.0)
+        self.assertEqual((decision.action, decision.price), (entry_manager.REPRICE, 0.0801))
+
+        self.chase.repriced(now=110.0)
+        self.assertIsNone(self.chase.decide(self.order, 0.0802, now=115.0))
+        # Ya en el precio objetivo: cuenta como re-precio sin petición
+        self.order.price = 0.0802
+        self.assertIsNone(self.chase.decide(self.order, 0.0802, now=120.0))
+        self.assertEqual((self.chase.reprices, self.chase.placed_at), (2, 120.0))
+
+        self.assertEqual(self.chase.decide(self.order, 0.0803, now=130.0).action, entry_manager.CANCEL)
+
+    def test_cancels_when_price_runs_away_or_partially_filled(self):
+        """Test: Si el precio se aleja más del límite o ya se ejecutó una parte, se cancela"""
+        decision = self.chase.decide(self.order, 0.0805, now=110.0)  # 0.625% de la señal
+        self.assertEqual((decision.action, decision.price), (entry_manager.CANCEL, None))
+
+        self.order.apply(order_state.PARTIALLY_FILLED, 100, 0.08)
+        self.assertEqual(self.chase.decide(self.order, 0.0801, now=110.0).action, entry_manager.CANCEL)
+
+
+class TestBotEntryChase(unittest.TestCase):
+    """Tests para el bot con la entrada en el simulador"""
+
+    def setUp(self):
+        patcher = patch.multiple(config, ENABLE_REAL_TRADING=False, USE_SIMULATOR=True,
+                                 USE_DYNAMIC_POSITION_SIZE=False, POSITION_SIZE_USDT=20, USE_FUTURES=True,
+                                 LEVERAGE=10, EMA_PERIOD=12,
+                                 TAKE_PROFIT_PERCENT=0.6, STOP_LOSS_PERCENT=0.4, TARGET_PROFIT_USDT=2.0,
+                                 USE_PROTECTIVE_ORDERS=True, USE_WARM_START=False,
+                                 ENTRY_ORDER_TIMEOUT=10, ENTRY_MAX_REPRICES=2, ENTRY_MAX_CHASE_PERCENT=0.2,
+                                 ENTRY_REPRICE_METHOD='edit')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        print_patcher = patch('builtins.print')
+        print_patcher.start()
+        self.addCleanup(print_patcher.stop)
+
+        self.exchange = sim_exchange.SimulatedExchange(balance=1000.0, leverage=10)
+        self.exchange.tick(SYMBOL, 0.08)
+        self.bot = ScalpingBot('automatic', symbol=SYMBOL, exchange=self.exchange, show_configuration=False)
+        self.bot._execute_buy(0.0799, 'LONG')
+        self.entry_id = self.bot.active_order_id
+
+    def _expire(self):
+        self.bot.entry_chase.placed_at -= 60
+
+    def test_edit_keeps_id_and_fills_later(self):
+        """Test: La entrada se modifica al nuevo precio con el mismo ID y se ejecuta después"""
+        bot = self.bot
+        self.exchange.tick(SYMBOL, 0.08005, bid=0.08005, ask=0.0801)
+        bot._manage_entry_order(0.0800)  # En plazo: nada
+        self.assertEqual(self.exchange.fetch_order(self.entry_id)['price'], 0.0799)
+
+        self._expire()
+        bot._manage_entry_order(0.0800)
+
+        self.assertEqual(bot.position_state.phase, order_state.ENTRY_PENDING)
+        self.assertEqual(bot.active_order_id, self.entry_id)
+        self.assertEqual(self.exchange.fetch_order(self.entry_id)['price'], 0.08)
+        self.assertEqual(bot.entry_chase.reprices, 1)
+
+        self.exchange.tick(SYMBOL, 0.0800)
+        bot._reconcile_state()
+        self.assertEqual(bot.position_state.phase, order_state.OPEN)
+        self.assertEqual(bot.entry_price, 0.08)
+
+    def test_cancel_replace_and_run_away(self):
+        """Test: Con cancel_replace la entrada cambia de ID; si el precio se va demasiado se cancela"""
+        bot = self.bot
+        self.exchange.tick(SYMBOL, 0.08005, bid=0.08005, ask=0.0801)
+        self._expire()
+        with patch.object(config, 'ENTRY_REPRICE_METHOD', 'cancel_replace'):
+            bot._manage_entry_order(0.0800)
+
+        replacement = bot.active_order_id
+        self.assertNotEqual(replacement, self.entry_id)
+        self.assertEqual(self.exchange.fetch_order(self.entry_id)['status'], 'canceled')
+        self.assertEqual(self.exchange.fetch_order(replacement)['price'], 0.08)
+
+        self.exchange.tick(SYMBOL, 0.0802)
+        self._expire()
+        bot._manage_entry_order(0.0802)  # 0.375% por encima de la señal
+
+        self.assertEqual(bot.position_state.phase, order_state.FLAT)
+        self.assertFalse(bot.in_position)
+        self.assertIsNone(bot.active_order_id)
+        self.assertEqual(self.exchange.fetch_open_orders(SYMBOL), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,104 @@
+"""
+Test para la configuración desde entorno/archivo (settings.py) y el arranque sin TTY (headless.py)
+"""
+
+import json
+import os
+import signal
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import config
+import headless
+import settings
+
+
+class TestSettings(unittest.TestCase):
+    """Tests para settings.py"""
+
+    def test_values_converted_to_config_types(self):
+        """Test: Los textos del entorno se convierten al tipo de la constante de config.py"""
+        overrides = settings.from_env({
+            'SCALPER_LEVERAGE': '5',
+            'SCALPER_LOOP_INTERVAL': '0.5',
+            'SCALPER_TARGET_PROFIT_USDT': '3',
+            'SCALPER_USE_WEBSOCKET_FEED': 'false',
+            'SCALPER_SYMBOLS': 'DOGE/USDT, XRP/USDT',
+            'SCALPER_MARGIN_MODE': 'cross',
+            'PATH': '/usr/bin',
+        })
+
+        self.assertEqual(overrides, {'LEVERAGE': 5, 'LOOP_INTERVAL': 0.5, 'TARGET_PROFIT_USDT': 3.0,
+                                     'USE_WEBSOCKET_FEED': False, 'SYMBOLS': ['DOGE/USDT', 'XRP/USDT'],
+                                     'MARGIN_MODE': 'cross'})
+        self.assertIsInstance(overrides['LEVERAGE'], int)
+
+    def test_unknown_or_invalid_values_rejected(self):
+        """Test: Una clave desconocida o un valor inválido detiene el arranque"""
+        with self.assertRaises(ValueError):
+            settings.from_env({'SCALPER_LEVRAGE': '5'})
+        with self.assertRaises(ValueError):
+            settings.from_env({'SCALPER_LEVERAGE': 'diez'})
+        with self.assertRaises(ValueError):
+            settings.from_env({'SCALPER_USE_SANDBOX': 'quizás'})
+
+    def test_env_overrides_file(self):
+        """Test: El entorno tiene prioridad sobre el archivo y SYMBOL arrastra a SYMBOLS"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'instancia.json')
+            with open(path, 'w') as f:
+                json.dump({'SYMBOL': 'XRP/USDT', 'LEVERAGE': 3, 'USE_SANDBOX': True}, f)
+
+            overrides = settings.load(environ={'SCALPER_CONFIG_FILE': path, 'SCALPER_LEVERAGE': '7',
+                                               'SCALPER_CONFIRM_REAL_TRADING': '1'})
+
+        self.assertEqual(overrides, {'SYMBOL': 'XRP/USDT', 'SYMBOLS': ['XRP/USDT'], 'LEVERAGE': 7,
+                                     'USE_SANDBOX': True})
+        self.assertNotIn('secret', settings.describe({'API_SECRET': 'secret'}))
+
+
+class TestHeadless(unittest.TestCase):
+    """Tests para headless.run"""
+
+    def setUp(self):
+        previous = signal.getsignal(signal.SIGTERM)
+        self.addCleanup(signal.signal, signal.SIGTERM, previous)
+        # settings.apply modifica el módulo config: se restaura al terminar cada test
+        config_patch = patch.dict(config.__dict__)
+        config_patch.start()
+        self.addCleanup(config_patch.stop)
+
+    def test_starts_automatic_mode_without_tty(self):
+        """Test: Arranca en modo automático con la configuración del entorno y sin input()"""
+        environ = {'SCALPER_API_KEY': 'key', 'SCALPER_API_SECRET': 'secret', 'SCALPER_ENABLE_REAL_TRADING': '0',
+                   'SCALPER_SYMBOL': 'XRP/USDT'}
+        with patch('main.create_bot') as create_bot, patch('builtins.input', side_effect=AssertionError), \
+                patch('builtins.print'):
+            self.assertEqual(headless.run(environ=environ), 0)
+
+        create_bot.assert_called_once_with('automatic')
+        create_bot.return_value.run.assert_called_once_with()
+        self.assertEqual((config.SYMBOL, config.SYMBOLS, config.API_KEY), ('XRP/USDT', ['XRP/USDT'], 'key'))
+        self.assertIs(signal.getsignal(signal.SIGTERM), headless._stop_on_sigterm)
+
+    def test_real_trading_requires_confirmation(self):
+        """Test: Con trading real hay que confirmarlo explícitamente (sin 'SI' interactivo)"""
+        environ = {'SCALPER_API_KEY': 'key', 'SCALPER_API_SECRET': 'secret', 'SCALPER_ENABLE_REAL_TRADING': '1'}
+        with patch('main.create_bot') as create_bot, patch('builtins.print'):
+            self.assertEqual(headless.run(environ=environ), headless.EXIT_NOT_CONFIRMED)
+            create_bot.assert_not_called()
+
+            self.assertEqual(headless.run(environ=dict(environ, SCALPER_CONFIRM_REAL_TRADING='si')), 0)
+            create_bot.assert_called_once_with('automatic')
+
+    def test_invalid_configuration_exit_code(self):
+        """Test: Configuración inválida o sin credenciales termina con código 2"""
+        with patch('main.create_bot') as create_bot, patch('builtins.print'):
+            self.assertEqual(headless.run(environ={'SCALPER_LEVERAGE': 'x'}), headless.EXIT_CONFIG)
+            self.assertEqual(headless.run(environ={'SCALPER_API_KEY': ''}), headless.EXIT_CONFIG)
+        create_bot.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
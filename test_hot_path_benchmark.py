@@ -0,0 +1,35 @@
+"""
+Test de regresión de rendimiento del camino caliente (benchmarks/bench_hot_path.py)
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+import bench_hot_path  # noqa: E402
+
+
+class TestHotPathBenchmark(unittest.TestCase):
+    """Tests para la suite de benchmarks del camino caliente"""
+
+    def test_dataset_is_reproducible(self):
+        """Test: El dataset es el mismo en cada ejecución (resultados comparables)"""
+        self.assertEqual(bench_hot_path.dataset(), bench_hot_path.dataset())
+        candles, prices = bench_hot_path.dataset()
+        self.assertEqual((len(candles), len(prices)), (bench_hot_path.CANDLES, bench_hot_path.TICKS))
+
+    def test_every_case_has_threshold(self):
+        """Test: Cada caso del benchmark tiene su umbral de regresión"""
+        self.assertEqual(sorted(bench_hot_path.load_thresholds()), sorted(bench_hot_path.CASES))
+
+    def test_hot_path_within_thresholds(self):
+        """Test: Ningún caso del camino caliente supera su umbral"""
+        results = bench_hot_path.run_suite(scale=0.2, repeat=3)
+        failed = bench_hot_path.regressions(results, bench_hot_path.load_thresholds())
+        self.assertEqual(failed, [], f"Regresiones de rendimiento (caso, µs/op, umbral): {failed}")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
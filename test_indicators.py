@@ -0,0 +1,119 @@
+"""
+Test para verificar la EMA incremental frente a utils.calculate_ema
+"""
+
+import random
+import unittest
+from unittest.mock import Mock, patch
+
+import pandas as pd
+
+import utils
+from indicators import IncrementalEMA
+from main import ScalpingBot
+
+
+def _random_closes(n, seed=7):
+    rng = random.Random(seed)
+    price = 0.08
+    closes = []
+    for _ in range(n):
+        price *= 1 + rng.uniform(-0.002, 0.002)
+        closes.append(price)
+    return closes
+
+
+class TestIncrementalEMA(unittest.TestCase):
+    """Tests para la EMA incremental"""
+
+    def test_matches_calculate_ema_exactly(self):
+        """Test: La EMA incremental coincide bit a bit con calculate_ema"""
+        for period in (3, 12, 20, 50):
+            closes = _random_closes(period + 200, seed=period)
+            ema = IncrementalEMA(period)
+            ema.seed(closes[:period])
+
+            for i in range(period, len(closes)):
+                expected = utils.calculate_ema(pd.DataFrame({'close': closes[:i + 1]}), period)
+                # peek con la vela en curso y update al cerrarla deben coincidir
+                self.assertEqual(ema.peek(closes[i]), expected)
+                self.assertEqual(ema.update(closes[i]), expected)
+
+    def test_peek_does_not_modify_state(self):
+        """Test: peek no altera el valor ni el contador"""
+        ema = IncrementalEMA(12)
+        ema.seed(_random_closes(30), last_timestamp=1000)
+        value, count = ema.value, ema.count
+
+        ema.peek(1.0)
+
+        self.assertEqual(ema.value, value)
+        self.assertEqual(ema.count, count)
+        self.assertEqual(ema.last_timestamp, 1000)
+
+    def test_ready_and_invalid_period(self):
+        """Test: ready requiere 'period' velas y el periodo debe ser positivo"""
+        ema = IncrementalEMA(5)
+        self.assertIsNone(ema.peek(1.0))
+        ema.seed([1.0, 2.0, 3.0, 4.0])
+        self.assertFalse(ema.ready)
+        ema.update(5.0)
+        self.assertTrue(ema.ready)
+
+        with self.assertRaises(ValueError):
+            IncrementalEMA(0)
+
+
+class TestBotEMASync(unittest.TestCase):
+    """Tests para la sincronización de velas de la EMA en el bot"""
+
+    def _make_bot(self, exchange):
+        bot = ScalpingBot.__new__(ScalpingBot)
+        bot.exchange = exchange
+        bot.symbol = 'DOGE/USDT'
+        bot.timeframe = '1m'
+        bot.timeframe_ms = 60000
+        bot.ema_period = 12
+        bot.ema_engine = IncrementalEMA(12)
+        bot.market_data = None
+        bot.candle_store = None
+        return bot
+
+    def test_seed_then_only_fetch_on_new_candle(self):
+        """Test: Solo se consulta el exchange al inicio y al cerrar una vela"""
+        now_ms = 1_700_000_000_000 - 1_700_000_000_000 % 60000 + 5000
+        current_open = now_ms - now_ms % 60000
+        closes = _random_closes(23)
+        candles = [[current_open - (22 - i) * 60000, 0, 0, 0, closes[i], 0] for i in range(23)]
+
+        exchange = Mock()
+        exchange.fetch_ohlcv.return_value = candles
+        bot = self._make_bot(exchange)
+
+        with patch('main.time.time', return_value=now_ms / 1000):
+            self.assertTrue(bot._sync_ema_candles())
+            self.assertTrue(bot._sync_ema_candles())
+
+        # La vela en curso no se incorpora al estado
+        self.assertEqual(exchange.fetch_ohlcv.call_count, 1)
+        self.assertEqual(bot.ema_engine.count, 22)
+        self.assertEqual(bot.ema_engine.last_timestamp, current_open - 60000)
+
+        # Al cerrarse la vela en curso se pide solo lo nuevo
+        exchange.fetch_ohlcv.return_value = [
+            [current_open, 0, 0, 0, 0.09, 0],
+            [current_open + 60000, 0, 0, 0, 0.091, 0],
+        ]
+        with patch('main.time.time', return_value=(now_ms + 60000) / 1000):
+            self.assertTrue(bot._sync_ema_candles())
+
+        self.assertEqual(exchange.fetch_ohlcv.call_args.kwargs['since'], current_open)
+        self.assertEqual(bot.ema_engine.count, 23)
+        self.assertEqual(bot.ema_engine.last_timestamp, current_open)
+
+        expected = utils.calculate_ema(pd.DataFrame({'close': closes[:22] + [0.09, 0.091]}), 12)
+        self.assertEqual(bot.ema_engine.peek(0.091), expected)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
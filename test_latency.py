@@ -0,0 +1,129 @@
+"""
+Test para el histograma de latencias y el modo event-driven del bot
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from latency import LatencyHistogram
+from market_data import MarketDataFeed
+import main
+
+
+def _trade(price):
+    return {"e": "aggTrade", "E": 1700000002000, "s": "DOGEUSDT", "p": str(price), "q": "10", "T": 1700000002000}
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Tests para LatencyHistogram"""
+
+    def test_record_and_percentiles(self):
+        """Test: Los percentiles caen en el bucket correcto"""
+        histogram = LatencyHistogram('test')
+        for _ in range(90):
+            histogram.record(0.0008)  # 0.8 ms -> bucket ≤1 ms
+        for _ in range(10):
+            histogram.record(0.030)   # 30 ms -> bucket ≤50 ms
+
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.percentile(50), 1)
+        self.assertEqual(histogram.percentile(99), 30.0)  # Acotado por el máximo observado
+        self.assertAlmostEqual(histogram.snapshot()['avg_ms'], (90 * 0.8 + 10 * 30) / 100)
+        self.assertIn('n=100', histogram.format())
+
+    def test_empty_histogram(self):
+        """Test: Histograma vacío"""
+        histogram = LatencyHistogram('vacío')
+        self.assertIsNone(histogram.percentile(50))
+        self.assertIn('sin muestras', histogram.format())
+
+
+class TestFeedWakeup(unittest.TestCase):
+    """Tests para la notificación de ticks del feed"""
+
+    def test_wait_for_update_wakes_on_tick(self):
+        """Test: wait_for_update despierta al llegar un tick"""
+        feed = MarketDataFeed('DOGE/USDT')
+        threading.Timer(0.05, feed.handle_message, args=(_trade(0.08),)).start()
+
+        start = time.monotonic()
+        sequence = feed.wait_for_update(0, timeout=2.0)
+
+        self.assertEqual(sequence, 1)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertIsNotNone(feed.last_tick_at)
+
+    def test_wait_for_update_coalesces_and_times_out(self):
+        """Test: Los ticks acumulados se agrupan y sin ticks expira el timeout"""
+        feed = MarketDataFeed('DOGE/USDT')
+        for price in (0.08, 0.0801, 0.0802):
+            feed.handle_message(_trade(price))
+
+        self.assertEqual(feed.wait_for_update(0, timeout=0), 3)
+        self.assertEqual(feed.wait_for_update(3, timeout=0.01), 3)
+
+
+class TestEventDrivenBot(unittest.TestCase):
+    """Tests para el ciclo event-driven del bot"""
+
+    @patch('main.ccxt.binance')
+    @patch('main.config')
+    def test_tick_to_order_latency_is_recorded(self, mock_config, mock_binance):
+        """Test: Un tick que genera señal registra la latencia tick→orden"""
+        mock_config.SYMBOL = 'DOGE/USDT'
+        mock_config.TIMEFRAME = '1m'
+        mock_config.EMA_PERIOD = 3
+        mock_config.POSITION_SIZE_USDT = 10
+        mock_config.USE_DYNAMIC_POSITION_SIZE = False
+        mock_config.POSITION_SIZE_PERCENT = 10
+        mock_config.TAKE_PROFIT_PERCENT = 0.6
+        mock_config.STOP_LOSS_PERCENT = 0.4
+        mock_config.TARGET_PROFIT_USDT = 2.0
+        mock_config.LOOP_INTERVAL = 3
+        mock_config.ENABLE_REAL_TRADING = False
+        mock_config.COOLDOWN_SECONDS = 60
+        mock_config.ENABLE_SHORT_POSITIONS = True
+        mock_config.USE_FUTURES = True
+        mock_config.LEVERAGE = 10
+        mock_config.MARGIN_MODE = 'isolated'
+        mock_config.USE_SANDBOX = False
+        mock_config.EVENT_DRIVEN = True
+        mock_binance.return_value = Mock()
+
+        bot = main.ScalpingBot()
+        bot.ema_engine.seed([0.08, 0.08, 0.08], last_timestamp=int(time.time() * 1000) // 60000 * 60000)
+
+        feed = MarketDataFeed('DOGE/USDT')
+        feed.connected.set()
+        bot.market_data = feed
+
+        # Un tick por encima de la EMA llega mientras la estrategia espera
+        threading.Timer(0.05, feed.handle_message, args=(_trade(0.081),)).start()
+        bot._wait_next_cycle()
+        bot._trading_cycle_automatic()
+
+        self.assertTrue(bot.in_position)
+        self.assertEqual(bot.position_side, 'LONG')
+        self.assertEqual(bot.decision_latency.count, 1)
+        self.assertLess(bot.decision_latency.max_ms, 1000)
+
+    def test_polling_mode_does_not_record_latency(self):
+        """Test: Sin feed el ciclo duerme loop_interval y no mide latencia"""
+        bot = main.ScalpingBot.__new__(main.ScalpingBot)
+        bot.event_driven = True
+        bot.market_data = None
+        bot.loop_interval = 0
+        bot._tick_received_at = 123.0
+        bot.decision_latency = LatencyHistogram('x')
+
+        bot._wait_next_cycle()
+        bot._record_decision_latency()
+
+        self.assertIsNone(bot._tick_received_at)
+        self.assertEqual(bot.decision_latency.count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,145 @@
+"""
+Test para el feed de datos de mercado por WebSocket usando un servidor local
+que reproduce mensajes grabados del stream combinado de Binance Futures
+"""
+
+import time
+import unittest
+from unittest.mock import Mock
+
+import utils
+from fake_stream import FakeStreamServer
+from market_data import MarketDataFeed, build_stream_url
+
+
+# Mensajes grabados del stream combinado de dogeusdt (recortados)
+RECORDED_MESSAGES = [
+    {"stream": "dogeusdt@kline_1m", "data": {"e": "kline", "E": 1700000001000, "s": "DOGEUSDT", "k": {
+        "t": 1699999980000, "T": 1700000039999, "s": "DOGEUSDT", "i": "1m",
+        "o": "0.08000", "c": "0.08010", "h": "0.08020", "l": "0.07990", "v": "120000", "x": False}}},
+    {"stream": "dogeusdt@bookTicker", "data": {"e": "bookTicker", "u": 400900217, "s": "DOGEUSDT",
+                                               "b": "0.08009", "B": "31000", "a": "0.08011", "A": "40000",
+                                               "T": 1700000001500, "E": 1700000001501}},
+    {"stream": "dogeusdt@aggTrade", "data": {"e": "aggTrade", "E": 1700000002000, "s": "DOGEUSDT",
+                                             "a": 5933014, "p": "0.08012", "q": "1500", "T": 1700000001999,
+                                             "m": False}},
+    {"stream": "dogeusdt@kline_1m", "data": {"e": "kline", "E": 1700000040000, "s": "DOGEUSDT", "k": {
+        "t": 1699999980000, "T": 1700000039999, "s": "DOGEUSDT", "i": "1m",
+        "o": "0.08000", "c": "0.08015", "h": "0.08020", "l": "0.07990", "v": "150000", "x": True}}},
+    {"stream": "dogeusdt@kline_1m", "data": {"e": "kline", "E": 1700000041000, "s": "DOGEUSDT", "k": {
+        "t": 1700000040000, "T": 1700000099999, "s": "DOGEUSDT", "i": "1m",
+        "o": "0.08015", "c": "0.08030", "h": "0.08030", "l": "0.08015", "v": "9000", "x": False}}},
+    {"stream": "dogeusdt@aggTrade", "data": {"e": "aggTrade", "E": 1700000041500, "s": "DOGEUSDT",
+                                             "a": 5933015, "p": "0.08030", "q": "800", "T": 1700000041499,
+                                             "m": True}},
+]
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestMarketDataFeed(unittest.TestCase):
+    """Tests para MarketDataFeed"""
+
+    def test_build_stream_url(self):
+        """Test: URL del stream combinado para Futures y Spot"""
+        url = build_stream_url('DOGE/USDT', '1m', use_futures=True)
+        self.assertEqual(
+            url,
+            'wss://fstream.binance.com/stream?streams=dogeusdt@aggTrade/dogeusdt@bookTicker/dogeusdt@kline_1m'
+        )
+        self.assertIn('dogeusdt@trade', build_stream_url('DOGE/USDT', '1m', use_futures=False))
+
+    def test_replay_recorded_stream(self):
+        """Test: El feed consume el stream grabado y sirve precio y velas localmente"""
+        with FakeStreamServer(RECORDED_MESSAGES) as server:
+            feed = MarketDataFeed('DOGE/USDT', '1m', url=server.url)
+            feed.start()
+            try:
+                self.assertTrue(_wait_for(lambda: feed.messages_received == len(RECORDED_MESSAGES)))
+
+                # Misma interfaz que el exchange: utils funciona sin cambios y sin red
+                self.assertEqual(utils.get_current_price(feed, 'DOGE/USDT'), 0.0803)
+                ticker = feed.fetch_ticker('DOGE/USDT')
+                self.assertEqual(ticker['bid'], 0.08009)
+                self.assertEqual(ticker['ask'], 0.08011)
+
+                candles = utils.get_ohlcv_candles(feed, 'DOGE/USDT', '1m')
+                self.assertEqual(len(candles), 2)
+                self.assertEqual(candles[0], [1699999980000, 0.08, 0.0802, 0.0799, 0.08015, 150000.0])
+                self.assertEqual(candles[-1][0], 1700000040000)
+                self.assertTrue(feed.covers(1699999980000))
+                self.assertEqual(len(feed.fetch_ohlcv(since=1700000040000)), 1)
+            finally:
+                feed.stop()
+
+    def test_reconnects_after_disconnect(self):
+        """Test: El feed se reconecta si el servidor cierra la conexión"""
+        with FakeStreamServer(RECORDED_MESSAGES[:1], keep_open=False) as server:
+            feed = MarketDataFeed('DOGE/USDT', '1m', url=server.url)
+            feed.start()
+            try:
+                self.assertTrue(_wait_for(lambda: server.connections >= 2, timeout=5.0))
+            finally:
+                feed.stop()
+
+    def test_stale_feed_returns_none(self):
+        """Test: Sin mensajes recientes el feed no devuelve precio"""
+        feed = MarketDataFeed('DOGE/USDT', stale_after=0.0)
+        feed.handle_message(RECORDED_MESSAGES[2])
+        feed.last_update -= 1.0
+
+        self.assertIsNone(feed.get_current_price())
+        self.assertIsNone(utils.get_current_price(feed, 'DOGE/USDT'))
+
+
+class TestBotPriceSource(unittest.TestCase):
+    """Tests para la lectura de precios del bot"""
+
+    def test_bot_prefers_local_feed(self):
+        """Test: El bot lee el precio del feed sin llamar a fetch_ticker"""
+        from main import ScalpingBot
+
+        bot = ScalpingBot.__new__(ScalpingBot)
+        bot.exchange = Mock()
+        bot.symbol = 'DOGE/USDT'
+        bot.market_data = MarketDataFeed('DOGE/USDT')
+        bot.market_data.handle_message(RECORDED_MESSAGES[2])
+
+        self.assertEqual(bot._get_current_price(), 0.08012)
+        bot.exchange.fetch_ticker.assert_not_called()
+
+        # Si el feed está viejo se recurre a REST
+        bot.market_data.last_update -= 60
+        bot.exchange.fetch_ticker.return_value = {'last': 0.081}
+        self.assertEqual(bot._get_current_price(), 0.081)
+
+    def test_candle_gap_falls_back_to_rest(self):
+        """Test: Si faltan velas en el buffer (reconexión) las velas se piden por REST"""
+        from main import ScalpingBot
+
+        bot = ScalpingBot.__new__(ScalpingBot)
+        bot.exchange = Mock()
+        bot.market_data = MarketDataFeed('DOGE/USDT', '1m')
+        bot.market_data.seed_candles([[1699999860000 + i * 60000, 0.08, 0.08, 0.08, 0.08, 1.0] for i in range(3)])
+        # Tras la reconexión llega la vela de 1700000160000: faltan 1700000040000 y 1700000100000
+        bot.market_data.handle_message({"stream": "dogeusdt@kline_1m", "data": {
+            "e": "kline", "E": 1700000161000, "s": "DOGEUSDT", "k": {
+                "t": 1700000160000, "T": 1700000219999, "s": "DOGEUSDT", "i": "1m",
+                "o": "0.081", "c": "0.081", "h": "0.081", "l": "0.081", "v": "10", "x": False}}})
+
+        self.assertFalse(bot.market_data.covers(1699999980000))
+        self.assertFalse(bot.market_data.covers(1700000040000))
+        self.assertIs(bot._candle_source(1700000040000), bot.exchange)
+        # Desde la primera vela tras el hueco el buffer vuelve a estar completo
+        self.assertIs(bot._candle_source(1700000160000), bot.market_data)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,200 @@
+"""
+Test para los filtros de mercado y la cuantización de precios y cantidades
+"""
+
+import math
+import unittest
+from unittest.mock import Mock, patch
+
+import ccxt
+
+import utils
+from batch_orders import create_batch_orders, order_request
+from market_filters import SymbolFilters, filters_from_market, get_filters, load_filters
+
+
+def _market(symbol, tick_size, step_size, min_notional, max_qty='5000000', market_max_qty='1000000',
+            market_type='swap'):
+    """Mercado de CCXT con los filtros originales de Binance Futures"""
+    return {
+        'symbol': symbol,
+        'type': market_type,
+        'precision': {'price': 0.1, 'amount': 0.1},  # Se ignoran: mandan los filtros de info
+        'limits': {'amount': {'min': None, 'max': None}, 'cost': {'min': None}},
+        'info': {'filters': [
+            {'filterType': 'PRICE_FILTER', 'tickSize': tick_size, 'minPrice': '0.000001'},
+            {'filterType': 'LOT_SIZE', 'stepSize': step_size, 'minQty': step_size, 'maxQty': max_qty},
+            {'filterType': 'MARKET_LOT_SIZE', 'stepSize': step_size, 'minQty': step_size,
+             'maxQty': market_max_qty},
+            {'filterType': 'MIN_NOTIONAL', 'notional': min_notional},
+        ]},
+    }
+
+
+MARKETS = {
+    'DOGE/USDT': _market('DOGE/USDT', '0.00001', '1', '1', market_type='spot'),
+    'DOGE/USDT:USDT': _market('DOGE/USDT:USDT', '0.00001', '1', '5'),
+    '1000SHIB/USDT:USDT': _market('1000SHIB/USDT:USDT', '0.000001', '1', '5'),
+    'BTC/USDT:USDT': _market('BTC/USDT:USDT', '0.10', '0.001', '100', max_qty='1000', market_max_qty='120'),
+}
+
+
+def _exchange():
+    exchange = Mock()
+    exchange.markets = MARKETS
+    exchange.precisionMode = ccxt.TICK_SIZE
+    return exchange
+
+
+class TestSymbolFilters(unittest.TestCase):
+    """Tests para la cuantización de SymbolFilters"""
+
+    def setUp(self):
+        self.btc = filters_from_market(MARKETS['BTC/USDT:USDT'], ccxt.TICK_SIZE)
+
+    def test_filters_from_binance_market(self):
+        """Test: Se leen tick size, step size, notional mínimo y cantidades máximas"""
+        self.assertEqual(self.btc.tick_size, 0.1)
+        self.assertEqual(self.btc.step_size, 0.001)
+        self.assertEqual(self.btc.min_qty, 0.001)
+        self.assertEqual(self.btc.max_qty, 1000.0)
+        self.assertEqual(self.btc.market_max_qty, 120.0)
+        self.assertEqual(self.btc.min_notional, 100.0)
+
+    def test_unified_precision_without_filters(self):
+        """Test: Sin filtros de Binance se usan la precisión y los límites de CCXT"""
+        market = {'symbol': 'ETH/USDT', 'precision': {'price': 2, 'amount': 3},
+                  'limits': {'amount': {'min': 0.001, 'max': 10000}, 'cost': {'min': 20}}}
+        filters = filters_from_market(market, ccxt.DECIMAL_PLACES)
+
+        self.assertEqual((filters.tick_size, filters.step_size), (0.01, 0.001))
+        self.assertEqual((filters.min_qty, filters.max_qty, filters.min_notional), (0.001, 10000, 20))
+
+    def test_price_quantization(self):
+        """Test: Precios al tick sin empeorar las órdenes LIMIT"""
+        self.assertEqual(self.btc.floor_price(43210.19), 43210.1)
+        self.assertEqual(self.btc.ceil_price(43210.11), 43210.2)
+        self.assertEqual(self.btc.round_price(43210.16), 43210.2)
+        self.assertEqual(self.btc.limit_price('buy', 43210.19), 43210.1)
+        self.assertEqual(self.btc.limit_price('sell', 43210.11), 43210.2)
+        # Un precio ya en el tick no se mueve por errores de float
+        self.assertEqual(self.btc.ceil_price(0.3), 0.3)
+        self.assertEqual(self.btc.floor_price(0.3), 0.3)
+
+    def test_amount_quantization(self):
+        """Test: Cantidades al step y sin pasar de la cantidad máxima"""
+        self.assertEqual(self.btc.floor_amount(0.0129), 0.012)
+        self.assertEqual(self.btc.ceil_amount(0.0121), 0.013)
+        self.assertEqual(self.btc.ceil_amount(0.003), 0.003)
+        self.assertEqual(self.btc.round_amount(0.01249), 0.012)
+        self.assertEqual(self.btc.round_amount(500), 500.0)
+        self.assertEqual(self.btc.round_amount(500, market=True), 120.0)
+
+    def test_amount_for_notional(self):
+        """Test: Cantidad de entrada con notional mínimo del símbolo"""
+        # 50 USDT no llegan al mínimo de 100 USDT de BTC: se sube al mínimo
+        amount = self.btc.amount_for_notional(50, 40000)
+        self.assertEqual(amount, 0.003)
+        self.assertTrue(self.btc.meets_min_notional(amount, 40000))
+        # En órdenes de mercado se deja margen sobre el mínimo
+        self.assertGreaterEqual(self.btc.amount_for_notional(50, 40000, market=True) * 40000, 110)
+        # Importe mayor que el mínimo: redondeo hacia arriba al step
+        self.assertEqual(self.btc.amount_for_notional(150, 40000), 0.004)
+
+    def test_defaults_match_previous_doge_rounding(self):
+        """Test: Sin mercados se mantiene el redondeo anterior (1 decimal, 4 decimales, 5 USDT)"""
+        filters = SymbolFilters('DOGE/USDT')
+        self.assertEqual(filters.ceil_amount(62.51), math.ceil(62.51 * 10) / 10)
+        self.assertEqual(filters.round_price(0.081234), round(0.081234, 4))
+        self.assertEqual(filters.amount_for_notional(2, 0.08), 62.5)
+
+
+class TestFilterCache(unittest.TestCase):
+    """Tests para el caché de filtros por exchange y símbolo"""
+
+    def test_prefers_perpetual_and_caches(self):
+        """Test: 'DOGE/USDT' usa el contrato perpetuo y los filtros se construyen una sola vez"""
+        exchange = _exchange()
+        filters = get_filters(exchange, 'DOGE/USDT')
+
+        self.assertEqual(filters.min_notional, 5.0)
+        self.assertEqual(filters.step_size, 1.0)
+        with patch('market_filters.filters_from_market') as build:
+            self.assertIs(get_filters(exchange, 'DOGE/USDT'), filters)
+        build.assert_not_called()
+
+    def test_load_filters_for_symbols(self):
+        """Test: load_filters prepara solo los símbolos pedidos"""
+        exchange = _exchange()
+        loaded = load_filters(exchange, ['BTC/USDT', '1000SHIB/USDT', 'XXX/USDT'])
+        self.assertEqual(sorted(loaded), ['1000SHIB/USDT', 'BTC/USDT'])
+
+    def test_unknown_exchange_uses_defaults(self):
+        """Test: Sin mercados cargados se devuelven los valores por defecto"""
+        filters = get_filters(Mock(), 'DOGE/USDT')
+        self.assertEqual((filters.tick_size, filters.step_size, filters.min_notional), (0.0001, 0.1, 5.0))
+
+
+class TestOrderBuildersUseFilters(unittest.TestCase):
+    """Tests para las funciones de órdenes de utils con los filtros del símbolo"""
+
+    def test_limit_entry_on_tick_and_step(self):
+        """Test: La entrada LIMIT de 1000SHIB usa 6 decimales de precio y cantidades enteras"""
+        exchange = _exchange()
+        with patch('builtins.print'):
+            utils.create_limit_buy_order(exchange, '1000SHIB/USDT', 10, 0.0123456789, True)
+
+        amount, price = exchange.create_limit_buy_order.call_args[0][1:]
+        self.assertEqual(price, 0.012345)
+        self.assertEqual(amount, 811)  # ceil(10 / 0.012345) con step 1
+        self.assertGreaterEqual(amount * price, 5)
+
+    def test_closes_use_step_size(self):
+        """Test: Los cierres redondean al step del símbolo en lugar de a 1 decimal"""
+        exchange = _exchange()
+        with patch('builtins.print'):
+            utils.create_market_sell_order(exchange, 'DOGE/USDT', 1234.6, True, True)
+            utils.close_limit_short_order(exchange, 'BTC/USDT', 0.0123, 43210.19, True)
+
+        self.assertEqual(exchange.create_market_sell_order.call_args[0][1], 1235)
+        self.assertEqual(exchange.create_limit_buy_order.call_args[0][1:], (0.012, 43210.1))
+
+    def test_market_entry_meets_min_notional(self):
+        """Test: La entrada a mercado cumple el notional mínimo del símbolo"""
+        exchange = _exchange()
+        exchange.fetch_ticker.return_value = {'last': 43000.0}
+        with patch('builtins.print'):
+            utils.create_market_buy_order(exchange, 'BTC/USDT', 20, True, True)
+
+        amount = exchange.create_market_buy_order.call_args[0][1]
+        self.assertEqual(amount, 0.003)
+        self.assertGreater(amount * 43000.0, 100)
+
+    def test_stop_limit_prices(self):
+        """Test: El stop-limit lleva precios en el tick y cantidad en el step"""
+        exchange = _exchange()
+        utils.create_stop_limit_order(exchange, 'BTC/USDT', 'sell', 0.01234, 42000.04, 41999.96)
+
+        kwargs = exchange.create_order.call_args.kwargs
+        self.assertEqual((kwargs['amount'], kwargs['price'], kwargs['params']['stopPrice']),
+                         (0.012, 42000.0, 42000.0))
+
+    def test_batch_orders_quantized(self):
+        """Test: Las órdenes del lote (TP y SL) se cuantizan con los filtros del símbolo"""
+        exchange = _exchange()
+        exchange.fapiPrivatePostBatchOrders.return_value = [{'code': -2019, 'msg': 'Margin is insufficient.'}] * 2
+        filters = get_filters(exchange, 'BTC/USDT')
+        with patch('builtins.print'):
+            create_batch_orders(exchange, [
+                order_request('BTC/USDT', 'sell', 'LIMIT', 0.01234, price=43300.06, reduce_only=True, filters=filters),
+                order_request('BTC/USDT', 'sell', 'STOP_MARKET', stop_price=43100.04, close_position=True,
+                              filters=filters),
+            ])
+
+        tp, sl = exchange.fapiPrivatePostBatchOrders.call_args[0][0]['batchOrders']
+        self.assertEqual((tp['quantity'], tp['price']), ('0.012', '43300.1'))
+        self.assertEqual(sl['stopPrice'], '43100')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
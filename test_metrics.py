@@ -0,0 +1,160 @@
+"""
+Test para la instrumentación de las llamadas al exchange
+"""
+
+import asyncio
+import json
+import socket
+import time
+import unittest
+import urllib.request
+from unittest.mock import patch
+
+import ccxt
+
+import metrics
+import utils
+
+
+class FakeExchange:
+    """Exchange síncrono con la forma de CCXT (los métodos unificados acaban en fetch2)"""
+
+    def __init__(self):
+        self.last_response_headers = {}
+
+    def fetch2(self, path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+        self.last_response_headers = {'X-MBX-USED-WEIGHT-1M': '7'}
+        return {'path': path}
+
+    def calculate_rate_limiter_cost(self, api, method, path, params, config={}):
+        return 1 if method == 'GET' else 5
+
+    def create_order(self, symbol, type, side, amount, price=None, params={}):
+        return self.fetch2('order', 'fapiPrivate', 'POST')
+
+    def create_limit_buy_order(self, symbol, amount, price, params={}):
+        return self.create_order(symbol, 'limit', 'buy', amount, price, params)
+
+    def fetch_ticker(self, symbol):
+        time.sleep(0.005)
+        return self.fetch2('ticker/price', 'fapiPublic')
+
+    def fetch_balance(self, params={}):
+        raise ccxt.RequestTimeout('binance GET https://fapi.binance.com/fapi/v2/balance timeout')
+
+
+class FakeAsyncExchange(FakeExchange):
+    """Igual que FakeExchange con métodos asíncronos"""
+
+    async def fetch2(self, path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+        await asyncio.sleep(0.02)
+        return super().fetch2(path, api, method, params, headers, body, config)
+
+    async def fetch_ticker(self, symbol):
+        return await self.fetch2('ticker/price', 'fapiPublic')
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Tests para instrument_ccxt"""
+
+    def setUp(self):
+        self.registry = metrics.MetricsRegistry()
+        self.exchange = metrics.instrument_ccxt(FakeExchange(), self.registry)
+
+    def test_nested_calls_counted_once(self):
+        """Test: create_limit_buy_order -> create_order -> fetch2 cuenta una llamada con su peso"""
+        self.exchange.create_limit_buy_order('DOGE/USDT', 100, 0.08)
+
+        snap = self.registry.snapshot()
+        self.assertEqual(list(snap['endpoints']), ['create_limit_buy_order'])
+        stats = snap['endpoints']['create_limit_buy_order']
+        self.assertEqual((stats['count'], stats['weight']), (1, 5))
+        self.assertEqual(snap['used_weight_1m'], 7)
+
+    def test_latency_histogram_per_endpoint(self):
+        """Test: Cada método tiene su histograma de latencia"""
+        for _ in range(3):
+            self.exchange.fetch_ticker('DOGE/USDT')
+
+        stats = self.registry.endpoint('fetch_ticker')
+        self.assertEqual(stats.calls, 3)
+        self.assertGreaterEqual(stats.latency.min_ms, 5)
+        self.assertEqual(stats.weight, 3)
+
+    def test_errors_counted_when_utils_swallows_them(self):
+        """Test: Los errores se cuentan aunque utils.py los convierta en un print"""
+        with patch('builtins.print'):
+            self.assertIsNone(utils.get_balance(self.exchange, 'USDT'))
+
+        self.assertEqual(self.registry.endpoint('fetch_balance').errors, {'RequestTimeout': 1})
+        self.assertIn('exchange_request_errors_total{endpoint="fetch_balance",error="RequestTimeout"} 1',
+                      self.registry.prometheus())
+
+    def test_raw_api_calls_by_path(self):
+        """Test: Las llamadas directas a la API (leverage, positionRisk) se registran por ruta"""
+        exchange = metrics.instrument_ccxt(ccxt.binance({'apiKey': 'key', 'secret': 'secret'}), self.registry)
+        with patch.object(exchange, 'fetch', return_value={'serverTime': 1700000000000}):
+            exchange.fapiPublicGetTime()
+
+        self.assertEqual(self.registry.endpoint('fapiPublic GET time').calls, 1)
+
+    def test_async_exchange(self):
+        """Test: Con ccxt.async_support las llamadas concurrentes se miden por separado"""
+        exchange = metrics.instrument_ccxt(FakeAsyncExchange(), self.registry)
+
+        async def scenario():
+            await asyncio.gather(*[exchange.fetch_ticker('DOGE/USDT') for _ in range(4)])
+
+        started = time.perf_counter()
+        asyncio.run(scenario())
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        stats = self.registry.endpoint('fetch_ticker')
+        self.assertEqual(stats.calls, 4)
+        self.assertLessEqual(stats.latency.max_ms, elapsed_ms)
+        self.assertEqual(list(self.registry.snapshot()['endpoints']), ['fetch_ticker'])
+
+
+class TestMetricsServer(unittest.TestCase):
+    """Tests para el endpoint local de métricas"""
+
+    def test_prometheus_and_json_endpoints(self):
+        """Test: /metrics y /metrics.json exponen las métricas del registro"""
+        registry = metrics.MetricsRegistry()
+        metrics.instrument_ccxt(FakeExchange(), registry).fetch_ticker('DOGE/USDT')
+        server = metrics.MetricsServer(registry, host='127.0.0.1', port=_free_port(), summary_interval=0)
+        server.start()
+        try:
+            with urllib.request.urlopen(server.url, timeout=5) as response:
+                text = response.read().decode()
+            with urllib.request.urlopen(server.url + '.json', timeout=5) as response:
+                data = json.load(response)
+        finally:
+            server.stop()
+
+        self.assertIn('exchange_request_duration_ms_count{endpoint="fetch_ticker"} 1', text)
+        self.assertIn('exchange_used_weight_1m 7', text)
+        self.assertEqual(data['endpoints']['fetch_ticker']['count'], 1)
+
+    def test_periodic_summary(self):
+        """Test: El resumen se imprime en consola cada summary_interval"""
+        registry = metrics.MetricsRegistry()
+        metrics.instrument_ccxt(FakeExchange(), registry).fetch_ticker('DOGE/USDT')
+        server = metrics.MetricsServer(registry, port=0, summary_interval=0.05)
+        with patch('builtins.print') as printed:
+            server.start()
+            time.sleep(0.2)
+            server.stop()
+
+        self.assertIsNone(server.url)
+        self.assertTrue(any('fetch_ticker' in call.args[0] for call in printed.call_args_list))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,155 @@
+"""
+Test para el libro L2 local (order_book.py) y el precio de entrada desde el libro
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+import config
+import order_book
+from market_data import MarketDataFeed
+from market_filters import SymbolFilters
+
+
+SYMBOL = 'DOGE/USDT'
+FILTERS = SymbolFilters(SYMBOL, tick_size=0.00001)
+
+SNAPSHOT = {
+    'lastUpdateId': 100,
+    'bids': [['0.08000', '5000'], ['0.07999', '20000'], ['0.07998', '30000']],
+    'asks': [['0.08002', '4000'], ['0.08003', '10000'], ['0.08004', '50000']],
+}
+
+
+def _diff(first, final, previous=None, bids=(), asks=()):
+    event = {'e': 'depthUpdate', 's': 'DOGEUSDT', 'U': first, 'u': final, 'b': list(bids), 'a': list(asks)}
+    if previous is not None:
+        event['pu'] = previous
+    return event
+
+
+def _book(snapshot=SNAPSHOT, **kwargs):
+    loader = Mock(return_value=snapshot)
+    book = order_book.OrderBook(SYMBOL, loader, background=False, **kwargs)
+    return book, loader
+
+
+class TestOrderBook(unittest.TestCase):
+    """Tests para OrderBook"""
+
+    def setUp(self):
+        print_patcher = patch('builtins.print')
+        print_patcher.start()
+        self.addCleanup(print_patcher.stop)
+
+    def test_snapshot_with_buffered_events(self):
+        """Test: Los eventos anteriores al snapshot se descartan y los que lo contienen se aplican"""
+        book, loader = _book()
+
+        book.handle_diff(_diff(95, 99, 94, bids=[['0.08001', '100']]))   # Anterior al snapshot
+        self.assertEqual(loader.call_count, 1)
+        self.assertTrue(book.synced)
+        book.handle_diff(_diff(99, 103, 99, asks=[['0.08002', '0']]))  # Contiene lastUpdateId
+        book.handle_diff(_diff(104, 106, 103, bids=[['0.08001', '700']]))
+
+        self.assertEqual(book.best_bid(), (0.08001, 700.0))
+        self.assertEqual(book.best_ask(), (0.08003, 10000.0))
+        self.assertEqual(book.bids(2), [(0.08001, 700.0), (0.08, 5000.0)])
+        self.assertEqual(book.asks(5), [(0.08003, 10000.0), (0.08004, 50000.0)])
+        self.assertEqual(book.gaps, 0)
+
+    def test_gap_triggers_resync(self):
+        """Test: Un evento cuyo pu no es el u anterior descarta el libro y pide otro snapshot"""
+        book, loader = _book()
+        book.apply_snapshot(SNAPSHOT)
+        book.handle_diff(_diff(100, 101, 99))
+        loader.return_value = dict(SNAPSHOT, lastUpdateId=110, bids=[['0.07990', '1']])
+
+        book.handle_diff(_diff(108, 112, 105, bids=[['0.08000', '0']]))  # Faltan 102-107
+
+        self.assertEqual((book.gaps, book.snapshots, loader.call_count), (1, 2, 1))
+        self.assertTrue(book.synced)
+        # El evento que reveló el hueco contiene el nuevo lastUpdateId y se aplica sobre el snapshot
+        self.assertEqual(book.best_bid(), (0.0799, 1.0))
+
+    def test_spot_sequence(self):
+        """Test: Sin pu (Spot) cada evento empieza en el u anterior + 1"""
+        book, _ = _book()
+        book.apply_snapshot(SNAPSHOT)
+        book.handle_diff(_diff(101, 102, asks=[['0.08002', '1']]))
+        self.assertTrue(book.synced)
+        book.load_snapshot = None
+        book.handle_diff(_diff(104, 105))
+        self.assertFalse(book.synced)
+        self.assertFalse(book.is_fresh())
+
+
+class TestEntryPrice(unittest.TestCase):
+    """Tests para order_book.entry_price"""
+
+    def setUp(self):
+        self.book, _ = _book()
+        self.book.apply_snapshot(SNAPSHOT)
+
+    def test_join_and_improve(self):
+        """Test: join se pone en el mejor nivel propio e improve un tick dentro si hay hueco"""
+        self.assertEqual(order_book.entry_price(self.book, 'buy', 100, 'join', FILTERS), 0.08)
+        self.assertEqual(order_book.entry_price(self.book, 'sell', 100, 'join', FILTERS), 0.08002)
+        self.assertEqual(order_book.entry_price(self.book, 'buy', 100, 'improve', FILTERS), 0.08001)
+        self.assertEqual(order_book.entry_price(self.book, 'sell', 100, 'improve', FILTERS), 0.08001)
+        self.assertIsNone(order_book.entry_price(self.book, 'buy', 100, 'last', FILTERS))
+
+        # Spread de un tick: no se puede mejorar sin cruzar
+        self.book.handle_diff(_diff(101, 101, 100, bids=[['0.08001', '10']]))
+        self.assertEqual(order_book.entry_price(self.book, 'buy', 100, 'improve', FILTERS), 0.08001)
+
+    def test_queue_ahead_limit(self):
+        """Test: Con mucha cola por delante en el mejor nivel, join mejora un tick"""
+        # 5000 DOGE a 0.08 = 400 USDT por delante
+        self.assertEqual(order_book.entry_price(self.book, 'buy', 100, 'join', FILTERS, 500), 0.08)
+        self.assertEqual(order_book.entry_price(self.book, 'buy', 100, 'join', FILTERS, 300), 0.08001)
+
+    def test_cross_sweeps_to_fill(self):
+        """Test: cross usa el nivel del otro lado donde se completa la cantidad"""
+        self.assertEqual(order_book.entry_price(self.book, 'buy', 3000, 'cross', FILTERS), 0.08002)
+        self.assertEqual(order_book.entry_price(self.book, 'buy', 12000, 'cross', FILTERS), 0.08003)
+        self.assertEqual(order_book.entry_price(self.book, 'sell', 40000, 'cross', FILTERS), 0.07998)
+        with self.assertRaises(ValueError):
+            order_book.entry_price(self.book, 'buy', 100, 'market', FILTERS)
+
+
+class TestBotEntryPrice(unittest.TestCase):
+    """Tests para el libro en el feed y en el bot"""
+
+    def test_feed_routes_depth_to_book(self):
+        """Test: El feed se suscribe a la profundidad y le pasa los eventos sin despertar a la estrategia"""
+        book, _ = _book()
+        feed = MarketDataFeed(SYMBOL, order_book=book)
+        self.assertIn('dogeusdt@depth@100ms', feed.url)
+
+        feed.handle_message({'stream': 'dogeusdt@depth@100ms', 'data': _diff(90, 95, 89)})
+
+        self.assertTrue(book.synced)
+        self.assertEqual(feed.sequence, 0)
+
+    def test_bot_uses_book_when_fresh(self):
+        """Test: El bot pone la entrada en el mejor bid/ask y sin libro usa el último precio"""
+        from main import ScalpingBot
+
+        bot = ScalpingBot.__new__(ScalpingBot)
+        bot.filters = FILTERS
+        bot.order_book = None
+        with patch.multiple(config, ENTRY_PRICE_MODE='join', ENTRY_QUEUE_MAX_AHEAD_USDT=0.0):
+            self.assertEqual(bot._entry_limit_price(0.0795, 'LONG', 20), 0.0795)
+
+            bot.order_book, _ = _book()
+            bot.order_book.apply_snapshot(SNAPSHOT)
+            self.assertEqual(bot._entry_limit_price(0.0795, 'LONG', 20), 0.08)
+            self.assertEqual(bot._entry_limit_price(0.0795, 'SHORT', 20), 0.08002)
+
+            bot.order_book.last_update -= 60  # Libro viejo
+            self.assertEqual(bot._entry_limit_price(0.0795, 'LONG', 20), 0.0795)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,410 @@
+"""
+Test para la máquina de estados de órdenes y posición
+"""
+
+import time
+import unittest
+from collections import Counter
+from datetime import datetime
+from unittest.mock import patch
+
+import config
+import order_state
+from main import ScalpingBot
+from order_state import PositionState, normalize_status
+from user_data import UserDataStream
+
+
+class TestPositionState(unittest.TestCase):
+    """Tests para PositionState"""
+
+    def test_entry_partial_then_filled(self):
+        """Test: NEW → PARTIALLY_FILLED → FILLED con el precio medio real"""
+        state = PositionState()
+        state.entry_placed('1', 'LONG', 100, 0.08)
+        self.assertEqual(state.phase, order_state.ENTRY_PENDING)
+        self.assertTrue(state.in_position)
+        self.assertEqual(state.amount, 0.0)
+
+        self.assertEqual(state.on_order_update('1', 'PARTIALLY_FILLED', 40, 0.0799), order_state.ENTRY_PARTIAL)
+        self.assertEqual(state.amount, 40)
+        self.assertEqual(state.phase, order_state.ENTRY_PENDING)
+
+        self.assertEqual(state.on_order_update(1, 'FILLED', 100, 0.07995), order_state.ENTRY_FILLED)
+        self.assertEqual(state.phase, order_state.OPEN)
+        self.assertEqual(state.entry_price, 0.07995)
+        self.assertIsNone(state.active_order)
+
+    def test_stale_and_unknown_updates_are_ignored(self):
+        """Test: Eventos desordenados, repetidos o de órdenes ajenas no cambian el estado"""
+        state = PositionState()
+        state.entry_placed('1', 'SHORT', 100, 0.08)
+        state.on_order_update('1', 'PARTIALLY_FILLED', 60, 0.08)
+
+        self.assertIsNone(state.on_order_update('1', 'PARTIALLY_FILLED', 40, 0.08))  # Llegó tarde
+        self.assertIsNone(state.on_order_update('1', 'PARTIALLY_FILLED', 60, 0.08))  # Repetido
+        self.assertIsNone(state.on_order_update('999', 'FILLED', 10, 0.08))
+        self.assertIsNone(state.on_order_update('1', 'TRADE_PREVENTION', 60, 0.08))
+        self.assertEqual(state.amount, 60)
+
+        state.on_order_update('1', 'FILLED', 100, 0.08)
+        self.assertIsNone(state.on_order_update('1', 'CANCELED', 100, 0.08))  # Ya finalizada
+        self.assertEqual(state.phase, order_state.OPEN)
+
+    def test_entry_canceled(self):
+        """Test: Entrada cancelada sin ejecutar vuelve a FLAT; con parte ejecutada queda OPEN"""
+        state = PositionState()
+        state.entry_placed('1', 'LONG', 100, 0.08)
+        self.assertEqual(state.on_order_update('1', 'EXPIRED', 0, 0), order_state.ENTRY_CANCELED)
+        self.assertEqual(state.phase, order_state.FLAT)
+
+        state.entry_placed('2', 'LONG', 100, 0.08)
+        state.on_order_update('2', 'open', 30, 0.08)  # CCXT: 'open' con ejecución parcial
+        self.assertEqual(state.on_order_update('2', 'canceled', 30, 0.08), order_state.ENTRY_CANCELED)
+        self.assertEqual(state.phase, order_state.OPEN)
+        self.assertEqual(state.amount, 30)
+
+    def test_exit_lifecycle(self):
+        """Test: La posición solo se cierra cuando se ejecuta la orden de cierre"""
+        state = PositionState()
+        state.adopt('LONG', 100, 0.08)
+        state.exit_placed('7', 100, 0.081)
+        self.assertEqual(state.phase, order_state.EXIT_PENDING)
+
+        # El ACCOUNT_UPDATE suele llegar antes que el evento de la orden
+        self.assertIsNone(state.on_position_update(0, 0))
+        self.assertEqual(state.phase, order_state.EXIT_PENDING)
+
+        self.assertEqual(state.on_order_update('7', 'PARTIALLY_FILLED', 30, 0.081), order_state.EXIT_PARTIAL)
+        self.assertEqual(state.amount, 70)
+        self.assertEqual(state.on_order_update('7', 'closed', 100, 0.0811), order_state.EXIT_FILLED)
+        self.assertEqual(state.phase, order_state.FLAT)
+        self.assertEqual(state.exit_price, 0.0811)
+
+    def test_limit_exit_flag(self):
+        """Test: Solo el cierre LIMIT pendiente cuenta como take profit del bot"""
+        state = PositionState()
+        state.adopt('LONG', 100, 0.08)
+        self.assertFalse(state.has_limit_exit)
+        state.exit_placed('7', 100, 0.081)
+        self.assertTrue(state.has_limit_exit)
+        state.exit_placed('8', 100, 0.079, 'MARKET')
+        self.assertFalse(state.has_limit_exit)
+
+    def test_exit_canceled_keeps_position(self):
+        """Test: Si se cancela el cierre la posición sigue abierta con lo que quede"""
+        state = PositionState()
+        state.adopt('SHORT', 100, 0.08)
+        state.exit_placed('7', 100, 0.079)
+        state.on_order_update('7', 'PARTIALLY_FILLED', 25, 0.079)
+
+        self.assertEqual(state.on_order_update('7', 'CANCELED', 25, 0.079), order_state.EXIT_CANCELED)
+        self.assertEqual(state.phase, order_state.OPEN)
+        self.assertEqual(state.amount, 75)
+        self.assertEqual(state.signed_amount(), -75)
+
+    def test_position_updates(self):
+        """Test: Posiciones abiertas o cerradas fuera del bot"""
+        state = PositionState()
+        self.assertIsNone(state.on_position_update(0, 0))
+        self.assertEqual(state.on_position_update(-50, 0.081), order_state.ADOPTED)
+        self.assertEqual(state.side, 'SHORT')
+        self.assertIsNone(state.on_position_update(-50, 0.081))
+        self.assertEqual(state.on_position_update(-80, 0.0812), order_state.RESIZED)
+        self.assertEqual(state.on_position_update(0, 0), order_state.CLOSED)
+        self.assertFalse(state.in_position)
+
+    def test_protective_orders_close_position(self):
+        """Test: El stop loss del exchange cierra la posición y el take profit queda para cancelar"""
+        state = PositionState()
+        state.adopt('LONG', 100, 0.08)
+        state.protection_placed('10', 0.0805, '11', 0.0797)
+        self.assertEqual(state.phase, order_state.OPEN)
+        self.assertTrue(state.has_stop and state.has_take_profit)
+
+        # El ACCOUNT_UPDATE llega antes que el evento del stop: se espera a su precio
+        self.assertIsNone(state.on_position_update(0, 0))
+        self.assertEqual(state.on_order_update('11', 'FILLED', 100, 0.0796), order_state.EXIT_FILLED)
+        self.assertEqual(state.phase, order_state.FLAT)
+        self.assertEqual(state.exit_price, 0.0796)
+        self.assertEqual([o.id for o in state.live_orders()], ['10'])
+
+    def test_protective_order_canceled_or_missed(self):
+        """Test: Stop cancelado en el exchange y cierre cuyo evento no llega"""
+        state = PositionState()
+        state.adopt('SHORT', 100, 0.08)
+        state.protection_placed('10', 0.0795, '11', 0.0803)
+        self.assertEqual(state.on_order_update('11', 'CANCELED', 0, 0), order_state.PROTECTION_CANCELED)
+        self.assertFalse(state.has_stop)
+        self.assertEqual(state.on_order_update('10', 'PARTIALLY_FILLED', 40, 0.0795), order_state.EXIT_PARTIAL)
+        self.assertEqual(state.amount, 60)
+
+        # Segunda confirmación de posición a cero sin evento de la orden: cerrada fuera del bot
+        self.assertIsNone(state.on_position_update(0, 0))
+        self.assertEqual(state.on_position_update(0, 0), order_state.CLOSED)
+        self.assertEqual([o.id for o in state.leftover_orders], ['10'])
+
+    def test_normalize_status(self):
+        """Test: Estados de Binance y de CCXT"""
+        self.assertEqual(normalize_status('open'), order_state.NEW)
+        self.assertEqual(normalize_status('open', 5), order_state.PARTIALLY_FILLED)
+        self.assertEqual(normalize_status('closed'), order_state.FILLED)
+        self.assertEqual(normalize_status('REJECTED'), order_state.CANCELED)
+        self.assertIsNone(normalize_status(None))
+
+
+class FakeExchange:
+    """Exchange mínimo de Futures que registra las llamadas"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.orders = {}
+        self.position_rows = [{'symbol': 'DOGEUSDT', 'positionAmt': '0', 'entryPrice': '0',
+                               'positionSide': 'BOTH'}]
+
+    def fapiPrivate_post_leverage(self, params):
+        pass
+
+    def fapiPrivate_post_margintype(self, params):
+        pass
+
+    def _create(self, side, amount, price):
+        order = {'id': str(len(self.orders) + 1), 'side': side, 'amount': amount, 'price': price,
+                 'status': 'open', 'filled': 0.0, 'average': None}
+        self.orders[order['id']] = order
+        return dict(order)
+
+    def create_limit_buy_order(self, symbol, amount, price):
+        self.calls['create_limit_buy_order'] += 1
+        return self._create('buy', amount, price)
+
+    def create_limit_sell_order(self, symbol, amount, price):
+        self.calls['create_limit_sell_order'] += 1
+        return self._create('sell', amount, price)
+
+    def cancel_order(self, order_id, symbol):
+        self.calls['cancel_order'] += 1
+        self.orders[order_id]['status'] = 'canceled'
+        return dict(self.orders[order_id])
+
+    def fetch_order(self, order_id, symbol):
+        self.calls['fetch_order'] += 1
+        return dict(self.orders[order_id])
+
+    def fapiPrivateV2GetPositionRisk(self, params):
+        self.calls['positionRisk'] += 1
+        return self.position_rows
+
+    def create_market_sell_order(self, symbol, amount):
+        self.calls['create_market_sell_order'] += 1
+        return self._create('sell', amount, None)
+
+    markets = None
+
+    def parse_order(self, raw, market=None):
+        return {'id': str(raw['orderId']), 'type': raw['type'].lower(), 'status': 'open'}
+
+    def fapiPrivatePostBatchOrders(self, params):
+        self.calls['batchOrders'] += 1
+        self.batch = params['batchOrders']
+        return [{'orderId': 100 + i, 'symbol': 'DOGEUSDT', 'type': request['type']}
+                for i, request in enumerate(self.batch)]
+
+    def fapiPrivateDeleteBatchOrders(self, params):
+        self.calls['cancelBatchOrders'] += 1
+        self.canceled = params['orderidlist']
+        return [{'orderId': order_id} for order_id in self.canceled]
+
+
+def _order_event(order_id, status, filled, average):
+    return {"e": "ORDER_TRADE_UPDATE", "E": 1, "o": {
+        "s": "DOGEUSDT", "i": int(order_id), "X": status, "x": "TRADE", "z": str(filled),
+        "ap": str(average), "q": "250", "p": "0.08", "l": "0", "L": "0", "S": "BUY", "o": "LIMIT"}}
+
+
+def _account_event(amount, entry_price):
+    return {"e": "ACCOUNT_UPDATE", "E": 1, "a": {"B": [], "P": [
+        {"s": "DOGEUSDT", "pa": str(amount), "ep": str(entry_price), "up": "0", "ps": "BOTH"}]}}
+
+
+class TestBotStateMachine(unittest.TestCase):
+    """Tests para el bot en modo real guiado por eventos del exchange"""
+
+    def setUp(self):
+        patcher = patch.multiple(config, ENABLE_REAL_TRADING=True, USE_DYNAMIC_POSITION_SIZE=False,
+                                 POSITION_SIZE_USDT=20, USE_FUTURES=True, LEVERAGE=10, EMA_PERIOD=12,
+                                 LOOP_INTERVAL=3, RECONCILE_INTERVAL=30, TAKE_PROFIT_PERCENT=0.6,
+                                 STOP_LOSS_PERCENT=0.4, TARGET_PROFIT_USDT=2.0, USE_PROTECTIVE_ORDERS=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.print_patcher = patch('builtins.print')
+        self.print_patcher.start()
+        self.addCleanup(self.print_patcher.stop)
+
+        self.exchange = FakeExchange()
+        self.bot = ScalpingBot('automatic', symbol='DOGE/USDT', exchange=self.exchange, show_configuration=False)
+        self.stream = UserDataStream(lambda: 'key', lambda key: None)
+        self.stream.connected.set()
+        self.bot._attach_user_data(self.stream)
+
+    def test_trade_driven_by_stream_events(self):
+        """Test: Entrada y cierre solo cambian el estado cuando llegan las ejecuciones"""
+        bot = self.bot
+        bot._execute_buy(0.08, 'LONG')
+
+        self.assertTrue(bot.in_position)
+        self.assertEqual(bot.position_state.phase, order_state.ENTRY_PENDING)
+        self.assertEqual(bot.active_order_id, '1')
+        self.assertEqual(bot.position_amount, 0.0)
+        self.assertIsNone(bot._evaluate_strategy(0.09, 0.08))  # Sin ejecución no se evalúa el cierre
+
+        # El llenado llega por el stream y se aplica al principio del ciclo, sin red
+        self.stream.handle_message(_account_event(250, 0.07998))
+        self.stream.handle_message(_order_event(1, 'FILLED', 250, 0.07998))
+        bot._apply_exchange_events()
+        self.assertEqual(bot.position_state.phase, order_state.OPEN)
+        self.assertEqual(bot.entry_price, 0.07998)
+        self.assertEqual(bot.position_amount, 250)
+        self.assertIsNone(bot.active_order_id)
+        self.assertGreater(bot.take_profit_price, 0.07998)
+
+        # Colocar el cierre no cierra la posición ni cuenta el trade
+        bot._execute_sell(0.0805, 'Take Profit')
+        self.assertTrue(bot.in_position)
+        self.assertEqual(bot.position_state.phase, order_state.EXIT_PENDING)
+        self.assertEqual(bot.total_trades, 0)
+
+        self.stream.handle_message(_account_event(0, 0))
+        self.stream.handle_message(_order_event(2, 'FILLED', 250, 0.0806))
+        bot._apply_exchange_events()
+        self.assertFalse(bot.in_position)
+        self.assertEqual(bot.total_trades, 1)
+        self.assertEqual(bot.winning_trades, 1)
+        self.assertIsNotNone(bot.last_close_time)
+        self.assertEqual(sum(self.exchange.calls.values()), 2)  # Solo las dos órdenes
+
+    def test_reconciliation_recovers_missed_fill(self):
+        """Test: La reconciliación periódica detecta una ejecución cuyo evento se perdió"""
+        bot = self.bot
+        bot._execute_buy(0.08, 'SHORT')
+        self.assertFalse(bot._reconcile_due())
+
+        self.exchange.orders['1'].update(status='closed', filled=250.0, average=0.0801)
+        self.exchange.position_rows[0].update(positionAmt='-250', entryPrice='0.0801')
+        bot._last_reconcile -= 31
+        self.assertTrue(bot._reconcile_due())
+        bot._reconcile_state()
+
+        self.assertEqual(bot.position_state.phase, order_state.OPEN)
+        self.assertEqual(bot.position_side, 'SHORT')
+        self.assertEqual(bot.entry_price, 0.0801)
+        self.assertEqual(self.exchange.calls['fetch_order'], 1)
+
+        # En posición sin órdenes vivas solo se consulta la posición
+        bot._reconcile_state()
+        self.assertEqual(self.exchange.calls['fetch_order'], 1)
+        self.assertEqual(self.exchange.calls['positionRisk'], 2)
+
+    def test_reconciliation_without_stream_runs_every_heartbeat(self):
+        """Test: Sin stream de usuario la reconciliación se hace en cada latido"""
+        self.stream.connected.clear()
+        self.bot._last_reconcile = time.monotonic() - 3
+        self.assertTrue(self.bot._reconcile_due())
+
+    def test_position_closed_outside_the_bot(self):
+        """Test: Una posición cerrada a mano se detecta y activa el cooldown sin contar el trade"""
+        bot = self.bot
+        self.stream.handle_message(_account_event(-100, 0.08))
+        bot._apply_exchange_events()
+        self.assertEqual(bot.position_side, 'SHORT')
+
+        self.stream.handle_message(_account_event(0, 0))
+        bot._apply_exchange_events()
+        self.assertFalse(bot.in_position)
+        self.assertEqual(bot.total_trades, 0)
+        self.assertIsNotNone(bot.last_close_time)
+
+    def test_cooldown_status_is_throttled(self):
+        """Test: Durante el cooldown el aviso se muestra como mucho una vez por loop_interval"""
+        bot = self.bot
+        bot.last_close_time = datetime.now()
+        with patch('builtins.print') as mock_print:
+            for _ in range(5):
+                self.assertIsNone(bot._evaluate_strategy(0.07, 0.08))  # Señal de compra, pero en cooldown
+
+        cooldown_lines = [c for c in mock_print.call_args_list if 'Cooldown activo' in str(c)]
+        self.assertEqual(len(cooldown_lines), 1)
+
+    def test_protective_orders_placed_on_fill(self):
+        """Test: Al ejecutarse la entrada se colocan TP y SL en un lote; al saltar el SL se cancela el TP"""
+        bot = self.bot
+        with patch.object(config, 'USE_PROTECTIVE_ORDERS', True):
+            bot._execute_buy(0.08, 'LONG')
+            bot._sync_protective_orders()
+            self.assertEqual(self.exchange.calls['batchOrders'], 0)  # Todavía sin ejecutar
+
+            self.stream.handle_message(_account_event(250, 0.08))
+            self.stream.handle_message(_order_event(1, 'FILLED', 250, 0.08))
+            bot._apply_exchange_events()
+            bot._sync_protective_orders()
+
+        take_profit, stop = self.exchange.batch
+        self.assertEqual((take_profit['type'], take_profit['side'], take_profit['reduceOnly']),
+                         ('LIMIT', 'SELL', 'true'))
+        self.assertEqual((stop['type'], stop['closePosition']), ('STOP_MARKET', 'true'))
+        self.assertAlmostEqual(float(stop['stopPrice']), 0.08 * (1 - 0.4 / 100), places=4)
+        self.assertTrue(bot.position_state.has_stop)
+
+        # El stop loss ya está en el exchange: el bot no envía otra orden de cierre
+        self.assertIsNone(bot._evaluate_strategy(0.0790, 0.08))
+        bot._sync_protective_orders()
+        self.assertEqual(self.exchange.calls['batchOrders'], 1)
+
+        self.stream.handle_message(_account_event(0, 0))
+        self.stream.handle_message(_order_event(101, 'FILLED', 250, 0.0796))
+        bot._apply_exchange_events()
+        self.assertFalse(bot.in_position)
+        self.assertEqual(bot.losing_trades, 1)
+
+        bot._sync_protective_orders()
+        self.assertEqual(self.exchange.canceled, ['100'])
+        self.assertEqual(self.exchange.calls['create_limit_sell_order'], 0)
+
+    def test_stop_loss_without_exchange_stop_closes_at_market(self):
+        """Test: El stop loss vigilado por el bot cierra a mercado, no con una LIMIT al take profit"""
+        bot = self.bot
+        self.stream.handle_message(_account_event(250, 0.08))
+        bot._apply_exchange_events()
+
+        action = bot._evaluate_strategy(0.0790, 0.08)
+        self.assertEqual(action[0], 'EXIT')
+        bot._execute_sell(0.0790, action[1])
+
+        self.assertEqual(self.exchange.calls['create_market_sell_order'], 1)
+        self.assertEqual(self.exchange.calls['create_limit_sell_order'], 0)
+        self.assertEqual(bot.position_state.phase, order_state.EXIT_PENDING)
+        self.assertIsNone(bot._evaluate_strategy(0.0780, 0.08))  # El cierre a mercado ya está en curso
+
+    def test_stop_loss_while_take_profit_pending(self):
+        """Test: Con el take profit LIMIT del bot pendiente, el stop loss lo cancela y cierra a mercado"""
+        bot = self.bot
+        self.stream.handle_message(_account_event(250, 0.08))
+        bot._apply_exchange_events()
+        bot._execute_sell(0.0805, 'Take Profit')
+        self.assertTrue(bot.position_state.has_limit_exit)
+        self.assertIsNone(bot._evaluate_strategy(0.0802, 0.08))  # Sin stop loss se espera al take profit
+
+        # El take profit llegó a ejecutar 100 antes de caer el precio
+        self.exchange.orders['1'].update(filled=100.0, average=bot.take_profit_price)
+        action = bot._evaluate_strategy(0.0790, 0.08)
+        self.assertEqual(action[0], 'EXIT')
+        bot._execute_sell(0.0790, action[1])
+
+        self.assertEqual(self.exchange.calls['cancel_order'], 1)
+        self.assertEqual(self.exchange.orders['2']['amount'], 150.0)
+        self.assertEqual(bot.position_state.phase, order_state.EXIT_PENDING)
+        self.assertFalse(bot.position_state.has_limit_exit)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
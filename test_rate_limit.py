@@ -0,0 +1,182 @@
+"""
+Test para el planificador de peso de peticiones
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+
+import ccxt
+
+from rate_limit import (RateLimitScheduler, PRIORITY_ORDER, PRIORITY_POLL, futures_request_weight,
+                        instrument_ccxt, instrument_binance_client, is_order_request)
+
+
+class TestRateLimitScheduler(unittest.TestCase):
+    """Tests para RateLimitScheduler"""
+
+    def test_orders_use_reserve_and_polls_wait(self):
+        """Test: Con el bucket en la reserva, las órdenes pasan y el polling espera"""
+        scheduler = RateLimitScheduler(weight_limit=600, order_reserve=0.5)  # 10 de peso por segundo
+        scheduler.update_from_headers({'X-MBX-USED-WEIGHT-1M': '300'})  # Justo en la reserva
+
+        self.assertLess(scheduler.acquire(1, PRIORITY_ORDER), 0.01)
+        waited = scheduler.acquire(5, PRIORITY_POLL)
+
+        self.assertGreater(waited, 0.4)
+        self.assertEqual(scheduler.used_weight, 300)
+        self.assertEqual(scheduler.snapshot()['throttled'], 1)
+
+    def test_queued_order_goes_before_polling(self):
+        """Test: Una orden en cola pasa antes que una consulta que ya esperaba"""
+        scheduler = RateLimitScheduler(weight_limit=600, order_reserve=0.0)
+        scheduler.update_from_headers({'x-mbx-used-weight-1m': '600'})  # Bucket vacío
+        finished = []
+
+        def request(name, weight, priority):
+            scheduler.acquire(weight, priority)
+            finished.append(name)
+
+        poll = threading.Thread(target=request, args=('poll', 10, PRIORITY_POLL))
+        poll.start()
+        time.sleep(0.05)
+        order = threading.Thread(target=request, args=('order', 10, PRIORITY_ORDER))
+        order.start()
+        poll.join(5)
+        order.join(5)
+
+        self.assertEqual(finished, ['order', 'poll'])
+
+    def test_rate_limited_blocks_everything(self):
+        """Test: Tras un 429 nadie sale hasta el Retry-After"""
+        scheduler = RateLimitScheduler(weight_limit=2400)
+        scheduler.on_rate_limited({'Retry-After': '0.2'})
+
+        waited = scheduler.acquire(1, PRIORITY_ORDER)
+
+        self.assertGreaterEqual(waited, 0.19)
+        self.assertEqual(scheduler.rate_limited, 1)
+
+    def test_weights_and_priorities(self):
+        """Test: Pesos de Futures y clasificación de peticiones de órdenes"""
+        self.assertEqual(futures_request_weight('positionRisk', {'symbol': '1000SHIBUSDT'}), 5)
+        self.assertEqual(futures_request_weight('openOrders', {}), 40)
+        self.assertEqual(futures_request_weight('openOrders', {'symbol': 'DOGEUSDT'}), 1)
+        self.assertEqual(futures_request_weight('ticker/price', None), 2)
+        self.assertTrue(is_order_request('order', 'post'))
+        self.assertTrue(is_order_request('batchOrders', 'DELETE'))
+        self.assertFalse(is_order_request('order', 'GET'))
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Tests para la integración con CCXT y python-binance"""
+
+    def test_ccxt_requests_go_through_scheduler(self):
+        """Test: Las peticiones de CCXT reservan peso y leen la cabecera de peso usado"""
+        exchange = ccxt.binance()
+        scheduler = RateLimitScheduler(weight_limit=2400)
+        instrument_ccxt(exchange, scheduler)
+
+        def fake_fetch(url, method='GET', headers=None, body=None):
+            exchange.last_response_headers = {'X-MBX-USED-WEIGHT-1M': '42'}
+            return {'symbol': 'DOGEUSDT', 'price': '0.08'}
+
+        exchange.fetch = fake_fetch
+        response = exchange.fapiPublicGetTickerPrice({'symbol': 'DOGEUSDT'})
+
+        self.assertEqual(response['price'], '0.08')
+        self.assertFalse(exchange.enableRateLimit)
+        self.assertEqual(scheduler.requests, 1)
+        self.assertEqual(scheduler.used_weight, 42)
+
+    def test_ccxt_429_pauses_scheduler(self):
+        """Test: Un 429 de CCXT activa la pausa del planificador"""
+        exchange = ccxt.binance()
+        scheduler = RateLimitScheduler(weight_limit=2400)
+        instrument_ccxt(exchange, scheduler)
+
+        def fake_fetch(url, method='GET', headers=None, body=None):
+            exchange.last_response_headers = {'Retry-After': '30'}
+            raise ccxt.DDoSProtection('binance 429 Too Many Requests')
+
+        exchange.fetch = fake_fetch
+        with self.assertRaises(ccxt.DDoSProtection):
+            exchange.fapiPublicGetTickerPrice({'symbol': 'DOGEUSDT'})
+
+        self.assertEqual(scheduler.rate_limited, 1)
+        self.assertGreater(scheduler.banned_until, time.monotonic() + 25)
+
+    def test_async_ccxt_requests_go_through_scheduler(self):
+        """Test: Con ccxt.async_support las peticiones comparten el mismo presupuesto de peso"""
+        import ccxt.async_support as ccxt_async
+
+        scheduler = RateLimitScheduler(weight_limit=2400)
+
+        async def run():
+            exchange = instrument_ccxt(ccxt_async.binance(), scheduler)
+
+            async def fake_fetch(url, method='GET', headers=None, body=None):
+                exchange.last_response_headers = {'X-MBX-USED-WEIGHT-1M': '42'}
+                return {'symbol': 'DOGEUSDT', 'price': '0.08'}
+
+            exchange.fetch = fake_fetch
+            try:
+                return exchange, await exchange.fapiPublicGetTickerPrice({'symbol': 'DOGEUSDT'})
+            finally:
+                await exchange.close()
+
+        exchange, response = asyncio.run(run())
+        self.assertEqual(response['price'], '0.08')
+        self.assertFalse(exchange.enableRateLimit)
+        self.assertEqual(scheduler.requests, 1)
+        self.assertEqual(scheduler.used_weight, 42)
+
+    def test_acquire_async_waits_without_blocking_loop(self):
+        """Test: Sin peso disponible acquire_async espera en un hilo y el event loop sigue libre"""
+        scheduler = RateLimitScheduler(weight_limit=600, order_reserve=0)  # 10 de peso por segundo
+        scheduler.update_from_headers({'X-MBX-USED-WEIGHT-1M': '600'})
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            task = asyncio.create_task(ticker())
+            waited = await scheduler.acquire_async(1)
+            task.cancel()
+            return waited, ticks
+
+        waited, ticks = asyncio.run(run())
+        self.assertGreater(waited, 0.05)
+        self.assertGreater(ticks, 3)
+
+    def test_binance_client_requests_go_through_scheduler(self):
+        """Test: Las peticiones de Futures de python-binance pasan por el planificador"""
+        class FakeResponse:
+            headers = {'x-mbx-used-weight-1m': '17'}
+
+        class FakeClient:
+            response = None
+
+            def _request_futures_api(self, method, path, signed=False, version=1, **kwargs):
+                self.response = FakeResponse()
+                return [{'symbol': kwargs['data']['symbol'], 'positionAmt': '0'}]
+
+        client = FakeClient()
+        scheduler = RateLimitScheduler(weight_limit=2400)
+        instrument_binance_client(client, scheduler)
+
+        result = client._request_futures_api('get', 'positionRisk', True, 2, data={'symbol': '1000SHIBUSDT'})
+
+        self.assertEqual(result[0]['symbol'], '1000SHIBUSDT')
+        self.assertEqual(scheduler.used_weight, 17)
+        self.assertAlmostEqual(scheduler.available, 2400 - 17, delta=1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
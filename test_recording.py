@@ -0,0 +1,207 @@
+"""
+Test para la grabación y reproducción del tráfico con el exchange (recording.py)
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import ccxt
+from binance.exceptions import BinanceAPIException
+
+import config
+import recording
+from main import ScalpingBot
+
+
+class FakeExchange:
+    """Exchange mínimo con una llamada anidada como las de CCXT"""
+
+    def __init__(self):
+        self.price = 0.08
+        self.orders = 0
+
+    def fetch_ticker(self, symbol):
+        return {'symbol': symbol, 'last': self.price, 'bid': self.price, 'ask': self.price}
+
+    def create_order(self, symbol, type, side, amount, price=None, params={}):
+        if amount * price > 100:
+            raise ccxt.InsufficientFunds('binance Margin is insufficient.')
+        self.orders += 1
+        return {'id': str(self.orders), 'symbol': symbol, 'side': side, 'amount': amount, 'price': price}
+
+    def create_limit_buy_order(self, symbol, amount, price, params={}):
+        return self.create_order(symbol, 'limit', 'buy', amount, price, params)
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None):
+        return [[1700000000000 + i * 60000, 0.08, 0.081, 0.079, 0.08, 1000.0] for i in range(limit or 100)]
+
+    def fetch2(self, path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+        raise AssertionError('sin red en los tests')
+
+
+class TestLogFormat(unittest.TestCase):
+    """Tests para el formato del registro"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'traffic', 'test.rec')
+
+    def test_round_trip_with_compression_and_errors(self):
+        """Test: Respuestas, errores y respuestas grandes (comprimidas) se leen igual que se grabaron"""
+        recorder = recording.TrafficRecorder(self.path)
+        candles = [[1700000000000 + i, 0.08, 0.081, 0.079, 0.08, 1000.0] for i in range(500)]
+        recorder.write('ccxt', 'fetch_ticker', ('DOGE/USDT',), {}, 100.0, 0.012, {'last': 0.08})
+        recorder.write('ccxt', 'fetch_ohlcv', ('DOGE/USDT', '1m'), {'limit': 500}, 100.1, 0.05, candles)
+        recorder.write('ccxt', 'cancel_order', ('1', 'DOGE/USDT'), {}, 100.2, 0.02,
+                       error=ccxt.OrderNotFound('Unknown order sent.'))
+        recorder.close()
+
+        records = list(recording.read_log(self.path))
+        self.assertEqual([r.method for r in records], ['fetch_ticker', 'fetch_ohlcv', 'cancel_order'])
+        self.assertEqual(records[0].args, ['DOGE/USDT'])
+        self.assertEqual((records[0].timestamp, records[0].duration, records[0].result),
+                         (100.0, 0.012, {'last': 0.08}))
+        self.assertEqual(records[1].result, candles)
+        self.assertEqual(records[2].error['type'], 'OrderNotFound')
+        # JSON de 500 velas comprimido con zlib
+        self.assertLess(os.path.getsize(self.path), len(str(candles)) / 3)
+
+    def test_truncated_record_ignored(self):
+        """Test: Un registro a medio escribir al final (corte del bot) no impide leer el resto"""
+        recorder = recording.TrafficRecorder(self.path)
+        recorder.write('ccxt', 'fetch_ticker', ('DOGE/USDT',), {}, 100.0, 0.01, {'last': 0.08})
+        recorder.write('ccxt', 'fetch_ticker', ('DOGE/USDT',), {}, 100.5, 0.01, {'last': 0.081})
+        recorder.close()
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+
+        self.assertEqual([r.result['last'] for r in recording.read_log(self.path)], [0.08])
+
+
+class TestRecordAndReplay(unittest.TestCase):
+    """Tests para grabar un exchange y reproducirlo"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'ccxt.rec')
+
+    def _record_session(self):
+        recorder = recording.TrafficRecorder(self.path)
+        exchange = recording.record_ccxt(FakeExchange(), recorder)
+        exchange.fetch_ticker('DOGE/USDT')
+        exchange.price = 0.081
+        exchange.fetch_ticker('DOGE/USDT')
+        exchange.create_limit_buy_order('DOGE/USDT', 100, 0.08)
+        with self.assertRaises(ccxt.InsufficientFunds):
+            exchange.create_limit_buy_order('DOGE/USDT', 10000, 0.08)
+        recorder.close()
+        return recorder
+
+    def test_only_outermost_call_recorded(self):
+        """Test: create_limit_buy_order se graba una vez aunque llame a create_order"""
+        recorder = self._record_session()
+        records = list(recording.read_log(self.path))
+
+        self.assertEqual(recorder.records, 4)
+        self.assertEqual([r.method for r in records],
+                         ['fetch_ticker', 'fetch_ticker', 'create_limit_buy_order', 'create_limit_buy_order'])
+        self.assertIsNone(records[2].error)
+        self.assertEqual(records[3].error['module'].split('.')[0], 'ccxt')
+
+    def test_replay_is_deterministic_and_offline(self):
+        """Test: La reproducción devuelve lo grabado en orden, con los mismos errores y sin red"""
+        self._record_session()
+        exchange = ccxt.binance({'options': {'defaultType': 'future'}})
+        player = recording.TrafficPlayer(recording.read_log(self.path))
+        recording.replay_ccxt(exchange, player)
+
+        self.assertEqual([exchange.fetch_ticker('DOGE/USDT')['last'] for _ in range(2)], [0.08, 0.081])
+        self.assertEqual(exchange.create_limit_buy_order('DOGE/USDT', 100, 0.08)['id'], '1')
+        with self.assertRaises(ccxt.InsufficientFunds):
+            exchange.create_limit_buy_order('DOGE/USDT', 10000, 0.08)
+        self.assertEqual(player.remaining, 0)
+
+        with self.assertRaises(recording.ReplayMismatch):
+            exchange.fetch_ticker('DOGE/USDT')
+        with self.assertRaises(recording.ReplayMismatch):
+            exchange.fetch_balance()  # No grabado: llega a fetch2 y no sale a la red
+
+    def test_argument_check(self):
+        """Test: Con check_args una petición distinta de la grabada se detecta"""
+        self._record_session()
+        exchange = recording.replay_ccxt(
+            ccxt.binance(), recording.TrafficPlayer(recording.read_log(self.path), check_args=True))
+
+        exchange.fetch_ticker('DOGE/USDT')
+        with self.assertRaises(recording.ReplayMismatch):
+            exchange.fetch_ticker('XRP/USDT')
+
+    def test_wall_clock_speed(self):
+        """Test: speed=1 respeta el ritmo grabado y sin speed no espera"""
+        records = [recording.Record(1000.0 + i * 0.05, 0.01, 'ccxt', 'fetch_ticker', ['DOGE/USDT'], {},
+                                    {'last': 0.08}, None) for i in range(3)]
+
+        for speed, low, high in ((1.0, 0.11, 0.5), (None, 0.0, 0.05)):
+            player = recording.TrafficPlayer(records, speed=speed)
+            started = time.perf_counter()
+            for _ in records:
+                player.respond('ccxt', 'fetch_ticker')
+            elapsed = time.perf_counter() - started
+            self.assertTrue(low <= elapsed < high, (speed, elapsed))
+
+    def test_binance_client_round_trip(self):
+        """Test: Las peticiones de python-binance (y BinanceAPIException) se graban y reproducen"""
+        class FakeClient:
+            def _request_futures_api(self, method, path, signed=False, version=1, **kwargs):
+                if path == 'order':
+                    raise BinanceAPIException(None, 400, '{"code": -2019, "msg": "Margin is insufficient."}')
+                return [{'symbol': '1000SHIBUSDT', 'positionAmt': '0'}]
+
+        recorder = recording.TrafficRecorder(self.path)
+        client = recording.record_binance_client(FakeClient(), recorder)
+        client._request_futures_api('get', 'positionRisk', True, 2, data={'symbol': '1000SHIBUSDT'})
+        with self.assertRaises(BinanceAPIException):
+            client._request_futures_api('post', 'order', True, data={'symbol': '1000SHIBUSDT'})
+        recorder.close()
+
+        replay = recording.replay_binance_client(FakeClient(), recording.TrafficPlayer(recording.read_log(self.path)))
+        self.assertEqual(replay._request_futures_api('get', 'positionRisk', True, 2)[0]['positionAmt'], '0')
+        with self.assertRaises(BinanceAPIException) as error:
+            replay._request_futures_api('post', 'order', True)
+        self.assertEqual((error.exception.code, error.exception.message), (-2019, 'Margin is insufficient.'))
+
+    def test_warm_start_disabled_while_recording(self):
+        """Test: Grabando o reproduciendo no se usa la caché de arranque"""
+        bot = ScalpingBot.__new__(ScalpingBot)
+        exchange = ccxt.binance()
+        with patch.object(config, 'USE_WARM_START', True):
+            self.assertTrue(bot._warm_start_enabled(exchange))
+            recording.replay_ccxt(exchange, recording.TrafficPlayer([]))
+            self.assertFalse(bot._warm_start_enabled(exchange))
+
+    @patch('recording.open_log')
+    @patch('main.config')
+    @patch('main.utils')
+    @patch('main.ccxt.binance')
+    def test_mocked_config_does_not_record(self, mock_binance, mock_utils, mock_config, open_log):
+        """Test: Con config simulado (MagicMock) no se abre ningún registro en data/traffic"""
+        mock_config.configure_mock(
+            SYMBOL='DOGE/USDT', TIMEFRAME='1m', EMA_PERIOD=12, POSITION_SIZE_USDT=5, TAKE_PROFIT_PERCENT=0.6,
+            STOP_LOSS_PERCENT=0.4, TARGET_PROFIT_USDT=2.0, LOOP_INTERVAL=3, ENABLE_REAL_TRADING=False,
+            COOLDOWN_SECONDS=60, ENABLE_SHORT_POSITIONS=True, USE_FUTURES=True, LEVERAGE=10,
+            MARGIN_MODE='isolated', USE_SANDBOX=False, USE_DYNAMIC_POSITION_SIZE=False, POSITION_SIZE_PERCENT=10)
+        mock_binance.return_value.load_markets.return_value = {}
+
+        with patch('builtins.print'):
+            ScalpingBot(operation_mode='automatic')
+
+        open_log.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
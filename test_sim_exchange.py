@@ -0,0 +1,186 @@
+"""
+Test para el simulador de exchange (sim_exchange.py) y el bot en modo simulación
+"""
+
+import unittest
+from unittest.mock import patch
+
+import ccxt
+
+import batch_orders
+import config
+import order_state
+import sim_exchange
+import utils
+from main import ScalpingBot
+
+
+SYMBOL = 'DOGE/USDT'
+
+
+def _exchange(**kwargs):
+    exchange = sim_exchange.SimulatedExchange(**dict({'balance': 1000.0, 'leverage': 10}, **kwargs))
+    exchange.tick(SYMBOL, 0.08)
+    return exchange
+
+
+class TestMatching(unittest.TestCase):
+    """Tests para el emparejamiento de órdenes"""
+
+    def test_price_time_priority_and_partial_fills(self):
+        """Test: Mejor precio primero y, a igual precio, la orden más antigua; la liquidez se reparte"""
+        exchange = _exchange()
+        first = exchange.create_limit_buy_order(SYMBOL, 100, 0.0799)
+        second = exchange.create_limit_buy_order(SYMBOL, 100, 0.0799)
+        better = exchange.create_limit_buy_order(SYMBOL, 50, 0.07995)
+        self.assertEqual(first['status'], 'open')
+
+        exchange.tick(SYMBOL, 0.0799, quantity=120)
+
+        self.assertEqual(exchange.fetch_order(better['id'])['status'], 'closed')
+        first = exchange.fetch_order(first['id'])
+        self.assertEqual((first['filled'], first['status']), (70, 'open'))
+        self.assertEqual(exchange.fetch_order(second['id'])['filled'], 0)
+        self.assertEqual(len(exchange.fetch_open_orders(SYMBOL)), 2)
+
+    def test_marketable_limit_fills_as_taker(self):
+        """Test: Una LIMIT que cruza al llegar se ejecuta al mejor precio con comisión taker"""
+        exchange = _exchange()
+        exchange.tick(SYMBOL, 0.08, bid=0.0799, ask=0.0801)
+        order = exchange.create_limit_buy_order(SYMBOL, 100, 0.0805)
+
+        self.assertEqual((order['status'], order['average']), ('closed', 0.0801))
+        self.assertAlmostEqual(order['fee']['cost'], 100 * 0.0801 * sim_exchange.TAKER_FEE)
+
+    def test_position_pnl_and_fees(self):
+        """Test: Precio medio, PnL realizado y comisiones en el balance"""
+        exchange = _exchange()
+        exchange.create_market_buy_order(SYMBOL, 100)
+        exchange.tick(SYMBOL, 0.081)
+        exchange.create_market_buy_order(SYMBOL, 100)
+        position = exchange.fetch_positions([SYMBOL])[0]
+        self.assertEqual((position['side'], position['contracts']), ('long', 200))
+        self.assertAlmostEqual(position['entryPrice'], 0.0805)
+        self.assertAlmostEqual(position['unrealizedPnl'], 0.1)
+
+        exchange.create_limit_sell_order(SYMBOL, 200, 0.082)
+        exchange.tick(SYMBOL, 0.082)
+
+        fees = (100 * 0.08 + 100 * 0.081) * sim_exchange.TAKER_FEE + 200 * 0.082 * sim_exchange.MAKER_FEE
+        self.assertAlmostEqual(exchange.wallet_balance, 1000 + 200 * 0.0015 - fees)
+        self.assertEqual(exchange.fetch_positions([SYMBOL])[0]['contracts'], 0)
+        self.assertIsNone(utils.get_open_positions(exchange, SYMBOL))
+
+    def test_stop_market_close_position(self):
+        """Test: El stop se activa al cruzar su precio, cierra la posición y el take profit caduca"""
+        exchange = _exchange()
+        exchange.create_market_sell_order(SYMBOL, 100)
+        take_profit = exchange.create_order(SYMBOL, 'limit', 'buy', 100, 0.0795, {'reduceOnly': True})
+        stop = exchange.create_order(SYMBOL, 'STOP_MARKET', 'buy', None, None,
+                                     {'stopPrice': 0.0804, 'closePosition': True})
+        self.assertEqual(utils.get_open_positions(exchange, SYMBOL)['side'], 'SHORT')
+
+        exchange.tick(SYMBOL, 0.0803)
+        self.assertEqual(exchange.fetch_order(stop['id'])['status'], 'open')
+        exchange.tick(SYMBOL, 0.0805)
+
+        stop = exchange.fetch_order(stop['id'])
+        self.assertEqual((stop['status'], stop['filled'], stop['average']), ('closed', 100, 0.0805))
+        self.assertEqual(exchange.fetch_order(take_profit['id'])['status'], 'expired')
+        self.assertEqual(exchange.fetch_open_orders(SYMBOL), [])
+
+    def test_rejections(self):
+        """Test: Margen insuficiente, reduceOnly sin posición, stop que ya cruza y orden desconocida"""
+        exchange = _exchange(balance=10.0)
+        with self.assertRaises(ccxt.InsufficientFunds):
+            exchange.create_market_buy_order(SYMBOL, 2000)  # 160 USDT / 10x = 16 USDT de margen
+        exchange.create_market_buy_order(SYMBOL, 1000)
+        with self.assertRaises(ccxt.InvalidOrder):
+            exchange.create_order(SYMBOL, 'market', 'buy', 100, None, {'reduceOnly': True})
+        with self.assertRaises(ccxt.OrderImmediatelyFillable):
+            exchange.create_order(SYMBOL, 'STOP_MARKET', 'sell', None, None,
+                                  {'stopPrice': 0.081, 'closePosition': True})
+        with self.assertRaises(ccxt.OrderNotFound):
+            exchange.cancel_order('999', SYMBOL)
+
+    def test_batch_endpoints(self):
+        """Test: batchOrders coloca y cancela con resultados por orden, como Binance"""
+        exchange = _exchange()
+        exchange.create_market_buy_order(SYMBOL, 100)
+        requests = [
+            batch_orders.order_request(SYMBOL, 'sell', 'LIMIT', 100, price=0.0805, reduce_only=True),
+            batch_orders.order_request(SYMBOL, 'sell', 'STOP_MARKET', stop_price=0.0797, close_position=True),
+            batch_orders.order_request(SYMBOL, 'sell', 'STOP_MARKET', stop_price=0.0805, close_position=True),
+        ]
+        take_profit, stop, rejected = batch_orders.create_batch_orders(exchange, requests)
+        self.assertEqual((take_profit['type'], stop['type']), ('limit', 'stop_market'))
+        self.assertIsNone(rejected)
+
+        results = batch_orders.cancel_batch_orders(exchange, SYMBOL, [take_profit['id'], '999'])
+        self.assertEqual(results, {take_profit['id']: True, '999': False})
+
+    def test_replay_synthetic_ticks(self):
+        """Test: Los ticks sintéticos son reproducibles y ejecutan las órdenes"""
+        ticks = list(sim_exchange.random_walk(0.08, 500, seed=1))
+        self.assertEqual(ticks, list(sim_exchange.random_walk(0.08, 500, seed=1)))
+
+        exchange = _exchange()
+        low = min(price for _, price, _ in ticks)
+        order = exchange.create_limit_buy_order(SYMBOL, 100, low)
+        exchange.replay(SYMBOL, ticks)
+        self.assertEqual(exchange.fetch_order(order['id'])['status'], 'closed')
+
+    def test_simulated_ids_are_unique(self):
+        """Test: Las órdenes simuladas de utils.py no repiten ID dentro del mismo segundo"""
+        with patch('builtins.print'):
+            ids = {utils.create_limit_buy_order(None, SYMBOL, 20, 0.08, False)['id'] for _ in range(50)}
+        self.assertEqual(len(ids), 50)
+
+
+class TestPaperTradingBot(unittest.TestCase):
+    """Tests para el bot sin trading real contra el simulador"""
+
+    def setUp(self):
+        patcher = patch.multiple(config, ENABLE_REAL_TRADING=False, USE_SIMULATOR=True,
+                                 USE_DYNAMIC_POSITION_SIZE=False, POSITION_SIZE_USDT=20, USE_FUTURES=True,
+                                 LEVERAGE=10, EMA_PERIOD=12,
+                                 TAKE_PROFIT_PERCENT=0.6, STOP_LOSS_PERCENT=0.4, TARGET_PROFIT_USDT=2.0,
+                                 USE_PROTECTIVE_ORDERS=True, USE_WARM_START=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        print_patcher = patch('builtins.print')
+        print_patcher.start()
+        self.addCleanup(print_patcher.stop)
+
+        self.exchange = _exchange()
+        self.bot = ScalpingBot('automatic', symbol=SYMBOL, exchange=self.exchange, show_configuration=False)
+
+    def test_trade_lifecycle_in_simulator(self):
+        """Test: Entrada, take profit y stop loss en el simulador; el trade se cuenta al ejecutarse el stop"""
+        bot = self.bot
+        self.assertTrue(bot.paper_trading)
+        self.assertIs(bot.exchange, self.exchange)
+
+        bot._execute_buy(0.0799, 'LONG')
+        self.assertEqual(bot.position_state.phase, order_state.ENTRY_PENDING)
+
+        # El precio baja hasta la entrada: la reconciliación ve el llenado y coloca TP y SL
+        self.exchange.tick(SYMBOL, 0.0799)
+        bot._reconcile_state()
+        bot._sync_protective_orders()
+        self.assertEqual(bot.position_state.phase, order_state.OPEN)
+        self.assertTrue(bot.position_state.has_stop and bot.position_state.has_take_profit)
+        self.assertEqual(len(self.exchange.fetch_open_orders(SYMBOL)), 2)
+
+        self.exchange.tick(SYMBOL, 0.0790)
+        bot._reconcile_state()
+        bot._sync_protective_orders()
+
+        self.assertFalse(bot.in_position)
+        self.assertEqual((bot.total_trades, bot.losing_trades), (1, 1))
+        self.assertEqual(self.exchange.fetch_open_orders(SYMBOL), [])
+        self.assertLess(self.exchange.wallet_balance, 1000.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
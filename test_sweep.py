@@ -0,0 +1,85 @@
+"""
+Test para el barrido de parámetros vectorizado
+"""
+
+import random
+import unittest
+
+import numpy as np
+
+from backtest import Backtester
+from sweep import build_grid, run_sweep, sweep_kernel, _parse_range
+
+
+def _random_walk(n, seed=7):
+    rng = random.Random(seed)
+    candles = []
+    price = 0.08
+    for i in range(n):
+        open_ = price
+        close = max(0.01, open_ * (1 + rng.gauss(0, 0.003)))
+        high = max(open_, close) * (1 + abs(rng.gauss(0, 0.001)))
+        low = min(open_, close) * (1 - abs(rng.gauss(0, 0.001)))
+        candles.append((i * 60000, open_, high, low, close, 1.0))
+        price = close
+    return candles
+
+
+FIXED = dict(position_size_usdt=10.0, leverage=10, use_futures=True, enable_short_positions=True,
+             cooldown_seconds=120, maker_fee=0.0002, taker_fee=0.0005, entry_timeout_candles=3)
+
+
+class TestSweep(unittest.TestCase):
+    """Tests para el núcleo vectorizado"""
+
+    def test_matches_backtester_per_combination(self):
+        """Test: Cada combinación da el mismo resultado que Backtester"""
+        candles = _random_walk(3000)
+        grid = build_grid([3, 8, 20], [0.2, 0.6], [0.5], [0.5, 2.0])
+
+        results = run_sweep(np.array(candles), grid, **FIXED)
+
+        self.assertEqual(len(results), 12)
+        for row in results:
+            expected = Backtester(ema_period=row['ema_period'],
+                                  take_profit_percent=row['take_profit_percent'],
+                                  stop_loss_percent=row['stop_loss_percent'],
+                                  target_profit_usdt=row['target_profit_usdt'],
+                                  **FIXED).run(candles).stats()
+            self.assertGreater(expected['total_trades'], 0)
+            for field in ('total_trades', 'winning_trades', 'orders_canceled'):
+                self.assertEqual(row[field], expected[field], (row, field))
+            for field in ('total_profit_usd', 'total_fees_usd', 'max_drawdown_usd'):
+                self.assertAlmostEqual(row[field], expected[field], places=9)
+
+    def test_process_pool_gives_same_results(self):
+        """Test: Repartir la rejilla entre procesos no cambia los resultados"""
+        candles = np.array(_random_walk(1000, seed=3))
+        grid = build_grid([5, 12], [0.3, 0.5], [0.6], [1.0, 2.0])
+
+        serial = run_sweep(candles, grid, workers=1, **FIXED)
+        parallel = run_sweep(candles, grid, workers=2, **FIXED)
+
+        self.assertEqual(serial, parallel)
+
+    def test_spot_without_shorts(self):
+        """Test: En spot no hay SHORT ni apalancamiento"""
+        candles = _random_walk(1500, seed=11)
+        grid = build_grid([10], [0.4], [0.6], [0.2])
+        params = dict(FIXED, use_futures=False)
+
+        kernel = sweep_kernel(np.array(candles), grid, **params)
+        expected = Backtester(ema_period=10, take_profit_percent=0.6, stop_loss_percent=0.4,
+                              target_profit_usdt=0.2, **params).run(candles)
+
+        self.assertEqual(kernel['total_trades'][0], expected.total_trades)
+        self.assertAlmostEqual(kernel['total_profit_usd'][0], expected.total_profit_usd, places=9)
+
+    def test_parse_range(self):
+        """Test: Rangos como lista o inicio:fin:paso"""
+        self.assertEqual(_parse_range('8,12,20', int), [8, 12, 20])
+        self.assertEqual(_parse_range('0.2:0.6:0.2'), [0.2, 0.4, 0.6])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,146 @@
+"""
+Test para la capa de transporte HTTP con un servidor local
+"""
+
+import asyncio
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import ccxt
+import requests
+
+import transport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        _Handler.connections += 1
+
+    def do_GET(self):
+        body = b'{"serverTime": 1700000000000}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalServer:
+    def __enter__(self):
+        _Handler.connections = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://localhost:{self.server.server_address[1]}"
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestDnsCache(unittest.TestCase):
+    """Tests para DnsCache"""
+
+    def test_resolution_reused_until_ttl(self):
+        """Test: La resolución se reutiliza hasta que caduca"""
+        cache = transport.DnsCache(ttl=60)
+        with patch('socket.getaddrinfo', wraps=socket.getaddrinfo) as getaddrinfo:
+            first = cache.resolve('localhost', 80)
+            self.assertEqual(cache.resolve('localhost', 80), first)
+            self.assertEqual(getaddrinfo.call_count, 1)
+
+            cache.invalidate('localhost', 80)
+            cache.resolve('localhost', 80)
+            self.assertEqual(getaddrinfo.call_count, 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_expired_entry_resolves_again(self):
+        """Test: Con TTL 0 cada conexión nueva resuelve"""
+        cache = transport.DnsCache(ttl=0)
+        with patch('socket.getaddrinfo', wraps=socket.getaddrinfo) as getaddrinfo:
+            cache.resolve('localhost', 80)
+            cache.resolve('localhost', 80)
+        self.assertEqual(getaddrinfo.call_count, 2)
+
+
+class TestPooledAdapter(unittest.TestCase):
+    """Tests para PooledHTTPAdapter y su uso desde CCXT"""
+
+    def test_keep_alive_nodelay_and_dns_cache(self):
+        """Test: Varias peticiones usan una sola conexión con TCP_NODELAY y una sola resolución"""
+        cache = transport.DnsCache(ttl=60)
+        adapter = transport.PooledHTTPAdapter(pool_size=4, dns_cache=cache)
+        session = transport.mount(requests.Session(), adapter)
+
+        with LocalServer() as server:
+            for _ in range(5):
+                self.assertEqual(session.get(server.url + '/fapi/v1/time').status_code, 200)
+
+            (pool,) = [adapter.poolmanager.pools[key] for key in adapter.poolmanager.pools.keys()]
+            (conn,) = [c for c in pool.pool.queue if c is not None]
+            self.assertEqual(conn.sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY), 1)
+            self.assertEqual(conn.sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE), 1)
+            self.assertEqual(conn.host, 'localhost')  # TLS/SNI seguiría viendo el nombre original
+            self.assertEqual(_Handler.connections, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_sessions_share_connections(self):
+        """Test: CCXT y otra sesión (python-binance) comparten el pool de conexiones"""
+        adapter = transport.PooledHTTPAdapter(pool_size=4)
+        exchange = ccxt.binance()
+        with patch('transport.get_adapter', return_value=adapter):
+            transport.configure_ccxt(exchange, use_http2=False)
+            other = transport.mount(requests.Session())
+        other.trust_env = exchange.session.trust_env  # Mismo certificado de CA que CCXT (misma clave de pool)
+
+        with LocalServer() as server:
+            exchange.session.get(server.url + '/fapi/v1/time')
+            other.get(server.url + '/fapi/v1/time')
+            self.assertEqual(_Handler.connections, 1)
+        self.assertIs(exchange.session.get_adapter('https://fapi.binance.com'), adapter)
+
+    def test_http2_falls_back_when_unavailable(self):
+        """Test: Sin httpx/h2 se avisa y se usa HTTP/1.1 keep-alive"""
+        exchange = ccxt.binance()
+        with patch('transport.http2_available', return_value=False), patch('builtins.print') as printed:
+            transport.configure_ccxt(exchange, use_http2=True)
+
+        self.assertIsInstance(exchange.session, requests.Session)
+        self.assertIsInstance(exchange.session.get_adapter('https://fapi.binance.com'), transport.PooledHTTPAdapter)
+        printed.assert_called_once()
+
+
+class TestAsyncTransport(unittest.TestCase):
+    """Tests para el connector de aiohttp"""
+
+    def test_async_exchange_uses_tuned_connector(self):
+        """Test: El exchange asíncrono usa el connector con pool y caché de DNS"""
+        import ccxt.async_support as ccxt_async
+
+        async def scenario():
+            exchange = ccxt_async.binance()
+            transport.configure_ccxt_async(exchange)
+            connector = exchange.tcp_connector
+            try:
+                return connector.limit, connector.use_dns_cache
+            finally:
+                await exchange.close()
+
+        limit, use_dns_cache = asyncio.run(scenario())
+        self.assertEqual(limit, transport.config.HTTP_POOL_SIZE)
+        self.assertTrue(use_dns_cache)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,225 @@
+"""
+Test para el stream de datos de usuario usando un servidor local que
+reproduce eventos grabados de Binance Futures
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from fake_stream import FakeStreamServer
+from user_data import UserDataStream, ccxt_listen_key_functions
+
+
+def _order_update(status, filled, last_filled, execution='TRADE', order_id=8886774, event_ms=1700000002000):
+    return {"e": "ORDER_TRADE_UPDATE", "E": event_ms, "T": event_ms - 1, "o": {
+        "s": "DOGEUSDT", "c": "scalp-1", "S": "BUY", "o": "LIMIT", "f": "GTC", "q": "100", "p": "0.08000",
+        "ap": "0.08000" if filled else "0", "sp": "0", "x": execution, "X": status, "i": order_id,
+        "l": str(last_filled), "z": str(filled), "L": "0.08000" if last_filled else "0", "n": "0.0016",
+        "N": "USDT", "T": event_ms - 1, "t": 1, "R": False, "ps": "BOTH", "rp": "0"}}
+
+
+def _account_update(amount, entry_price, event_ms=1700000002001):
+    return {"e": "ACCOUNT_UPDATE", "E": event_ms, "T": event_ms - 1, "a": {
+        "m": "ORDER",
+        "B": [{"a": "USDT", "wb": "122.62", "cw": "100.81", "bc": "0"}],
+        "P": [{"s": "DOGEUSDT", "pa": str(amount), "ep": str(entry_price), "cr": "0", "up": "0",
+               "mt": "isolated", "iw": "0.8", "ps": "BOTH"}]}}
+
+
+# Eventos grabados de una entrada LONG de 100 DOGE llenada en dos partes (recortados)
+RECORDED_EVENTS = [
+    _order_update('NEW', 0, 0, execution='NEW', event_ms=1700000001000),
+    _order_update('PARTIALLY_FILLED', 40, 40, event_ms=1700000001500),
+    _account_update(40, 0.08, event_ms=1700000001501),
+    _order_update('FILLED', 100, 60, event_ms=1700000002000),
+    _account_update(100, 0.08, event_ms=1700000002001),
+]
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class FakeListenKeys:
+    """Crea listen keys numerados y cuenta los keepalive"""
+
+    def __init__(self):
+        self.created = 0
+        self.keepalives = []
+
+    def create(self):
+        self.created += 1
+        return f"key{self.created}"
+
+    def keepalive(self, key):
+        self.keepalives.append(key)
+
+
+class TestUserDataStream(unittest.TestCase):
+    """Tests para UserDataStream"""
+
+    def _stream(self, server, keys=None, **kwargs):
+        keys = keys or FakeListenKeys()
+        return UserDataStream(keys.create, keys.keepalive, base_url=server.url + '/ws', **kwargs)
+
+    def test_replay_recorded_events(self):
+        """Test: Los eventos grabados dejan órdenes, posición y balance en memoria"""
+        with FakeStreamServer(RECORDED_EVENTS) as server:
+            stream = self._stream(server)
+            stream.start()
+            try:
+                self.assertTrue(_wait_for(lambda: stream.messages_received == len(RECORDED_EVENTS)))
+            finally:
+                stream.stop()
+
+        self.assertEqual(stream.listen_key, 'key1')
+        order = stream.get_order(8886774)
+        self.assertEqual(order['status'], 'FILLED')
+        self.assertEqual(order['filled'], 100.0)
+        self.assertEqual(order['average'], 0.08)
+        self.assertEqual(order['client_order_id'], 'scalp-1')
+        self.assertAlmostEqual(order['commission'], 0.0048)
+
+        position = stream.get_position('DOGE/USDT')
+        self.assertEqual(position['amount'], 100.0)
+        self.assertEqual(position['entry_price'], 0.08)
+        self.assertEqual(stream.get_position('DOGEUSDT'), position)
+        self.assertEqual(stream.balances['USDT']['wallet'], 122.62)
+        self.assertEqual(stream.last_event_ms, 1700000002001)
+
+    def test_fill_is_known_without_polling(self):
+        """Test: Un llenado empujado por el servidor despierta al que espera en milisegundos"""
+        with FakeStreamServer(RECORDED_EVENTS[:1]) as server:
+            stream = self._stream(server)
+            stream.start()
+            try:
+                self.assertTrue(_wait_for(lambda: stream.get_order(8886774) is not None))
+
+                result = {}
+
+                def waiter():
+                    result['order'] = stream.wait_for_order(8886774, statuses=('FILLED',), timeout=5)
+                    result['woke_at'] = time.perf_counter()
+
+                thread = threading.Thread(target=waiter)
+                thread.start()
+                time.sleep(0.05)
+                sent_at = time.perf_counter()
+                server.send_to_all(RECORDED_EVENTS[3])
+                thread.join(5)
+            finally:
+                stream.stop()
+
+        self.assertEqual(result['order']['status'], 'FILLED')
+        self.assertLess(result['woke_at'] - sent_at, 0.2)
+
+    def test_position_open_and_close_waits(self):
+        """Test: Espera de apertura y cierre de posición, y símbolo desconocido"""
+        stream = UserDataStream(Mock(), Mock())
+        self.assertFalse(stream.wait_for_position_closed('DOGE/USDT', timeout=0))  # Sin eventos: no se sabe
+        self.assertIsNone(stream.wait_for_position_open('DOGE/USDT', timeout=0))
+
+        stream.handle_message(_account_update(-50, 0.081))
+        self.assertEqual(stream.wait_for_position_open('DOGE/USDT', timeout=0)['amount'], -50.0)
+        self.assertFalse(stream.wait_for_position_closed('DOGE/USDT', timeout=0))
+
+        threading.Timer(0.05, stream.handle_message, args=[_account_update(0, 0)]).start()
+        self.assertTrue(stream.wait_for_position_closed('DOGE/USDT', timeout=5))
+        self.assertIsNone(stream.get_position('DOGE/USDT'))
+
+    def test_stale_close_does_not_count(self):
+        """Test: El cierre de la operación anterior no da por cerrada la actual"""
+        stream = UserDataStream(Mock(), Mock())
+        stream.handle_message(_account_update(100, 0.08))
+        stream.handle_message(_account_update(0, 0))  # Cierre anterior
+
+        # La nueva posición aún no ha llegado por el stream: no se sabe si está cerrada
+        self.assertFalse(stream.wait_for_position_closed('DOGE/USDT', timeout=0))
+
+        # Un cierre que llega entre el envío de la orden y la espera sí cuenta
+        since = stream.sequence
+        stream.handle_message(_account_update(-50, 0.081))
+        stream.handle_message(_account_update(0, 0))
+        self.assertTrue(stream.wait_for_position_closed('DOGE/USDT', timeout=0, since=since))
+
+    def test_listen_key_expired_reconnects_with_new_key(self):
+        """Test: Si el listen key caduca se reconecta con uno nuevo"""
+        keys = FakeListenKeys()
+        with FakeStreamServer([{"e": "listenKeyExpired", "E": 1700000000000}]) as server:
+            stream = self._stream(server, keys)
+            stream.start()
+            try:
+                self.assertTrue(_wait_for(lambda: server.connections >= 2 and keys.created >= 2))
+            finally:
+                stream.stop()
+        self.assertEqual(stream.listen_key, f"key{keys.created}")
+
+    def test_keepalive_renews_listen_key(self):
+        """Test: El listen key se renueva periódicamente"""
+        keys = FakeListenKeys()
+        with FakeStreamServer([]) as server:
+            stream = self._stream(server, keys, keepalive_interval=0.05)
+            stream.start()
+            try:
+                self.assertTrue(_wait_for(lambda: len(keys.keepalives) >= 2))
+            finally:
+                stream.stop()
+        self.assertEqual(keys.keepalives[0], 'key1')
+
+    def test_listeners_receive_events(self):
+        """Test: Los listeners reciben cada orden y posición actualizada"""
+        stream = UserDataStream(Mock(), Mock())
+        received = []
+        stream.add_listener(lambda kind, record: received.append((kind, record['symbol'])))
+
+        for event in RECORDED_EVENTS[:3]:
+            stream.handle_message(event)
+
+        self.assertEqual(received, [('order', 'DOGEUSDT'), ('order', 'DOGEUSDT'), ('position', 'DOGEUSDT')])
+
+    def test_ccxt_listen_key_functions(self):
+        """Test: Listen key de Futures con CCXT"""
+        exchange = Mock()
+        exchange.fapiPrivatePostListenKey.return_value = {'listenKey': 'abc'}
+        create, keepalive = ccxt_listen_key_functions(exchange)
+
+        self.assertEqual(create(), 'abc')
+        keepalive('abc')
+        exchange.fapiPrivatePutListenKey.assert_called_once_with({'listenKey': 'abc'})
+
+
+class TestBotWaitForClose(unittest.TestCase):
+    """Tests para la espera de cierre del bot"""
+
+    def test_close_known_from_stream(self):
+        """Test: Con el stream conectado el cierre se detecta sin consultar posiciones"""
+        from main import ScalpingBot
+
+        bot = ScalpingBot.__new__(ScalpingBot)
+        bot.enable_real_trading = True
+        bot.exchange = Mock()
+        bot.symbol = 'DOGE/USDT'
+        bot._finalize_trade = Mock()
+        bot.user_data = UserDataStream(Mock(), Mock())
+        bot.user_data.connected.set()
+        bot.user_data.handle_message(_account_update(100, 0.08))
+
+        threading.Timer(0.05, bot.user_data.handle_message, args=[_account_update(0, 0)]).start()
+        with patch('utils.get_open_positions') as get_open_positions, patch('builtins.print'):
+            started = time.monotonic()
+            bot._wait_for_close(0.0805)
+
+        self.assertLess(time.monotonic() - started, 1.0)
+        get_open_positions.assert_not_called()
+        bot._finalize_trade.assert_called_once_with(0.0805)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
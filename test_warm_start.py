@@ -0,0 +1,153 @@
+"""
+Test para el arranque en caliente: mercados, hora y configuración de Futures en caché
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import ccxt
+
+import config
+import warm_start
+from main import ScalpingBot
+
+
+def _market(base):
+    return {
+        'id': f'{base}USDT', 'symbol': f'{base}/USDT:USDT', 'base': base, 'quote': 'USDT', 'settle': 'USDT',
+        'baseId': base, 'quoteId': 'USDT', 'settleId': 'USDT', 'type': 'swap', 'spot': False, 'margin': False,
+        'swap': True, 'future': False, 'option': False, 'contract': True, 'linear': True, 'inverse': False,
+        'active': True, 'contractSize': 1, 'precision': {'price': 0.00001, 'amount': 1},
+        'limits': {'amount': {'min': 1, 'max': 1000000}, 'cost': {'min': 5}},
+        'info': {'symbol': f'{base}USDT', 'filters': []},
+    }
+
+
+MARKETS = [_market('DOGE'), _market('BTC'), _market('ETH')]
+
+
+def _exchange():
+    return ccxt.binance({'apiKey': 'key', 'secret': 'secret', 'options': {'defaultType': 'future'}})
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'data', 'exchange_cache.json')
+        self.cache = warm_start.ExchangeCache(self.path, ttl=3600)
+
+
+class TestWarmMarkets(CacheTestCase):
+    """Tests para la carga de mercados y hora desde la caché"""
+
+    def test_cold_then_warm_start(self):
+        """Test: El primer arranque descarga solo linear y guarda los símbolos; el segundo no pide nada"""
+        cold = _exchange()
+        with patch.object(cold, 'fetch_markets', return_value=MARKETS) as fetch_markets:
+            from_cache = warm_start.load_markets(cold, ['DOGE/USDT'], 'future', cache=self.cache)
+
+        self.assertFalse(from_cache)
+        fetch_markets.assert_called_once()
+        self.assertEqual(cold.options['fetchMarkets']['types'], ['linear'])
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertEqual([m['symbol'] for m in saved['markets']['future']['markets']], ['DOGE/USDT:USDT'])
+
+        warm = _exchange()
+        cache = warm_start.ExchangeCache(self.path, ttl=3600)
+        with patch.object(warm, 'fetch_markets') as fetch_markets, \
+                patch.object(warm, 'fetch_currencies') as fetch_currencies:
+            self.assertTrue(warm_start.load_markets(warm, ['DOGE/USDT'], 'future', cache=cache))
+        fetch_markets.assert_not_called()
+        fetch_currencies.assert_not_called()
+        self.assertEqual(warm.market('DOGE/USDT')['id'], 'DOGEUSDT')
+
+    def test_expired_or_incomplete_cache_refetches(self):
+        """Test: Con la caché caducada o sin algún símbolo se vuelven a descargar los mercados"""
+        with patch.object(ccxt.binance, 'fetch_markets', return_value=MARKETS) as fetch_markets:
+            warm_start.load_markets(_exchange(), ['DOGE/USDT'], 'future', cache=self.cache)
+            self.assertFalse(warm_start.load_markets(_exchange(), ['DOGE/USDT', 'BTC/USDT'], 'future',
+                                                     cache=self.cache))
+            self.assertTrue(warm_start.load_markets(_exchange(), ['BTC/USDT'], 'future', cache=self.cache))
+            # Testnet y producción no comparten caché
+            self.assertFalse(warm_start.load_markets(_exchange(), ['BTC/USDT'], 'future', sandbox=True,
+                                                     cache=self.cache))
+
+            self.cache.ttl = 0
+            self.assertFalse(warm_start.load_markets(_exchange(), ['BTC/USDT'], 'future', cache=self.cache))
+        self.assertEqual(fetch_markets.call_count, 4)
+
+    def test_time_difference_cached(self):
+        """Test: La diferencia de hora se reutiliza mientras no caduca"""
+        exchange = _exchange()
+
+        def load_time_difference():
+            exchange.options['timeDifference'] = 42
+
+        with patch.object(exchange, 'load_time_difference', side_effect=load_time_difference) as load:
+            self.assertFalse(warm_start.load_time_difference(exchange, 'future', cache=self.cache))
+            other = _exchange()
+            self.assertTrue(warm_start.load_time_difference(other, 'future', cache=self.cache))
+        load.assert_called_once()
+        self.assertEqual(other.options['timeDifference'], 42)
+
+
+class TestWarmFuturesConfig(CacheTestCase):
+    """Tests para apalancamiento y modo de margen sin llamadas redundantes"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch.multiple(config, USE_WARM_START=True, USE_FUTURES=True, LEVERAGE=10, MARGIN_MODE='isolated',
+                                 ENABLE_REAL_TRADING=True, USE_SANDBOX=False, API_KEY='key',
+                                 USE_DYNAMIC_POSITION_SIZE=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for target in (patch('warm_start.get_cache', return_value=self.cache), patch('builtins.print')):
+            target.start()
+            self.addCleanup(target.stop)
+
+    def _bot(self, margin_error=None):
+        exchange = _exchange()
+        self.leverage = patch.object(exchange, 'fapiPrivate_post_leverage', create=True).start()
+        self.margin = patch.object(exchange, 'fapiPrivate_post_margintype', create=True,
+                                   side_effect=margin_error).start()
+        self.addCleanup(patch.stopall)
+        return ScalpingBot('automatic', symbol='DOGE/USDT', exchange=exchange, show_configuration=False)
+
+    def test_second_start_skips_leverage_and_margin(self):
+        """Test: Con la configuración ya aplicada no se repiten las llamadas"""
+        self._bot(margin_error=ccxt.ExchangeError('binance {"code":-4046,"msg":"No need to change margin type."}'))
+        self.leverage.assert_called_once()
+        self.assertEqual(self.cache.get_account_config(warm_start.account_key('key'), 'DOGEUSDT'),
+                         {'leverage': 10, 'margin_type': 'ISOLATED'})
+
+        self._bot()
+        self.leverage.assert_not_called()
+        self.margin.assert_not_called()
+
+    def test_failed_configuration_not_remembered(self):
+        """Test: Si falla el apalancamiento no se guarda y se reintenta en el siguiente arranque"""
+        self._bot(margin_error=ccxt.ExchangeError('binance {"code":-4048,"msg":"Margin type cannot be changed"}'))
+        self.assertIsNone(self.cache.get_account_config(warm_start.account_key('key'), 'DOGEUSDT'))
+
+        self._bot()
+        self.leverage.assert_called_once()
+
+    def test_reconciliation_detects_external_change(self):
+        """Test: positionRisk con otro apalancamiento invalida la caché y reconfigura"""
+        bot = self._bot()
+        row = {'symbol': 'DOGEUSDT', 'positionAmt': '0', 'entryPrice': '0', 'positionSide': 'BOTH',
+               'leverage': '10', 'marginType': 'isolated'}
+        self.assertFalse(bot._futures_config_changed([row]))
+
+        self.assertTrue(bot._futures_config_changed([dict(row, leverage='20')]))
+        self.assertIsNone(self.cache.get_account_config(warm_start.account_key('key'), 'DOGEUSDT'))
+        self.assertTrue(bot._futures_config_changed([dict(row, marginType='cross')]))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,314 @@
+"""
+Capa de transporte HTTP para las peticiones REST al exchange
+
+Por defecto CCXT y python-binance usan una requests.Session sin ajustar y
+cada cliente tiene su propio pool de conexiones. Aquí se crea un único
+adaptador de conexiones para todo el proceso:
+
+- Conexiones keep-alive reutilizadas entre peticiones (sin handshake TCP+TLS
+  por orden) con tamaño de pool configurable.
+- TCP_NODELAY (sin esperar a Nagle) y SO_KEEPALIVE en cada socket.
+- Caché de DNS con TTL: las conexiones nuevas no esperan a getaddrinfo.
+- HTTP/2 opcional para CCXT si están instalados httpx y h2 (si no, se sigue
+  con HTTP/1.1 keep-alive).
+
+El adaptador se monta en la sesión de CCXT y en la de python-binance, así que
+las dos comparten las mismas conexiones abiertas. La variante asíncrona
+(ccxt.async_support) usa un TCPConnector de aiohttp con los mismos ajustes.
+"""
+
+import socket
+import threading
+import time
+from typing import Optional, Dict, Tuple, List
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import config
+
+
+class DnsCache:
+    """
+    Caché de resolución DNS con TTL compartida por las conexiones del adaptador
+    """
+
+    def __init__(self, ttl: float = config.HTTP_DNS_CACHE_TTL):
+        """
+        Args:
+            ttl: Segundos que se reutiliza una resolución
+        """
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        """
+        Direcciones IP de host (de la caché si no ha caducado)
+
+        Returns:
+            Lista de IPs en el orden de getaddrinfo
+        """
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+        infos = socket.getaddrinfo(host, port, socket.AF_UNSPEC, socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (now + self.ttl, addresses)
+        return addresses
+
+    def invalidate(self, host: str, port: int):
+        """Descarta la resolución de host (por ejemplo tras un fallo de conexión)"""
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+def _is_ip(host: str) -> bool:
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+            return True
+        except OSError:
+            pass
+    return False
+
+
+class _CachedDnsMixin:
+    """Conexión de urllib3 que resuelve el host con la DnsCache del adaptador"""
+
+    dns_cache: Optional[DnsCache] = None
+
+    def _new_conn(self):
+        host = self._dns_host
+        if self.dns_cache is None or _is_ip(host.rstrip('.')):
+            return super()._new_conn()
+        addresses = self.dns_cache.resolve(host, self.port)
+        error = None
+        for address in addresses:
+            # Solo se cambia el destino del socket: TLS (SNI y verificación) usa el nombre original
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except Exception as e:
+                error = e
+            finally:
+                self._dns_host = host
+        self.dns_cache.invalidate(host, self.port)
+        if error is None:
+            return super()._new_conn()
+        raise error
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    Adaptador de requests con pool keep-alive, TCP_NODELAY, SO_KEEPALIVE y caché de DNS
+    """
+
+    def __init__(self, pool_size: int = config.HTTP_POOL_SIZE, tcp_nodelay: bool = config.HTTP_TCP_NODELAY,
+                 dns_cache: Optional[DnsCache] = None):
+        """
+        Args:
+            pool_size: Conexiones abiertas que se conservan por host
+            tcp_nodelay: Desactivar el algoritmo de Nagle
+            dns_cache: Caché de DNS (None para resolver en cada conexión nueva)
+        """
+        self.tcp_nodelay = tcp_nodelay
+        self.dns_cache = dns_cache
+        # Sin reintentos aquí: los reintentos los decide el bot (una orden no se reenvía a ciegas)
+        super().__init__(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+
+    def socket_options(self) -> list:
+        options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        if self.tcp_nodelay:
+            options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+        return options
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs['socket_options'] = self.socket_options()
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        if self.dns_cache is not None:
+            cache = self.dns_cache
+            http_conn = type('CachedHTTPConnection', (_CachedDnsMixin, HTTPConnection), {'dns_cache': cache})
+            https_conn = type('CachedHTTPSConnection', (_CachedDnsMixin, HTTPSConnection), {'dns_cache': cache})
+            self.poolmanager.pool_classes_by_scheme = {
+                'http': type('CachedHTTPConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': http_conn}),
+                'https': type('CachedHTTPSConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': https_conn}),
+            }
+
+
+_shared_adapter: Optional[PooledHTTPAdapter] = None
+_shared_lock = threading.Lock()
+
+
+def get_adapter() -> PooledHTTPAdapter:
+    """
+    Adaptador compartido por todo el proceso (creado con la configuración de config.py)
+    """
+    global _shared_adapter
+    with _shared_lock:
+        if _shared_adapter is None:
+            dns_cache = DnsCache(config.HTTP_DNS_CACHE_TTL) if config.HTTP_DNS_CACHE_TTL > 0 else None
+            _shared_adapter = PooledHTTPAdapter(config.HTTP_POOL_SIZE, config.HTTP_TCP_NODELAY, dns_cache)
+        return _shared_adapter
+
+
+def mount(session: requests.Session, adapter: Optional[PooledHTTPAdapter] = None) -> requests.Session:
+    """
+    Monta el adaptador en una sesión de requests (conserva sus cabeceras y ajustes)
+
+    Args:
+        session: Sesión de requests (la de CCXT o la de python-binance)
+        adapter: Adaptador (por defecto el compartido del proceso)
+
+    Returns:
+        La misma sesión
+    """
+    adapter = adapter or get_adapter()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class _Http2Response:
+    """Respuesta de httpx con la interfaz de requests que usa CCXT"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = response.headers
+        self.encoding = 'utf-8'
+
+    @property
+    def text(self) -> str:
+        return self._response.text
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} {self.reason}", response=self)
+
+
+class Http2Session:
+    """
+    Sesión HTTP/2 (httpx) con la interfaz de requests.Session que usa CCXT
+
+    Una sola conexión multiplexa todas las peticiones al host. Los errores de
+    httpx se traducen a las excepciones de requests que CCXT ya sabe manejar.
+    """
+
+    def __init__(self, pool_size: int = config.HTTP_POOL_SIZE, keepalive_timeout: float = config.HTTP_KEEPALIVE_TIMEOUT):
+        import httpx
+
+        self._httpx = httpx
+        self._client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size,
+                                keepalive_expiry=keepalive_timeout),
+        )
+        self.cookies = self._client.cookies
+        self.headers = self._client.headers
+        self.trust_env = False
+
+    def request(self, method, url, data=None, headers=None, timeout=None, proxies=None, verify=True,
+                files=None, **kwargs):
+        httpx = self._httpx
+        try:
+            response = self._client.request(method, url, content=data, headers=headers, timeout=timeout)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        return _Http2Response(response)
+
+    def close(self):
+        self._client.close()
+
+
+def http2_available() -> bool:
+    """True si httpx y h2 están instalados"""
+    try:
+        import httpx  # noqa: F401
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def configure_ccxt(exchange, use_http2: bool = config.HTTP_USE_HTTP2):
+    """
+    Hace que un exchange CCXT síncrono use el transporte compartido
+
+    Args:
+        exchange: Instancia de ccxt (síncrona)
+        use_http2: Usar HTTP/2 (requiere httpx y h2; si faltan se usa HTTP/1.1 keep-alive)
+
+    Returns:
+        El mismo exchange
+    """
+    if use_http2:
+        if http2_available():
+            exchange.session = Http2Session()
+            return exchange
+        print("⚠️  HTTP/2 no disponible (pip install httpx[http2]). Usando HTTP/1.1 keep-alive")
+    mount(exchange.session)
+    return exchange
+
+
+def configure_binance_client(client):
+    """
+    Hace que un Client de python-binance use el transporte compartido
+
+    Returns:
+        El mismo cliente
+    """
+    mount(client.session)
+    return client
+
+
+def aiohttp_connector(pool_size: int = config.HTTP_POOL_SIZE,
+                      dns_cache_ttl: float = config.HTTP_DNS_CACHE_TTL,
+                      keepalive_timeout: float = config.HTTP_KEEPALIVE_TIMEOUT):
+    """
+    TCPConnector de aiohttp con los mismos ajustes (crear dentro del loop)
+
+    aiohttp ya activa TCP_NODELAY en sus sockets.
+    """
+    import aiohttp
+
+    return aiohttp.TCPConnector(
+        limit=pool_size,
+        limit_per_host=pool_size,
+        use_dns_cache=dns_cache_ttl > 0,
+        ttl_dns_cache=dns_cache_ttl if dns_cache_ttl > 0 else None,
+        keepalive_timeout=keepalive_timeout,
+        enable_cleanup_closed=True,
+    )
+
+
+def configure_ccxt_async(exchange):
+    """
+    Crea la sesión aiohttp de un exchange de ccxt.async_support con el connector ajustado
+
+    Debe llamarse dentro del loop de asyncio y antes de la primera petición.
+    CCXT sigue siendo el dueño de la sesión y la cierra en ``close()``.
+
+    Returns:
+        El mismo exchange
+    """
+    import aiohttp
+
+    if exchange.session is None:
+        exchange.tcp_connector = aiohttp_connector()
+        exchange.session = aiohttp.ClientSession(connector=exchange.tcp_connector,
+                                                 trust_env=exchange.aiohttp_trust_env)
+    return exchange
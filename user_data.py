@@ -0,0 +1,351 @@
+"""
+Stream de datos de usuario (listen key) de Binance
+Recibe ORDER_TRADE_UPDATE y ACCOUNT_UPDATE y mantiene en memoria el estado de
+órdenes, posiciones y balances, para saber cuándo se llena una orden o se
+cierra una posición en milisegundos sin consultar la API REST en bucle
+"""
+
+import json
+import threading
+import time
+from typing import Optional, Dict, Any, List, Callable, Tuple
+
+from market_data import run_stream, stream_symbol, ws_connect
+
+
+FUTURES_USER_STREAM_URL = 'wss://fstream.binance.com/ws/'
+FUTURES_TESTNET_USER_STREAM_URL = 'wss://stream.binancefuture.com/ws/'
+SPOT_USER_STREAM_URL = 'wss://stream.binance.com:9443/ws/'
+
+KEEPALIVE_INTERVAL = 30 * 60  # Binance caduca el listen key a los 60 minutos sin keepalive
+
+# Estados de orden finales
+FINAL_ORDER_STATUSES = ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED', 'EXPIRED_IN_MATCH')
+
+
+def ccxt_listen_key_functions(exchange, use_futures: bool = True) -> Tuple[Callable, Callable]:
+    """
+    Funciones para crear y renovar el listen key con un exchange CCXT
+
+    Args:
+        exchange: Instancia de ccxt.binance
+        use_futures: Si se usa el stream de Futures (USD-M)
+
+    Returns:
+        Tupla (crear listen key, keepalive del listen key)
+    """
+    if use_futures:
+        return (lambda: exchange.fapiPrivatePostListenKey()['listenKey'],
+                lambda key: exchange.fapiPrivatePutListenKey({'listenKey': key}))
+    return (lambda: exchange.publicPostUserDataStream()['listenKey'],
+            lambda key: exchange.publicPutUserDataStream({'listenKey': key}))
+
+
+def binance_client_listen_key_functions(client) -> Tuple[Callable, Callable]:
+    """
+    Funciones para crear y renovar el listen key de Futures con python-binance
+
+    Args:
+        client: binance.client.Client
+
+    Returns:
+        Tupla (crear listen key, keepalive del listen key)
+    """
+    return client.futures_stream_get_listen_key, client.futures_stream_keepalive
+
+
+class UserDataStream:
+    """
+    Consumidor en segundo plano del stream de datos de usuario
+
+    Cada conexión pide un listen key nuevo, un hilo aparte lo renueva cada
+    KEEPALIVE_INTERVAL y, si Binance avisa de que caducó (listenKeyExpired),
+    se reconecta con uno nuevo.
+    """
+
+    def __init__(self, create_listen_key: Callable[[], str], keepalive_listen_key: Callable[[str], Any],
+                 use_futures: bool = True, use_testnet: bool = False, base_url: Optional[str] = None,
+                 keepalive_interval: float = KEEPALIVE_INTERVAL):
+        """
+        Args:
+            create_listen_key: Función que crea un listen key y lo devuelve
+            keepalive_listen_key: Función que renueva un listen key
+            use_futures: Si se usa el stream de Futures
+            use_testnet: Si se usa el testnet de Futures
+            base_url: URL base del stream (el listen key se añade al final)
+            keepalive_interval: Segundos entre renovaciones del listen key
+        """
+        if base_url is None:
+            if not use_futures:
+                base_url = SPOT_USER_STREAM_URL
+            elif use_testnet:
+                base_url = FUTURES_TESTNET_USER_STREAM_URL
+            else:
+                base_url = FUTURES_USER_STREAM_URL
+        self.base_url = base_url.rstrip('/') + '/'
+        self.keepalive_interval = keepalive_interval
+        self._create_listen_key = create_listen_key
+        self._keepalive_listen_key = keepalive_listen_key
+        self.listen_key: Optional[str] = None
+
+        # Estado en memoria (protegido por la condición)
+        self._condition = threading.Condition()
+        self.orders: Dict[str, Dict[str, Any]] = {}      # Por ID de orden del exchange
+        self.positions: Dict[str, Dict[str, Any]] = {}   # Por símbolo de Binance (ej: 'DOGEUSDT')
+        self.balances: Dict[str, Dict[str, float]] = {}  # Por activo (ej: 'USDT')
+        self.sequence = 0  # Se incrementa con cada evento aplicado
+        self.last_event_ms: Optional[int] = None
+        self.last_update_at: Optional[float] = None  # time.perf_counter() del último evento
+        self.messages_received = 0
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+        self._stop_event = threading.Event()
+        self._reconnect = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._keepalive_thread: Optional[threading.Thread] = None
+        self.connected = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """
+        Arranca los hilos del stream y del keepalive del listen key
+        """
+        if ws_connect is None:
+            raise RuntimeError("Módulo 'websockets' no disponible. Instala con: pip install websockets")
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="user-data", daemon=True)
+        self._thread.start()
+        self._keepalive_thread = threading.Thread(target=self._keepalive_loop, name="user-data-keepalive",
+                                                  daemon=True)
+        self._keepalive_thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Detiene los hilos del stream
+        """
+        self._stop_event.set()
+        for thread in (self._thread, self._keepalive_thread):
+            if thread:
+                thread.join(timeout)
+        self.connected.clear()
+
+    def _next_url(self) -> str:
+        self.listen_key = self._create_listen_key()
+        return self.base_url + self.listen_key
+
+    def _run(self):
+        run_stream(self._next_url, self.handle_message, self._stop_event, self.connected,
+                   reconnect=self._reconnect, label='Stream de usuario')
+
+    def _keepalive_loop(self):
+        while not self._stop_event.wait(self.keepalive_interval):
+            if self.listen_key is None:
+                continue
+            try:
+                self._keepalive_listen_key(self.listen_key)
+            except Exception as e:
+                print(f"⚠️  No se pudo renovar el listen key ({e}). Reconectando con uno nuevo...")
+                self._reconnect.set()
+
+    def add_listener(self, callback: Callable[[str, Dict[str, Any]], None]):
+        """
+        Registra una función que recibe cada evento aplicado
+
+        Se llama desde el hilo del stream con el tipo de evento y el registro
+        actualizado (orden o posición), sin el lock tomado.
+
+        Args:
+            callback: Función (evento, registro)
+        """
+        self._listeners.append(callback)
+
+    # ------------------------------------------------------------------
+    # Procesamiento de mensajes
+    # ------------------------------------------------------------------
+
+    def handle_message(self, raw):
+        """
+        Procesa un mensaje del stream de usuario
+
+        Args:
+            raw: Mensaje JSON (str/bytes) o dict ya decodificado
+        """
+        received_at = time.perf_counter()
+        message = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        data = message.get('data', message)
+        event = data.get('e')
+
+        if event == 'listenKeyExpired':
+            print("⚠️  Listen key caducado. Reconectando con uno nuevo...")
+            self._reconnect.set()
+            return
+
+        with self._condition:
+            if event == 'ORDER_TRADE_UPDATE':
+                updated = [('order', self._apply_order(data['o'], received_at))]
+            elif event == 'executionReport':  # Spot
+                updated = [('order', self._apply_order(data, received_at))]
+            elif event == 'ACCOUNT_UPDATE':
+                updated = [('position', p) for p in self._apply_account(data['a'], received_at)]
+            else:
+                return
+            self.last_event_ms = data.get('E')
+            self.last_update_at = received_at
+            self.messages_received += 1
+            self.sequence += 1
+            self._condition.notify_all()
+
+        for kind, record in updated:
+            for callback in self._listeners:
+                callback(kind, record)
+
+    def _apply_order(self, o: Dict[str, Any], received_at: float) -> Dict[str, Any]:
+        # Llamar con la condición tomada
+        order_id = str(o['i'])
+        order = self.orders.setdefault(order_id, {'id': order_id})
+        order.update({
+            'client_order_id': o.get('c'),
+            'symbol': o.get('s'),
+            'side': o.get('S'),
+            'type': o.get('o'),
+            'status': o.get('X'),
+            'execution_type': o.get('x'),
+            'price': float(o.get('p') or 0),
+            'stop_price': float(o.get('sp') or 0),
+            'amount': float(o.get('q') or 0),
+            'filled': float(o.get('z') or 0),
+            'last_filled': float(o.get('l') or 0),
+            'last_price': float(o.get('L') or 0),
+            'average': float(o.get('ap') or 0),
+            'reduce_only': bool(o.get('R', False)),
+            'realized_pnl': float(o.get('rp') or 0),
+            'commission': order.get('commission', 0.0) + float(o.get('n') or 0),
+            'timestamp': o.get('T'),
+            'received_at': received_at,
+        })
+        return order
+
+    def _apply_account(self, a: Dict[str, Any], received_at: float) -> List[Dict[str, Any]]:
+        # Llamar con la condición tomada
+        for b in a.get('B', []):
+            self.balances[b['a']] = {
+                'wallet': float(b.get('wb') or 0),
+                'cross_wallet': float(b.get('cw') or 0),
+            }
+        updated = []
+        for p in a.get('P', []):
+            side = p.get('ps', 'BOTH')
+            key = p['s'] if side == 'BOTH' else f"{p['s']}:{side}"  # Modo hedge: una entrada por lado
+            position = {
+                'symbol': p['s'],
+                'position_side': side,
+                'amount': float(p['pa']),
+                'entry_price': float(p['ep']),
+                'unrealized_pnl': float(p.get('up') or 0),
+                'received_at': received_at,
+                'sequence': self.sequence + 1,  # Número de este evento (ver wait_for_position_closed)
+            }
+            self.positions[key] = position
+            updated.append(position)
+        return updated
+
+    # ------------------------------------------------------------------
+    # Lectura del estado (sin red)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _key(symbol: str) -> str:
+        return stream_symbol(symbol).upper()
+
+    def get_order(self, order_id) -> Optional[Dict[str, Any]]:
+        """
+        Último estado conocido de una orden, o None si no llegó ningún evento suyo
+        """
+        with self._condition:
+            order = self.orders.get(str(order_id))
+            return dict(order) if order else None
+
+    def get_position(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Posición abierta de un símbolo según el stream
+
+        Args:
+            symbol: Par de trading (ej: 'DOGE/USDT' o 'DOGEUSDT')
+
+        Returns:
+            Posición con amount != 0, o None si está cerrada o no hay eventos del símbolo
+        """
+        with self._condition:
+            position = self._open_position(self._key(symbol))
+            return dict(position) if position else None
+
+    def _open_position(self, key: str) -> Optional[Dict[str, Any]]:
+        # Llamar con la condición tomada
+        for position in self.positions.values():
+            if position['symbol'] == key and position['amount'] != 0:
+                return position
+        return None
+
+    def _is_closed(self, key: str, since: int) -> bool:
+        # Llamar con la condición tomada. Solo cuenta un evento del símbolo posterior a
+        # since: un cierre anterior es el de otra posición (o no se sabe nada todavía)
+        recent = any(p['symbol'] == key and p['sequence'] > since for p in self.positions.values())
+        return recent and self._open_position(key) is None
+
+    def wait_for_order(self, order_id, statuses=FINAL_ORDER_STATUSES,
+                       timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Bloquea hasta que la orden llegue a uno de ``statuses``
+
+        Args:
+            order_id: ID de la orden del exchange
+            statuses: Estados que se esperan (por defecto, cualquier estado final)
+            timeout: Segundos máximos de espera
+
+        Returns:
+            Estado de la orden, o None si expiró el timeout
+        """
+        order_id = str(order_id)
+        with self._condition:
+            done = self._condition.wait_for(
+                lambda: self.orders.get(order_id, {}).get('status') in statuses, timeout)
+            return dict(self.orders[order_id]) if done else None
+
+    def wait_for_position_open(self, symbol: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Bloquea hasta que el stream informe de una posición abierta en ``symbol``
+
+        Returns:
+            Posición abierta, o None si expiró el timeout
+        """
+        key = self._key(symbol)
+        with self._condition:
+            if self._condition.wait_for(lambda: self._open_position(key) is not None, timeout):
+                return dict(self._open_position(key))
+            return None
+
+    def wait_for_position_closed(self, symbol: str, timeout: Optional[float] = None,
+                                 since: Optional[int] = None) -> bool:
+        """
+        Bloquea hasta que el stream informe de que la posición de ``symbol`` está cerrada
+
+        Un cierre visto antes de ``since`` no cuenta: el estado en memoria puede
+        ser el de la operación anterior, antes de que llegue la posición actual.
+
+        Args:
+            symbol: Par de trading
+            timeout: Segundos máximos de espera
+            since: ``sequence`` leído antes de enviar la orden de cierre (por defecto, el actual)
+
+        Returns:
+            True si se cerró, False si expiró el timeout
+        """
+        key = self._key(symbol)
+        with self._condition:
+            since = self.sequence if since is None else since
+            return self._condition.wait_for(lambda: self._is_closed(key, since), timeout)
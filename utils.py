@@ -3,13 +3,19 @@ Utilidades para el bot de scalping
 Funciones auxiliares para obtener precios, calcular indicadores técnicos, etc.
 """
 
-import ccxt
-import pandas as pd
-import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Union, TYPE_CHECKING
 
+import batch_orders
+import market_filters
+from candle_buffer import CandleBuffer
+from indicators import IncrementalEMA
 
-def get_current_price(exchange: ccxt.Exchange, symbol: str) -> Optional[float]:
+if TYPE_CHECKING:
+    import ccxt  # Solo para las anotaciones: utils no carga ccxt (backtests sin exchange)
+    import pandas as pd  # pandas solo se carga al pedir un DataFrame (análisis), no en el bot en vivo
+
+
+def get_current_price(exchange: 'ccxt.Exchange', symbol: str) -> Optional[float]:
     """
     Obtiene el precio actual del símbolo especificado
     
@@ -28,21 +34,34 @@ def get_current_price(exchange: ccxt.Exchange, symbol: str) -> Optional[float]:
         return None
 
 
-def get_ohlcv_data(exchange: ccxt.Exchange, symbol: str, timeframe: str, limit: int = 100) -> Optional[pd.DataFrame]:
+def get_ohlcv_data(exchange: 'ccxt.Exchange', symbol: str, timeframe: str, limit: int = 100,
+                   store=None) -> Optional['pd.DataFrame']:
     """
-    Obtiene datos OHLCV (velas) del exchange
+    Obtiene datos OHLCV (velas) del exchange como DataFrame de pandas
+    
+    Pensada para análisis: importa pandas al llamarla. El bot en vivo usa
+    ``get_ohlcv_buffer``, que no crea DataFrames.
     
     Args:
         exchange: Instancia del exchange de CCXT
         symbol: Par de trading (ej: 'BTC/USDT')
         timeframe: Timeframe de las velas (ej: '1m', '5m', '1h')
         limit: Número de velas a obtener
+        store: CandleStore opcional. Si se indica, solo se descargan las velas
+               posteriores a las guardadas y se devuelven las últimas ``limit``
+               velas cerradas desde disco (sin la vela en curso)
         
     Returns:
         DataFrame con las velas o None si hay error
     """
     try:
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+        import pandas as pd
+        
+        if store is not None:
+            store.sync(exchange, symbol, timeframe, limit=max(limit, 1000))
+            ohlcv = store.read_last(symbol, timeframe, limit)
+        else:
+            ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
         df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
         return df
@@ -51,12 +70,71 @@ def get_ohlcv_data(exchange: ccxt.Exchange, symbol: str, timeframe: str, limit:
         return None
 
 
-def calculate_ema(data: pd.DataFrame, period: int, column: str = 'close') -> Optional[float]:
+def get_ohlcv_buffer(exchange: 'ccxt.Exchange', symbol: str, timeframe: str, limit: int = 100,
+                     store=None, buffer: Optional[CandleBuffer] = None) -> Optional[CandleBuffer]:
+    """
+    Obtiene datos OHLCV (velas) en un CandleBuffer, sin pandas
+    
+    Args:
+        exchange: Instancia del exchange de CCXT (o un MarketDataFeed)
+        symbol: Par de trading (ej: 'BTC/USDT')
+        timeframe: Timeframe de las velas (ej: '1m', '5m', '1h')
+        limit: Número de velas a obtener
+        store: CandleStore opcional (como en ``get_ohlcv_data``)
+        buffer: Buffer a reutilizar (se vacía antes); por defecto uno nuevo de ``limit`` velas
+        
+    Returns:
+        CandleBuffer con las velas o None si hay error
+    """
+    try:
+        if store is not None:
+            store.sync(exchange, symbol, timeframe, limit=max(limit, 1000))
+            ohlcv = store.read_last(symbol, timeframe, limit)
+        else:
+            ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+        if buffer is None:
+            buffer = CandleBuffer(max(limit, len(ohlcv), 1))
+        else:
+            buffer.clear()
+        buffer.extend(ohlcv)
+        return buffer
+    except Exception as e:
+        print(f"Error obteniendo datos OHLCV: {e}")
+        return None
+
+
+def get_ohlcv_candles(exchange: 'ccxt.Exchange', symbol: str, timeframe: str,
+                      since: Optional[int] = None, limit: int = 100) -> Optional[List[list]]:
+    """
+    Obtiene velas OHLCV crudas del exchange (sin construir un DataFrame)
+    
+    Args:
+        exchange: Instancia del exchange de CCXT
+        symbol: Par de trading (ej: 'BTC/USDT')
+        timeframe: Timeframe de las velas (ej: '1m', '5m', '1h')
+        since: Timestamp (ms) desde el que pedir velas (opcional)
+        limit: Número de velas a obtener
+        
+    Returns:
+        Lista de velas [timestamp, open, high, low, close, volume] o None si hay error
+    """
+    try:
+        return exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+    except Exception as e:
+        print(f"Error obteniendo datos OHLCV: {e}")
+        return None
+
+
+def calculate_ema(data: Union[CandleBuffer, 'pd.DataFrame'], period: int,
+                  column: str = 'close') -> Optional[float]:
     """
     Calcula la Media Móvil Exponencial (EMA) para el periodo especificado
     
+    Con un CandleBuffer se calcula sin pandas y con el mismo resultado que
+    ``ewm(span=period, adjust=False)``.
+    
     Args:
-        data: DataFrame con los datos de precio
+        data: CandleBuffer o DataFrame con los datos de precio
         period: Periodo de la EMA
         column: Columna a usar para el cálculo (por defecto 'close')
         
@@ -68,6 +146,8 @@ def calculate_ema(data: pd.DataFrame, period: int, column: str = 'close') -> Opt
             print(f"No hay suficientes datos para calcular EMA de {period} periodos")
             return None
         
+        if isinstance(data, CandleBuffer):
+            return IncrementalEMA(period).seed(data.column(column).tolist())
         ema = data[column].ewm(span=period, adjust=False).mean()
         return ema.iloc[-1]
     except Exception as e:
@@ -184,7 +264,12 @@ def should_sell(entry_price: float, current_price: float, take_profit_percent: f
     return False, ""
 
 
-def create_market_buy_order(exchange: ccxt.Exchange, symbol: str, amount_usdt: float, 
+def is_stop_loss(reason: str) -> bool:
+    """True si el motivo de cierre de should_sell es el stop loss"""
+    return reason.startswith("STOP LOSS")
+
+
+def create_market_buy_order(exchange: 'ccxt.Exchange', symbol: str, amount_usdt: float, 
                            enable_real_trading: bool, use_futures: bool = False) -> Optional[Dict[str, Any]]:
     """
     Crea una orden de compra de mercado (LONG en Futures)
@@ -203,7 +288,7 @@ def create_market_buy_order(exchange: ccxt.Exchange, symbol: str, amount_usdt: f
         if not enable_real_trading:
             print(f"[MODO SIMULACIÓN] Orden de compra LONG: {amount_usdt} USDT de {symbol}")
             return {
-                'id': 'sim_' + str(int(time.time())),
+                'id': batch_orders.simulated_order_id(),
                 'symbol': symbol,
                 'type': 'market',
                 'side': 'buy',
@@ -216,27 +301,14 @@ def create_market_buy_order(exchange: ccxt.Exchange, symbol: str, amount_usdt: f
         ticker = exchange.fetch_ticker(symbol)
         current_price = ticker['last']
         
-        # Usar $5.50 para estar bien por encima del mínimo de $5
-        # Esto evita problemas con redondeo y fluctuaciones de precio
-        amount_usdt_safe = max(amount_usdt, 5.5)
-        amount = amount_usdt_safe / current_price
-        
-        # Redondear hacia ARRIBA para asegurar que el notional sea suficiente
-        import math
-        amount = math.ceil(amount * 10) / 10  # Redondear hacia arriba a 1 decimal
-        
-        # Verificar que el notional sea suficiente
-        notional = amount * current_price
+        # Cantidad redondeada hacia ARRIBA al step del símbolo, con margen
+        # sobre el notional mínimo para que el precio de ejecución no la deje por debajo
+        amount = market_filters.get_filters(exchange, symbol).amount_for_notional(
+            amount_usdt, current_price, market=True)
         
         if use_futures:
-            print(f"   DEBUG: Creando LONG - Precio: ${current_price:.4f}, Cantidad: {amount} DOGE, Notional: ${notional:.2f} USDT")
-            
-            # Verificación adicional
-            if notional < 5.2:
-                print(f"   ⚠️ Notional ${notional:.2f} muy cerca del mínimo. Ajustando más...")
-                amount = math.ceil((6.0 / current_price) * 10) / 10
-                notional = amount * current_price
-                print(f"   ✅ Cantidad ajustada: {amount} DOGE, Notional: ${notional:.2f} USDT")
+            notional = amount * current_price
+            print(f"   DEBUG: Creando LONG - Precio: ${current_price:.4f}, Cantidad: {amount}, Notional: ${notional:.2f} USDT")
             
             # En Futures, usar create_market_buy_order directamente
             order = exchange.create_market_buy_order(symbol, amount)
@@ -249,7 +321,7 @@ def create_market_buy_order(exchange: ccxt.Exchange, symbol: str, amount_usdt: f
         return None
 
 
-def create_market_sell_order(exchange: ccxt.Exchange, symbol: str, amount: float, 
+def create_market_sell_order(exchange: 'ccxt.Exchange', symbol: str, amount: float, 
                              enable_real_trading: bool, use_futures: bool = False,
                              position_side: str = 'LONG') -> Optional[Dict[str, Any]]:
     """
@@ -270,7 +342,7 @@ def create_market_sell_order(exchange: ccxt.Exchange, symbol: str, amount: float
         if not enable_real_trading:
             print(f"[MODO SIMULACIÓN] Orden de venta (cerrar {position_side}): {amount} de {symbol}")
             return {
-                'id': 'sim_' + str(int(time.time())),
+                'id': batch_orders.simulated_order_id(),
                 'symbol': symbol,
                 'type': 'market',
                 'side': 'sell',
@@ -279,11 +351,11 @@ def create_market_sell_order(exchange: ccxt.Exchange, symbol: str, amount: float
                 'simulated': True
             }
         
-        # Redondear cantidad
-        amount = round(amount, 1)
+        # Redondear cantidad al step del símbolo
+        amount = market_filters.get_filters(exchange, symbol).round_amount(amount, market=True)
         
         if use_futures:
-            print(f"   DEBUG: Cerrando LONG - Cantidad: {amount} DOGE")
+            print(f"   DEBUG: Cerrando LONG - Cantidad: {amount}")
             # En Futures, cerrar LONG con sell
             order = exchange.create_market_sell_order(symbol, amount)
         else:
@@ -295,7 +367,7 @@ def create_market_sell_order(exchange: ccxt.Exchange, symbol: str, amount: float
         return None
 
 
-def create_short_order(exchange: ccxt.Exchange, symbol: str, amount_usdt: float, 
+def create_short_order(exchange: 'ccxt.Exchange', symbol: str, amount_usdt: float, 
                       enable_real_trading: bool) -> Optional[Dict[str, Any]]:
     """
     Crea una orden SHORT (venta en corto) en Futures
@@ -313,7 +385,7 @@ def create_short_order(exchange: ccxt.Exchange, symbol: str, amount_usdt: float,
         if not enable_real_trading:
             print(f"[MODO SIMULACIÓN] Orden SHORT: {amount_usdt} USDT de {symbol}")
             return {
-                'id': 'sim_' + str(int(time.time())),
+                'id': batch_orders.simulated_order_id(),
                 'symbol': symbol,
                 'type': 'market',
                 'side': 'sell',
@@ -327,25 +399,12 @@ def create_short_order(exchange: ccxt.Exchange, symbol: str, amount_usdt: float,
         ticker = exchange.fetch_ticker(symbol)
         current_price = ticker['last']
         
-        # Usar $5.50 para estar bien por encima del mínimo de $5
-        amount_usdt_safe = max(amount_usdt, 5.5)
-        amount = amount_usdt_safe / current_price
-        
-        # Redondear hacia ARRIBA para asegurar que el notional sea suficiente
-        import math
-        amount = math.ceil(amount * 10) / 10
-        
-        # Verificar que el notional sea suficiente
+        # Cantidad redondeada hacia ARRIBA al step del símbolo, con margen sobre el notional mínimo
+        amount = market_filters.get_filters(exchange, symbol).amount_for_notional(
+            amount_usdt, current_price, market=True)
         notional = amount * current_price
         
-        print(f"   DEBUG: Creando SHORT - Precio: ${current_price:.4f}, Cantidad: {amount} DOGE, Notional: ${notional:.2f} USDT")
-        
-        # Verificación adicional
-        if notional < 5.2:
-            print(f"   ⚠️ Notional ${notional:.2f} muy cerca del mínimo. Ajustando más...")
-            amount = math.ceil((6.0 / current_price) * 10) / 10
-            notional = amount * current_price
-            print(f"   ✅ Cantidad ajustada: {amount} DOGE, Notional: ${notional:.2f} USDT")
+        print(f"   DEBUG: Creando SHORT - Precio: ${current_price:.4f}, Cantidad: {amount}, Notional: ${notional:.2f} USDT")
         
         # Abrir posición SHORT con sell
         order = exchange.create_market_sell_order(
@@ -359,7 +418,7 @@ def create_short_order(exchange: ccxt.Exchange, symbol: str, amount_usdt: float,
         return None
 
 
-def close_short_order(exchange: ccxt.Exchange, symbol: str, amount: float, 
+def close_short_order(exchange: 'ccxt.Exchange', symbol: str, amount: float, 
                      enable_real_trading: bool) -> Optional[Dict[str, Any]]:
     """
     Cierra una posición SHORT en Futures
@@ -377,7 +436,7 @@ def close_short_order(exchange: ccxt.Exchange, symbol: str, amount: float,
         if not enable_real_trading:
             print(f"[MODO SIMULACIÓN] Cerrar SHORT: {amount} de {symbol}")
             return {
-                'id': 'sim_' + str(int(time.time())),
+                'id': batch_orders.simulated_order_id(),
                 'symbol': symbol,
                 'type': 'market',
                 'side': 'buy',
@@ -386,10 +445,10 @@ def close_short_order(exchange: ccxt.Exchange, symbol: str, amount: float,
                 'simulated': True
             }
         
-        # Redondear cantidad
-        amount = round(amount, 1)
+        # Redondear cantidad al step del símbolo
+        amount = market_filters.get_filters(exchange, symbol).round_amount(amount, market=True)
         
-        print(f"   DEBUG: Cerrando SHORT - Cantidad: {amount} DOGE")
+        print(f"   DEBUG: Cerrando SHORT - Cantidad: {amount}")
         
         # Cerrar posición SHORT con buy (comprar de vuelta)
         order = exchange.create_market_buy_order(
@@ -403,7 +462,7 @@ def close_short_order(exchange: ccxt.Exchange, symbol: str, amount: float,
         return None
 
 
-def create_stop_limit_order(exchange: ccxt.Exchange, symbol: str, side: str, 
+def create_stop_limit_order(exchange: 'ccxt.Exchange', symbol: str, side: str, 
                            amount: float, trigger_price: float, limit_price: float,
                            reduce_only: bool = True) -> Optional[Dict[str, Any]]:
     """
@@ -422,10 +481,11 @@ def create_stop_limit_order(exchange: ccxt.Exchange, symbol: str, side: str,
         Información de la orden o None si hay error
     """
     try:
-        # Redondear precios a 4 decimales y cantidad a 1 decimal
-        trigger_price = round(trigger_price, 4)
-        limit_price = round(limit_price, 4)
-        amount = round(amount, 1)
+        # Redondear precios al tick y cantidad al step del símbolo
+        filters = market_filters.get_filters(exchange, symbol)
+        trigger_price = filters.round_price(trigger_price)
+        limit_price = filters.limit_price(side, limit_price)
+        amount = filters.round_amount(amount)
         
         # Crear orden stop-limit usando la API de Futures
         params = {
@@ -448,7 +508,7 @@ def create_stop_limit_order(exchange: ccxt.Exchange, symbol: str, side: str,
         return None
 
 
-def cancel_all_stop_orders(exchange: ccxt.Exchange, symbol: str) -> bool:
+def cancel_all_stop_orders(exchange: 'ccxt.Exchange', symbol: str) -> bool:
     """
     Cancela todas las órdenes stop pendientes para un símbolo
     
@@ -466,24 +526,24 @@ def cancel_all_stop_orders(exchange: ccxt.Exchange, symbol: str) -> bool:
         # Filtrar solo órdenes de tipo STOP o STOP_MARKET
         stop_orders = [
             order for order in open_orders 
-            if order.get('type') in ['STOP', 'STOP_MARKET', 'STOP_LIMIT']
+            if str(order.get('type')).upper() in ['STOP', 'STOP_MARKET', 'STOP_LIMIT']
         ]
+        if not stop_orders:
+            return True
         
-        # Cancelar cada orden stop
-        for order in stop_orders:
-            try:
-                exchange.cancel_order(order['id'], symbol)
-                print(f"   ✅ Stop-limit cancelado: ID {order['id']}")
-            except Exception as e:
-                print(f"   ⚠️ Error cancelando orden {order['id']}: {e}")
+        # Cancelar todas las órdenes stop en lotes (una petición por cada 10)
+        results = batch_orders.cancel_batch_orders(exchange, symbol, [order['id'] for order in stop_orders])
+        for order_id, canceled in results.items():
+            if canceled:
+                print(f"   ✅ Stop-limit cancelado: ID {order_id}")
         
-        return True
+        return all(results.values())
     except Exception as e:
         print(f"Error cancelando órdenes stop: {e}")
         return False
 
 
-def get_balance(exchange: ccxt.Exchange, currency: str) -> Optional[float]:
+def get_balance(exchange: 'ccxt.Exchange', currency: str) -> Optional[float]:
     """
     Obtiene el balance disponible de una moneda
     
@@ -502,7 +562,7 @@ def get_balance(exchange: ccxt.Exchange, currency: str) -> Optional[float]:
         return None
 
 
-def get_futures_available_balance(exchange: ccxt.Exchange, currency: str) -> Optional[float]:
+def get_futures_available_balance(exchange: 'ccxt.Exchange', currency: str) -> Optional[float]:
     """
     Obtiene el balance disponible en Futures para una moneda
     
@@ -521,7 +581,7 @@ def get_futures_available_balance(exchange: ccxt.Exchange, currency: str) -> Opt
         return None
 
 
-def get_open_positions(exchange: ccxt.Exchange, symbol: str) -> Optional[Dict[str, Any]]:
+def get_open_positions(exchange: 'ccxt.Exchange', symbol: str) -> Optional[Dict[str, Any]]:
     """
     Obtiene las posiciones abiertas en Futures para un símbolo específico
     
@@ -534,28 +594,60 @@ def get_open_positions(exchange: ccxt.Exchange, symbol: str) -> Optional[Dict[st
     """
     try:
         positions = exchange.fetch_positions([symbol])
-        
-        for pos in positions:
-            # Verificar si hay una posición abierta (cantidad != 0)
-            contracts = float(pos.get('contracts', 0))
-            if contracts != 0:
-                return {
-                    'symbol': pos['symbol'],
-                    'side': 'LONG' if contracts > 0 else 'SHORT',
-                    'contracts': abs(contracts),
-                    'entryPrice': float(pos.get('entryPrice', 0)),
-                    'markPrice': float(pos.get('markPrice', 0)),
-                    'unrealizedPnl': float(pos.get('unrealizedPnl', 0)),
-                    'leverage': float(pos.get('leverage', 1))
-                }
-        
-        return None
+        return find_open_position(positions)
     except Exception as e:
         print(f"Error obteniendo posiciones: {e}")
         return None
 
 
-def create_limit_buy_order(exchange: ccxt.Exchange, symbol: str, amount_usdt: float,
+def find_open_position(positions: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Busca la primera posición abierta en una respuesta de fetch_positions
+    
+    Args:
+        positions: Lista de posiciones en formato CCXT
+        
+    Returns:
+        Dict con información de la posición o None si no hay posición abierta
+    """
+    for pos in positions:
+        # Verificar si hay una posición abierta (cantidad != 0)
+        contracts = float(pos.get('contracts', 0))
+        if contracts != 0:
+            # CCXT da los contratos en positivo y el lado en 'side'; sin 'side', el signo manda
+            side = str(pos.get('side') or '').upper() or ('LONG' if contracts > 0 else 'SHORT')
+            return {
+                'symbol': pos['symbol'],
+                'side': side,
+                'contracts': abs(contracts),
+                'entryPrice': float(pos.get('entryPrice', 0)),
+                'markPrice': float(pos.get('markPrice', 0)),
+                'unrealizedPnl': float(pos.get('unrealizedPnl', 0)),
+                'leverage': float(pos.get('leverage', 1))
+            }
+    
+    return None
+
+
+def calculate_limit_order_amount(amount_usdt: float, limit_price: float,
+                                 filters: Optional[market_filters.SymbolFilters] = None) -> float:
+    """
+    Calcula la cantidad de una orden LIMIT a partir del importe en USDT
+    
+    Args:
+        amount_usdt: Cantidad en USDT para la posición
+        limit_price: Precio límite de la orden
+        filters: Filtros del símbolo (None para los valores por defecto de DOGE)
+        
+    Returns:
+        Cantidad de activo redondeada hacia arriba al step, con el notional mínimo
+    """
+    if filters is None:
+        filters = market_filters.SymbolFilters('')
+    return filters.amount_for_notional(amount_usdt, limit_price)
+
+
+def create_limit_buy_order(exchange: 'ccxt.Exchange', symbol: str, amount_usdt: float,
                           limit_price: float, enable_real_trading: bool) -> Optional[Dict[str, Any]]:
     """
     Crea una orden de compra LIMIT (LONG en Futures)
@@ -574,7 +666,7 @@ def create_limit_buy_order(exchange: ccxt.Exchange, symbol: str, amount_usdt: fl
         if not enable_real_trading:
             print(f"[MODO SIMULACIÓN] Orden LIMIT de compra LONG: {amount_usdt} USDT de {symbol} a ${limit_price:.4f}")
             return {
-                'id': 'sim_' + str(int(time.time())),
+                'id': batch_orders.simulated_order_id(),
                 'symbol': symbol,
                 'type': 'limit',
                 'side': 'buy',
@@ -584,12 +676,10 @@ def create_limit_buy_order(exchange: ccxt.Exchange, symbol: str, amount_usdt: fl
                 'simulated': True
             }
         
-        # Calcular cantidad basada en el precio límite
-        amount = amount_usdt / limit_price
-        
-        # Redondear hacia arriba
-        import math
-        amount = math.ceil(amount * 10) / 10
+        # Precio al tick y cantidad basada en el precio límite (redondeada hacia arriba al step)
+        filters = market_filters.get_filters(exchange, symbol)
+        limit_price = filters.floor_price(limit_price)
+        amount = calculate_limit_order_amount(amount_usdt, limit_price, filters)
         
         print(f"   DEBUG: Creando LIMIT LONG - Precio: ${limit_price:.4f}, Cantidad: {amount}, Notional: ${amount * limit_price:.2f} USDT")
         
@@ -602,7 +692,7 @@ def create_limit_buy_order(exchange: ccxt.Exchange, symbol: str, amount_usdt: fl
         return None
 
 
-def create_limit_sell_order(exchange: ccxt.Exchange, symbol: str, amount: float,
+def create_limit_sell_order(exchange: 'ccxt.Exchange', symbol: str, amount: float,
                            limit_price: float, enable_real_trading: bool,
                            position_side: str = 'LONG') -> Optional[Dict[str, Any]]:
     """
@@ -623,7 +713,7 @@ def create_limit_sell_order(exchange: ccxt.Exchange, symbol: str, amount: float,
         if not enable_real_trading:
             print(f"[MODO SIMULACIÓN] Orden LIMIT de venta (cerrar {position_side}): {amount} de {symbol} a ${limit_price:.4f}")
             return {
-                'id': 'sim_' + str(int(time.time())),
+                'id': batch_orders.simulated_order_id(),
                 'symbol': symbol,
                 'type': 'limit',
                 'side': 'sell',
@@ -633,8 +723,10 @@ def create_limit_sell_order(exchange: ccxt.Exchange, symbol: str, amount: float,
                 'simulated': True
             }
         
-        # Redondear cantidad
-        amount = round(amount, 1)
+        # Redondear cantidad al step y precio al tick del símbolo
+        filters = market_filters.get_filters(exchange, symbol)
+        amount = filters.round_amount(amount)
+        limit_price = filters.ceil_price(limit_price)
         
         print(f"   DEBUG: Creando LIMIT SELL - Cantidad: {amount}, Precio: ${limit_price:.4f}")
         
@@ -647,7 +739,7 @@ def create_limit_sell_order(exchange: ccxt.Exchange, symbol: str, amount: float,
         return None
 
 
-def create_limit_short_order(exchange: ccxt.Exchange, symbol: str, amount_usdt: float,
+def create_limit_short_order(exchange: 'ccxt.Exchange', symbol: str, amount_usdt: float,
                             limit_price: float, enable_real_trading: bool) -> Optional[Dict[str, Any]]:
     """
     Crea una orden LIMIT SHORT (venta en corto) en Futures
@@ -666,7 +758,7 @@ def create_limit_short_order(exchange: ccxt.Exchange, symbol: str, amount_usdt:
         if not enable_real_trading:
             print(f"[MODO SIMULACIÓN] Orden LIMIT SHORT: {amount_usdt} USDT de {symbol} a ${limit_price:.4f}")
             return {
-                'id': 'sim_' + str(int(time.time())),
+                'id': batch_orders.simulated_order_id(),
                 'symbol': symbol,
                 'type': 'limit',
                 'side': 'sell',
@@ -677,9 +769,10 @@ def create_limit_short_order(exchange: ccxt.Exchange, symbol: str, amount_usdt:
                 'positionSide': 'SHORT'
             }
         
-        # Calcular cantidad basada en el precio límite
-        import math
-        amount = math.ceil((amount_usdt / limit_price) * 10) / 10
+        # Precio al tick y cantidad basada en el precio límite (redondeada hacia arriba al step)
+        filters = market_filters.get_filters(exchange, symbol)
+        limit_price = filters.ceil_price(limit_price)
+        amount = calculate_limit_order_amount(amount_usdt, limit_price, filters)
         
         print(f"   DEBUG: Creando LIMIT SHORT - Precio: ${limit_price:.4f}, Cantidad: {amount}, Notional: ${amount * limit_price:.2f} USDT")
         
@@ -692,7 +785,7 @@ def create_limit_short_order(exchange: ccxt.Exchange, symbol: str, amount_usdt:
         return None
 
 
-def close_limit_short_order(exchange: ccxt.Exchange, symbol: str, amount: float,
+def close_limit_short_order(exchange: 'ccxt.Exchange', symbol: str, amount: float,
                            limit_price: float, enable_real_trading: bool) -> Optional[Dict[str, Any]]:
     """
     Cierra una posición SHORT con orden LIMIT en Futures
@@ -711,7 +804,7 @@ def close_limit_short_order(exchange: ccxt.Exchange, symbol: str, amount: float,
         if not enable_real_trading:
             print(f"[MODO SIMULACIÓN] Cerrar LIMIT SHORT: {amount} de {symbol} a ${limit_price:.4f}")
             return {
-                'id': 'sim_' + str(int(time.time())),
+                'id': batch_orders.simulated_order_id(),
                 'symbol': symbol,
                 'type': 'limit',
                 'side': 'buy',
@@ -721,8 +814,10 @@ def close_limit_short_order(exchange: ccxt.Exchange, symbol: str, amount: float,
                 'simulated': True
             }
         
-        # Redondear cantidad
-        amount = round(amount, 1)
+        # Redondear cantidad al step y precio al tick del símbolo
+        filters = market_filters.get_filters(exchange, symbol)
+        amount = filters.round_amount(amount)
+        limit_price = filters.floor_price(limit_price)
         
         print(f"   DEBUG: Cerrando LIMIT SHORT - Cantidad: {amount}, Precio: ${limit_price:.4f}")
         
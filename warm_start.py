@@ -0,0 +1,290 @@
+"""
+Arranque en caliente: mercados, diferencia de hora y configuración de cuenta en disco
+
+En un arranque en frío el bot descarga todos los mercados de Binance (spot,
+USDT-M y COIN-M, más las monedas), sincroniza la hora y repite las llamadas de
+apalancamiento y modo de margen aunque ya estén configurados (Binance responde
+con error "No need to change margin type").
+
+Con la caché:
+- Los mercados de los símbolos configurados se guardan en un archivo JSON con
+  TTL y se cargan con ``set_markets`` sin ninguna petición. Si caducan solo se
+  descarga el tipo de mercado que se usa (linear en Futures).
+- La diferencia de hora con el servidor se reutiliza mientras no caduque.
+- El apalancamiento y el modo de margen aplicados se recuerdan por cuenta y
+  símbolo; si coinciden con la configuración no se vuelven a enviar. La
+  reconciliación con positionRisk detecta los cambios hechos fuera del bot.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, Iterable, List
+
+import ccxt
+
+import config
+from market_filters import find_market
+
+
+class ExchangeCache:
+    """
+    Archivo JSON con mercados, diferencia de hora y configuración de Futures por cuenta
+    """
+
+    def __init__(self, path: str = config.WARM_START_CACHE_FILE, ttl: float = config.MARKETS_CACHE_TTL):
+        """
+        Args:
+            path: Archivo de la caché
+            ttl: Segundos que son válidos los mercados y la diferencia de hora
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = self._read()
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(self):
+        """Escribe la caché (archivo temporal + rename para no dejarla a medias)"""
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Un temporal por proceso: varias instancias headless pueden compartir la caché
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._data, f)
+            os.replace(tmp_path, self.path)
+
+    def _fresh(self, entry: Optional[Dict[str, Any]]) -> bool:
+        return entry is not None and time.time() - entry.get('saved_at', 0) < self.ttl
+
+    # ------------------------------------------------------------------
+    # Mercados y hora
+    # ------------------------------------------------------------------
+
+    def get_markets(self, key: str, symbols: Iterable[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Mercados guardados si no han caducado y contienen todos los símbolos
+
+        Args:
+            key: Tipo de mercado y red (ej: 'future', 'future-sandbox')
+            symbols: Símbolos que necesita el bot
+
+        Returns:
+            Lista de mercados de CCXT o None
+        """
+        entry = self._data.get('markets', {}).get(key)
+        if not self._fresh(entry):
+            return None
+        markets = {m['symbol']: m for m in entry['markets']}
+        if any(find_market(markets, symbol) is None for symbol in symbols):
+            return None
+        return entry['markets']
+
+    def put_markets(self, key: str, markets: List[Dict[str, Any]]):
+        with self._lock:
+            self._data.setdefault('markets', {})[key] = {'saved_at': time.time(), 'markets': markets}
+
+    def get_time_difference(self, key: str) -> Optional[int]:
+        entry = self._data.get('time_difference', {}).get(key)
+        return entry['value'] if self._fresh(entry) else None
+
+    def put_time_difference(self, key: str, value: int):
+        with self._lock:
+            self._data.setdefault('time_difference', {})[key] = {'saved_at': time.time(), 'value': value}
+
+    # ------------------------------------------------------------------
+    # Configuración de Futures por cuenta y símbolo
+    # ------------------------------------------------------------------
+
+    def get_account_config(self, account: str, symbol: str) -> Optional[Dict[str, Any]]:
+        return self._data.get('accounts', {}).get(account, {}).get(symbol)
+
+    def put_account_config(self, account: str, symbol: str, leverage: int, margin_type: str):
+        with self._lock:
+            accounts = self._data.setdefault('accounts', {})
+            accounts.setdefault(account, {})[symbol] = {'leverage': leverage, 'margin_type': margin_type}
+
+    def forget_account_config(self, account: str, symbol: str):
+        with self._lock:
+            self._data.get('accounts', {}).get(account, {}).pop(symbol, None)
+
+
+_default_cache: Optional[ExchangeCache] = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> ExchangeCache:
+    """
+    Caché compartida por todos los bots del proceso
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ExchangeCache()
+        return _default_cache
+
+
+def account_key(api_key: str, sandbox: bool = False) -> str:
+    """
+    Identificador de la cuenta para la caché (hash de la API key, nunca la key)
+    """
+    digest = hashlib.sha256((api_key or '').encode()).hexdigest()[:16]
+    return f"{digest}-sandbox" if sandbox else digest
+
+
+def markets_key(market_type: str, sandbox: bool = False) -> str:
+    return f"{market_type}-sandbox" if sandbox else market_type
+
+
+def supports(exchange) -> bool:
+    """True si el exchange es de CCXT (la caché usa set_markets y options)"""
+    return isinstance(exchange, ccxt.Exchange)
+
+
+def _restrict_market_types(exchange, market_type: str):
+    """Descargar solo el tipo de mercado que se usa (linear en Futures)"""
+    exchange.options['fetchMarkets'] = dict(exchange.options.get('fetchMarkets') or {},
+                                            types=['linear'] if market_type == 'future' else ['spot'])
+
+
+def _apply_cached_markets(exchange, symbols: List[str], key: str, cache: ExchangeCache) -> bool:
+    markets = cache.get_markets(key, symbols)
+    if markets is None:
+        return False
+    exchange.set_markets(markets)
+    return True
+
+
+def _store_markets(exchange, symbols: List[str], key: str, cache: ExchangeCache):
+    selected = [find_market(exchange.markets, symbol) for symbol in symbols]
+    cache.put_markets(key, [m for m in selected if m is not None])
+    cache.save()
+
+
+def load_markets(exchange, symbols: Iterable[str], market_type: str, sandbox: bool = False,
+                 cache: Optional[ExchangeCache] = None) -> bool:
+    """
+    Carga en el exchange los mercados de los símbolos (de la caché o de la API)
+
+    Sin caché válida se descarga solo el tipo de mercado que se usa, sin
+    monedas, y se guardan los mercados de los símbolos configurados.
+
+    Args:
+        exchange: Instancia de ccxt.binance
+        symbols: Símbolos del bot
+        market_type: 'future' o 'spot'
+        sandbox: Si el exchange está en testnet
+        cache: Caché (por defecto la compartida)
+
+    Returns:
+        True si se cargaron desde la caché
+    """
+    cache = cache or get_cache()
+    symbols = list(symbols)
+    key = markets_key(market_type, sandbox)
+    if _apply_cached_markets(exchange, symbols, key, cache):
+        return True
+    _restrict_market_types(exchange, market_type)
+    exchange.set_markets(exchange.fetch_markets())
+    _store_markets(exchange, symbols, key, cache)
+    return False
+
+
+async def load_markets_async(exchange, symbols: Iterable[str], market_type: str, sandbox: bool = False,
+                             cache: Optional[ExchangeCache] = None) -> bool:
+    """
+    Igual que load_markets para ccxt.async_support
+    """
+    cache = cache or get_cache()
+    symbols = list(symbols)
+    key = markets_key(market_type, sandbox)
+    if _apply_cached_markets(exchange, symbols, key, cache):
+        return True
+    _restrict_market_types(exchange, market_type)
+    exchange.set_markets(await exchange.fetch_markets())
+    _store_markets(exchange, symbols, key, cache)
+    return False
+
+
+def load_time_difference(exchange, market_type: str, sandbox: bool = False,
+                         cache: Optional[ExchangeCache] = None) -> bool:
+    """
+    Aplica la diferencia de hora guardada o la sincroniza con el servidor
+
+    Returns:
+        True si se usó la caché
+    """
+    cache = cache or get_cache()
+    key = markets_key(market_type, sandbox)
+    cached = cache.get_time_difference(key)
+    if cached is not None:
+        exchange.options['timeDifference'] = cached
+        return True
+    exchange.load_time_difference()
+    cache.put_time_difference(key, exchange.options.get('timeDifference', 0))
+    cache.save()
+    return False
+
+
+async def load_time_difference_async(exchange, market_type: str, sandbox: bool = False,
+                                     cache: Optional[ExchangeCache] = None) -> bool:
+    """
+    Igual que load_time_difference para ccxt.async_support
+    """
+    cache = cache or get_cache()
+    key = markets_key(market_type, sandbox)
+    cached = cache.get_time_difference(key)
+    if cached is not None:
+        exchange.options['timeDifference'] = cached
+        return True
+    await exchange.load_time_difference()
+    cache.put_time_difference(key, exchange.options.get('timeDifference', 0))
+    cache.save()
+    return False
+
+
+def futures_config_matches(account: str, symbol_id: str, leverage: int, margin_type: str,
+                           cache: Optional[ExchangeCache] = None) -> bool:
+    """
+    True si el apalancamiento y el modo de margen ya se aplicaron a la cuenta
+
+    Args:
+        account: Cuenta (account_key)
+        symbol_id: Símbolo de Binance (ej: 'DOGEUSDT')
+        leverage: Apalancamiento configurado
+        margin_type: 'ISOLATED' o 'CROSSED'
+    """
+    cache = cache or get_cache()
+    return cache.get_account_config(account, symbol_id) == {'leverage': leverage, 'margin_type': margin_type}
+
+
+def remember_futures_config(account: str, symbol_id: str, leverage: int, margin_type: str,
+                            cache: Optional[ExchangeCache] = None):
+    """Guarda la configuración de Futures aplicada con éxito"""
+    cache = cache or get_cache()
+    cache.put_account_config(account, symbol_id, leverage, margin_type)
+    cache.save()
+
+
+def forget_futures_config(account: str, symbol_id: str, cache: Optional[ExchangeCache] = None):
+    """Olvida la configuración guardada (cambió fuera del bot)"""
+    cache = cache or get_cache()
+    cache.forget_account_config(account, symbol_id)
+    cache.save()
+
+
+def margin_already_set(error: Exception) -> bool:
+    """True si Binance rechazó el cambio de margen porque ya estaba aplicado (-4046)"""
+    text = str(error)
+    return '-4046' in text or 'No need to change margin type' in text